@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Vectorized OHLC Backtest Engine for TraderEdgePro
+Replays persisted signals against historical OHLC bars and determines which of
+take-profit or stop-loss is hit first, for all signals at once.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Outcome codes used in BacktestResult.outcome_code
+WON, LOST, EXPIRED, OPEN, NO_DATA = 0, 1, 2, 3, 4
+OUTCOME_NAMES = np.array(['won', 'lost', 'expired', 'open', 'no_data'])
+
+# Column names of the persisted signal tables
+SIGNAL_TABLE_COLUMNS = {
+    'signals': {
+        'signal_id': 'id', 'pair': 'symbol', 'direction': 'side', 'entry_price': 'entry_price',
+        'stop_loss': 'stop_loss', 'take_profit': 'take_profit', 'confidence': 'confidence',
+        'timestamp': 'created_at'
+    },
+    'signal_feed': {
+        'signal_id': 'signal_id', 'pair': 'pair', 'direction': 'direction', 'entry_price': 'entry_price',
+        'stop_loss': 'stop_loss', 'take_profit': 'take_profit', 'confidence': 'confidence',
+        'timestamp': 'created_at'
+    }
+}
+
+LONG_DIRECTIONS = {'long', 'buy'}
+SHORT_DIRECTIONS = {'short', 'sell'}
+
+
+def normalize_pair(pair: str) -> str:
+    """EUR/USD, eur_usd and EURUSD all map to EURUSD"""
+    return ''.join(ch for ch in pair.upper() if ch.isalnum())
+
+
+def _parse_direction(direction: str) -> int:
+    value = direction.strip().lower()
+    if value in LONG_DIRECTIONS:
+        return 1
+    if value in SHORT_DIRECTIONS:
+        return -1
+    raise ValueError(f"Unknown signal direction: {direction}")
+
+
+def _parse_timestamp(value) -> int:
+    """Epoch seconds from a number or an ISO-8601 string (naive times are UTC)"""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    text = str(value).strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
+
+def _parse_price(value) -> float:
+    """Price from a number or string; a JSON list of targets ("[1.12, 1.13]") gives the first"""
+    if isinstance(value, str) and value.lstrip().startswith('['):
+        value = json.loads(value)
+    if isinstance(value, (list, tuple)):
+        if not value:
+            raise ValueError("Empty list of price targets")
+        value = value[0]
+    return float(value)
+
+
+@dataclass
+class SignalBatch:
+    """Column arrays for a set of signals (one row per signal)"""
+    signal_id: np.ndarray
+    pair: np.ndarray
+    direction: np.ndarray  # +1 long, -1 short
+    entry_price: np.ndarray
+    stop_loss: np.ndarray
+    take_profit: np.ndarray
+    timestamp: np.ndarray  # epoch seconds
+    confidence: np.ndarray = None
+    secondary_count: np.ndarray = None
+    skipped: int = 0  # rows from_rows() could not parse
+
+    def __post_init__(self):
+        n = len(self.signal_id)
+        if self.confidence is None:
+            self.confidence = np.full(n, np.nan)
+        if self.secondary_count is None:
+            self.secondary_count = np.zeros(n, dtype=int)
+
+    def __len__(self) -> int:
+        return len(self.signal_id)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'SignalBatch':
+        """Build a batch from dicts keyed like SIGNAL_TABLE_COLUMNS
+
+        Multi-target take profits stored as JSON lists use the first target. Rows
+        that still cannot be parsed are left out and counted in `skipped`.
+        """
+        def value(row, key, default, parse):
+            raw = row.get(key)
+            return default if raw in (None, '') else parse(raw)
+
+        parsed = []
+        for row in rows:
+            try:
+                parsed.append((
+                    str(row['signal_id']),
+                    normalize_pair(row['pair']),
+                    _parse_direction(row['direction']),
+                    value(row, 'entry_price', None, _parse_price),
+                    value(row, 'stop_loss', None, _parse_price),
+                    value(row, 'take_profit', None, _parse_price),
+                    _parse_timestamp(row['timestamp']),
+                    value(row, 'confidence', np.nan, float),
+                    value(row, 'secondary_count', 0, lambda raw: int(float(raw)))
+                ))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+
+        columns = list(zip(*parsed)) if parsed else [()] * 9
+        return cls(
+            signal_id=np.array(columns[0], dtype=object),
+            pair=np.array(columns[1], dtype=object),
+            direction=np.array(columns[2], dtype=np.int8),
+            entry_price=np.array(columns[3], dtype=float),
+            stop_loss=np.array(columns[4], dtype=float),
+            take_profit=np.array(columns[5], dtype=float),
+            timestamp=np.array(columns[6], dtype=np.int64),
+            confidence=np.array(columns[7], dtype=float),
+            secondary_count=np.array(columns[8], dtype=int),
+            skipped=len(rows) - len(parsed)
+        )
+
+
+def load_signals_from_db(db_path: str, table: str = 'signals') -> SignalBatch:
+    """Load persisted signals from the `signals` or `signal_feed` table"""
+    if table not in SIGNAL_TABLE_COLUMNS:
+        raise ValueError(f"Unsupported signal table: {table}")
+    columns = SIGNAL_TABLE_COLUMNS[table]
+    select = ', '.join(f"{source} AS {key}" for key, source in columns.items())
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = [dict(row) for row in conn.execute(f"SELECT {select} FROM {table} ORDER BY created_at")]
+    finally:
+        conn.close()
+    return SignalBatch.from_rows(rows)
+
+
+def load_signals_from_csv(path: str) -> SignalBatch:
+    """Load signals from a CSV with signal_id, pair, direction, entry_price, stop_loss,
+    take_profit and timestamp columns (confidence and secondary_count are optional)"""
+    with open(path, newline='') as f:
+        return SignalBatch.from_rows(list(csv.DictReader(f)))
+
+
+@dataclass
+class OHLCSeries:
+    """Bars for one instrument, sorted by open time (epoch seconds)"""
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+def load_ohlc_file(path: str) -> OHLCSeries:
+    """Load bars from a .npz (time/open/high/low/close arrays) or CSV with those columns"""
+    if path.endswith('.npz'):
+        data = np.load(path)
+        return OHLCSeries(data['time'].astype(np.int64), *(data[k].astype(float) for k in
+                                                            ('open', 'high', 'low', 'close')))
+
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    time_key = 'time' if rows and 'time' in rows[0] else 'timestamp'
+    return OHLCSeries(
+        np.array([_parse_timestamp(row[time_key]) for row in rows], dtype=np.int64),
+        *(np.array([float(row[key]) for row in rows]) for key in ('open', 'high', 'low', 'close'))
+    )
+
+
+def load_ohlc_dir(directory: str, pairs=None) -> Dict[str, OHLCSeries]:
+    """Load <PAIR>.npz or <PAIR>.csv files from a directory, keyed by normalized pair"""
+    wanted = {normalize_pair(p) for p in pairs} if pairs is not None else None
+    series = {}
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        pair = normalize_pair(stem)
+        if ext not in ('.npz', '.csv') or (wanted is not None and pair not in wanted) or pair in series:
+            continue
+        series[pair] = load_ohlc_file(os.path.join(directory, name))
+    return series
+
+
+@dataclass
+class BacktestResult:
+    """Per-signal outcome arrays, aligned with the input SignalBatch"""
+    signals: SignalBatch
+    outcome_code: np.ndarray
+    exit_price: np.ndarray
+    exit_time: np.ndarray
+    bars_to_exit: np.ndarray
+    pnl: np.ndarray
+    r_multiple: np.ndarray
+    mae: np.ndarray
+    mfe: np.ndarray
+    meta: Dict = field(default_factory=dict)
+
+    @property
+    def outcome(self) -> np.ndarray:
+        return OUTCOME_NAMES[self.outcome_code]
+
+    @property
+    def time_to_exit(self) -> np.ndarray:
+        """Seconds from signal time to exit bar (-1 for signals with no data)"""
+        return np.where(self.outcome_code == NO_DATA, -1, self.exit_time - self.signals.timestamp)
+
+    def equity_curve(self, pair: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Exit times and cumulative R of closed trades, in exit order"""
+        closed = np.isin(self.outcome_code, (WON, LOST, EXPIRED))
+        if pair is not None:
+            closed &= self.signals.pair == normalize_pair(pair)
+        order = np.argsort(self.exit_time[closed], kind='stable')
+        return self.exit_time[closed][order], np.cumsum(self.r_multiple[closed][order])
+
+    def summary(self) -> Dict:
+        closed = np.isin(self.outcome_code, (WON, LOST, EXPIRED))
+        counts = np.bincount(self.outcome_code, minlength=len(OUTCOME_NAMES))
+        _, equity = self.equity_curve()
+        drawdown = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity if len(equity) else []
+        return {
+            'total_signals': len(self.signals),
+            **{str(name): int(count) for name, count in zip(OUTCOME_NAMES, counts)},
+            'win_rate': float(counts[WON] / closed.sum()) if closed.any() else 0.0,
+            'total_r': float(self.r_multiple[closed].sum()),
+            'avg_r': float(self.r_multiple[closed].mean()) if closed.any() else 0.0,
+            'max_drawdown_r': float(np.max(drawdown)) if len(drawdown) else 0.0,
+            'avg_bars_to_exit': float(self.bars_to_exit[closed].mean()) if closed.any() else 0.0
+        }
+
+    def to_csv(self, path: str):
+        """Write one row per signal"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Signal ID', 'Pair', 'Direction', 'Entry Price', 'Stop Loss', 'Take Profit',
+                             'Outcome', 'Exit Price', 'Exit Time', 'Bars To Exit', 'P&L', 'R Multiple',
+                             'MAE', 'MFE'])
+            s = self.signals
+            for i in range(len(s)):
+                writer.writerow([
+                    s.signal_id[i], s.pair[i], 'LONG' if s.direction[i] > 0 else 'SHORT',
+                    f"{s.entry_price[i]:.5f}", f"{s.stop_loss[i]:.5f}", f"{s.take_profit[i]:.5f}",
+                    OUTCOME_NAMES[self.outcome_code[i]], f"{self.exit_price[i]:.5f}",
+                    datetime.fromtimestamp(int(self.exit_time[i]), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                    if self.outcome_code[i] != NO_DATA else '',
+                    int(self.bars_to_exit[i]), f"{self.pnl[i]:.5f}", f"{self.r_multiple[i]:.3f}",
+                    f"{self.mae[i]:.5f}", f"{self.mfe[i]:.5f}"
+                ])
+
+
+def _simulate_series(bars: OHLCSeries, direction: np.ndarray, entry: np.ndarray, stop: np.ndarray,
+                     target: np.ndarray, start: np.ndarray, max_bars: int, same_bar_stop_first: bool):
+    """
+    First-crossing search for one instrument
+
+    Signals are scanned in column blocks starting at their entry bar; each block
+    checks every still-open signal against its next bars at once, and signals that
+    resolve drop out. Blocks double in width since most signals exit early.
+    """
+    n = len(direction)
+    n_bars = len(bars)
+    outcome = np.full(n, NO_DATA, dtype=np.int8)
+    exit_bar = np.full(n, -1, dtype=np.int64)
+    mfe = np.zeros(n)
+    mae = np.zeros(n)
+
+    active = np.flatnonzero(start < n_bars)
+    offset, width = 0, 16
+    while active.size and offset < max_bars:
+        width = min(width, max_bars - offset)
+        columns = start[active, None] + offset + np.arange(width)
+        in_range = columns < n_bars
+        columns = np.minimum(columns, n_bars - 1)
+
+        high, low = bars.high[columns], bars.low[columns]
+        d = direction[active, None]
+        e = entry[active, None]
+        long = d > 0
+        favorable = np.where(long, high - e, e - low)
+        adverse = np.where(long, e - low, high - e)
+        target_hit = np.where(long, high >= target[active, None], low <= target[active, None]) & in_range
+        stop_hit = np.where(long, low <= stop[active, None], high >= stop[active, None]) & in_range
+
+        any_hit = target_hit | stop_hit
+        resolved = any_hit.any(axis=1)
+        first = np.where(resolved, any_hit.argmax(axis=1), in_range.sum(axis=1) - 1)
+
+        upto = (np.arange(width) <= first[:, None]) & in_range
+        mfe[active] = np.maximum(mfe[active], np.where(upto, favorable, -np.inf).max(axis=1))
+        mae[active] = np.maximum(mae[active], np.where(upto, adverse, -np.inf).max(axis=1))
+
+        rows = np.arange(active.size)
+        stop_first = stop_hit[rows, first] & (same_bar_stop_first | ~target_hit[rows, first])
+        done = active[resolved]
+        outcome[done] = np.where(stop_first[resolved], LOST, WON)
+        exit_bar[done] = start[done] + offset + first[resolved]
+
+        # Signals whose bars ran out before either level was touched stay open
+        exhausted = ~resolved & ~in_range[:, -1]
+        ran_out = active[exhausted]
+        outcome[ran_out] = OPEN
+        exit_bar[ran_out] = n_bars - 1
+
+        active = active[~resolved & ~exhausted]
+        offset += width
+        width *= 2
+
+    outcome[active] = EXPIRED
+    exit_bar[active] = start[active] + max_bars - 1
+    return outcome, exit_bar, mfe, mae
+
+
+def run_backtest(signals: SignalBatch, ohlc: Dict[str, OHLCSeries], max_bars: int = 500,
+                 same_bar_stop_first: bool = True) -> BacktestResult:
+    """
+    Replay signals bar by bar against OHLC history
+
+    Args:
+        signals: Signals to replay; each enters at the first bar opening at or after its timestamp
+        ohlc: Bars per normalized pair
+        max_bars: Bars after entry before an untouched signal is closed as expired
+        same_bar_stop_first: When one bar spans both levels, count the stop as hit first
+
+    Returns:
+        BacktestResult with outcome, exit, P&L, R multiple and MAE/MFE per signal.
+        Stops that gap through fill at the bar's open; expired and open trades mark to the close.
+    """
+    n = len(signals)
+    outcome = np.full(n, NO_DATA, dtype=np.int8)
+    exit_bar = np.full(n, -1, dtype=np.int64)
+    mfe = np.zeros(n)
+    mae = np.zeros(n)
+    exit_price = np.full(n, np.nan)
+    exit_time = np.zeros(n, dtype=np.int64)
+    start = np.zeros(n, dtype=np.int64)
+
+    for pair in np.unique(signals.pair):
+        bars = ohlc.get(pair)
+        if bars is None or not len(bars):
+            continue
+        idx = np.flatnonzero(signals.pair == pair)
+        start[idx] = np.searchsorted(bars.time, signals.timestamp[idx], side='left')
+        o, b, hi, lo = _simulate_series(bars, signals.direction[idx], signals.entry_price[idx],
+                                        signals.stop_loss[idx], signals.take_profit[idx], start[idx],
+                                        max_bars, same_bar_stop_first)
+        outcome[idx], exit_bar[idx], mfe[idx], mae[idx] = o, b, hi, lo
+
+        has_exit = b >= 0
+        bar = np.where(has_exit, b, 0)
+        exit_time[idx] = np.where(has_exit, bars.time[bar], 0)
+
+        direction = signals.direction[idx]
+        bar_open = bars.open[bar]
+        stop = signals.stop_loss[idx]
+        gapped = np.where(direction > 0, bar_open < stop, bar_open > stop)
+        stop_fill = np.where(gapped, bar_open, stop)
+        exit_price[idx] = np.select(
+            [o == WON, o == LOST, (o == EXPIRED) | (o == OPEN)],
+            [signals.take_profit[idx], stop_fill, bars.close[bar]],
+            np.nan
+        )
+
+    pnl = np.where(outcome == NO_DATA, 0.0, (exit_price - signals.entry_price) * signals.direction)
+    risk = np.abs(signals.entry_price - signals.stop_loss)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_multiple = np.where(risk > 0, pnl / risk, 0.0)
+
+    return BacktestResult(
+        signals=signals,
+        outcome_code=outcome,
+        exit_price=exit_price,
+        exit_time=exit_time,
+        bars_to_exit=np.where(exit_bar >= 0, exit_bar - start + 1, 0),
+        pnl=pnl,
+        r_multiple=r_multiple,
+        mae=mae,
+        mfe=mfe,
+        meta={'max_bars': max_bars, 'same_bar_stop_first': same_bar_stop_first}
+    )
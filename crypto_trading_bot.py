@@ -10,16 +10,26 @@ import logging
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 import requests
-import sqlite3
-import numpy as np
+import sys
 from dataclasses import dataclass
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'forex_data_service'))
+from indicators import IndicatorState, latest_indicators
+from price_store import PriceHistory, SQLiteWriteBehind
+from scan_scheduler import ScanScheduler
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Stored prices replayed into a symbol's indicator state on first use (enough for SMA-200)
+INDICATOR_WARMUP = 250
+
+# Recent prices kept in memory per asset
+PRICE_BUFFER_SIZE = 500
+
 @dataclass
 class CryptoAsset:
     """Cryptocurrency asset data structure"""
@@ -52,9 +62,15 @@ class CryptoTradingBot:
         self.db_path = db_path
         self.crypto_assets = {}
         self.signals = []
+        self.indicator_states: Dict[str, IndicatorState] = {}
+        # Scans run on the scheduler pool while the data thread updates prices; this
+        # guards creating, updating and reading indicator states
+        self._indicator_lock = threading.RLock()
+        self.scheduler: Optional[ScanScheduler] = None
         self.config = {
             'min_confidence': 0.75,
             'update_interval': 60,  # seconds
+            'scan_workers': 4,  # symbols analyzed in parallel
             'max_assets': 100,
             'risk_level': 'medium',
             'stop_loss_percent': 0.05,
@@ -62,16 +78,15 @@ class CryptoTradingBot:
             'max_position_size': 0.1,  # 10% of portfolio
             'volatility_threshold': 0.03  # 3% daily volatility
         }
+        self.db = SQLiteWriteBehind(db_path)
+        self.price_history = PriceHistory(self.db, 'crypto_price_history', PRICE_BUFFER_SIZE)
         self.init_database()
         self.start_monitoring()
     
     def init_database(self):
         """Initialize database for crypto data and signals"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create crypto assets table
-        cursor.execute('''
+        self.db.executescript('''
+            -- Create crypto assets table
             CREATE TABLE IF NOT EXISTS crypto_assets (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT UNIQUE NOT NULL,
@@ -85,11 +100,9 @@ class CryptoTradingBot:
                 low_24h REAL,
                 circulating_supply REAL,
                 last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create crypto signals table
-        cursor.execute('''
+            );
+            
+            -- Create crypto signals table
             CREATE TABLE IF NOT EXISTS crypto_signals (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT NOT NULL,
@@ -101,22 +114,20 @@ class CryptoTradingBot:
                 reasoning TEXT,
                 risk_level TEXT,
                 status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Create price history table
-        cursor.execute('''
+            );
+            
+            -- Create price history table
             CREATE TABLE IF NOT EXISTS crypto_price_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT NOT NULL,
                 price REAL NOT NULL,
                 volume REAL,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create portfolio table
-        cursor.execute('''
+            );
+            CREATE INDEX IF NOT EXISTS idx_crypto_price_history_symbol_timestamp
+                ON crypto_price_history (symbol, timestamp);
+            
+            -- Create portfolio table
             CREATE TABLE IF NOT EXISTS crypto_portfolio (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT NOT NULL,
@@ -125,22 +136,16 @@ class CryptoTradingBot:
                 current_value REAL,
                 pnl REAL,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+            );
         ''')
-        
-        conn.commit()
-        conn.close()
         logger.info("Crypto trading bot database initialized")
     
     def add_crypto_asset(self, asset: CryptoAsset):
         """Add or update a cryptocurrency asset"""
         self.crypto_assets[asset.symbol] = asset
         
-        # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        # Database writes are batched in the background
+        self.db.enqueue('''
             INSERT OR REPLACE INTO crypto_assets 
             (symbol, name, current_price, previous_price, change_percent, 
              market_cap, volume_24h, high_24h, low_24h, circulating_supply, last_updated)
@@ -150,14 +155,17 @@ class CryptoTradingBot:
               asset.high_24h, asset.low_24h, asset.circulating_supply,
               asset.last_updated.isoformat()))
         
-        # Add to price history
-        cursor.execute('''
-            INSERT INTO crypto_price_history (symbol, price, volume, timestamp)
-            VALUES (?, ?, ?, ?)
-        ''', (asset.symbol, asset.current_price, asset.volume_24h, asset.last_updated.isoformat()))
-        
-        conn.commit()
-        conn.close()
+        # Add to price history; a new state warms up from the buffered history that
+        # already includes this price, so both happen under the indicator lock
+        with self._indicator_lock:
+            self.price_history.append(asset.symbol, asset.current_price, '''
+                INSERT INTO crypto_price_history (symbol, price, volume, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', (asset.symbol, asset.current_price, asset.volume_24h, asset.last_updated.isoformat()))
+            if asset.symbol in self.indicator_states:
+                self.indicator_states[asset.symbol].update(asset.current_price)
+            else:
+                self.get_indicator_state(asset.symbol)
     
     def get_crypto_asset(self, symbol: str) -> Optional[CryptoAsset]:
         """Get crypto asset by symbol"""
@@ -173,13 +181,12 @@ class CryptoTradingBot:
         if not asset:
             return None
         
-        # Get price history for analysis
-        prices = self.get_price_history(symbol, limit=100)
-        if len(prices) < 20:
-            return None
-        
-        # Calculate technical indicators
-        indicators = self.calculate_indicators(prices)
+        # Indicators are updated incrementally as prices arrive
+        with self._indicator_lock:
+            state = self.get_indicator_state(symbol)
+            if state.count < 20:
+                return None
+            indicators = self._with_bot_fields(state.snapshot())
         
         # Generate signal based on indicators
         signal = self.generate_signal(symbol, asset, indicators)
@@ -194,97 +201,24 @@ class CryptoTradingBot:
         """Calculate technical indicators from price data"""
         if len(prices) < 20:
             return {}
-        
-        prices_array = np.array(prices)
-        
-        # Simple Moving Averages
-        sma_20 = np.mean(prices_array[-20:])
-        sma_50 = np.mean(prices_array[-50:]) if len(prices) >= 50 else sma_20
-        sma_200 = np.mean(prices_array[-200:]) if len(prices) >= 200 else sma_50
-        
-        # Exponential Moving Averages
-        ema_12 = self.calculate_ema(prices_array, 12)
-        ema_26 = self.calculate_ema(prices_array, 26)
-        
-        # RSI
-        rsi = self.calculate_rsi(prices_array)
-        
-        # MACD
-        macd_line = ema_12 - ema_26
-        signal_line = self.calculate_ema(np.array([macd_line]), 9)[0] if len(prices) >= 35 else 0
-        
-        # Bollinger Bands
-        bb_upper, bb_lower = self.calculate_bollinger_bands(prices_array, 20)
-        
-        # Volume analysis
-        volume_sma = np.mean(prices_array[-20:]) if len(prices) >= 20 else prices_array[-1]
-        
-        # Volatility calculation
-        returns = np.diff(np.log(prices_array))
-        volatility = np.std(returns) * np.sqrt(252)  # Annualized volatility
-        
-        return {
-            'sma_20': float(sma_20),
-            'sma_50': float(sma_50),
-            'sma_200': float(sma_200),
-            'ema_12': float(ema_12),
-            'ema_26': float(ema_26),
-            'rsi': float(rsi),
-            'macd': float(macd_line),
-            'macd_signal': float(signal_line),
-            'bb_upper': float(bb_upper),
-            'bb_lower': float(bb_lower),
-            'current_price': float(prices[-1]),
-            'volume_sma': float(volume_sma),
-            'volatility': float(volatility)
-        }
-    
-    def calculate_ema(self, prices: np.ndarray, period: int) -> float:
-        """Calculate Exponential Moving Average"""
-        if len(prices) < period:
-            return float(prices[-1])
-        
-        alpha = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = alpha * price + (1 - alpha) * ema
-        
-        return ema
-    
-    def calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return 50.0
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
-    
-    def calculate_bollinger_bands(self, prices: np.ndarray, period: int = 20) -> Tuple[float, float]:
-        """Calculate Bollinger Bands"""
-        if len(prices) < period:
-            return prices[-1], prices[-1]
-        
-        sma = np.mean(prices[-period:])
-        std = np.std(prices[-period:])
-        
-        upper_band = sma + (2 * std)
-        lower_band = sma - (2 * std)
-        
-        return upper_band, lower_band
-    
+        return self._with_bot_fields(latest_indicators(prices))
+
+    def get_indicator_state(self, symbol: str) -> IndicatorState:
+        """Streaming indicator state for a symbol, warmed up from stored history on first use"""
+        with self._indicator_lock:
+            state = self.indicator_states.get(symbol)
+            if state is None:
+                state = IndicatorState()
+                for price in self.get_price_history(symbol, limit=INDICATOR_WARMUP):
+                    state.update(price)
+                self.indicator_states[symbol] = state
+            return state
+
+    def _with_bot_fields(self, indicators: Dict) -> Dict:
+        # volume_sma has always been the 20-period price average here
+        indicators['volume_sma'] = indicators['sma_20']
+        return indicators
+
     def generate_signal(self, symbol: str, asset: CryptoAsset, indicators: Dict) -> Optional[CryptoSignal]:
         """Generate trading signal based on indicators"""
         if not indicators:
@@ -404,19 +338,13 @@ class CryptoTradingBot:
         self.signals.append(signal)
         
         # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self.db.enqueue('''
             INSERT INTO crypto_signals 
             (symbol, signal_type, confidence, price, indicators, reasoning, risk_level)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (signal.symbol, signal.signal_type, signal.confidence, signal.price,
               json.dumps(signal.indicators), signal.reasoning, signal.risk_level))
         
-        conn.commit()
-        conn.close()
-        
         logger.info(f"New crypto signal: {signal.signal_type.upper()} {signal.symbol} "
                    f"(confidence: {signal.confidence:.2f}, risk: {signal.risk_level})")
     
@@ -425,39 +353,20 @@ class CryptoTradingBot:
         return sorted(self.signals, key=lambda x: x.timestamp, reverse=True)[:limit]
     
     def get_price_history(self, symbol: str, limit: int = 100) -> List[float]:
-        """Get price history for a symbol"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT price FROM crypto_price_history 
-            WHERE symbol = ? 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        ''', (symbol, limit))
-        
-        prices = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        return prices[::-1]  # Return in chronological order
+        """Get price history for a symbol in chronological order"""
+        return self.price_history.latest(symbol, limit)
     
     def start_monitoring(self):
-        """Start background monitoring thread"""
-        def monitor_crypto():
-            while True:
-                try:
-                    # Analyze all assets
-                    for symbol in self.crypto_assets:
-                        self.analyze_asset(symbol)
-                    
-                    time.sleep(self.config['update_interval'])
-                except Exception as e:
-                    logger.error(f"Error in crypto monitoring: {e}")
-                    time.sleep(self.config['update_interval'])
-        
-        thread = threading.Thread(target=monitor_crypto, daemon=True)
-        thread.start()
-        logger.info("Crypto monitoring thread started")
+        """Start the background scan scheduler"""
+        self.scheduler = ScanScheduler(
+            self.analyze_asset,
+            interval=self.config['update_interval'],
+            symbols=lambda: list(self.crypto_assets),
+            workers=self.config['scan_workers'],
+            name='crypto-scan'
+        )
+        self.scheduler.start()
+        logger.info("Crypto monitoring scheduler started")
     
     def update_crypto_data(self, crypto_data: List[Dict]):
         """Update crypto data from external source"""
@@ -491,15 +400,14 @@ class CryptoTradingBot:
             'crypto_assets_count': len(self.crypto_assets),
             'active_signals': len([s for s in self.signals if s.timestamp > datetime.now() - timedelta(hours=24)]),
             'total_signals': len(self.signals),
+            'pending_writes': self.db.pending_count(),
+            'scan': self.scheduler.get_stats() if self.scheduler else None,
             'config': self.config
         }
     
     def get_portfolio_summary(self) -> Dict:
         """Get portfolio summary"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        rows = self.db.query('''
             SELECT symbol, quantity, avg_price, current_value, pnl
             FROM crypto_portfolio
         ''')
@@ -508,7 +416,7 @@ class CryptoTradingBot:
         total_value = 0
         total_pnl = 0
         
-        for row in cursor.fetchall():
+        for row in rows:
             symbol, quantity, avg_price, current_value, pnl = row
             portfolio.append({
                 'symbol': symbol,
@@ -520,8 +428,6 @@ class CryptoTradingBot:
             total_value += current_value or 0
             total_pnl += pnl or 0
         
-        conn.close()
-        
         return {
             'portfolio': portfolio,
             'total_value': total_value,
@@ -8,6 +8,11 @@ from datetime import datetime
 import uuid
 import hashlib
 import re
+import atexit
+
+from audit_writer import AuditWriter, audit_timestamp
+from customer_search import CustomerSearch
+from data_access import ConnectionPool
 
 app = Flask(__name__)
 CORS(app)
@@ -459,19 +464,14 @@ class SecureDatabaseDashboard:
 class AuditTrailService:
     """Service for comprehensive audit logging and permanent data storage"""
     
-    def __init__(self, db_path):
-        self.db_path = db_path
+    def __init__(self, pool, writer=None):
+        self.pool = pool
+        self.writer = writer or AuditWriter(pool, durability='sync')
     
     def log_action(self, table_name, record_id, action, old_data=None, new_data=None, user_id=None, ip_address=None, user_agent=None, details=None):
-        """Log any action to the audit trail"""
+        """Log any action to the audit trail (queued for the next batch in group durability mode)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO audit_logs (table_name, record_id, action, user_id, old_data, new_data, ip_address, user_agent, details)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            return self.writer.write('audit_logs', (
                 table_name,
                 record_id,
                 action,
@@ -480,38 +480,26 @@ class AuditTrailService:
                 json.dumps(new_data) if new_data else None,
                 ip_address,
                 user_agent,
-                json.dumps(details) if details else None
+                json.dumps(details) if details else None,
+                audit_timestamp()
             ))
-            
-            conn.commit()
-            conn.close()
-            return True
         except Exception as e:
             logger.error(f"Error logging audit action: {e}")
             return False
     
     def log_user_change(self, user_id, action, field_name=None, old_value=None, new_value=None, ip_address=None, user_agent=None):
-        """Log user-specific changes to the audit trail"""
+        """Log user-specific changes to the audit trail (queued like log_action)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO user_audit_trail (user_id, action, field_name, old_value, new_value, ip_address, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            return self.writer.write('user_audit_trail', (
                 user_id,
                 action,
                 field_name,
                 old_value,
                 new_value,
                 ip_address,
-                user_agent
+                user_agent,
+                audit_timestamp()
             ))
-            
-            conn.commit()
-            conn.close()
-            return True
         except Exception as e:
             logger.error(f"Error logging user change: {e}")
             return False
@@ -519,7 +507,7 @@ class AuditTrailService:
     def create_permanent_record(self, user_data):
         """Create a permanent record that can never be deleted"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.pool.connect()
             cursor = conn.cursor()
             
             # Create hash of email for uniqueness
@@ -548,7 +536,8 @@ class AuditTrailService:
     def get_audit_logs(self, table_name=None, record_id=None, limit=100):
         """Retrieve audit logs with optional filtering"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            self.writer.flush()
+            conn = self.pool.connect()
             cursor = conn.cursor()
             
             query = "SELECT * FROM audit_logs WHERE 1=1"
@@ -577,7 +566,8 @@ class AuditTrailService:
     def get_user_audit_trail(self, user_id, limit=50):
         """Retrieve audit trail for a specific user"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            self.writer.flush()
+            conn = self.pool.connect()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -602,9 +592,15 @@ class AuditTrailService:
 # Database setup
 DATABASE_PATH = 'customer_service.db'
 
+# Pooled WAL-mode connections shared by every route and service below
+db_pool = ConnectionPool(DATABASE_PATH)
+
+# FTS-backed customer search, set up by init_database()
+customer_search = CustomerSearch()
+
 def init_enhanced_database():
     """Initialize enhanced database with new tables"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = db_pool.connect()
     cursor = conn.cursor()
     
     # Create enhanced tables
@@ -764,16 +760,19 @@ def init_enhanced_database():
 init_enhanced_database()
 
 # Create service instances
-user_service = UserRegistrationService(sqlite3.connect(DATABASE_PATH))
-customer_sync_service = CustomerDataSyncService(sqlite3.connect(DATABASE_PATH))
-signal_service = SignalPropagationService(sqlite3.connect(DATABASE_PATH))
-bot_manager = BotStateManager(sqlite3.connect(DATABASE_PATH))
+user_service = UserRegistrationService(db_pool.connect())
+customer_sync_service = CustomerDataSyncService(db_pool.connect())
+signal_service = SignalPropagationService(db_pool.connect())
+bot_manager = BotStateManager(db_pool.connect())
 dashboard_service = SecureDatabaseDashboard()
-audit_service = AuditTrailService(DATABASE_PATH)
+audit_writer = AuditWriter(db_pool)
+audit_writer.start()
+atexit.register(audit_writer.stop)
+audit_service = AuditTrailService(db_pool, audit_writer)
 
 def init_database():
     """Initialize the customer service database"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = db_pool.connect()
     cursor = conn.cursor()
     
     # Create customers table
@@ -859,11 +858,14 @@ def init_database():
     ''')
     
     conn.commit()
+    
+    # Full-text index and sync triggers for customer search
+    customer_search.ensure_index(conn)
     conn.close()
 
 def create_sample_data():
     """Create sample customer data for testing"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = db_pool.connect()
     cursor = conn.cursor()
     
     # Sample customers with your real business plans
@@ -936,7 +938,7 @@ def enhanced_user_registration():
             return jsonify({'error': 'Email and password are required'}), 400
         
         # Use the enhanced registration service
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         user_service = UserRegistrationService(conn)
         result = user_service.register_user(email, password, user_data)
         conn.close()
@@ -965,7 +967,7 @@ def sync_customer_data(customer_id):
     try:
         data = request.get_json()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         sync_service = CustomerDataSyncService(conn)
         result = sync_service.sync_questionnaire_data(customer_id, data)
         conn.close()
@@ -990,7 +992,7 @@ def sync_customer_data(customer_id):
 def get_comprehensive_customer_data(customer_id):
     """Get comprehensive customer data from all tables"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         sync_service = CustomerDataSyncService(conn)
         data = sync_service.get_accurate_user_data(customer_id)
         conn.close()
@@ -1013,7 +1015,7 @@ def create_trading_signal():
     try:
         data = request.get_json()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         signal_service = SignalPropagationService(conn)
         signal = signal_service.propagate_signal_to_users(data)
         conn.close()
@@ -1037,7 +1039,7 @@ def get_trading_signals():
     try:
         filters = request.args.to_dict()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         signal_service = SignalPropagationService(conn)
         signals = signal_service.get_user_signals(filters)
         conn.close()
@@ -1059,7 +1061,7 @@ def toggle_bot_status(bot_type):
         data = request.get_json()
         is_active = data.get('active', False)
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         bot_manager = BotStateManager(conn)
         result = bot_manager.toggle_bot_status(bot_type, is_active)
         conn.close()
@@ -1082,7 +1084,7 @@ def toggle_bot_status(bot_type):
 def get_bot_status(bot_type):
     """Get current bot status"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         bot_manager = BotStateManager(conn)
         status = bot_manager.check_bot_status(bot_type)
         conn.close()
@@ -1108,7 +1110,7 @@ def get_secure_trading_data():
         if not pin:
             return jsonify({'error': 'PIN is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         dashboard_service = SecureDatabaseDashboard()
         
         try:
@@ -1146,7 +1148,7 @@ def store_bot_trading_data():
         if not pin:
             return jsonify({'error': 'PIN is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         dashboard_service = SecureDatabaseDashboard()
         
         try:
@@ -1185,7 +1187,7 @@ def get_audit_log():
         action = request.args.get('action')
         limit = min(int(request.args.get('limit', 100)), 1000)  # Max 1000 records
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Build query with filters
@@ -1243,13 +1245,13 @@ def validate_email_uniqueness():
         if not email:
             return jsonify({'error': 'Email is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         user_service = UserRegistrationService(conn)
         normalized_email = user_service.normalize_email(email)
         conn.close()
         
         # Check if normalized email already exists
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         existing_user = cursor.execute(
             'SELECT id, email FROM customers WHERE email = ? OR email = ? LIMIT 1',
@@ -1284,7 +1286,7 @@ def validate_email_uniqueness():
 def get_tickets():
     """Get all support tickets"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get tickets with customer information
@@ -1345,7 +1347,7 @@ def create_ticket():
         if not data or not data.get('customer_id') or not data.get('subject'):
             return jsonify({'error': 'Customer ID and subject are required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1380,7 +1382,7 @@ def update_ticket(ticket_id):
     try:
         data = request.get_json()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Build update query dynamically
@@ -1421,7 +1423,7 @@ def update_ticket(ticket_id):
 def get_notifications():
     """Get system notifications"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get recent system events as notifications
@@ -1477,7 +1479,7 @@ def get_notifications():
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer stats
@@ -1526,7 +1528,7 @@ def get_dashboard_stats():
 def health_check():
     """Health check endpoint"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         cursor.execute('SELECT COUNT(*) FROM customers')
         customer_count = cursor.fetchone()[0]
@@ -1536,6 +1538,9 @@ def health_check():
             'status': 'healthy',
             'database': 'connected',
             'customer_count': customer_count,
+            'database_pool': db_pool.get_stats(),
+            'audit_writer': audit_writer.get_stats(),
+            'customer_search': customer_search.get_stats(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -1547,44 +1552,21 @@ def health_check():
 
 @app.route('/api/customers', methods=['GET'])
 def get_customers():
-    """Get all customers with pagination and search"""
+    """Get customers newest first, optionally filtered by search, with cursor or page pagination"""
     try:
-        search = request.args.get('search', '')
+        search = request.args.get('search', '').strip()
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
-        offset = (page - 1) * per_page
-        
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        if search:
-            cursor.execute('''
-                SELECT * FROM customers 
-                WHERE unique_id LIKE ? OR name LIKE ? OR email LIKE ?
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (f'%{search}%', f'%{search}%', f'%{search}%', per_page, offset))
-        else:
-            cursor.execute('''
-                SELECT * FROM customers 
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (per_page, offset))
-        
-        customers = [dict(row) for row in cursor.fetchall()]
-        
-        # Get total count
-        if search:
-            cursor.execute('''
-                SELECT COUNT(*) FROM customers 
-                WHERE unique_id LIKE ? OR name LIKE ? OR email LIKE ?
-            ''', (f'%{search}%', f'%{search}%', f'%{search}%'))
-        else:
-            cursor.execute('SELECT COUNT(*) FROM customers')
-        
-        total_count = cursor.fetchone()[0]
+        cursor = request.args.get('cursor')
+        fuzzy = request.args.get('fuzzy', 'false').lower() == 'true'
         
+        conn = db_pool.connect()
+        customers, next_cursor = customer_search.search(
+            conn, search, limit=per_page, cursor=cursor, fuzzy=fuzzy,
+            offset=0 if cursor else (page - 1) * per_page
+        )
+        # Cached for a few seconds; only used for the page count
+        total_count = customer_search.count(conn, search, fuzzy=fuzzy)
         conn.close()
         
         return jsonify({
@@ -1592,37 +1574,36 @@ def get_customers():
             'total': total_count,
             'page': page,
             'per_page': per_page,
-            'total_pages': (total_count + per_page - 1) // per_page
+            'total_pages': (total_count + per_page - 1) // per_page,
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching customers: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/customers/search', methods=['GET'])
 def search_customers():
-    """Search customers by name, email, or unique_id"""
+    """Search customers by name, email, or unique_id, best matches first"""
     try:
-        search = request.args.get('search', '')
+        search = request.args.get('search', '').strip()
         if not search:
             return jsonify({'customers': []})
+        limit = min(int(request.args.get('limit', 100)), 100)
+        fuzzy = request.args.get('fuzzy', 'false').lower() == 'true'
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM customers 
-            WHERE unique_id LIKE ? OR name LIKE ? OR email LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 100
-        ''', (f'%{search}%', f'%{search}%', f'%{search}%'))
-        
-        customers = [dict(row) for row in cursor.fetchall()]
+        conn = db_pool.connect()
+        customers, next_cursor = customer_search.search(
+            conn, search, limit=limit, cursor=request.args.get('cursor'), order='rank', fuzzy=fuzzy
+        )
         conn.close()
         
-        return jsonify({'customers': customers})
+        return jsonify({'customers': customers, 'next_cursor': next_cursor})
         
+    except ValueError as e:
+        return jsonify({'error': str(e), 'customers': []}), 400
     except Exception as e:
         logger.error(f"Error searching customers: {str(e)}")
         return jsonify({'error': str(e), 'customers': []}), 500
@@ -1631,7 +1612,7 @@ def search_customers():
 def get_customer_details(customer_id):
     """Get detailed customer information"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -1706,7 +1687,7 @@ def get_customer_details(customer_id):
 def delete_customer(customer_id):
     """Attempt to delete customer (BLOCKED - No-delete policy enforced)"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID first
@@ -1746,6 +1727,8 @@ def delete_customer(customer_id):
             SET status = 'inactive', updated_at = ? 
             WHERE id = ?
         ''', (datetime.now().isoformat(), customer_db_id))
+        # Commit before auditing: the audit service writes on its own connection
+        conn.commit()
         
         # Log the deletion attempt (blocked)
         audit_service.log_action(
@@ -1776,7 +1759,6 @@ def delete_customer(customer_id):
             user_agent=request.headers.get('User-Agent')
         )
         
-        conn.commit()
         conn.close()
         
         return jsonify({
@@ -1806,7 +1788,7 @@ def create_customer():
         # Generate unique ID
         unique_id = str(uuid.uuid4())[:8].upper()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1842,7 +1824,7 @@ def update_customer(unique_id):
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID first
@@ -1912,6 +1894,8 @@ def update_customer(unique_id):
         # Get updated customer data
         cursor.execute('SELECT * FROM customers WHERE id = ?', (customer_id,))
         updated_customer = cursor.fetchone()
+        # Commit before auditing: the audit service writes on its own connection
+        conn.commit()
         
         # Log the successful update
         audit_service.log_action(
@@ -1949,7 +1933,6 @@ def update_customer(unique_id):
                     user_agent=request.headers.get('User-Agent')
                 )
         
-        conn.commit()
         conn.close()
         
         return jsonify({
@@ -1976,7 +1959,7 @@ def update_customer(unique_id):
 def get_customer_activities(unique_id):
     """Get customer activities"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2011,7 +1994,7 @@ def get_customer_activities(unique_id):
 def get_customer_screenshots(unique_id):
     """Get customer screenshots"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2044,7 +2027,7 @@ def get_customer_screenshots(unique_id):
 def get_customer_questionnaire(unique_id):
     """Get customer questionnaire responses"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2077,7 +2060,7 @@ def get_customer_questionnaire(unique_id):
 def get_customer_risk_plan(unique_id):
     """Get customer risk management plan"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2111,7 +2094,7 @@ def get_customer_risk_plan(unique_id):
 def get_customer_dashboard_data(unique_id):
     """Get customer dashboard data"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2148,7 +2131,7 @@ def add_customer_activity(customer_id):
         if not data or not data.get('activity_type'):
             return jsonify({'error': 'Activity type is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2187,7 +2170,7 @@ def add_customer_screenshot(customer_id):
         if not data or not data.get('screenshot_url'):
             return jsonify({'error': 'Screenshot URL is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2225,7 +2208,7 @@ def add_questionnaire_response(customer_id):
         if not data or not data.get('responses'):
             return jsonify({'error': 'Questionnaire responses are required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2265,7 +2248,7 @@ def add_risk_management_plan(customer_id):
         if not data or not data.get('plan_data'):
             return jsonify({'error': 'Risk plan data is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2311,7 +2294,7 @@ def add_dashboard_data(customer_id):
         if not data or not data.get('data_type') or not data.get('data_content'):
             return jsonify({'error': 'Data type and content are required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2405,7 +2388,7 @@ def get_user_audit_trail(user_id):
 def get_permanent_records():
     """Get all permanent user records"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2447,7 +2430,9 @@ def get_permanent_records():
 def get_compliance_report():
     """Get compliance report with audit summary"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        # Include audit records still waiting for their batch
+        audit_writer.flush()
+        conn = db_pool.connect()
         cursor = conn.cursor()
         
         # Get audit summary
@@ -0,0 +1,210 @@
+"""
+Batched Audit Trail Writer for the Customer Service API
+Audit records are queued in memory and a background thread writes them in
+batched transactions, so audited requests no longer wait for an audit commit.
+Batches flush when full or after a short interval; the queue is bounded and
+what happens when it is full is configurable
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Timestamps in the same format as SQLite's CURRENT_TIMESTAMP (UTC), taken when
+# the action happens rather than when the batch is written
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+AUDIT_INSERTS = {
+    'audit_logs': '''
+        INSERT INTO audit_logs (table_name, record_id, action, user_id, old_data, new_data, ip_address, user_agent, details, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'user_audit_trail': '''
+        INSERT INTO user_audit_trail (user_id, action, field_name, old_value, new_value, ip_address, user_agent, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+}
+
+DURABILITY_MODES = ('sync', 'group')
+OVERFLOW_POLICIES = ('block', 'drop', 'sync')
+
+_STOP = object()
+
+def audit_timestamp() -> str:
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+class AuditWriter:
+    """Writes audit rows either inline or in background group commits.
+
+    durability='sync' inserts and commits each record on the caller's thread,
+    as the API always did. durability='group' queues records and a writer
+    thread inserts up to batch_size of them per transaction, at least every
+    flush_interval_ms. When the queue is full the overflow policy decides:
+    'block' waits up to block_timeout then writes inline, 'sync' writes inline
+    straight away, 'drop' discards the record and counts it.
+    """
+
+    def __init__(self, pool, durability: str = None, batch_size: int = None, flush_interval_ms: float = None,
+                 queue_size: int = None, overflow_policy: str = None, block_timeout: float = None):
+        self.pool = pool
+        self.durability = durability or os.getenv('AUDIT_DURABILITY', 'group')
+        self.batch_size = batch_size or int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+        self.flush_interval = (flush_interval_ms or float(os.getenv('AUDIT_FLUSH_INTERVAL_MS', '50'))) / 1000
+        self.queue_size = queue_size or int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+        self.overflow_policy = overflow_policy or os.getenv('AUDIT_OVERFLOW_POLICY', 'block')
+        self.block_timeout = block_timeout if block_timeout is not None else float(os.getenv('AUDIT_BLOCK_TIMEOUT', '1.0'))
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown audit durability mode: {self.durability}")
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {self.overflow_policy}")
+
+        self.queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'inline': 0, 'dropped': 0, 'failed': 0,
+                      'max_batch': 0, 'flush_ms_total': 0.0}
+
+    def start(self):
+        """Start the background writer (group durability only)"""
+        with self._lock:
+            if self.running or self.durability != 'group':
+                return
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+        logger.info(f"Audit writer started (batch {self.batch_size}, every {self.flush_interval * 1000:.0f}ms)")
+
+    def stop(self, timeout: float = 10.0):
+        """Write everything still queued and stop the background writer"""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        logger.info(f"Audit writer stopped, {self.stats['written']} records written")
+
+    def write(self, table: str, params: Sequence[Any]) -> bool:
+        """Record one audit row; returns False if it was dropped or failed to write"""
+        if table not in AUDIT_INSERTS:
+            raise ValueError(f"Unknown audit table: {table}")
+        record = (table, tuple(params))
+        if not self.running:
+            return self._write_inline(record)
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow_policy == 'drop':
+                self.stats['dropped'] += 1
+                logger.warning(f"Audit queue full, dropped {table} record")
+                return False
+            if self.overflow_policy == 'block':
+                try:
+                    self.queue.put(record, timeout=self.block_timeout)
+                except queue.Full:
+                    return self._write_inline(record)
+            else:
+                return self._write_inline(record)
+        self.stats['queued'] += 1
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued record has been written; True if the queue drained in time"""
+        if not self.running:
+            return True
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _write_inline(self, record: Tuple[str, tuple]) -> bool:
+        self.stats['inline'] += 1
+        return self._write_batch([record]) == 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    self.queue.task_done()
+                    stopping = True
+                    break
+                batch.append(record)
+            if batch:
+                self._write_batch(batch)
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, tuple]]) -> int:
+        """Insert a batch in one transaction, falling back to row by row if a row is rejected"""
+        started = time.monotonic()
+        by_table: Dict[str, List[tuple]] = {}
+        for table, params in batch:
+            by_table.setdefault(table, []).append(params)
+
+        conn = self.pool.connect()
+        try:
+            try:
+                for table, rows in by_table.items():
+                    conn.executemany(AUDIT_INSERTS[table], rows)
+                conn.commit()
+                written = len(batch)
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                written = self._write_rows(conn, batch)
+        except sqlite3.Error as e:
+            conn.rollback()
+            self.stats['failed'] += len(batch)
+            logger.error(f"Failed to write {len(batch)} audit records: {e}")
+            return 0
+        finally:
+            conn.close()
+
+        self.stats['written'] += written
+        self.stats['batches'] += 1
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+        self.stats['flush_ms_total'] += (time.monotonic() - started) * 1000
+        return written
+
+    def _write_rows(self, conn, batch: List[Tuple[str, tuple]]) -> int:
+        written = 0
+        for table, params in batch:
+            try:
+                conn.execute(AUDIT_INSERTS[table], params)
+                written += 1
+            except sqlite3.IntegrityError as e:
+                self.stats['failed'] += 1
+                logger.error(f"Rejected {table} audit record {params[:3]}: {e}")
+        conn.commit()
+        return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats['batches']
+        return {
+            'running': self.running,
+            'durability': self.durability,
+            'overflow_policy': self.overflow_policy,
+            'queue_depth': self.queue.qsize(),
+            'avg_batch': self.stats['written'] / batches if batches else 0.0,
+            'avg_flush_ms': self.stats['flush_ms_total'] / batches if batches else 0.0,
+            **{key: value for key, value in self.stats.items() if key != 'flush_ms_total'}
+        }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Concurrent Write Benchmark for the Customer Service Database
+Runs the same audit-log insert from many threads for a fixed time, once with a
+fresh sqlite3.connect() per write (how the API used to work) and once through
+the pooled WAL-mode data access layer, and reports sustained writes/sec and
+the number of writes that failed with "database is locked".
+
+By default every write runs on a new thread, the way app.run() and gthread
+workers serve requests; --threading long-lived keeps one thread per client.
+
+Usage:
+    python benchmark_db.py --threads 16 --seconds 10
+    python benchmark_db.py --mode pooled --database /tmp/bench.db --threading long-lived
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from data_access import ConnectionPool, is_busy_error
+
+INSERT = '''
+    INSERT INTO audit_logs (table_name, record_id, action, user_id, new_data)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+
+def create_schema(path: str):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            record_id INTEGER,
+            action TEXT NOT NULL,
+            user_id INTEGER,
+            new_data TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def run(connect, threads: int, seconds: float, per_request: bool = True):
+    """Write from every client thread until the deadline; returns (writes, locked errors, elapsed)
+
+    With per_request, each write runs on a thread of its own that the client
+    starts and joins, like a server that spawns a thread per request.
+    """
+    counts = [0] * threads
+    locked = [0] * threads
+    start = threading.Barrier(threads + 1)
+    deadline = []
+
+    def write(index, n):
+        try:
+            conn = connect()
+            conn.execute(INSERT, ('customers', n, 'UPDATE', index, '{"status": "active"}'))
+            conn.commit()
+            conn.close()
+            counts[index] += 1
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            locked[index] += 1
+
+    def worker(index):
+        start.wait()
+        n = 0
+        while time.monotonic() < deadline[0]:
+            if per_request:
+                request = threading.Thread(target=write, args=(index, n))
+                request.start()
+                request.join()
+            else:
+                write(index, n)
+            n += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    began = time.monotonic()
+    deadline.append(began + seconds)
+    start.wait()
+    for thread in workers:
+        thread.join()
+    return sum(counts), sum(locked), time.monotonic() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent writes to the customer service database')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--mode', choices=['both', 'direct', 'pooled'], default='both')
+    parser.add_argument('--database', help='Database file (default: a temporary file per mode)')
+    parser.add_argument('--threading', choices=['per-request', 'long-lived'], default='per-request',
+                        help='Start a thread per write (default) or reuse one thread per client')
+    args = parser.parse_args()
+
+    modes = ['direct', 'pooled'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = args.database or os.path.join(tmp, f'{mode}.db')
+            create_schema(path)
+            if mode == 'direct':
+                connect = lambda: sqlite3.connect(path)
+            else:
+                pool = ConnectionPool(path)
+                connect = pool.connect
+
+            writes, locked, elapsed = run(connect, args.threads, args.seconds,
+                                          per_request=args.threading == 'per-request')
+            print(f"{mode:>7}: {writes / elapsed:10.0f} writes/sec  "
+                  f"({writes} writes, {locked} locked errors, {args.threads} threads, {elapsed:.1f}s)")
+            if mode == 'pooled':
+                stats = pool.get_stats()
+                print(f"         journal_mode={stats['journal_mode']} opened={stats['opened']} "
+                      f"reused={stats['reused']} busy_retries={stats['busy_retries']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Customer Search for the Customer Service API
+Searches unique_id, name and email through an FTS5 trigram index kept in sync
+with the customers table by triggers, so a search term matches anywhere in a
+field (as LIKE '%term%' did) without scanning the table. Results are ranked
+with bm25 or listed newest first, paginated by keyset cursors, and totals are
+cached for a short time since they are only shown as a page count
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'customers_fts'
+
+# Terms shorter than a trigram cannot use the FTS index; they match as prefixes
+# through NOCASE indexes instead
+MIN_FTS_TERM = 3
+
+SCHEMA = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        unique_id, name, email,
+        content='customers', content_rowid='id', tokenize='trigram'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, unique_id, name, email) VALUES (new.id, new.unique_id, new.name, new.email);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, unique_id, name, email)
+        VALUES ('delete', old.id, old.unique_id, old.name, old.email);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF unique_id, name, email ON customers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, unique_id, name, email)
+        VALUES ('delete', old.id, old.unique_id, old.name, old.email);
+        INSERT INTO {FTS_TABLE}(rowid, unique_id, name, email) VALUES (new.id, new.unique_id, new.name, new.email);
+    END
+    '''
+]
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_customers_created_at ON customers(created_at DESC, id DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_customers_unique_id_nocase ON customers(unique_id COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_customers_name_nocase ON customers(name COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_customers_email_nocase ON customers(email COLLATE NOCASE)'
+]
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def phrase(term: str) -> str:
+    """FTS5 query matching the term as a substring"""
+    return '"' + term.replace('"', '""') + '"'
+
+def fuzzy_query(term: str) -> str:
+    """FTS5 query matching any of the term's trigrams; bm25 ranks rows sharing more of them first"""
+    term = term.lower()
+    trigrams = dict.fromkeys(term[i:i + 3] for i in range(len(term) - 2))
+    return ' OR '.join(phrase(trigram) for trigram in trigrams)
+
+def _like_prefix(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+class CustomerSearch:
+    """Indexed customer lookup with keyset pagination and cached totals"""
+
+    def __init__(self, count_ttl: float = None):
+        self.count_ttl = count_ttl if count_ttl is not None else float(os.getenv('CUSTOMER_SEARCH_COUNT_TTL', '30'))
+        self.fts_available = False
+        self._counts: Dict[Tuple[str, bool], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'fts_searches': 0, 'prefix_searches': 0, 'count_hits': 0, 'count_misses': 0}
+
+    def ensure_index(self, conn) -> bool:
+        """Create the FTS table, its sync triggers and the list indexes; fills the index the first time"""
+        for statement in INDEXES:
+            conn.execute(statement)
+        try:
+            existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone()
+            for statement in SCHEMA:
+                conn.execute(statement)
+            if not existed:
+                conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            self.fts_available = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+            logger.warning(f"Customer full-text index unavailable, searching with LIKE: {e}")
+            self.fts_available = False
+        conn.commit()
+        return self.fts_available
+
+    def _filter(self, term: str, fuzzy: bool) -> Tuple[str, List[Any]]:
+        """WHERE clause restricting customers c to matches of term"""
+        if self.fts_available and len(term) >= MIN_FTS_TERM:
+            self.stats['fts_searches'] += 1
+            query = fuzzy_query(term) if fuzzy else phrase(term)
+            return f"c.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)", [query]
+        self.stats['prefix_searches'] += 1
+        if self.fts_available:
+            pattern = _like_prefix(term)
+            return ("(c.unique_id LIKE ? ESCAPE '\\' OR c.name LIKE ? ESCAPE '\\' OR c.email LIKE ? ESCAPE '\\')",
+                    [pattern] * 3)
+        pattern = '%' + term + '%'
+        return "(c.unique_id LIKE ? OR c.name LIKE ? OR c.email LIKE ?)", [pattern] * 3
+
+    def search(self, conn, term: str = '', limit: int = 50, cursor: Optional[str] = None,
+               order: str = 'recent', fuzzy: bool = False, offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of customers
+
+        Args:
+            term: Search text; empty lists every customer
+            order: 'recent' (newest first) or 'rank' (best match first, needs the FTS index)
+            cursor: next_cursor from the previous page
+            offset: Rows to skip when no cursor is given, for page-number clients
+
+        Returns:
+            (customers, next_cursor); next_cursor is None on the last page
+        """
+        term = term.strip()
+        after = decode_cursor(cursor) if cursor else None
+        ranked = order == 'rank' and term and self.fts_available and len(term) >= MIN_FTS_TERM
+
+        if ranked:
+            self.stats['fts_searches'] += 1
+            query = fuzzy_query(term) if fuzzy else phrase(term)
+            sql = f'''
+                SELECT c.*, f.rank AS search_rank FROM {FTS_TABLE} f JOIN customers c ON c.id = f.rowid
+                WHERE {FTS_TABLE} MATCH ?
+            '''
+            params: List[Any] = [query]
+            if after:
+                sql += ' AND (f.rank > ? OR (f.rank = ? AND c.id > ?))'
+                params += [after[0], after[0], after[1]]
+            sql += ' ORDER BY f.rank, c.id LIMIT ?'
+        else:
+            sql = 'SELECT c.* FROM customers c WHERE 1=1'
+            params = []
+            if term:
+                clause, clause_params = self._filter(term, fuzzy)
+                sql += f' AND {clause}'
+                params += clause_params
+            if after:
+                sql += ' AND (c.created_at < ? OR (c.created_at = ? AND c.id < ?))'
+                params += [after[0], after[0], after[1]]
+            sql += ' ORDER BY c.created_at DESC, c.id DESC LIMIT ?'
+        params.append(limit + 1)
+        if offset and not after:
+            sql += ' OFFSET ?'
+            params.append(offset)
+
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        rows = [dict(row) for row in cur.execute(sql, params).fetchall()]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last['search_rank'] if ranked else last['created_at'], last['id']])
+        for row in rows:
+            row.pop('search_rank', None)
+        return rows, next_cursor
+
+    def count(self, conn, term: str = '', fuzzy: bool = False) -> int:
+        """Number of matching customers, reused for count_ttl seconds"""
+        term = term.strip()
+        key = (term.lower(), fuzzy)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and cached[0] > now:
+                self.stats['count_hits'] += 1
+                return cached[1]
+        self.stats['count_misses'] += 1
+
+        if not term:
+            total = conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0]
+        elif self.fts_available and len(term) >= MIN_FTS_TERM:
+            total = conn.execute(f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?',
+                                 (fuzzy_query(term) if fuzzy else phrase(term),)).fetchone()[0]
+        else:
+            clause, params = self._filter(term, fuzzy)
+            total = conn.execute(f'SELECT COUNT(*) FROM customers c WHERE {clause}', params).fetchone()[0]
+
+        with self._lock:
+            if len(self._counts) > 1000:
+                self._counts.clear()
+            self._counts[key] = (now + self.count_ttl, total)
+        return total
+
+    def clear_counts(self):
+        with self._lock:
+            self._counts.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'fts_available': self.fts_available, 'count_ttl': self.count_ttl, **self.stats}
@@ -0,0 +1,173 @@
+"""
+SQLite Data Access Layer for the Customer Service API
+Hands out pooled connections opened in WAL mode with tuned PRAGMAs.
+Statements go through sqlite3's prepared statement cache and are retried with
+backoff when another writer holds the lock, so concurrent requests wait briefly
+instead of failing with "database is locked"
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+def is_busy_error(error: Exception) -> bool:
+    """True for errors another connection's lock caused, which are safe to retry"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+class RetryingCursor(sqlite3.Cursor):
+    """Cursor whose statements are retried while the database is busy"""
+
+    def execute(self, sql, parameters=()):
+        return self.connection._retry(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.connection._retry(super().executemany, sql, seq_of_parameters)
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that goes back to its pool on close().
+
+    Existing code keeps its connect() / close() shape: close() rolls back
+    anything left uncommitted (as closing a plain connection would) and parks
+    the connection for the next caller.
+    """
+
+    pool = None
+    checked_out = False
+
+    def cursor(self, factory=RetryingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        return self._retry(super().commit)
+
+    def close(self):
+        if self.pool is not None and self.checked_out:
+            self.pool.release(self)
+        elif self.pool is None:
+            super().close()
+
+    def close_connection(self):
+        """Really close the underlying connection"""
+        sqlite3.Connection.close(self)
+
+    def _retry(self, operation, *args):
+        pool = self.pool
+        retries = pool.busy_retries if pool is not None else 0
+        for attempt in range(retries + 1):
+            try:
+                return operation(*args)
+            except sqlite3.OperationalError as e:
+                if attempt == retries or not is_busy_error(e):
+                    raise
+                pool.stats['busy_retries'] += 1
+                delay = min(pool.backoff_base * 2 ** attempt, pool.backoff_max)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+class ConnectionPool:
+    """Pool of SQLite connections shared by all threads.
+
+    The development server and gthread workers start a thread per request, so
+    idle connections are shared by all threads (opened with
+    check_same_thread=False) and handed to whichever thread asks next. A checked-out connection belongs to one caller until close(), so
+    it is never used by two threads at once. A checkout while another connection
+    is already open (a service called from a route) gets a second connection, so
+    the two never share a transaction.
+    """
+
+    def __init__(self, database_path: str, max_idle: int = None, busy_timeout: float = None,
+                 busy_retries: int = None, cached_statements: int = None, mmap_size: int = None,
+                 cache_size_kb: int = None):
+        self.database_path = database_path
+        self.max_idle = max_idle or int(os.getenv('CS_DB_MAX_IDLE', '8'))
+        self.busy_timeout = busy_timeout if busy_timeout is not None else float(os.getenv('CS_DB_BUSY_TIMEOUT', '5'))
+        self.busy_retries = busy_retries if busy_retries is not None else int(os.getenv('CS_DB_BUSY_RETRIES', '5'))
+        self.cached_statements = cached_statements or int(os.getenv('CS_DB_CACHED_STATEMENTS', '256'))
+        self.mmap_size = mmap_size if mmap_size is not None else int(os.getenv('CS_DB_MMAP_SIZE', str(256 * 1024 * 1024)))
+        self.cache_size_kb = cache_size_kb or int(os.getenv('CS_DB_CACHE_SIZE_KB', '65536'))
+        self.backoff_base = 0.05
+        self.backoff_max = 1.0
+        self.journal_mode = None
+        self._idle: list = []
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0, 'released': 0, 'busy_retries': 0}
+
+    def _open(self) -> PooledConnection:
+        conn = sqlite3.connect(self.database_path, timeout=self.busy_timeout, factory=PooledConnection,
+                               cached_statements=self.cached_statements, check_same_thread=False)
+        conn.pool = self
+        journal_mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size={-int(self.cache_size_kb)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        with self._lock:
+            self.stats['opened'] += 1
+            if self.journal_mode != journal_mode:
+                self.journal_mode = journal_mode
+                logger.info(f"SQLite {self.database_path} journal mode: {journal_mode}")
+        return conn
+
+    def connect(self) -> PooledConnection:
+        """Check out a connection; close() returns it"""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.stats['reused'] += 1
+        if conn is None:
+            conn = self._open()
+        conn.checked_out = True
+        return conn
+
+    def release(self, conn: PooledConnection):
+        conn.checked_out = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding pooled connection: {e}")
+            conn.close_connection()
+            return
+        with self._lock:
+            self.stats['released'] += 1
+            parked = len(self._idle) < self.max_idle
+            if parked:
+                self._idle.append(conn)
+        if not parked:
+            conn.close_connection()
+
+    def close_idle(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close_connection()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'database': self.database_path,
+            'journal_mode': self.journal_mode,
+            'idle': len(self._idle),
+            **self.stats
+        }
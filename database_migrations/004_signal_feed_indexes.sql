@@ -0,0 +1,17 @@
+-- Migration: Indexes for the keyset-paginated user signal feed
+-- /user/signals filters by (risk_tier, status, origin) and pages by (created_at, id) descending,
+-- so one composite index serves the filter, the ORDER BY and the cursor predicate with no sort.
+-- CONCURRENTLY avoids blocking writes on a live table; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_signals_feed
+    ON signals (risk_tier, status, origin, created_at DESC, id DESC);
+
+-- Covering index for the feed's LEFT JOIN on delivery status: answers
+-- (user_id, signal_id) -> delivered, delivered_at from the index alone
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_signals_delivery
+    ON user_signals (user_id, signal_id) INCLUDE (delivered, delivered_at);
+
+-- Superseded by idx_signals_feed for feed queries
+DROP INDEX CONCURRENTLY IF EXISTS idx_signals_risk_tier;
+
+COMMENT ON INDEX idx_signals_feed IS 'Keyset pagination for /user/signals: WHERE risk_tier, status, origin ORDER BY created_at DESC, id DESC';
@@ -15,6 +15,8 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
 
+from streaming_export import EXPORT_FORMATS, export_response, sqlite_keyset_chunks, track_export
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,6 +36,28 @@ def get_db_connection():
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
+# Columns included in exports, newest first by (created_at, id)
+EXPORT_COLUMNS = [
+    'id', 'customer_id', 'unique_id', 'email', 'name', 'phone', 'membership_tier',
+    'payment_status', 'payment_method', 'payment_amount', 'payment_date', 'join_date',
+    'last_active', 'status', 'questionnaire_data', 'account_type', 'prop_firm',
+    'account_size', 'trading_experience', 'risk_tolerance', 'trading_goals',
+    'ip_address', 'signup_source', 'referral_code', 'data_capture_complete',
+    'admin_verified', 'created_at', 'updated_at'
+]
+EXPORT_KEY = ['created_at', 'id']
+# Parquet column types; the rest are text, so columns that start out NULL keep their type
+EXPORT_TYPES = {
+    **{column: 'string' for column in EXPORT_COLUMNS},
+    'id': 'int64', 'customer_id': 'int64', 'payment_amount': 'float64', 'account_size': 'int64',
+    'data_capture_complete': 'bool', 'admin_verified': 'bool'
+}
+
+def export_record(row):
+    """Export shape of a customer_data_immutable row"""
+    row['questionnaire_data'] = json.loads(row['questionnaire_data']) if row['questionnaire_data'] else {}
+    return row
+
 def hash_password(password):
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -646,96 +670,64 @@ def export_customer_data():
         if not is_authenticated:
             return jsonify({"error": "Admin access required"}), 403
         
-        data = request.get_json()
+        data = request.get_json() or {}
         export_type = data.get('export_type', 'all')  # 'all', 'payment_verified', 'specific'
-        export_format = data.get('export_format', 'json')  # 'json', 'csv'
+        export_format = data.get('export_format', 'json')  # 'json', 'ndjson', 'csv', 'parquet'
         customer_ids = data.get('customer_ids', [])
+        resume_after = data.get('resume_after')  # {"created_at": ..., "id": ...} of the last record received
+        admin_username = request.headers.get('X-Admin-Username', 'unknown')
+        remote_addr = request.remote_addr
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"Unsupported export format: {export_format}"}), 400
+        if resume_after is not None and not all(column in resume_after for column in EXPORT_KEY):
+            return jsonify({"error": f"resume_after needs {', '.join(EXPORT_KEY)}"}), 400
         
         # Build query based on export type
+        sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM customer_data_immutable WHERE 1=1"
+        params = []
         if export_type == 'payment_verified':
-            cursor.execute("""
-                SELECT * FROM customer_data_immutable 
-                WHERE payment_status = 'completed'
-                ORDER BY created_at DESC
-            """)
+            sql += " AND payment_status = 'completed'"
         elif export_type == 'specific' and customer_ids:
-            placeholders = ','.join(['?' for _ in customer_ids])
-            cursor.execute(f"""
-                SELECT * FROM customer_data_immutable 
-                WHERE customer_id IN ({placeholders})
-                ORDER BY created_at DESC
-            """, customer_ids)
-        else:
-            cursor.execute("""
-                SELECT * FROM customer_data_immutable 
-                ORDER BY created_at DESC
-            """)
-        
-        customers = cursor.fetchall()
-        
-        # Log export
-        admin_username = request.headers.get('X-Admin-Username', 'unknown')
-        cursor.execute("""
-            INSERT INTO data_export_log (
-                admin_username, export_type, customer_ids, export_format, 
-                ip_address, records_exported
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            admin_username, export_type, json.dumps(customer_ids), export_format,
-            request.remote_addr, len(customers)
-        ))
-        
-        conn.commit()
-        conn.close()
-        
-        # Prepare export data
-        export_data = []
-        for customer in customers:
-            export_data.append({
-                "id": customer['id'],
-                "customer_id": customer['customer_id'],
-                "unique_id": customer['unique_id'],
-                "email": customer['email'],
-                "name": customer['name'],
-                "phone": customer['phone'],
-                "membership_tier": customer['membership_tier'],
-                "payment_status": customer['payment_status'],
-                "payment_method": customer['payment_method'],
-                "payment_amount": customer['payment_amount'],
-                "payment_date": customer['payment_date'],
-                "join_date": customer['join_date'],
-                "last_active": customer['last_active'],
-                "status": customer['status'],
-                "questionnaire_data": json.loads(customer['questionnaire_data']) if customer['questionnaire_data'] else {},
-                "account_type": customer['account_type'],
-                "prop_firm": customer['prop_firm'],
-                "account_size": customer['account_size'],
-                "trading_experience": customer['trading_experience'],
-                "risk_tolerance": customer['risk_tolerance'],
-                "trading_goals": customer['trading_goals'],
-                "ip_address": customer['ip_address'],
-                "signup_source": customer['signup_source'],
-                "referral_code": customer['referral_code'],
-                "data_capture_complete": customer['data_capture_complete'],
-                "admin_verified": customer['admin_verified'],
-                "created_at": customer['created_at'],
-                "updated_at": customer['updated_at']
-            })
-        
-        logger.info(f"✅ Admin {admin_username} exported {len(export_data)} customer records")
-        
-        return jsonify({
-            "success": True,
-            "export_data": export_data,
-            "total_records": len(export_data),
-            "export_type": export_type,
-            "export_format": export_format,
-            "exported_at": datetime.utcnow().isoformat()
-        }), 200
+            sql += f" AND customer_id IN ({','.join(['?' for _ in customer_ids])})"
+            params = list(customer_ids)
+        
+        def log_export(records_exported, completed):
+            conn = get_db_connection()
+            conn.execute("""
+                INSERT INTO data_export_log (
+                    admin_username, export_type, customer_ids, export_format, 
+                    ip_address, records_exported
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                admin_username, export_type, json.dumps(customer_ids), export_format,
+                remote_addr, records_exported
+            ))
+            conn.commit()
+            conn.close()
+            status = "exported" if completed else "stopped after"
+            logger.info(f"✅ Admin {admin_username} {status} {records_exported} customer records")
+        
+        chunks = sqlite_keyset_chunks(get_db_connection, sql, params, EXPORT_KEY,
+                                      descending=True, after=resume_after)
+        chunks = track_export((list(map(export_record, chunk)) for chunk in chunks), log_export)
+        
+        return export_response(
+            chunks, export_format,
+            filename=f"customer_data_{export_type}",
+            key=EXPORT_KEY,
+            columns=EXPORT_COLUMNS,
+            types=EXPORT_TYPES,
+            envelope={
+                "success": True,
+                "export_type": export_type,
+                "export_format": export_format,
+                "exported_at": datetime.utcnow().isoformat()
+            }
+        )
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"❌ Error exporting customer data: {str(e)}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
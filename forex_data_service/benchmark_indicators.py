@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-tick indicator cost: the bots' old full recomputation over the
+stored history versus the streaming IndicatorState update.
+
+Usage: python benchmark_indicators.py [ticks]
+"""
+import sys
+import time
+
+import numpy as np
+
+from indicators import IndicatorState, latest_indicators
+
+HISTORY_LENGTHS = [100, 1_000, 10_000]
+
+
+def legacy_ema(prices, period):
+    """The pure-Python EMA loop calculate_indicators used to run on every tick"""
+    if len(prices) < period:
+        return float(prices[-1])
+    alpha = 2 / (period + 1)
+    value = prices[0]
+    for price in prices[1:]:
+        value = alpha * price + (1 - alpha) * value
+    return value
+
+
+def legacy_indicators(prices):
+    """The parts of the old calculate_indicators that scale with history length"""
+    prices_array = np.array(prices)
+    ema_12 = legacy_ema(prices_array, 12)
+    ema_26 = legacy_ema(prices_array, 26)
+    returns = np.diff(np.log(prices_array))
+    return ema_12 - ema_26, np.std(returns)
+
+
+def make_prices(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return list(1.08 + np.cumsum(rng.normal(0, 0.0004, n)))
+
+
+def per_tick(fn, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        fn()
+    return (time.perf_counter() - start) / ticks * 1e6
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'history':>8} {'legacy us/tick':>15} {'vectorized us/tick':>19} {'streaming us/tick':>18}")
+
+    for history_length in HISTORY_LENGTHS:
+        history = make_prices(history_length)
+        new_prices = make_prices(ticks, seed=7)
+
+        state = IndicatorState()
+        for price in history:
+            state.update(price)
+        streaming = iter(new_prices)
+
+        legacy = per_tick(lambda: legacy_indicators(history), ticks)
+        vectorized = per_tick(lambda: latest_indicators(history), ticks)
+        incremental = per_tick(lambda: state.update(next(streaming)), ticks)
+        print(f"{history_length:>8} {legacy:>15.1f} {vectorized:>19.1f} {incremental:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized swing engine against the original nested-loop detection
+used by perform_smc_analysis.
+
+Usage: python benchmark_swing_engine.py [lookback]
+"""
+import sys
+import time
+
+import numpy as np
+
+from swing_engine import find_swing_points
+
+CANDLE_COUNTS = [1_000, 10_000, 100_000]
+
+
+def legacy_swing_points(highs, lows, swing_lookback):
+    """The O(n * lookback) loop perform_smc_analysis used before the swing engine"""
+    major_swing_highs = []
+    major_swing_lows = []
+
+    for i in range(swing_lookback, len(highs) - swing_lookback):
+        is_swing_high = True
+        current_high = highs[i]
+        for j in range(i - swing_lookback, i + swing_lookback + 1):
+            if j != i and highs[j] >= current_high:
+                is_swing_high = False
+                break
+        if is_swing_high:
+            major_swing_highs.append(i)
+
+        is_swing_low = True
+        current_low = lows[i]
+        for j in range(i - swing_lookback, i + swing_lookback + 1):
+            if j != i and lows[j] <= current_low:
+                is_swing_low = False
+                break
+        if is_swing_low:
+            major_swing_lows.append(i)
+
+    return major_swing_highs, major_swing_lows
+
+
+def make_candles(n, seed=42):
+    """Random-walk OHLC highs/lows rounded like real 5-digit quotes (so ties occur)"""
+    rng = np.random.default_rng(seed)
+    closes = 1.08 + np.cumsum(rng.normal(0, 0.0004, n))
+    highs = np.round(closes + rng.uniform(0, 0.0005, n), 5)
+    lows = np.round(closes - rng.uniform(0, 0.0005, n), 5)
+    return highs, lows
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    lookback = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"Swing detection benchmark (lookback={lookback})")
+    print(f"{'candles':>10} {'legacy (s)':>12} {'engine (s)':>12} {'speedup':>10}  match")
+
+    for n in CANDLE_COUNTS:
+        highs, lows = make_candles(n)
+        (legacy_highs, legacy_lows), legacy_time = time_call(legacy_swing_points, highs, lows, lookback)
+        (engine_highs, engine_lows), engine_time = time_call(find_swing_points, highs, lows, lookback)
+
+        match = (legacy_highs == engine_highs.tolist()) and (legacy_lows == engine_lows.tolist())
+        speedup = legacy_time / engine_time if engine_time > 0 else float('inf')
+        print(f"{n:>10} {legacy_time:>12.4f} {engine_time:>12.4f} {speedup:>9.1f}x  {'✅' if match else '❌'}")
+
+
+if __name__ == '__main__':
+    main()
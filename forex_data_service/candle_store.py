@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Candle Store
+Per-(symbol, interval) OHLCV store held as columnar NumPy arrays and persisted
+to memory-mapped .npy files, with incremental upstream fetching
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+class FetchPlan(NamedTuple):
+    """Upstream fetch needed to serve a range; since/until are UTC epoch seconds or None"""
+    kind: str  # 'full' or 'incremental'
+    since: Optional[float]
+    until: Optional[float]
+
+    @property
+    def since_datetime(self) -> Optional[datetime]:
+        return _to_datetime(self.since) if self.since is not None else None
+
+    @property
+    def until_datetime(self) -> Optional[datetime]:
+        return _to_datetime(self.until) if self.until is not None else None
+
+
+# fetcher(start, end) -> DataFrame with COLUMNS; start/end are naive UTC datetimes or None
+Fetcher = Callable[[Optional[datetime], Optional[datetime]], pd.DataFrame]
+
+
+def _to_epoch(value) -> Optional[float]:
+    """Convert a date string / datetime / Timestamp to UTC epoch seconds"""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return ts.timestamp()
+
+
+def _to_datetime(epoch: float) -> datetime:
+    """Convert UTC epoch seconds to a naive UTC datetime (the convention used by the fetchers)"""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+
+
+class CandleStore:
+    """Columnar OHLCV store with on-disk persistence and incremental refresh.
+
+    Each (symbol, interval) series is a (6, n) float64 array, one row per column in
+    COLUMNS order, sorted by time (UTC epoch seconds). Series are saved as a single
+    .npy file so gunicorn workers sharing the directory can memory-map each other's
+    writes; a worker reloads a series whenever the file's mtime changes.
+    """
+
+    def __init__(self, root_dir: str, refresh_seconds: int = 60):
+        self.root_dir = root_dir
+        self.refresh_seconds = refresh_seconds
+        self._series: Dict[Tuple[str, str], dict] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {'store_hits': 0, 'full_fetches': 0, 'incremental_fetches': 0}
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _path(self, symbol: str, interval: str) -> str:
+        safe_symbol = re.sub(r'[^A-Za-z0-9_-]', '_', symbol)
+        return os.path.join(self.root_dir, f"{safe_symbol}__{interval}.npy")
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _load(self, symbol: str, interval: str) -> Optional[dict]:
+        """Return the in-memory entry for a series, reloading it if another worker rewrote it"""
+        key = (symbol, interval)
+        path = self._path(symbol, interval)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return self._series.get(key)
+
+        entry = self._series.get(key)
+        if entry is None or entry['mtime'] != mtime:
+            try:
+                data = np.load(path, mmap_mode='r')
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load candle file {path}: {e}")
+                return entry
+            previous = entry or {}
+            entry = {
+                'data': data,
+                'mtime': mtime,
+                'covered_from': previous.get('covered_from'),
+                'covered_until': previous.get('covered_until')
+            }
+            self._series[key] = entry
+        return entry
+
+    def _save(self, symbol: str, interval: str, data: np.ndarray):
+        key = (symbol, interval)
+        path = self._path(symbol, interval)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp_path, path)
+        previous = self._series.get(key) or {}
+        self._series[key] = {
+            'data': data,
+            'mtime': os.stat(path).st_mtime_ns,
+            'covered_from': previous.get('covered_from'),
+            'covered_until': previous.get('covered_until')
+        }
+
+    def upsert(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Merge bars into a series, replacing any stored bars with the same timestamp.
+
+        Returns the number of bars that were not already stored.
+        """
+        entry = self._load(symbol, interval)
+        existing = entry['data'] if entry else np.empty((len(COLUMNS), 0))
+
+        if df is None or df.empty:
+            return 0
+
+        times = pd.to_datetime(df['time'], utc=True)
+        epochs = ((times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+        incoming = np.vstack([epochs] + [
+            pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) if col in df.columns
+            else np.zeros(len(df)) for col in COLUMNS[1:]
+        ])
+
+        # Incoming rows win on duplicate timestamps: the latest bar is usually still forming
+        merged = np.concatenate([incoming, np.asarray(existing)], axis=1)
+        _, first_idx = np.unique(merged[0], return_index=True)
+        merged = np.ascontiguousarray(merged[:, first_idx])
+
+        self._save(symbol, interval, merged)
+        return merged.shape[1] - existing.shape[1]
+
+    def bounds(self, symbol: str, interval: str) -> Optional[Tuple[float, float]]:
+        """Return (first, last) stored bar time in epoch seconds"""
+        entry = self._load(symbol, interval)
+        if not entry or entry['data'].shape[1] == 0:
+            return None
+        times = entry['data'][0]
+        return float(times[0]), float(times[-1])
+
+    def range(self, symbol: str, interval: str, start=None, end=None, limit: Optional[int] = None) -> pd.DataFrame:
+        """Slice a stored series by date range and/or keep only the most recent `limit` bars"""
+        entry = self._load(symbol, interval)
+        if not entry or entry['data'].shape[1] == 0:
+            return pd.DataFrame(columns=list(COLUMNS))
+
+        data = entry['data']
+        times = data[0]
+        lo = np.searchsorted(times, _to_epoch(start), side='left') if start is not None else 0
+        hi = np.searchsorted(times, _to_epoch(end), side='right') if end is not None else len(times)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        window = np.array(data[:, lo:hi])
+        df = pd.DataFrame({col: window[i] for i, col in enumerate(COLUMNS)})
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
+
+    def plan_fetch(self, symbol: str, interval: str, start=None, end=None) -> Optional[FetchPlan]:
+        """Decide what, if anything, must be fetched upstream to serve a range.
+
+        Every fetch is contiguous with the stored bars, so a series is always one
+        block covering [covered_from, covered_until] with no holes in it:
+
+        - Nothing stored: a 'full' fetch of the range.
+        - The range starts before the covered block: a 'full' fetch from the range
+          start through to the first stored bar (or the range end if that is later),
+          even if the range itself ends earlier.
+        - The range reaches past the covered block and the block ends more than
+          `refresh_seconds` ago: an 'incremental' fetch from the last stored bar
+          to the range end.
+        - Otherwise None: the range can be served straight from the store.
+        """
+        start_epoch, end_epoch = _to_epoch(start), _to_epoch(end)
+        bounds = self.bounds(symbol, interval)
+
+        if bounds is None:
+            return FetchPlan('full', start_epoch, end_epoch)
+
+        entry = self._series[(symbol, interval)]
+        covered_from = min(bounds[0], entry.get('covered_from') or bounds[0])
+        covered_until = max(bounds[1], entry.get('covered_until') or bounds[1])
+        if start_epoch is not None and start_epoch < covered_from:
+            until = None if end_epoch is None else max(end_epoch, bounds[0])
+            return FetchPlan('full', start_epoch, until)
+
+        if end_epoch is not None and end_epoch <= covered_until:
+            return None
+        if time.time() - covered_until >= self.refresh_seconds:
+            return FetchPlan('incremental', bounds[1], end_epoch)
+        return None
+
+    def record_fetch(self, symbol: str, interval: str, plan: FetchPlan, df: pd.DataFrame,
+                     checked_at: Optional[float] = None) -> int:
+        """Store the bars fetched for a plan returned by plan_fetch().
+
+        The fetcher must return every bar in the plan's window (paginating if the
+        provider caps a response), since the whole window is recorded as covered.
+        """
+        checked_at = time.time() if checked_at is None else checked_at
+        self.stats[f'{plan.kind}_fetches'] += 1
+        added = self.upsert(symbol, interval, df)
+
+        entry = self._series.get((symbol, interval))
+        if entry is not None:
+            # Remember the window asked for, not just the bars returned, so ranges the
+            # provider has no bars for (weekends, listing dates) aren't refetched
+            if plan.since is not None:
+                entry['covered_from'] = min(plan.since, entry.get('covered_from') or plan.since)
+            until = checked_at if plan.until is None else min(plan.until, checked_at)
+            entry['covered_until'] = max(until, entry.get('covered_until') or until)
+        return added
+
+    def load(self, symbol: str, interval: str, fetcher: Fetcher, start=None, end=None,
+             limit: Optional[int] = None) -> pd.DataFrame:
+        """Serve a range from the store, fetching upstream only what plan_fetch() says is missing"""
+        with self._lock_for((symbol, interval)):
+            now = time.time()
+            plan = self.plan_fetch(symbol, interval, start, end)
+            if plan is None:
+                self.stats['store_hits'] += 1
+            else:
+                self.record_fetch(symbol, interval, plan, fetcher(plan.since_datetime, plan.until_datetime), now)
+
+        return self.range(symbol, interval, start, end, limit)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, 'series': len(self._series)}
@@ -10,16 +10,24 @@ import logging
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 import requests
-import sqlite3
-import numpy as np
 from dataclasses import dataclass
 
+from indicators import IndicatorState, latest_indicators
+from price_store import PriceHistory, SQLiteWriteBehind
+from scan_scheduler import ScanScheduler
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Stored rates replayed into a symbol's indicator state on first use (enough for SMA-200)
+INDICATOR_WARMUP = 250
+
+# Recent rates kept in memory per pair
+PRICE_BUFFER_SIZE = 500
+
 @dataclass
 class ForexPair:
     """Forex pair data structure"""
@@ -50,24 +58,29 @@ class ForexBotSystem:
         self.db_path = db_path
         self.forex_pairs = {}
         self.signals = []
+        self.indicator_states: Dict[str, IndicatorState] = {}
+        # Scans run on the scheduler pool while the data thread updates prices; this
+        # guards creating, updating and reading indicator states
+        self._indicator_lock = threading.RLock()
+        self.scheduler: Optional[ScanScheduler] = None
         self.config = {
             'min_confidence': 0.7,
             'update_interval': 30,  # seconds
+            'scan_workers': 4,  # symbols analyzed in parallel
             'max_pairs': 50,
             'risk_level': 'medium',
             'stop_loss_percent': 0.02,
             'take_profit_percent': 0.04
         }
+        self.db = SQLiteWriteBehind(db_path)
+        self.price_history = PriceHistory(self.db, 'price_history', PRICE_BUFFER_SIZE)
         self.init_database()
         self.start_monitoring()
     
     def init_database(self):
         """Initialize database for forex data and signals"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create forex pairs table
-        cursor.execute('''
+        self.db.executescript('''
+            -- Create forex pairs table
             CREATE TABLE IF NOT EXISTS forex_pairs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT UNIQUE NOT NULL,
@@ -80,11 +93,9 @@ class ForexBotSystem:
                 low_24h REAL,
                 volume_24h REAL,
                 last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create trading signals table
-        cursor.execute('''
+            );
+            
+            -- Create trading signals table
             CREATE TABLE IF NOT EXISTS forex_signals (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT NOT NULL,
@@ -95,32 +106,26 @@ class ForexBotSystem:
                 indicators TEXT,
                 reasoning TEXT,
                 status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Create price history table
-        cursor.execute('''
+            );
+            
+            -- Create price history table
             CREATE TABLE IF NOT EXISTS price_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 symbol TEXT NOT NULL,
                 price REAL NOT NULL,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+            );
+            CREATE INDEX IF NOT EXISTS idx_price_history_symbol_timestamp
+                ON price_history (symbol, timestamp);
         ''')
-        
-        conn.commit()
-        conn.close()
         logger.info("Forex bot database initialized")
     
     def add_forex_pair(self, pair: ForexPair):
         """Add or update a forex pair"""
         self.forex_pairs[pair.symbol] = pair
         
-        # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        # Database writes are batched in the background
+        self.db.enqueue('''
             INSERT OR REPLACE INTO forex_pairs 
             (symbol, base_currency, quote_currency, current_rate, previous_rate, 
              change_percent, high_24h, low_24h, volume_24h, last_updated)
@@ -129,14 +134,17 @@ class ForexBotSystem:
               pair.previous_rate, pair.change_percent, pair.high_24h, pair.low_24h,
               pair.volume_24h, pair.last_updated.isoformat()))
         
-        # Add to price history
-        cursor.execute('''
-            INSERT INTO price_history (symbol, price, timestamp)
-            VALUES (?, ?, ?)
-        ''', (pair.symbol, pair.current_rate, pair.last_updated.isoformat()))
-        
-        conn.commit()
-        conn.close()
+        # Add to price history; a new state warms up from the buffered history that
+        # already includes this price, so both happen under the indicator lock
+        with self._indicator_lock:
+            self.price_history.append(pair.symbol, pair.current_rate, '''
+                INSERT INTO price_history (symbol, price, timestamp)
+                VALUES (?, ?, ?)
+            ''', (pair.symbol, pair.current_rate, pair.last_updated.isoformat()))
+            if pair.symbol in self.indicator_states:
+                self.indicator_states[pair.symbol].update(pair.current_rate)
+            else:
+                self.get_indicator_state(pair.symbol)
     
     def get_forex_pair(self, symbol: str) -> Optional[ForexPair]:
         """Get forex pair by symbol"""
@@ -152,13 +160,12 @@ class ForexBotSystem:
         if not pair:
             return None
         
-        # Get price history for analysis
-        prices = self.get_price_history(symbol, limit=100)
-        if len(prices) < 20:
-            return None
-        
-        # Calculate technical indicators
-        indicators = self.calculate_indicators(prices)
+        # Indicators are updated incrementally as rates arrive
+        with self._indicator_lock:
+            state = self.get_indicator_state(symbol)
+            if state.count < 20:
+                return None
+            indicators = state.snapshot()
         
         # Generate signal based on indicators
         signal = self.generate_signal(symbol, pair, indicators)
@@ -173,86 +180,19 @@ class ForexBotSystem:
         """Calculate technical indicators from price data"""
         if len(prices) < 20:
             return {}
-        
-        prices_array = np.array(prices)
-        
-        # Simple Moving Averages
-        sma_20 = np.mean(prices_array[-20:])
-        sma_50 = np.mean(prices_array[-50:]) if len(prices) >= 50 else sma_20
-        
-        # Exponential Moving Averages
-        ema_12 = self.calculate_ema(prices_array, 12)
-        ema_26 = self.calculate_ema(prices_array, 26)
-        
-        # RSI
-        rsi = self.calculate_rsi(prices_array)
-        
-        # MACD
-        macd_line = ema_12 - ema_26
-        signal_line = self.calculate_ema(np.array([macd_line]), 9)[0] if len(prices) >= 35 else 0
-        
-        # Bollinger Bands
-        bb_upper, bb_lower = self.calculate_bollinger_bands(prices_array, 20)
-        
-        return {
-            'sma_20': float(sma_20),
-            'sma_50': float(sma_50),
-            'ema_12': float(ema_12),
-            'ema_26': float(ema_26),
-            'rsi': float(rsi),
-            'macd': float(macd_line),
-            'macd_signal': float(signal_line),
-            'bb_upper': float(bb_upper),
-            'bb_lower': float(bb_lower),
-            'current_price': float(prices[-1])
-        }
-    
-    def calculate_ema(self, prices: np.ndarray, period: int) -> float:
-        """Calculate Exponential Moving Average"""
-        if len(prices) < period:
-            return float(prices[-1])
-        
-        alpha = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = alpha * price + (1 - alpha) * ema
-        
-        return ema
-    
-    def calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return 50.0
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
-    
-    def calculate_bollinger_bands(self, prices: np.ndarray, period: int = 20) -> Tuple[float, float]:
-        """Calculate Bollinger Bands"""
-        if len(prices) < period:
-            return prices[-1], prices[-1]
-        
-        sma = np.mean(prices[-period:])
-        std = np.std(prices[-period:])
-        
-        upper_band = sma + (2 * std)
-        lower_band = sma - (2 * std)
-        
-        return upper_band, lower_band
-    
+        return latest_indicators(prices)
+
+    def get_indicator_state(self, symbol: str) -> IndicatorState:
+        """Streaming indicator state for a symbol, warmed up from stored history on first use"""
+        with self._indicator_lock:
+            state = self.indicator_states.get(symbol)
+            if state is None:
+                state = IndicatorState()
+                for price in self.get_price_history(symbol, limit=INDICATOR_WARMUP):
+                    state.update(price)
+                self.indicator_states[symbol] = state
+            return state
+
     def generate_signal(self, symbol: str, pair: ForexPair, indicators: Dict) -> Optional[TradingSignal]:
         """Generate trading signal based on indicators"""
         if not indicators:
@@ -335,19 +275,13 @@ class ForexBotSystem:
         self.signals.append(signal)
         
         # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self.db.enqueue('''
             INSERT INTO forex_signals 
             (symbol, signal_type, confidence, price, indicators, reasoning)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (signal.symbol, signal.signal_type, signal.confidence, signal.price,
               json.dumps(signal.indicators), signal.reasoning))
         
-        conn.commit()
-        conn.close()
-        
         logger.info(f"New signal: {signal.signal_type.upper()} {signal.symbol} "
                    f"(confidence: {signal.confidence:.2f})")
     
@@ -356,39 +290,20 @@ class ForexBotSystem:
         return sorted(self.signals, key=lambda x: x.timestamp, reverse=True)[:limit]
     
     def get_price_history(self, symbol: str, limit: int = 100) -> List[float]:
-        """Get price history for a symbol"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT price FROM price_history 
-            WHERE symbol = ? 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        ''', (symbol, limit))
-        
-        prices = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        return prices[::-1]  # Return in chronological order
+        """Get price history for a symbol in chronological order"""
+        return self.price_history.latest(symbol, limit)
     
     def start_monitoring(self):
-        """Start background monitoring thread"""
-        def monitor_forex():
-            while True:
-                try:
-                    # Analyze all pairs
-                    for symbol in self.forex_pairs:
-                        self.analyze_pair(symbol)
-                    
-                    time.sleep(self.config['update_interval'])
-                except Exception as e:
-                    logger.error(f"Error in forex monitoring: {e}")
-                    time.sleep(self.config['update_interval'])
-        
-        thread = threading.Thread(target=monitor_forex, daemon=True)
-        thread.start()
-        logger.info("Forex monitoring thread started")
+        """Start the background scan scheduler"""
+        self.scheduler = ScanScheduler(
+            self.analyze_pair,
+            interval=self.config['update_interval'],
+            symbols=lambda: list(self.forex_pairs),
+            workers=self.config['scan_workers'],
+            name='forex-scan'
+        )
+        self.scheduler.start()
+        logger.info("Forex monitoring scheduler started")
     
     def update_forex_data(self, forex_data: List[Dict]):
         """Update forex data from external source"""
@@ -421,6 +336,8 @@ class ForexBotSystem:
             'forex_pairs_count': len(self.forex_pairs),
             'active_signals': len([s for s in self.signals if s.timestamp > datetime.now() - timedelta(hours=24)]),
             'total_signals': len(self.signals),
+            'pending_writes': self.db.pending_count(),
+            'scan': self.scheduler.get_stats() if self.scheduler else None,
             'config': self.config
         }
 
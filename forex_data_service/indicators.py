@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Technical Indicators
+Shared indicator library for the trading bots: vectorized full-series functions
+plus O(1) streaming state objects that update on each new price
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Full-series functions return float arrays aligned with the input, NaN where the
+# indicator isn't defined yet. EMAs are seeded with the SMA of their first
+# `period` values and RSI/ATR/ADX use Wilder smoothing, so the streaming states
+# below produce exactly the same numbers one tick at a time.
+
+
+def _as_array(values: Sequence[float]) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+def _seeded_ewm(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """Recursive average seeded with the mean of the first `period` values"""
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    seeded = values[period - 1:].copy()
+    seeded[0] = values[:period].mean()
+    out[period - 1:] = pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def sma(values: Sequence[float], period: int) -> np.ndarray:
+    """Simple moving average"""
+    return pd.Series(_as_array(values)).rolling(period).mean().to_numpy()
+
+
+def ema(values: Sequence[float], period: int) -> np.ndarray:
+    """Exponential moving average with alpha = 2 / (period + 1)"""
+    return _seeded_ewm(_as_array(values), period, 2 / (period + 1))
+
+
+def rsi(values: Sequence[float], period: int = 14) -> np.ndarray:
+    """Wilder's relative strength index"""
+    values = _as_array(values)
+    out = np.full(len(values), np.nan)
+    if len(values) <= period:
+        return out
+
+    deltas = np.diff(values)
+    avg_gain = _seeded_ewm(np.clip(deltas, 0, None), period, 1 / period)
+    avg_loss = _seeded_ewm(np.clip(-deltas, 0, None), period, 1 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        out[1:] = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + rs))
+    out[1:][np.isnan(avg_gain)] = np.nan
+    return out
+
+
+def macd(values: Sequence[float], fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line (EMA of the MACD line) and histogram"""
+    values = _as_array(values)
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        signal_line[valid[0]:] = ema(line[valid[0]:], signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger_bands(values: Sequence[float], period: int = 20,
+                    num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Middle (SMA), upper and lower bands using the population standard deviation"""
+    series = pd.Series(_as_array(values))
+    middle = series.rolling(period).mean().to_numpy()
+    std = series.rolling(period).std(ddof=0).to_numpy()
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def true_range(high: Sequence[float], low: Sequence[float], close: Sequence[float]) -> np.ndarray:
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    ranges = np.vstack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    return np.nanmax(ranges, axis=0)
+
+
+def atr(high: Sequence[float], low: Sequence[float], close: Sequence[float], period: int = 14) -> np.ndarray:
+    """Wilder's average true range"""
+    return _seeded_ewm(true_range(high, low, close), period, 1 / period)
+
+
+def adx(high: Sequence[float], low: Sequence[float], close: Sequence[float],
+        period: int = 14) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Wilder's average directional index, +DI and -DI"""
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    n = len(close)
+    adx_out, plus_di, minus_di = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    if n <= period:
+        return adx_out, plus_di, minus_di
+
+    up_move = np.diff(high)
+    down_move = -np.diff(low)
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+    tr_smooth = _seeded_ewm(true_range(high, low, close)[1:], period, 1 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di[1:] = 100 * _seeded_ewm(plus_dm, period, 1 / period) / tr_smooth
+        minus_di[1:] = 100 * _seeded_ewm(minus_dm, period, 1 / period) / tr_smooth
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum == 0, 0.0, 100 * np.abs(plus_di - minus_di) / di_sum)
+
+    valid = np.flatnonzero(~np.isnan(plus_di))
+    if len(valid):
+        adx_out[valid[0]:] = _seeded_ewm(dx[valid[0]:], period, 1 / period)
+    return adx_out, plus_di, minus_di
+
+
+class SMAState:
+    """Streaming simple moving average over the last `period` values"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(value)
+        self._sum += value
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.period if len(self._window) == self.period else None
+
+
+class _WilderState:
+    """Recursive average seeded with the mean of the first `period` values"""
+
+    def __init__(self, period: int, alpha: float):
+        self.period = period
+        self.alpha = alpha
+        self._count = 0
+        self._seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> Optional[float]:
+        if self.value is not None:
+            self.value += self.alpha * (value - self.value)
+        else:
+            self._count += 1
+            self._seed_sum += value
+            if self._count == self.period:
+                self.value = self._seed_sum / self.period
+        return self.value
+
+
+class EMAState(_WilderState):
+    """Streaming exponential moving average"""
+
+    def __init__(self, period: int):
+        super().__init__(period, 2 / (period + 1))
+
+
+class RSIState:
+    """Streaming Wilder RSI"""
+
+    def __init__(self, period: int = 14):
+        self._gain = _WilderState(period, 1 / period)
+        self._loss = _WilderState(period, 1 / period)
+        self._previous: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> Optional[float]:
+        if self._previous is not None:
+            delta = value - self._previous
+            avg_gain = self._gain.update(max(delta, 0.0))
+            avg_loss = self._loss.update(max(-delta, 0.0))
+            if avg_gain is not None:
+                self.value = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+        self._previous = value
+        return self.value
+
+
+class MACDState:
+    """Streaming MACD line, signal line and histogram"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = EMAState(fast)
+        self._slow = EMAState(slow)
+        self._signal = EMAState(signal)
+        self.line: Optional[float] = None
+        self.signal: Optional[float] = None
+
+    def update(self, value: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        fast, slow = self._fast.update(value), self._slow.update(value)
+        if fast is not None and slow is not None:
+            self.line = fast - slow
+            self.signal = self._signal.update(self.line)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        histogram = self.line - self.signal if self.signal is not None else None
+        return self.line, self.signal, histogram
+
+
+class RollingStdState:
+    """Streaming population standard deviation over the last `period` values.
+
+    Running sums are kept relative to the first value seen so that
+    sum-of-squares cancellation stays small for prices like 1.0850.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = deque(maxlen=period)
+        self._shift: Optional[float] = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        if self._shift is None:
+            self._shift = value
+        if len(self._window) == self.period:
+            oldest = self._window[0]
+            self._sum -= oldest
+            self._sum_sq -= oldest * oldest
+        shifted = value - self._shift
+        self._window.append(shifted)
+        self._sum += shifted
+        self._sum_sq += shifted * shifted
+        return self.value
+
+    @property
+    def count(self) -> int:
+        return len(self._window)
+
+    @property
+    def mean(self) -> Optional[float]:
+        if len(self._window) < self.period:
+            return None
+        return self._shift + self._sum / self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.partial_value() if len(self._window) == self.period else None
+
+    def partial_value(self) -> Optional[float]:
+        """Standard deviation of whatever the window holds so far"""
+        count = len(self._window)
+        if not count:
+            return None
+        mean = self._sum / count
+        return math.sqrt(max(self._sum_sq / count - mean * mean, 0.0))
+
+
+class BollingerState:
+    """Streaming Bollinger Bands (middle, upper, lower)"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.num_std = num_std
+        self._std = RollingStdState(period)
+
+    def update(self, value: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        self._std.update(value)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        std = self._std.value
+        if std is None:
+            return None, None, None
+        middle = self._std.mean
+        return middle, middle + self.num_std * std, middle - self.num_std * std
+
+
+class ATRState:
+    """Streaming Wilder ATR"""
+
+    def __init__(self, period: int = 14):
+        self._average = _WilderState(period, 1 / period)
+        self._previous_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        tr = high - low
+        if self._previous_close is not None:
+            tr = max(tr, abs(high - self._previous_close), abs(low - self._previous_close))
+        self._previous_close = close
+        self.value = self._average.update(tr)
+        return self.value
+
+
+class ADXState:
+    """Streaming Wilder ADX with +DI and -DI"""
+
+    def __init__(self, period: int = 14):
+        self._tr = _WilderState(period, 1 / period)
+        self._plus_dm = _WilderState(period, 1 / period)
+        self._minus_dm = _WilderState(period, 1 / period)
+        self._adx = _WilderState(period, 1 / period)
+        self._previous: Optional[Tuple[float, float, float]] = None
+        self.value: Optional[float] = None
+        self.plus_di: Optional[float] = None
+        self.minus_di: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        if self._previous is not None:
+            prev_high, prev_low, prev_close = self._previous
+            up_move, down_move = high - prev_high, prev_low - low
+            plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+            minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+            tr_smooth = self._tr.update(tr)
+            plus_smooth = self._plus_dm.update(plus_dm)
+            minus_smooth = self._minus_dm.update(minus_dm)
+            if tr_smooth is not None:
+                self.plus_di = 100 * plus_smooth / tr_smooth if tr_smooth else 0.0
+                self.minus_di = 100 * minus_smooth / tr_smooth if tr_smooth else 0.0
+                di_sum = self.plus_di + self.minus_di
+                dx = 100 * abs(self.plus_di - self.minus_di) / di_sum if di_sum else 0.0
+                self.value = self._adx.update(dx)
+        self._previous = (high, low, close)
+        return self.value
+
+
+class IndicatorState:
+    """All indicators the bots read, updated in O(1) per price.
+
+    snapshot() returns the same keys the bots' signal rules expect; values that
+    aren't warmed up yet fall back the same way the full-series path does.
+    """
+
+    def __init__(self, volatility_window: int = 100):
+        self.sma_20 = SMAState(20)
+        self.sma_50 = SMAState(50)
+        self.sma_200 = SMAState(200)
+        self.ema_12 = EMAState(12)
+        self.ema_26 = EMAState(26)
+        self.rsi = RSIState(14)
+        self.macd = MACDState(12, 26, 9)
+        self.bollinger = BollingerState(20, 2.0)
+        self.volatility = RollingStdState(volatility_window)
+        self.count = 0
+        self.last_price: Optional[float] = None
+
+    def update(self, price: float) -> Dict[str, float]:
+        if self.last_price is not None and self.last_price > 0 and price > 0:
+            self.volatility.update(math.log(price / self.last_price))
+        for state in (self.sma_20, self.sma_50, self.sma_200, self.ema_12, self.ema_26,
+                      self.rsi, self.macd, self.bollinger):
+            state.update(price)
+        self.last_price = price
+        self.count += 1
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, float]:
+        if self.last_price is None:
+            return {}
+        price = self.last_price
+        sma_20 = self.sma_20.value if self.sma_20.value is not None else price
+        sma_50 = self.sma_50.value if self.sma_50.value is not None else sma_20
+        sma_200 = self.sma_200.value if self.sma_200.value is not None else sma_50
+        ema_12 = self.ema_12.value if self.ema_12.value is not None else price
+        ema_26 = self.ema_26.value if self.ema_26.value is not None else price
+        macd_line, macd_signal, _ = self.macd.value
+        _, bb_upper, bb_lower = self.bollinger.value
+        volatility = self.volatility.partial_value() if self.volatility.count > 1 else 0.0
+
+        return {
+            'sma_20': float(sma_20),
+            'sma_50': float(sma_50),
+            'sma_200': float(sma_200),
+            'ema_12': float(ema_12),
+            'ema_26': float(ema_26),
+            'rsi': float(self.rsi.value if self.rsi.value is not None else 50.0),
+            'macd': float(macd_line if macd_line is not None else ema_12 - ema_26),
+            'macd_signal': float(macd_signal if macd_signal is not None else 0.0),
+            'bb_upper': float(bb_upper if bb_upper is not None else price),
+            'bb_lower': float(bb_lower if bb_lower is not None else price),
+            'current_price': float(price),
+            'volatility': float(volatility * np.sqrt(252))
+        }
+
+
+def latest_indicators(prices: Sequence[float], volatility_window: int = 100) -> Dict[str, float]:
+    """Indicator snapshot for the last price of a series, computed with the vectorized functions"""
+    prices = _as_array(prices)
+    if len(prices) == 0:
+        return {}
+
+    def last(series: np.ndarray, default: float) -> float:
+        value = series[-1] if len(series) else np.nan
+        return float(default if np.isnan(value) else value)
+
+    price = float(prices[-1])
+    sma_20 = last(sma(prices, 20), price)
+    sma_50 = last(sma(prices, 50), sma_20)
+    ema_12 = last(ema(prices, 12), price)
+    ema_26 = last(ema(prices, 26), price)
+    macd_line, macd_signal, _ = macd(prices)
+    _, bb_upper, bb_lower = bollinger_bands(prices)
+    returns = np.diff(np.log(prices[prices > 0]))[-volatility_window:]
+
+    return {
+        'sma_20': sma_20,
+        'sma_50': sma_50,
+        'sma_200': last(sma(prices, 200), sma_50),
+        'ema_12': ema_12,
+        'ema_26': ema_26,
+        'rsi': last(rsi(prices), 50.0),
+        'macd': last(macd_line, ema_12 - ema_26),
+        'macd_signal': last(macd_signal, 0.0),
+        'bb_upper': last(bb_upper, price),
+        'bb_lower': last(bb_lower, price),
+        'current_price': price,
+        'volatility': float(np.std(returns) * np.sqrt(252)) if len(returns) > 1 else 0.0
+    }
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Price Store
+In-memory per-symbol ring buffers for recent prices, and a write-behind SQLite
+writer that batches inserts on one long-lived WAL-mode connection
+"""
+
+import atexit
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PriceRingBuffer:
+    """Fixed-size NumPy-backed buffer of a symbol's most recent prices"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.empty(capacity, dtype=float)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, price: float):
+        self._data[self._next] = price
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, prices: Iterable[float]):
+        for price in prices:
+            self.append(price)
+
+    @property
+    def last(self) -> Optional[float]:
+        return float(self._data[self._next - 1]) if self._count else None
+
+    def latest(self, limit: Optional[int] = None) -> np.ndarray:
+        """Up to `limit` most recent prices in chronological order (a copy)"""
+        count = self._count if limit is None else min(limit, self._count)
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._data[start:start + count].copy()
+        return np.concatenate((self._data[start:], self._data[:self._next]))
+
+
+class SQLiteWriteBehind:
+    """
+    Buffers writes and applies them in batches on one shared connection
+
+    Statements are executed in the order they were queued; consecutive rows for the
+    same statement go through a single executemany. A background thread flushes every
+    `flush_interval` seconds or as soon as `batch_size` rows are waiting. Reads through
+    query() flush first, so callers always see their own writes.
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = 1.0, batch_size: int = 500):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        self._db_lock = threading.RLock()
+        self._pending: List[Tuple[str, Sequence]] = []
+        self._pending_lock = threading.Condition()
+        self._running = True
+        self.stats = {'rows_written': 0, 'batches': 0, 'errors': 0}
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def executescript(self, script: str):
+        """Run DDL immediately (schema setup)"""
+        with self._db_lock:
+            self.conn.executescript(script)
+            self.conn.commit()
+
+    def enqueue(self, sql: str, params: Sequence):
+        """Queue one row for the next batch"""
+        with self._pending_lock:
+            self._pending.append((sql, params))
+            if len(self._pending) >= self.batch_size:
+                self._pending_lock.notify()
+
+    def pending_count(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Flush queued writes, then run a read on the shared connection"""
+        with self._db_lock:
+            self.flush()
+            return self.conn.execute(sql, params).fetchall()
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written"""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+
+        with self._db_lock:
+            try:
+                start = 0
+                while start < len(batch):
+                    sql = batch[start][0]
+                    end = start
+                    while end < len(batch) and batch[end][0] == sql:
+                        end += 1
+                    self.conn.executemany(sql, [params for _, params in batch[start:end]])
+                    start = end
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                self.stats['errors'] += 1
+                logger.error(f"Error writing batch of {len(batch)} rows to {self.db_path}: {e}")
+                return 0
+
+        self.stats['rows_written'] += len(batch)
+        self.stats['batches'] += 1
+        return len(batch)
+
+    def _run(self):
+        while self._running:
+            with self._pending_lock:
+                if len(self._pending) < self.batch_size:
+                    self._pending_lock.wait(self.flush_interval)
+            self.flush()
+
+    def close(self):
+        """Flush remaining writes and stop the background thread"""
+        if not self._running:
+            return
+        self._running = False
+        with self._pending_lock:
+            self._pending_lock.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self.conn.close()
+
+
+class PriceHistory:
+    """Per-symbol ring buffers in front of a price history table"""
+
+    def __init__(self, writer: SQLiteWriteBehind, table: str, capacity: int = 500):
+        self.writer = writer
+        self.table = table
+        self.capacity = capacity
+        self._buffers: Dict[str, PriceRingBuffer] = {}
+        # Symbols are scanned from a worker pool while ticks arrive on another thread
+        self._lock = threading.RLock()
+
+    def buffer(self, symbol: str) -> PriceRingBuffer:
+        """Ring buffer for a symbol, loaded from the table the first time it's seen"""
+        with self._lock:
+            ring = self._buffers.get(symbol)
+            if ring is None:
+                ring = PriceRingBuffer(self.capacity)
+                rows = self.writer.query(
+                    f'SELECT price FROM {self.table} WHERE symbol = ? ORDER BY timestamp DESC LIMIT ?',
+                    (symbol, self.capacity)
+                )
+                ring.extend(row[0] for row in reversed(rows))
+                self._buffers[symbol] = ring
+            return ring
+
+    def append(self, symbol: str, price: float, insert_sql: str, params: Sequence):
+        """Record a price in memory and queue its history row"""
+        with self._lock:
+            self.buffer(symbol).append(price)
+        self.writer.enqueue(insert_sql, params)
+
+    def latest(self, symbol: str, limit: int) -> List[float]:
+        """Most recent prices in chronological order, from memory when the buffer covers them"""
+        if limit <= self.capacity:
+            with self._lock:
+                return self.buffer(symbol).latest(limit).tolist()
+        rows = self.writer.query(
+            f'SELECT price FROM {self.table} WHERE symbol = ? ORDER BY timestamp DESC LIMIT ?',
+            (symbol, limit)
+        )
+        return [row[0] for row in reversed(rows)]
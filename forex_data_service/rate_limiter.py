@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter
+Thread-safe token bucket used to pace calls to upstream data providers
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow `rate` calls per second on average with bursts of up to `capacity` calls.
+
+    acquire() blocks only as long as needed for a token to become available, so
+    concurrent fetches proceed at full speed until the provider's budget is used up.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens: float = 1):
+        """Block until `tokens` are available, then consume them"""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
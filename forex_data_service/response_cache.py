@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Bounded LRU + TTL cache with single-flight loading for the forex data service
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight:
+    """A load in progress that concurrent callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """Thread-safe cache bounded by entry count and approximate JSON size.
+
+    Entries expire after their TTL and the least recently used entries are evicted
+    once either bound is exceeded. get_or_load() coalesces concurrent misses so only
+    one caller per key goes upstream while the others wait for its result.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: float = 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'coalesced': 0}
+
+    @staticmethod
+    def _size_of(value: Any) -> int:
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+
+    def _lookup(self, key: str, now: float):
+        """Return (found, value) for a live entry; caller must hold the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry['expires_at'] <= now:
+            self._remove(key)
+            self.stats['expirations'] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry['value']
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            self.stats['hits' if found else 'misses'] += 1
+            return value if found else default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        size = self._size_of(value)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key}: {size} bytes exceeds cache bound")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                'value': value,
+                'size': size,
+                'expires_at': time.time() + (self.default_ttl if ttl is None else ttl)
+            }
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats['evictions'] += 1
+
+    def coalesce(self, key: str, fn: Callable[[], Any]):
+        """Run fn() once for all concurrent callers using the same key, without caching the result.
+
+        Exceptions raised by fn propagate to every waiter.
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _InFlight()
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            call.done.set()
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None):
+        """Return the cached value for key, calling loader() at most once across concurrent misses.
+
+        A loader result of None is returned to every waiter but not cached, so fallback
+        responses (mock data, upstream errors) are retried on the next request.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def load_and_store():
+            # Another caller may have filled the entry between our miss and taking the lead
+            with self._lock:
+                found, cached = self._lookup(key, time.time())
+            if found:
+                return cached
+            loaded = loader()
+            if loaded is not None:
+                self.set(key, loaded, ttl)
+            return loaded
+
+        return self.coalesce(key, load_and_store)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'in_flight': len(self._in_flight)
+            }
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Scan Scheduler
+Runs a per-symbol scan on a worker pool, each symbol on its own fixed cadence
+"""
+
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ScanScheduler:
+    """
+    Dispatches scan(symbol) for every symbol once per `interval` seconds
+
+    Each symbol keeps its own due time, advanced by whole intervals so cadence does
+    not drift with scan duration. A symbol whose previous scan is still running when
+    it comes due is skipped rather than queued, so it is never scanned twice at once;
+    slots missed because the dispatcher fell behind are skipped the same way.
+
+    Scans run on a thread pool: they read the caller's in-memory state (price buffers,
+    indicator states), which a process pool could not share.
+    """
+
+    def __init__(self, scan: Callable[[str], Any], interval: float,
+                 symbols: Callable[[], Iterable[str]], workers: int = 4,
+                 on_result: Optional[Callable[[str, Any], None]] = None, name: str = 'scan'):
+        self.scan = scan
+        self.interval = interval
+        self.symbols = symbols
+        self.workers = workers
+        self.on_result = on_result
+        self.name = name
+
+        self._executor = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._due: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+        self._running: Set[str] = set()
+        self.stats = {
+            'cycles': 0,
+            'scans_started': 0,
+            'scans_completed': 0,
+            'scans_skipped': 0,
+            'errors': 0,
+            'last_cycle_lag': 0.0,
+            'max_cycle_lag': 0.0,
+            'total_cycle_lag': 0.0
+        }
+
+    def start(self):
+        """Start the worker pool and dispatcher thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"{self.name} scheduler started ({self.workers} workers, "
+                    f"{self.interval}s interval)")
+
+    def stop(self, wait: bool = True):
+        """Stop dispatching and shut the pool down"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+        logger.info(f"{self.name} scheduler stopped")
+
+    def _add_new_symbols(self, now: float):
+        for symbol in self.symbols():
+            if symbol not in self._scheduled:
+                self._scheduled.add(symbol)
+                heapq.heappush(self._due, (now, symbol))
+
+    def dispatch_due(self, now: Optional[float] = None) -> int:
+        """Submit scans for every symbol that is due; returns the number submitted"""
+        now = time.monotonic() if now is None else now
+        self._add_new_symbols(now)
+        active = set(self.symbols())
+
+        submitted = 0
+        cycle_lag = None
+        while self._due and self._due[0][0] <= now:
+            due, symbol = heapq.heappop(self._due)
+            if symbol not in active:
+                self._scheduled.discard(symbol)
+                continue
+
+            # Whole intervals that passed without a dispatch are skipped, not replayed
+            missed = int((now - due) // self.interval)
+            next_due = due + (missed + 1) * self.interval
+            heapq.heappush(self._due, (next_due, symbol))
+            cycle_lag = max(cycle_lag or 0.0, now - due - missed * self.interval)
+
+            with self._lock:
+                self.stats['scans_skipped'] += missed
+                if symbol in self._running:
+                    self.stats['scans_skipped'] += 1
+                    continue
+                self._running.add(symbol)
+                self.stats['scans_started'] += 1
+
+            future = self._executor.submit(self.scan, symbol)
+            future.add_done_callback(lambda f, s=symbol: self._scan_done(s, f))
+            submitted += 1
+
+        if cycle_lag is not None:
+            with self._lock:
+                self.stats['cycles'] += 1
+                self.stats['last_cycle_lag'] = cycle_lag
+                self.stats['max_cycle_lag'] = max(self.stats['max_cycle_lag'], cycle_lag)
+                self.stats['total_cycle_lag'] += cycle_lag
+        return submitted
+
+    def _scan_done(self, symbol: str, future: Future):
+        with self._lock:
+            self._running.discard(symbol)
+            self.stats['scans_completed'] += 1
+        try:
+            result = future.result()
+            if self.on_result:
+                self.on_result(symbol, result)
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            logger.error(f"Error scanning {symbol}: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.dispatch_due()
+            except Exception as e:
+                logger.error(f"Error in {self.name} scheduler: {e}")
+            # Wake for the next due symbol, or soon enough to pick up new ones
+            wait = min(self._due[0][0] - time.monotonic(), 1.0) if self._due else 1.0
+            self._stop.wait(max(wait, 0.01))
+
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+            in_flight = len(self._running)
+        total_lag = stats.pop('total_cycle_lag')
+        return {
+            **stats,
+            'avg_cycle_lag': total_lag / stats['cycles'] if stats['cycles'] else 0.0,
+            'in_flight': in_flight,
+            'symbols': len(self._scheduled),
+            'workers': self.workers,
+            'interval': self.interval
+        }
@@ -9,9 +9,16 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import logging
 import os
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import random
 
+from swing_engine import analyze_structure
+from candle_store import CandleStore
+from response_cache import ResponseCache
+from rate_limiter import TokenBucket
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +40,20 @@ def create_session_with_retries():
 # Set up custom session for requests
 session = create_session_with_retries()
 
+BINANCE_PRICE_URL = "https://api.binance.com/api/v3/ticker/price"
+
+# Bulk endpoints fan out per-symbol work on a bounded pool; token buckets pace each
+# provider instead of sleeping before every call
+fetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BULK_FETCH_WORKERS', 8)), thread_name_prefix='bulk-fetch'
+)
+yfinance_limiter = TokenBucket(
+    rate=float(os.environ.get('YFINANCE_RATE_PER_SEC', 2)), capacity=float(os.environ.get('YFINANCE_BURST', 5))
+)
+binance_limiter = TokenBucket(
+    rate=float(os.environ.get('BINANCE_RATE_PER_SEC', 10)), capacity=float(os.environ.get('BINANCE_BURST', 20))
+)
+
 app = Flask(__name__)
 
 # Enhanced CORS configuration for deployment
@@ -62,10 +83,22 @@ def after_request(response):
     return response
 
 # Cache setup
-cache = {}
-cache_timestamp = 0
 CACHE_DURATION_SECONDS = 60  # Cache for 60 seconds
 
+# Bounded LRU + TTL response cache; concurrent misses for one key share a single upstream fetch
+cache = ResponseCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 1024)),
+    max_bytes=int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    default_ttl=CACHE_DURATION_SECONDS
+)
+
+# Persistent per-(symbol, interval) candle store; upstream is only asked for bars
+# newer than the last stored one, at most once per CACHE_DURATION_SECONDS
+CANDLE_STORE_DIR = os.environ.get(
+    'CANDLE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'candles')
+)
+candle_store = CandleStore(CANDLE_STORE_DIR, refresh_seconds=CACHE_DURATION_SECONDS)
+
 # Add root endpoint
 @app.route('/')
 def root():
@@ -94,7 +127,9 @@ def health_check():
         'status': 'healthy',
         'service': 'forex-data-service',
         'timestamp': time.time(),
-        'cache_size': len(cache)
+        'cache_size': len(cache),
+        'cache': cache.get_stats(),
+        'candle_store': candle_store.get_stats()
     })
 
 def format_symbol_for_yfinance(symbol):
@@ -143,6 +178,133 @@ def get_yfinance_interval(timeframe):
     }
     return timeframe_map.get(timeframe, '1h') # Default to '1h' if not found
 
+def get_binance_interval(timeframe):
+    """Maps frontend timeframe to a valid Binance kline interval."""
+    interval_map = {
+        '1m': '1m', '3m': '3m', '5m': '5m', '15m': '15m', '30m': '30m',
+        '1h': '1h', '4h': '4h', '1d': '1d', '1wk': '1w', '1mo': '1M',
+    }
+    return interval_map.get(timeframe, '1h')
+
+def default_history_start(interval, short_period_days=7):
+    """Start of the default history window (replaces yfinance's period='7d'/'1mo')"""
+    days = 30 if interval in ['1d', '1wk', '1mo'] else short_period_days
+    return datetime.utcnow() - timedelta(days=days)
+
+def to_utc_timestamp(value):
+    """Naive datetimes are UTC here; yfinance would otherwise read them in the exchange timezone"""
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value
+
+def normalize_yfinance_frame(data):
+    """Convert a yfinance history frame to the candle store layout (naive UTC 'time' column)"""
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    data = data.dropna(subset=['Close']).reset_index()
+    if data.empty:
+        return pd.DataFrame()
+    timestamp_col = 'Datetime' if 'Datetime' in data.columns else 'Date'
+    if data[timestamp_col].dt.tz:
+        data['time'] = data[timestamp_col].dt.tz_convert('UTC').dt.tz_localize(None)
+    else:
+        data['time'] = data[timestamp_col]
+    data.rename(columns={
+        'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
+    }, inplace=True)
+    if 'volume' not in data.columns:
+        data['volume'] = 0.0
+    return data[['time', 'open', 'high', 'low', 'close', 'volume']]
+
+def split_multi_ticker_frame(data, ticker):
+    """Pull one ticker's columns out of a yf.download(group_by='ticker') frame"""
+    if data is None or data.empty:
+        return pd.DataFrame()
+    if not isinstance(data.columns, pd.MultiIndex):
+        return data
+    if ticker not in data.columns.get_level_values(0):
+        return pd.DataFrame()
+    return data[ticker]
+
+def fetch_yfinance_candles(formatted_pair, interval, start=None, end=None):
+    """Fetch OHLCV bars from yfinance in the candle store layout (naive UTC 'time' column)"""
+    params = {'interval': interval, 'start': to_utc_timestamp(start), 'end': to_utc_timestamp(end)}
+    yfinance_limiter.acquire()
+    try:
+        data = yf.Ticker(formatted_pair).history(auto_adjust=False, **params)
+    except Exception as yf_error:
+        logger.warning(f"yfinance Ticker failed for {formatted_pair}: {str(yf_error)}")
+        data = yf.download(tickers=formatted_pair, auto_adjust=False, progress=False, timeout=30, **params)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+
+    return normalize_yfinance_frame(data)
+
+def prefetch_yfinance_candles(pairs, timeframe):
+    """Refresh the candle store for many yfinance pairs with one multi-ticker download.
+
+    Pairs whose stored range is already fresh are skipped; the rest are downloaded
+    together from the earliest bar any of them is missing.
+    """
+    interval = get_yfinance_interval(timeframe)
+    start = default_history_start(interval)
+
+    plans = {}
+    for pair in pairs:
+        formatted_pair = format_symbol_for_yfinance(pair)
+        plan = candle_store.plan_fetch(formatted_pair, interval, start)
+        if plan is not None:
+            plans[formatted_pair] = plan
+    if not plans:
+        return
+
+    since = min(plan.since for plan in plans.values())
+    logger.info(f"Bulk downloading {len(plans)} pairs from yfinance since {pd.Timestamp(since, unit='s')}")
+    yfinance_limiter.acquire()
+    data = yf.download(
+        tickers=list(plans),
+        start=to_utc_timestamp(pd.Timestamp(since, unit='s')),
+        interval=interval,
+        auto_adjust=False,
+        group_by='ticker',
+        threads=True,
+        progress=False,
+        timeout=30
+    )
+    checked_at = time.time()
+    for formatted_pair, plan in plans.items():
+        candles = normalize_yfinance_frame(split_multi_ticker_frame(data, formatted_pair))
+        candle_store.record_fetch(formatted_pair, interval, plan, candles, checked_at)
+
+def load_yfinance_candles(pair, timeframe, start_date=None, end_date=None, short_period_days=7):
+    """Serve yfinance bars for a pair from the candle store, fetching only what is missing"""
+    formatted_pair = format_symbol_for_yfinance(pair)
+    interval = get_yfinance_interval(timeframe)
+    start = start_date or default_history_start(interval, short_period_days)
+    return candle_store.load(
+        formatted_pair, interval,
+        lambda since, until: fetch_yfinance_candles(formatted_pair, interval, since, until),
+        start=start, end=end_date
+    )
+
+def load_binance_candles(pair, timeframe, start_date=None, end_date=None, limit=1000):
+    """Serve Binance bars for a pair from the candle store, fetching only what is missing"""
+    return candle_store.load(
+        pair, get_binance_interval(timeframe),
+        lambda since, until: fetch_binance_candles(pair, timeframe, since, until),
+        start=start_date, end=end_date,
+        limit=None if start_date else limit
+    )
+
+def candles_to_records(data):
+    """Format a candle DataFrame as JSON-safe records"""
+    data = data.copy()
+    data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    data = data.astype(object).where(pd.notna(data), None)
+    return data.to_dict(orient='records')
+
 
 @app.route('/api/forex-data')
 def get_forex_data():
@@ -155,113 +317,49 @@ def get_forex_data():
         if not pair:
             return jsonify({'error': 'The "pair" parameter is required.'}), 400
 
-        # Check cache first
         cache_key = f"{pair}_{timeframe}_{start_date}_{end_date}"
-        current_time = time.time()
-        
-        if cache_key in cache and (current_time - cache[cache_key]['timestamp']) < CACHE_DURATION_SECONDS:
-            logger.info(f"Returning cached data for {pair}")
-            return jsonify(cache[cache_key]['data'])
 
         # Check if the pair is a crypto pair
         if pair.endswith('USDT'):
+            def load_binance_records():
+                data = load_binance_candles(pair, timeframe, start_date, end_date)
+                return candles_to_records(data) if data is not None and not data.empty else None
+
             try:
-                data = get_binance_klines(pair, timeframe, start_date, end_date)
-                if data is None or data.empty:
+                result = cache.get_or_load(cache_key, load_binance_records)
+                if result is None:
                     logger.warning(f"No Binance data found for {pair}")
                     return jsonify({'error': f'No data found for {pair}'}), 404
-                data_copy = data.copy()
-                data_copy['time'] = data_copy['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                result = data_copy.to_dict(orient='records')
-                
-                # Cache the result
-                cache[cache_key] = {
-                    'data': result,
-                    'timestamp': current_time
-                }
-                
                 return jsonify(result)
             except Exception as e:
                 logger.error(f"Error fetching Binance data for {pair}: {str(e)}")
                 return jsonify({'error': f'An error occurred while fetching data for {pair}.'}), 500
                 
         # Continue to yfinance processing for non-crypto pairs
-        return process_yfinance_data(pair, timeframe, start_date, end_date, cache_key, current_time)
+        return process_yfinance_data(pair, timeframe, start_date, end_date, cache_key)
         
     except Exception as e:
         logger.error(f"Unexpected error in get_forex_data: {str(e)}")
         return jsonify({'error': 'Internal server error occurred.'}), 500
 
-def process_yfinance_data(pair, timeframe, start_date, end_date, cache_key, current_time):
+def process_yfinance_data(pair, timeframe, start_date, end_date, cache_key):
     """Process yfinance data with error handling"""
+    def load_yfinance_records():
+        data = load_yfinance_candles(pair, timeframe, start_date, end_date)
+        return candles_to_records(data) if not data.empty else None
+
     try:
         # Fallback to yfinance for non-crypto pairs
-        formatted_pair = format_symbol_for_yfinance(pair)
-        interval = get_yfinance_interval(timeframe)
-    
-        # Construct parameters for yfinance
-        params = {'interval': interval}
-        if start_date and end_date:
-            params['start'] = start_date
-            params['end'] = end_date
-        else:
-            # Default period if no date range is provided
-            params['period'] = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
-
-        # Fetch data from yfinance with better error handling
         try:
-            ticker = yf.Ticker(formatted_pair)
-            data = ticker.history(**params)
+            result = cache.get_or_load(cache_key, load_yfinance_records)
         except Exception as yf_error:
-            logger.warning(f"yfinance Ticker failed for {pair}: {str(yf_error)}")
-            # Try alternative method
-            try:
-                data = yf.download(
-                    tickers=formatted_pair,
-                    **params,
-                    auto_adjust=False,
-                    progress=False,
-                    timeout=30
-                )
-            except Exception as download_error:
-                logger.error(f"yfinance download also failed for {pair}: {str(download_error)}")
-                # Return mock data to prevent 500 errors
-                return get_mock_forex_data(pair, timeframe)
-
-        if data.empty:
-            logger.warning(f"No data found for {pair} with the specified parameters. Trying with a different period.")
-            try:
-                params['period'] = '1y' # Try with a longer period
-                data = yf.download(
-                    tickers=formatted_pair,
-                    **params,
-                    auto_adjust=False,
-                    progress=False,
-                    timeout=30
-                )
-            except Exception as fallback_error:
-                logger.error(f"Fallback yfinance download failed for {pair}: {str(fallback_error)}")
-                # Return mock data to prevent 500 errors
-                return get_mock_forex_data(pair, timeframe)
-
-        if data.empty:
-            logger.warning(f"Still no data for {pair}, returning mock data")
+            logger.error(f"yfinance fetch failed for {pair}: {str(yf_error)}")
+            # Return mock data to prevent 500 errors
             return get_mock_forex_data(pair, timeframe)
 
-        # Reset index to make datetime a column
-        data.reset_index(inplace=True)
-        data.rename(columns={'Datetime': 'time', 'Date': 'time'}, inplace=True)
-
-        # Format the data
-        data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        data.columns = data.columns.str.lower()
-        result = data[['time', 'open', 'high', 'low', 'close', 'volume']].to_dict(orient='records')
-
-        # Cache the result
-        cache[cache_key] = {
-            'data': result,
-            'timestamp': current_time
-        }
+        if result is None:
+            logger.warning(f"No data for {pair}, returning mock data")
+            return get_mock_forex_data(pair, timeframe)
 
         return jsonify(result)
         
@@ -338,66 +436,47 @@ def get_bulk_forex_data():
         return jsonify({'error': 'The "pairs" parameter is required.'}), 400
 
     pairs_list = pairs.split(',')
-    results = {}
+    crypto_pairs = [pair for pair in pairs_list if pair.endswith('USDT')]
+    forex_pairs = [pair for pair in pairs_list if not pair.endswith('USDT')]
 
-    for pair in pairs_list:
-        if pair.endswith('USDT'):
-            try:
-                data = get_binance_klines(pair, timeframe)
-                data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                results[pair] = data.to_dict(orient='records')
-            except Exception as e:
-                logger.error(f"Error fetching Binance data for {pair}: {str(e)}")
-                results[pair] = []
-        else:
-            # yfinance logic for non-crypto pairs
-            formatted_pair = format_symbol_for_yfinance(pair)
-            interval = get_yfinance_interval(timeframe)
-            period = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
-            
-            try:
-                time.sleep(0.5) # Avoid rate limiting
-                logger.info(f"Fetching data for single pair: {pair} ({formatted_pair})")
-                ticker = yf.Ticker(formatted_pair)
-                data = ticker.history(
-                    period=period,
-                    interval=interval,
-                    auto_adjust=False
-                )
+    # Binance has no multi-symbol klines call, so crypto pairs load on the pool
+    # while the yfinance pairs are downloaded
+    futures = {pair: fetch_pool.submit(load_bulk_pair_records, pair, timeframe) for pair in crypto_pairs}
 
-                if not data.empty:
-                    data = data.copy()
-                    data.reset_index(inplace=True)
-                    
-                    timestamp_col = 'Datetime' if 'Datetime' in data.columns else 'Date'
-                    
-                    if data[timestamp_col].dt.tz:
-                        data[timestamp_col] = data[timestamp_col].dt.tz_convert('UTC')
-                    else:
-                        data[timestamp_col] = data[timestamp_col].dt.tz_localize('UTC')
-                    
-                    data['time'] = data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-                    data.rename(columns={
-                        'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                    }, inplace=True)
-                    
-                    required_cols = ['time', 'open', 'high', 'low', 'close']
-                    if 'volume' in data.columns:
-                        required_cols.append('volume')
-                    
-                    data.replace({np.nan: None}, inplace=True)
-                    results[pair] = data[required_cols].to_dict('records')
-                else:
-                    logger.warning(f"No data returned for {pair}")
-                    results[pair] = []
+    # One multi-ticker download refreshes every stale yfinance pair; anything it
+    # misses falls back to a per-pair fetch in load_bulk_pair_records
+    if len(forex_pairs) > 1:
+        try:
+            prefetch_yfinance_candles(forex_pairs, timeframe)
+        except Exception as e:
+            logger.warning(f"Bulk yfinance download failed, fetching pairs individually: {str(e)}")
+    futures.update({pair: fetch_pool.submit(load_bulk_pair_records, pair, timeframe) for pair in forex_pairs})
 
-            except Exception as e:
-                logger.error(f"Error fetching data for {pair}: {str(e)}")
-                results[pair] = {'error': f'Failed to fetch data for {pair}'}
+    results = {pair: futures[pair].result() for pair in pairs_list}
 
     return jsonify(results)
 
+def load_bulk_pair_records(pair, timeframe):
+    """Candle records for one pair of a bulk request (runs on fetch_pool)"""
+    if pair.endswith('USDT'):
+        try:
+            data = load_binance_candles(pair, timeframe)
+            return candles_to_records(data) if not data.empty else []
+        except Exception as e:
+            logger.error(f"Error fetching Binance data for {pair}: {str(e)}")
+            return []
+
+    # yfinance logic for non-crypto pairs
+    try:
+        data = load_yfinance_candles(pair, timeframe)
+        if not data.empty:
+            return candles_to_records(data)
+        logger.warning(f"No data returned for {pair}")
+        return []
+    except Exception as e:
+        logger.error(f"Error fetching data for {pair}: {str(e)}")
+        return {'error': f'Failed to fetch data for {pair}'}
+
 @app.route('/api/forex-price')
 def get_forex_price():
     pair = request.args.get('pair')
@@ -446,9 +525,6 @@ def get_forex_price():
 
 @app.route('/api/bulk-forex-price')
 def get_bulk_forex_price():
-    global cache, cache_timestamp
-    current_time = time.time()
-    
     pairs = request.args.get('pairs')
     if not pairs:
         return jsonify({'error': 'The "pairs" parameter is required.'}), 400
@@ -458,89 +534,125 @@ def get_bulk_forex_price():
     cached_results = {}
     pairs_to_fetch = []
     # Check cache for all pairs
-    if current_time - cache_timestamp < CACHE_DURATION_SECONDS:
-        for pair in pairs_list:
-            if pair in cache:
-                cached_results[pair] = cache[pair]
-            else:
-                pairs_to_fetch.append(pair)
-    else:
-        pairs_to_fetch = pairs_list
-        cache.clear()
+    for pair in pairs_list:
+        price_data = cache.get(f"price:{pair}")
+        if price_data is not None:
+            cached_results[pair] = price_data
+        else:
+            pairs_to_fetch.append(pair)
 
     if pairs_to_fetch:
-        fetched_data = {}
-        # Separate crypto and forex pairs for different fetching strategies
-        crypto_pairs = [p for p in pairs_to_fetch if p.endswith('USDT')]
-        forex_pairs = [p for p in pairs_to_fetch if not p.endswith('USDT')]
+        # Identical watchlists loading at the same time share one upstream fetch
+        batch_key = f"bulk-price:{','.join(sorted(pairs_to_fetch))}"
+        fetched_data = cache.coalesce(batch_key, lambda: fetch_bulk_prices(pairs_to_fetch))
+
+        # Combine cached results with newly fetched data
+        cached_results.update(fetched_data)
+
+    return jsonify(cached_results)
+
+def fetch_binance_prices(symbols):
+    """Latest prices for many Binance symbols with a single ticker/price call"""
+    binance_limiter.acquire()
+    response = session.get(
+        BINANCE_PRICE_URL, params={'symbols': json.dumps(symbols, separators=(',', ':'))}, timeout=10
+    )
+    response.raise_for_status()
+    return {item['symbol']: float(item['price']) for item in response.json()}
+
+def fetch_binance_price(symbol):
+    """Latest price for one Binance symbol"""
+    binance_limiter.acquire()
+    response = session.get(BINANCE_PRICE_URL, params={'symbol': symbol}, timeout=10)
+    response.raise_for_status()
+    return float(response.json()['price'])
+
+def fetch_binance_prices_resilient(symbols):
+    """Batch Binance prices, retrying per symbol on the pool if the batch is rejected.
+
+    Binance fails the whole batch when any symbol is invalid, so a bad symbol must not
+    take the valid ones down with it. Symbols that still fail are omitted.
+    """
+    try:
+        return fetch_binance_prices(symbols)
+    except Exception as e:
+        logger.warning(f"Batch Binance price request failed, retrying individually: {str(e)}")
+
+    futures = {symbol: fetch_pool.submit(fetch_binance_price, symbol) for symbol in symbols}
+    prices = {}
+    for symbol, future in futures.items():
+        try:
+            prices[symbol] = future.result()
+        except Exception as e:
+            logger.error(f"Error fetching Binance price for {symbol}: {str(e)}")
+    return prices
+
+def fetch_yfinance_last_prices(pairs):
+    """Latest 1m close for many yfinance pairs with a single multi-ticker download"""
+    formatted_pairs = {pair: format_symbol_for_yfinance(pair) for pair in pairs}
+    yfinance_limiter.acquire()
+    data = yf.download(
+        tickers=sorted(set(formatted_pairs.values())),
+        period='1d',       # Get data for the last day
+        interval='1m',     # Get the most recent minute-by-minute data
+        auto_adjust=True,
+        group_by='ticker', # Group data by ticker symbol
+        threads=True,      # Use multiple threads for faster downloads
+        progress=False
+    )
 
-        # Fetch crypto pairs individually using Binance API
+    prices = {}
+    for pair, formatted_pair in formatted_pairs.items():
+        pair_data = split_multi_ticker_frame(data, formatted_pair)
+        if pair_data.empty or 'Close' not in pair_data.columns:
+            continue
+        closes = pair_data['Close'].dropna()
+        if not closes.empty:
+            prices[pair] = float(closes.iloc[-1])
+    return prices
+
+def fetch_bulk_prices(pairs_to_fetch):
+    """Fetch latest prices for pairs from Binance/yfinance, caching each successful price"""
+    fetched_data = {}
+    # Separate crypto and forex pairs for different fetching strategies
+    crypto_pairs = [p for p in pairs_to_fetch if p.endswith('USDT')]
+    forex_pairs = [p for p in pairs_to_fetch if not p.endswith('USDT')]
+
+    # The yfinance download runs on the pool while Binance is queried here
+    forex_future = fetch_pool.submit(fetch_yfinance_last_prices, forex_pairs) if forex_pairs else None
+
+    # Fetch all crypto pairs in one Binance ticker/price call
+    if crypto_pairs:
+        crypto_prices = fetch_binance_prices_resilient(crypto_pairs)
         for pair in crypto_pairs:
-            try:
-                BINANCE_PRICE_URL = "https://api.binance.com/api/v3/ticker/price"
-                params = {'symbol': pair}
-                response = session.get(BINANCE_PRICE_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-                price_data = {'pair': pair, 'price': float(data['price'])}
+            if pair in crypto_prices:
+                price_data = {'pair': pair, 'price': crypto_prices[pair]}
                 fetched_data[pair] = price_data
-                cache[pair] = price_data
-            except Exception as e:
-                logger.error(f"Error fetching Binance price for {pair}: {str(e)}")
+                cache.set(f"price:{pair}", price_data)
+            else:
                 fetched_data[pair] = {'error': 'Failed to fetch data.'}
 
-        # Fetch all forex pairs in a single bulk request using yfinance
-        if forex_pairs:
-            formatted_forex_pairs = [format_symbol_for_yfinance(p) for p in forex_pairs]
-            try:
-                logger.info(f"Fetching bulk prices for: {formatted_forex_pairs}")
-                # Use yf.download for efficient bulk fetching of recent price data
-                data = yf.download(
-                    tickers=formatted_forex_pairs,
-                    period='1d',       # Get data for the last day
-                    interval='1m',     # Get the most recent minute-by-minute data
-                    auto_adjust=True,
-                    group_by='ticker', # Group data by ticker symbol
-                    threads=True       # Use multiple threads for faster downloads
-                )
-                
-                if not data.empty:
-                    for i, pair in enumerate(forex_pairs):
-                        formatted_pair = formatted_forex_pairs[i]
-                        
-                        # Access data for the specific ticker
-                        # When fetching a single ticker, yf.download doesn't create a multi-level index
-                        pair_data = data[formatted_pair] if len(formatted_forex_pairs) > 1 else data
-
-                        if not pair_data.empty and 'Close' in pair_data.columns:
-                            # Get the last valid price from the 'Close' column
-                            last_price = pair_data['Close'].dropna().iloc[-1] if not pair_data['Close'].dropna().empty else None
-                            if last_price is not None and pd.notna(last_price):
-                                price_data = {'pair': pair, 'price': float(last_price)}
-                                fetched_data[pair] = price_data
-                                cache[pair] = price_data # Update cache
-                            else:
-                                fetched_data[pair] = {'error': f'No recent price data for {pair}'}
-                        else:
-                            fetched_data[pair] = {'error': f'No data found for {pair}'}
+    # Fetch all forex pairs in a single bulk request using yfinance
+    if forex_future is not None:
+        try:
+            logger.info(f"Fetching bulk prices for: {forex_pairs}")
+            forex_prices = forex_future.result()
+            if not forex_prices:
+                logger.warning(f"yf.download returned no data for pairs: {forex_pairs}")
+            for pair in forex_pairs:
+                if pair in forex_prices:
+                    price_data = {'pair': pair, 'price': forex_prices[pair]}
+                    fetched_data[pair] = price_data
+                    cache.set(f"price:{pair}", price_data) # Update cache
                 else:
-                    logger.warning(f"yf.download returned no data for pairs: {forex_pairs}")
-                    for pair in forex_pairs:
-                        fetched_data[pair] = {'error': f'No data returned from yfinance for {pair}'}
-
-            except Exception as e:
-                logger.error(f"Error fetching bulk forex prices with yfinance: {str(e)}")
-                for pair in forex_pairs:
-                    fetched_data[pair] = {'error': 'Failed to fetch data in bulk.'}
+                    fetched_data[pair] = {'error': f'No recent price data for {pair}'}
 
-        # Update cache timestamp if any new data was fetched
-        if fetched_data:
-            cache_timestamp = time.time()
-
-        # Combine cached results with newly fetched data
-        cached_results.update(fetched_data)
+        except Exception as e:
+            logger.error(f"Error fetching bulk forex prices with yfinance: {str(e)}")
+            for pair in forex_pairs:
+                fetched_data[pair] = {'error': 'Failed to fetch data in bulk.'}
 
-    return jsonify(cached_results)
+    return fetched_data
 
 # Real-time price endpoint for single symbol
 @app.route('/api/get-price', methods=['POST'])
@@ -632,32 +744,14 @@ def analyze_symbol():
         # Get historical data for analysis
         if symbol.endswith('USDT'):
             # Use Binance for crypto
-            historical_data = get_binance_klines(symbol, timeframe, limit=100)
+            historical_data = load_binance_candles(symbol, timeframe, limit=100)
         else:
             # Use yfinance for forex/commodities
-            formatted_symbol = format_symbol_for_yfinance(symbol)
             interval = get_yfinance_interval(timeframe)
-            
-            ticker = yf.Ticker(formatted_symbol)
-            historical_data = ticker.history(
-                period='5d' if interval in ['1m', '2m', '5m'] else '1mo',
-                interval=interval,
-                auto_adjust=False
+            historical_data = load_yfinance_candles(
+                symbol, timeframe,
+                short_period_days=5 if interval in ['1m', '2m', '5m'] else 30
             )
-            
-            if not historical_data.empty:
-                historical_data.reset_index(inplace=True)
-                timestamp_col = 'Datetime' if 'Datetime' in historical_data.columns else 'Date'
-                
-                if historical_data[timestamp_col].dt.tz:
-                    historical_data[timestamp_col] = historical_data[timestamp_col].dt.tz_convert('UTC')
-                else:
-                    historical_data[timestamp_col] = historical_data[timestamp_col].dt.tz_localize('UTC')
-                
-                historical_data['time'] = historical_data[timestamp_col]
-                historical_data.rename(columns={
-                    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                }, inplace=True)
         
         if historical_data.empty:
             return jsonify({
@@ -706,30 +800,9 @@ def perform_smc_analysis(data, symbol, timeframe):
         swing_lookback = min(50, len(data) // 4)  # Use 50 or quarter of data, whichever is smaller
         
         # Find major swing highs and lows
-        major_swing_highs = []
-        major_swing_lows = []
-        
-        # Detect swing points with proper lookback
-        for i in range(swing_lookback, len(highs) - swing_lookback):
-            # Check for swing high
-            is_swing_high = True
-            current_high = highs[i]
-            for j in range(i - swing_lookback, i + swing_lookback + 1):
-                if j != i and highs[j] >= current_high:
-                    is_swing_high = False
-                    break
-            if is_swing_high:
-                major_swing_highs.append({'index': i, 'price': current_high})
-            
-            # Check for swing low
-            is_swing_low = True
-            current_low = lows[i]
-            for j in range(i - swing_lookback, i + swing_lookback + 1):
-                if j != i and lows[j] <= current_low:
-                    is_swing_low = False
-                    break
-            if is_swing_low:
-                major_swing_lows.append({'index': i, 'price': current_low})
+        structure = analyze_structure(highs, lows, closes, swing_lookback)
+        major_swing_highs = structure.swing_highs
+        major_swing_lows = structure.swing_lows
         
         # Get most recent swing points
         recent_swing_high = major_swing_highs[-1] if major_swing_highs else {'price': np.max(highs[-20:]), 'index': len(highs) - 10}
@@ -767,20 +840,17 @@ def perform_smc_analysis(data, symbol, timeframe):
             confidence += 30  # Higher confidence for primary confirmations
         
         # Additional swing point analysis for multiple timeframe confirmation
-        if len(major_swing_highs) >= 2 and len(major_swing_lows) >= 2:
-            # Check for higher highs and higher lows (uptrend)
-            if (major_swing_highs[-1]['price'] > major_swing_highs[-2]['price'] and 
-                major_swing_lows[-1]['price'] > major_swing_lows[-2]['price']):
-                confirmations.append('Higher Highs & Higher Lows Pattern')
-                if signal_type == 'BUY':
-                    confidence += 15
-                    
-            # Check for lower highs and lower lows (downtrend)
-            elif (major_swing_highs[-1]['price'] < major_swing_highs[-2]['price'] and 
-                  major_swing_lows[-1]['price'] < major_swing_lows[-2]['price']):
-                confirmations.append('Lower Highs & Lower Lows Pattern')
-                if signal_type == 'SELL':
-                    confidence += 15
+        # Check for higher highs and higher lows (uptrend)
+        if structure.trend == 'bullish':
+            confirmations.append('Higher Highs & Higher Lows Pattern')
+            if signal_type == 'BUY':
+                confidence += 15
+                
+        # Check for lower highs and lower lows (downtrend)
+        elif structure.trend == 'bearish':
+            confirmations.append('Lower Highs & Lower Lows Pattern')
+            if signal_type == 'SELL':
+                confidence += 15
         
         # Market structure analysis
         recent_highs = highs[-10:]
@@ -886,12 +956,7 @@ def get_session_quality():
 def get_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=1000):
     """Enhanced Binance klines function with limit parameter"""
     BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
-    
-    interval_map = {
-        '1m': '1m', '3m': '3m', '5m': '5m', '15m': '15m', '30m': '30m',
-        '1h': '1h', '4h': '4h', '1d': '1d', '1wk': '1w', '1mo': '1M',
-    }
-    binance_interval = interval_map.get(timeframe, '1h')
+    binance_interval = get_binance_interval(timeframe)
 
     params = {
         'symbol': symbol,
@@ -905,6 +970,7 @@ def get_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=
         params['endTime'] = int(pd.to_datetime(end_date).timestamp() * 1000)
 
     try:
+        binance_limiter.acquire()
         response = session.get(BINANCE_API_URL, params=params)
         response.raise_for_status()
         klines = response.json()
@@ -926,6 +992,30 @@ def get_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=
         logger.error(f"Error fetching Binance klines for {symbol}: {e}")
         return pd.DataFrame()
 
+def fetch_binance_candles(symbol, timeframe, start_date=None, end_date=None, page_size=1000):
+    """Fetch every Binance bar from start_date to end_date, a page of klines at a time
+
+    Binance caps each klines response, so a long window is walked forward from the
+    last bar of each page until a short page or the end date. Without a start date
+    only the most recent page is fetched.
+    """
+    if start_date is None:
+        return get_binance_klines(symbol, timeframe, None, end_date, limit=page_size)
+
+    end = pd.to_datetime(end_date) if end_date is not None else None
+    since = pd.to_datetime(start_date)
+    pages = []
+    while True:
+        page = get_binance_klines(symbol, timeframe, since, end_date, limit=page_size)
+        if page.empty:
+            break
+        pages.append(page)
+        last = page['time'].iloc[-1]
+        if len(page) < page_size or (end is not None and last >= end):
+            break
+        since = last + pd.Timedelta(milliseconds=1)
+    return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+
 # Add error handling for startup
 def create_instance_directory():
     """Create instance directory if it doesn't exist"""
@@ -1046,6 +1136,50 @@ def get_mock_forex_news():
         }
     ]
 
+def mock_crypto_price(pair):
+    return 50000.0 if 'BTC' in pair else 3000.0 if 'ETH' in pair else 100.0
+
+def mock_forex_price(pair):
+    return 1.0850 if 'EUR' in pair else 1.2500 if 'GBP' in pair else 110.0 if 'JPY' in pair else 1.0000
+
+def price_payload(pair, price, source):
+    return {
+        'pair': pair,
+        'price': price,
+        'timestamp': datetime.now().isoformat(),
+        'source': source
+    }
+
+def get_real_time_price_data(pair):
+    """Real-time price payload for one pair, falling back to a mock price"""
+    # Check if the pair is a crypto pair
+    if pair.endswith('USDT'):
+        try:
+            return price_payload(pair, fetch_binance_price(pair), 'binance')
+        except Exception as e:
+            logger.error(f"Error fetching Binance price for {pair}: {str(e)}")
+            # Return mock price for crypto
+            return price_payload(pair, mock_crypto_price(pair), 'mock')
+
+    # For forex pairs, try to get current price
+    formatted_pair = format_symbol_for_yfinance(pair)
+    
+    try:
+        # Try to get info directly from yfinance
+        yfinance_limiter.acquire()
+        ticker = yf.Ticker(formatted_pair)
+        info = ticker.info
+        
+        if info and isinstance(info, dict):
+            price = info.get('regularMarketPrice') or info.get('bid') or info.get('ask')
+            if price and price > 0:
+                return price_payload(pair, float(price), 'yfinance')
+    except Exception as info_error:
+        logger.warning(f"Failed to get ticker info for {pair}: {str(info_error)}")
+    
+    # If all else fails, return mock price based on pair
+    return price_payload(pair, mock_forex_price(pair), 'mock')
+
 @app.route('/api/real-time-price/<pair>')
 def get_real_time_price_simple(pair):
     """Get real-time price for a single forex pair - simplified version"""
@@ -1053,91 +1187,55 @@ def get_real_time_price_simple(pair):
         if not pair:
             return jsonify({'error': 'Pair parameter is required'}), 400
 
-        # Check if the pair is a crypto pair
-        if pair.endswith('USDT'):
-            try:
-                BINANCE_PRICE_URL = "https://api.binance.com/api/v3/ticker/price"
-                params = {'symbol': pair}
-                response = session.get(BINANCE_PRICE_URL, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                return jsonify({
-                    'pair': pair,
-                    'price': float(data['price']),
-                    'timestamp': datetime.now().isoformat(),
-                    'source': 'binance'
-                })
-            except Exception as e:
-                logger.error(f"Error fetching Binance price for {pair}: {str(e)}")
-                # Return mock price for crypto
-                return jsonify({
-                    'pair': pair,
-                    'price': 50000.0 if 'BTC' in pair else 3000.0 if 'ETH' in pair else 100.0,
-                    'timestamp': datetime.now().isoformat(),
-                    'source': 'mock'
-                })
-
-        # For forex pairs, try to get current price
-        formatted_pair = format_symbol_for_yfinance(pair)
-        
-        try:
-            # Try to get info directly from yfinance
-            ticker = yf.Ticker(formatted_pair)
-            info = ticker.info
-            
-            if info and isinstance(info, dict):
-                price = info.get('regularMarketPrice') or info.get('bid') or info.get('ask')
-                if price and price > 0:
-                    return jsonify({
-                        'pair': pair,
-                        'price': float(price),
-                        'timestamp': datetime.now().isoformat(),
-                        'source': 'yfinance'
-                    })
-        except Exception as info_error:
-            logger.warning(f"Failed to get ticker info for {pair}: {str(info_error)}")
-        
-        # If all else fails, return mock price based on pair
-        mock_price = 1.0850 if 'EUR' in pair else 1.2500 if 'GBP' in pair else 110.0 if 'JPY' in pair else 1.0000
-        
-        return jsonify({
-            'pair': pair,
-            'price': mock_price,
-            'timestamp': datetime.now().isoformat(),
-            'source': 'mock'
-        })
+        return jsonify(get_real_time_price_data(pair))
         
     except Exception as e:
         logger.error(f"Error in get_real_time_price_simple: {str(e)}")
-        return jsonify({
-            'pair': pair,
-            'price': 1.0850,
-            'timestamp': datetime.now().isoformat(),
-            'source': 'fallback'
-        })
+        return jsonify(price_payload(pair, 1.0850, 'fallback'))
 
 @app.route('/api/real-time-prices')
 def get_real_time_prices_bulk():
     """Get real-time prices for multiple forex pairs"""
     try:
         pairs = request.args.get('pairs', 'EUR/USD,GBP/USD,USD/JPY,USD/CHF')
-        pairs_list = pairs.split(',')
+        pairs_list = [pair.strip() for pair in pairs.split(',') if pair.strip()]
+        crypto_pairs = [pair for pair in pairs_list if pair.endswith('USDT')]
+        forex_pairs = [pair for pair in pairs_list if not pair.endswith('USDT')]
         
         results = {}
-        for pair in pairs_list:
-            pair = pair.strip()
-            if pair:
-                # Get price for each pair
-                price_data = get_real_time_price_simple(pair)
-                if price_data.status_code == 200:
-                    results[pair] = price_data.json
+
+        # The yfinance download runs on the pool while Binance is queried here
+        forex_future = fetch_pool.submit(fetch_yfinance_last_prices, forex_pairs) if forex_pairs else None
+
+        # One Binance ticker/price call for every crypto pair
+        if crypto_pairs:
+            crypto_prices = fetch_binance_prices_resilient(crypto_pairs)
+            for pair in crypto_pairs:
+                if pair in crypto_prices:
+                    results[pair] = price_payload(pair, crypto_prices[pair], 'binance')
+                else:
+                    results[pair] = price_payload(pair, mock_crypto_price(pair), 'mock')
+
+        # One yfinance multi-ticker download for every forex pair; pairs it has no
+        # recent bar for fall back to per-pair ticker info on the pool
+        if forex_future is not None:
+            try:
+                forex_prices = forex_future.result()
+            except Exception as e:
+                logger.warning(f"Bulk yfinance price download failed: {str(e)}")
+                forex_prices = {}
+
+            missing = [pair for pair in forex_pairs if pair not in forex_prices]
+            futures = {pair: fetch_pool.submit(get_real_time_price_data, pair) for pair in missing}
+            for pair in forex_pairs:
+                if pair in forex_prices:
+                    results[pair] = price_payload(pair, forex_prices[pair], 'yfinance')
                 else:
-                    results[pair] = {
-                        'pair': pair,
-                        'price': 1.0850 if 'EUR' in pair else 1.2500 if 'GBP' in pair else 110.0 if 'JPY' in pair else 1.0000,
-                        'timestamp': datetime.now().isoformat(),
-                        'source': 'fallback'
-                    }
+                    try:
+                        results[pair] = futures[pair].result()
+                    except Exception as e:
+                        logger.error(f"Error fetching price for {pair}: {str(e)}")
+                        results[pair] = price_payload(pair, mock_forex_price(pair), 'fallback')
         
         return jsonify(results)
         
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Swing Engine
+Vectorized swing point and market structure detection for OHLC arrays
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_SWING_LOOKBACK = 50
+
+
+@dataclass
+class MarketStructure:
+    """Swing points, breaks of structure and trend classification for one OHLC series"""
+    lookback: int
+    swing_high_idx: np.ndarray
+    swing_high_price: np.ndarray
+    swing_low_idx: np.ndarray
+    swing_low_price: np.ndarray
+    high_labels: List[str] = field(default_factory=list)  # 'HH' / 'LH' / 'EQ' per swing high
+    low_labels: List[str] = field(default_factory=list)   # 'HL' / 'LL' / 'EQ' per swing low
+    bos_levels: List[Dict] = field(default_factory=list)
+    trend: str = 'ranging'
+
+    @property
+    def swing_highs(self) -> List[Dict]:
+        """Swing highs in the {'index', 'price'} shape used by the SMC analysis"""
+        return [{'index': int(i), 'price': float(p)}
+                for i, p in zip(self.swing_high_idx, self.swing_high_price)]
+
+    @property
+    def swing_lows(self) -> List[Dict]:
+        """Swing lows in the {'index', 'price'} shape used by the SMC analysis"""
+        return [{'index': int(i), 'price': float(p)}
+                for i, p in zip(self.swing_low_idx, self.swing_low_price)]
+
+
+def _neighbour_extremes(values: np.ndarray, lookback: int, reducer):
+    """Return the reduced value of the `lookback` bars left and right of each candidate bar.
+
+    Candidates are the bars in [lookback, n - lookback), i.e. those with a full window
+    on both sides. Both arrays are aligned with the candidate range.
+    """
+    windows = reducer(sliding_window_view(values, lookback), axis=1)
+    # windows[k] covers values[k:k + lookback]
+    left = windows[:-lookback - 1]          # values[i - lookback:i]
+    right = windows[lookback + 1:]          # values[i + 1:i + lookback + 1]
+    return left, right
+
+
+def find_swing_points(highs, lows, lookback: int = DEFAULT_SWING_LOOKBACK):
+    """Find swing highs and lows over a whole OHLC series.
+
+    A bar is a swing high when its high is strictly greater than every other high within
+    `lookback` bars on either side (swing lows mirror this with lows). This matches the
+    nested-loop detection previously done in perform_smc_analysis, but runs as a handful
+    of vectorized NumPy passes instead of an O(n * lookback) Python loop.
+
+    Returns (high_idx, low_idx) as integer index arrays in ascending order.
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    n = len(highs)
+    empty = np.empty(0, dtype=np.int64)
+
+    if lookback < 1 or n < 2 * lookback + 1:
+        return empty, empty
+
+    centre = slice(lookback, n - lookback)
+
+    left_max, right_max = _neighbour_extremes(highs, lookback, np.max)
+    is_high = (highs[centre] > left_max) & (highs[centre] > right_max)
+
+    left_min, right_min = _neighbour_extremes(lows, lookback, np.min)
+    is_low = (lows[centre] < left_min) & (lows[centre] < right_min)
+
+    return np.flatnonzero(is_high) + lookback, np.flatnonzero(is_low) + lookback
+
+
+def _classify(prices: np.ndarray, up_label: str, down_label: str) -> List[str]:
+    """Label each swing against the previous one of the same kind"""
+    if len(prices) == 0:
+        return []
+    delta = np.diff(prices)
+    labels = np.select([delta > 0, delta < 0], [up_label, down_label], default='EQ').tolist()
+    return [''] + labels
+
+
+def _find_breaks(closes: np.ndarray, swing_idx: np.ndarray, swing_price: np.ndarray,
+                 direction: str) -> List[Dict]:
+    """Find the first close beyond each swing level before the next swing of the same kind forms.
+
+    Every bar is searched at most once per direction, so the pass stays linear in the
+    series length regardless of how many swings there are.
+    """
+    breaks = []
+    n = len(closes)
+    for k, (idx, level) in enumerate(zip(swing_idx, swing_price)):
+        stop = swing_idx[k + 1] + 1 if k + 1 < len(swing_idx) else n
+        segment = closes[idx + 1:stop]
+        if len(segment) == 0:
+            continue
+        crossed = segment > level if direction == 'bullish' else segment < level
+        if crossed.any():
+            breaks.append({
+                'index': int(idx + 1 + np.argmax(crossed)),
+                'level': float(level),
+                'swing_index': int(idx),
+                'direction': direction
+            })
+    return breaks
+
+
+def analyze_structure(highs, lows, closes, lookback: int = DEFAULT_SWING_LOOKBACK) -> MarketStructure:
+    """Detect swing points, BOS levels and HH/HL structure for a whole OHLC array"""
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+
+    high_idx, low_idx = find_swing_points(highs, lows, lookback)
+    high_price = highs[high_idx]
+    low_price = lows[low_idx]
+
+    high_labels = _classify(high_price, 'HH', 'LH')
+    low_labels = _classify(low_price, 'HL', 'LL')
+
+    bos_levels = (_find_breaks(closes, high_idx, high_price, 'bullish') +
+                  _find_breaks(closes, low_idx, low_price, 'bearish'))
+    bos_levels.sort(key=lambda b: b['index'])
+
+    trend = 'ranging'
+    if len(high_price) >= 2 and len(low_price) >= 2:
+        if high_labels[-1] == 'HH' and low_labels[-1] == 'HL':
+            trend = 'bullish'
+        elif high_labels[-1] == 'LH' and low_labels[-1] == 'LL':
+            trend = 'bearish'
+
+    return MarketStructure(
+        lookback=lookback,
+        swing_high_idx=high_idx,
+        swing_high_price=high_price,
+        swing_low_idx=low_idx,
+        swing_low_price=low_price,
+        high_labels=high_labels,
+        low_labels=low_labels,
+        bos_levels=bos_levels,
+        trend=trend
+    )
@@ -6,6 +6,8 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 backlog = 2048
 
 # Worker processes
+# Socket.IO emits and presence are shared between workers through the message
+# queue in SOCKETIO_MESSAGE_QUEUE (default REDIS_URL); see journal/socketio_cluster.py
 workers = multiprocessing.cpu_count() * 2 + 1
 worker_class = "gthread"
 worker_connections = 1000
@@ -143,19 +143,18 @@ def create_signal():
         )
         
         db.session.add(signal)
-        db.session.commit()
-        
-        logger.info(f"Created signal {signal.id} by admin {admin_id}")
+        db.session.flush()
         
-        # Create user-signal mappings for all users with matching risk tier
-        user_ids = get_users_by_risk_tier(cleaned_data['risk_tier'])
-        for user_id in user_ids:
-            UserSignal.create_user_signal_mapping(user_id, str(signal.id))
+        # Create user-signal mappings for all users with matching risk tier in the
+        # same transaction as the signal, as one set-based insert
+        mappings_created = UserSignal.bulk_create_for_risk_tier(signal.id, cleaned_data['risk_tier'])
+        db.session.commit()
         
-        logger.info(f"Created {len(user_ids)} user-signal mappings for signal {signal.id}")
+        logger.info(f"Created signal {signal.id} by admin {admin_id} with {mappings_created} user-signal mappings")
         
-        # Publish to Redis for real-time distribution
-        signal_data = signal.to_dict()
+        # Publish to Redis for real-time distribution; this also warms the payload
+        # cache, so the broadcaster and feeds reuse the encoding
+        signal_data = signal.to_cached_dict()
         redis_published = redis_service.publish_signal(signal_data)
         
         if not redis_published:
@@ -166,7 +165,7 @@ def create_signal():
             'success': True,
             'message': 'Signal created successfully',
             'signal': signal_data,
-            'users_notified': len(user_ids),
+            'users_notified': mappings_created,
             'redis_published': redis_published
         }), 201
         
@@ -1,9 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from .models import db, User, RiskPlan
+from .stats_service import get_user_counts
 from datetime import datetime, timedelta
 import json
 import requests
-from sqlalchemy import func
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -198,18 +198,11 @@ def manage_tickets():
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics"""
     try:
-        # Calculate real-time statistics
-        total_customers = User.query.count()
-        
-        # Calculate active users (logged in within last 24 hours)
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        active_users = User.query.filter(User.last_login >= yesterday).count()
-        
-        # Calculate new users today
-        today = datetime.utcnow().date()
-        new_users_today = User.query.filter(
-            func.date(User.created_at) == today
-        ).count()
+        # Calculate real-time statistics in one pass over users, shared across workers
+        counts = get_user_counts()
+        total_customers = counts['total']
+        active_users = counts['active_24h']
+        new_users_today = counts['new_today']
         
         # Calculate average response time (simulated)
         avg_response_time = "2.5 hours"
@@ -233,8 +226,8 @@ def get_dashboard_stats():
             'resolvedTicketsToday': resolved_tickets_today,
             'customerGrowth': {
                 'daily': new_users_today,
-                'weekly': new_users_today * 7,  # Simulated
-                'monthly': new_users_today * 30  # Simulated
+                'weekly': counts['new_week'],
+                'monthly': counts['new_month']
             },
             'ticketMetrics': {
                 'open': open_tickets,
@@ -732,11 +725,13 @@ def get_test_signals():
         signal_system = get_signal_system()
         signals_data = signal_system.get_user_signals(limit=20)
         
-        return jsonify({
+        from .signal_payload_cache import encode_response
+        
+        return Response(encode_response({
             'signals': signals_data,
             'total': len(signals_data),
             'message': 'Signals retrieved successfully from signal system'
-        }), 200
+        }), status=200, mimetype='application/json')
         
     except Exception as e:
         return jsonify({
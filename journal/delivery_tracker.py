@@ -0,0 +1,190 @@
+"""
+Delivery Tracker - Online User Index and Write-behind Delivery Persistence
+Keeps a user_id -> sids index for connected Socket.IO clients and persists signal
+deliveries from a background queue so broadcasting never waits on the database
+"""
+
+import os
+import queue
+import threading
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app, has_app_context
+
+from .signal_models import UserSignal, db
+
+logger = logging.getLogger(__name__)
+
+class DeliveryTracker:
+    """Tracks which users are online and records signal deliveries in bulk.
+
+    connect/disconnect keep two indexes up to date (user_id -> sids and
+    risk_tier -> user_ids), so finding the online users of a tier costs
+    O(online users in the tier) instead of a scan over every connection per user.
+    record_broadcast() only enqueues; a worker thread drains the queue and writes
+    each signal's deliveries with one set-based insert and one bulk UPDATE.
+    """
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None):
+        self.batch_size = batch_size or int(os.getenv('DELIVERY_BATCH_SIZE', '1000'))
+        self.flush_interval = flush_interval or float(os.getenv('DELIVERY_FLUSH_INTERVAL', '0.5'))
+        self.running = False
+        self.worker_thread = None
+        self.app = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, str, Set[str]]]" = queue.Queue()
+        # sid -> (user_id, risk_tier); user_id -> sids; risk_tier -> user_ids
+        self._connections: Dict[str, Tuple[str, str]] = {}
+        self._sids_by_user: Dict[str, Set[str]] = {}
+        self._users_by_tier: Dict[str, Set[str]] = {}
+        self.stats = {'enqueued': 0, 'flushes': 0, 'mappings_created': 0, 'marked_delivered': 0, 'errors': 0}
+
+    def set_app(self, app):
+        """Set the Flask app whose context the worker uses for database writes"""
+        self.app = app
+
+    def add_connection(self, sid: str, user_id: str, risk_tier: str):
+        with self._lock:
+            self._connections[sid] = (user_id, risk_tier)
+            self._sids_by_user.setdefault(user_id, set()).add(sid)
+            self._users_by_tier.setdefault(risk_tier, set()).add(user_id)
+
+    def remove_connection(self, sid: str):
+        with self._lock:
+            connection = self._connections.pop(sid, None)
+            if connection is None:
+                return
+            user_id, risk_tier = connection
+            sids = self._sids_by_user.get(user_id)
+            if sids is not None:
+                sids.discard(sid)
+                if sids:
+                    return
+                del self._sids_by_user[user_id]
+            users = self._users_by_tier.get(risk_tier)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._users_by_tier[risk_tier]
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self._sids_by_user
+
+    def sids_for(self, user_id: str) -> Set[str]:
+        with self._lock:
+            return set(self._sids_by_user.get(user_id, ()))
+
+    def online_user_ids(self, risk_tier: str) -> Set[str]:
+        with self._lock:
+            return set(self._users_by_tier.get(risk_tier, ()))
+
+    def connected_count(self, risk_tier: str) -> int:
+        """Number of connections (not distinct users) in a risk tier"""
+        with self._lock:
+            return sum(len(self._sids_by_user[user_id]) for user_id in self._users_by_tier.get(risk_tier, ()))
+
+    def record_broadcast(self, signal_id: str, risk_tier: str, online_user_ids: Optional[Set[str]] = None):
+        """Queue delivery tracking for a signal just emitted to a risk tier; never touches the database.
+
+        online_user_ids defaults to the users connected to this worker; pass the
+        cluster-wide set when emits are relayed to other workers.
+        """
+        if self.app is None and has_app_context():
+            self.app = current_app._get_current_object()
+        if not self.running:
+            self.start()
+
+        if online_user_ids is None:
+            online_user_ids = self.online_user_ids(risk_tier)
+        self._queue.put((str(signal_id), risk_tier, set(online_user_ids)))
+        self.stats['enqueued'] += 1
+
+    def _drain(self, first: Optional[Tuple[str, str, Set[str]]] = None) -> List[Tuple[str, str, Set[str]]]:
+        items = [first] if first is not None else []
+        while len(items) < self.batch_size:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _persist(self, items: Iterable[Tuple[str, str, Set[str]]]):
+        """Write a batch of queued broadcasts, merging repeated signals into one update each"""
+        merged: Dict[Tuple[str, str], Set[str]] = {}
+        for signal_id, risk_tier, user_ids in items:
+            merged.setdefault((signal_id, risk_tier), set()).update(user_ids)
+
+        for (signal_id, risk_tier), user_ids in merged.items():
+            try:
+                self.stats['mappings_created'] += UserSignal.bulk_create_for_risk_tier(signal_id, risk_tier)
+                self.stats['marked_delivered'] += UserSignal.bulk_mark_delivered(signal_id, user_ids)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.stats['errors'] += 1
+                logger.error(f"Error persisting deliveries for signal {signal_id}: {e}")
+        self.stats['flushes'] += 1
+
+    def _write(self, items: List[Tuple[str, str, Set[str]]]):
+        if self.app is not None:
+            with self.app.app_context():
+                self._persist(items)
+        else:
+            self._persist(items)
+
+    def flush(self):
+        """Persist everything queued so far on the calling thread"""
+        items = self._drain()
+        if items:
+            self._write(items)
+
+    def start(self):
+        """Start the write-behind worker thread"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+        self.worker_thread = threading.Thread(target=self._run_worker, daemon=True)
+        self.worker_thread.start()
+        logger.info("Delivery tracker started")
+
+    def stop(self):
+        """Stop the worker thread after writing whatever is still queued"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self.worker_thread:
+            self.worker_thread.join(timeout=5)
+        self.flush()
+        logger.info("Delivery tracker stopped")
+
+    def _run_worker(self):
+        while self.running:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            try:
+                self._write(self._drain(first))
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Delivery tracker error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'running': self.running,
+                'online_users': len(self._sids_by_user),
+                'connections': len(self._connections),
+                'queued': self._queue.qsize(),
+                **self.stats
+            }
+
+# Global delivery tracker instance
+delivery_tracker = DeliveryTracker()
+
+def get_delivery_tracker_stats() -> Dict[str, Any]:
+    """Get delivery tracker statistics"""
+    return delivery_tracker.get_stats()
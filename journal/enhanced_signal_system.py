@@ -7,10 +7,12 @@ This module implements a robust signal system that:
 4. Filters signals based on user preferences
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_socketio import emit
 from .models import Signal, SignalFeed, User, RiskPlan, UserSignal
 from .extensions import db, socketio
+from .signal_ingest import ingest_signals, signal_ingestor
+from .signal_payload_cache import encode_response, signal_payload_cache
 from datetime import datetime, timedelta
 import uuid
 import json
@@ -36,34 +38,34 @@ class SignalDeliveryService:
                 f"{signal_data.get('symbol')}_{signal_data.get('action')}_{signal_data.get('entryPrice')}_{datetime.utcnow().strftime('%Y%m%d%H%M')}".encode()
             ).hexdigest()
             
-            # Check if signal already exists
-            existing_signal = SignalFeed.query.filter_by(unique_key=unique_key).first()
-            if existing_signal:
-                return {'success': False, 'message': 'Signal already exists'}
-            
             # Determine if signal should be recommended based on confidence and market conditions
             confidence = signal_data.get('confidence', 85)
             is_recommended = confidence > 85 and signal_data.get('rrRatio', '1:2') != '1:1'
             
-            # Create signal feed entry (this is what users see)
-            signal_feed = SignalFeed(
-                unique_key=unique_key,
-                signal_id=signal_id,
-                pair=signal_data.get('symbol', 'EUR/USD'),
-                direction='LONG' if signal_data.get('action', 'BUY').upper() == 'BUY' else 'SHORT',
-                entry_price=str(signal_data.get('entryPrice', 1.0850)),
-                stop_loss=str(signal_data.get('stopLoss', 1.0800)),
-                take_profit=str(signal_data.get('takeProfit', 1.0950)),
-                confidence=confidence,
-                analysis=signal_data.get('analysis', 'Professional signal analysis'),
-                ict_concepts=json.dumps(signal_data.get('ictConcepts', [])),
-                timestamp=datetime.utcnow(),
-                status='active',
-                market=market_type,
-                timeframe=signal_data.get('timeframe', '1H'),
-                created_by='admin',
-                is_recommended=is_recommended
-            )
+            # Create signal feed entry (this is what users see); duplicates are skipped by the insert.
+            # It is committed below together with the admin signal so neither is stored alone.
+            inserted = ingest_signals([{
+                'unique_key': unique_key,
+                'signal_id': signal_id,
+                'pair': signal_data.get('symbol', 'EUR/USD'),
+                'direction': 'LONG' if signal_data.get('action', 'BUY').upper() == 'BUY' else 'SHORT',
+                'entry_price': str(signal_data.get('entryPrice', 1.0850)),
+                'stop_loss': str(signal_data.get('stopLoss', 1.0800)),
+                'take_profit': str(signal_data.get('takeProfit', 1.0950)),
+                'confidence': confidence,
+                'analysis': signal_data.get('analysis', 'Professional signal analysis'),
+                'ict_concepts': json.dumps(signal_data.get('ictConcepts', [])),
+                'timestamp': datetime.utcnow(),
+                'status': 'active',
+                'market': market_type,
+                'timeframe': signal_data.get('timeframe', '1H'),
+                'created_by': 'admin',
+                'is_recommended': is_recommended
+            }], commit=False)
+            if not inserted:
+                db.session.rollback()
+                return {'success': False, 'message': 'Signal already exists'}
+            signal_feed = inserted[0]
             
             # Create admin signal entry (for admin tracking)
             admin_signal = Signal(
@@ -82,26 +84,25 @@ class SignalDeliveryService:
                 created_by='admin'
             )
             
-            db.session.add(signal_feed)
             db.session.add(admin_signal)
             db.session.commit()
             
             # Emit real-time signal to all connected users
             signal_payload = {
                 'id': signal_id,
-                'pair': signal_feed.pair,
-                'direction': signal_feed.direction,
-                'entry': signal_feed.entry_price,
-                'stopLoss': signal_feed.stop_loss,
-                'takeProfit': signal_feed.take_profit,
-                'confidence': signal_feed.confidence,
-                'analysis': signal_feed.analysis,
-                'ictConcepts': json.loads(signal_feed.ict_concepts) if signal_feed.ict_concepts else [],
-                'timestamp': signal_feed.timestamp.isoformat(),
-                'status': signal_feed.status,
-                'market': signal_feed.market,
-                'timeframe': signal_feed.timeframe,
-                'is_recommended': signal_feed.is_recommended
+                'pair': signal_feed['pair'],
+                'direction': signal_feed['direction'],
+                'entry': signal_feed['entry_price'],
+                'stopLoss': signal_feed['stop_loss'],
+                'takeProfit': signal_feed['take_profit'],
+                'confidence': signal_feed['confidence'],
+                'analysis': signal_feed['analysis'],
+                'ictConcepts': json.loads(signal_feed['ict_concepts']) if signal_feed['ict_concepts'] else [],
+                'timestamp': signal_feed['timestamp'].isoformat(),
+                'status': signal_feed['status'],
+                'market': signal_feed['market'],
+                'timeframe': signal_feed['timeframe'],
+                'is_recommended': signal_feed['is_recommended']
             }
             
             # Emit to all connected users
@@ -118,6 +119,25 @@ class SignalDeliveryService:
             db.session.rollback()
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def _feed_dict(signal):
+        return {
+            'id': signal.signal_id,
+            'pair': signal.pair,
+            'direction': signal.direction,
+            'entry': signal.entry_price,
+            'stopLoss': signal.stop_loss,
+            'takeProfit': signal.take_profit,
+            'confidence': signal.confidence,
+            'analysis': signal.analysis,
+            'ictConcepts': json.loads(signal.ict_concepts) if signal.ict_concepts else [],
+            'timestamp': signal.timestamp.isoformat(),
+            'status': signal.status,
+            'market': signal.market,
+            'timeframe': signal.timeframe,
+            'is_recommended': signal.is_recommended
+        }
+    
     @staticmethod
     def get_user_signals(user_id, market_filter='all', risk_reward_filter=None):
         """
@@ -144,26 +164,12 @@ class SignalDeliveryService:
             # Order by newest first
             signals = query.order_by(SignalFeed.timestamp.desc()).limit(100).all()
             
-            # Convert to dict format
-            signal_list = []
-            for signal in signals:
-                signal_dict = {
-                    'id': signal.signal_id,
-                    'pair': signal.pair,
-                    'direction': signal.direction,
-                    'entry': signal.entry_price,
-                    'stopLoss': signal.stop_loss,
-                    'takeProfit': signal.take_profit,
-                    'confidence': signal.confidence,
-                    'analysis': signal.analysis,
-                    'ictConcepts': json.loads(signal.ict_concepts) if signal.ict_concepts else [],
-                    'timestamp': signal.timestamp.isoformat(),
-                    'status': signal.status,
-                    'market': signal.market,
-                    'timeframe': signal.timeframe,
-                    'is_recommended': signal.is_recommended
-                }
-                signal_list.append(signal_dict)
+            # Convert to dict format, encoding each signal once per version
+            signal_list = [
+                signal_payload_cache.signal('delivery_feed', signal.signal_id, signal.payload_version,
+                                            lambda signal=signal: SignalDeliveryService._feed_dict(signal))
+                for signal in signals
+            ]
             
             return {
                 'success': True,
@@ -255,10 +261,9 @@ def get_user_signals(user_id):
         
         result = SignalDeliveryService.get_user_signals(user_id, market_filter, risk_reward_filter)
         
-        if result['success']:
-            return jsonify(result), 200
-        else:
-            return jsonify(result), 400
+        # Cached signal fragments are joined into the body rather than re-encoded
+        return Response(encode_response(result), status=200 if result['success'] else 400,
+                        mimetype='application/json')
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -331,6 +336,7 @@ def clear_signals():
         SignalFeed.query.delete()
         Signal.query.delete()
         db.session.commit()
+        signal_ingestor.recent_keys.clear()
         
         return jsonify({
             'success': True,
@@ -4,6 +4,8 @@ import logging
 import yfinance as yf
 import time
 
+from .price_hub import price_hub
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -66,6 +68,18 @@ def _get_forex_price_from_yfinance(pair: str) -> float:
     return None
 
 
+def _get_forex_price(pair: str):
+    """Latest price for a pair as (price, source), preferring the price hub's shared tick"""
+    tick = price_hub.get_latest(pair, max_age=price_hub.poll_interval * 2)
+    if tick is not None:
+        return tick['price'], 'price_hub'
+
+    price = _get_forex_price_from_yfinance(pair)
+    if price is not None:
+        price_hub.publish_tick(pair, price)
+    return price, 'yfinance'
+
+
 def _get_mock_price(pair: str) -> float:
     """Get realistic mock price for fallback"""
     mock_prices = {
@@ -89,14 +103,14 @@ def get_forex_price():
         if not pair:
             return jsonify({'error': 'Pair parameter is missing.'}), 400
 
-        # Try to get real price from yfinance
-        price = _get_forex_price_from_yfinance(pair)
+        # Try to get real price from the price hub or yfinance
+        price, source = _get_forex_price(pair)
         
         if price is not None:
             return jsonify({
                 'pair': pair, 
                 'price': round(price, 5), 
-                'source': 'yfinance', 
+                'source': source, 
                 'timestamp': datetime.now().isoformat()
             })
         
@@ -179,14 +193,14 @@ def get_bulk_forex_price():
         # Process pairs individually with API calls
         for pair in pairs_list:
             try:
-                # Try to get real price from yfinance
-                price = _get_forex_price_from_yfinance(pair)
+                # Try to get real price from the price hub or yfinance
+                price, source = _get_forex_price(pair)
                 
                 if price is not None:
                     results[pair] = {
                         'pair': pair,
                         'price': round(price, 5),
-                        'source': 'yfinance',
+                        'source': source,
                         'timestamp': datetime.now().isoformat()
                     }
                 else:
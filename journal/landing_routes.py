@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify
-from .models import db, User, Trade, SignalFeed
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from .models import User, SignalFeed
+from .stats_service import get_landing_trade_stats
+from datetime import datetime
 import logging
 
 # Set up logging
@@ -14,42 +14,20 @@ landing_bp = Blueprint('landing', __name__)
 def get_landing_stats():
     """Get statistics for the landing page"""
     try:
-        # Get current date for calculations
         now = datetime.utcnow()
-        thirty_days_ago = now - timedelta(days=30)
-        
-        # Calculate funded accounts (users with successful trades)
-        funded_accounts = db.session.query(func.count(func.distinct(Trade.user_id))).filter(
-            Trade.outcome == 'Target Hit',
-            Trade.closeTime >= thirty_days_ago
-        ).scalar() or 0
-        
-        # Calculate success rate (wins / total trades in last 30 days)
-        total_trades = db.session.query(func.count(Trade.id)).filter(
-            Trade.closeTime >= thirty_days_ago
-        ).scalar() or 0
-        
-        winning_trades = db.session.query(func.count(Trade.id)).filter(
-            Trade.outcome == 'Target Hit',
-            Trade.closeTime >= thirty_days_ago
-        ).scalar() or 0
         
+        # Recent trade totals and all-time winners from one pass over trades, shared across workers
+        trade_stats = get_landing_trade_stats()
+        funded_accounts = trade_stats['funded_accounts']
+        total_trades = trade_stats['total_trades']
+        winning_trades = trade_stats['winning_trades']
         success_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        
-        # Calculate total funded amount (sum of all winning trades)
-        total_funded = db.session.query(func.sum(Trade.pnl)).filter(
-            Trade.outcome == 'Target Hit',
-            Trade.closeTime >= thirty_days_ago
-        ).scalar() or 0
+        total_funded = trade_stats['total_funded']
+        successful_traders = trade_stats['successful_traders']
         
         # Convert to millions
         total_funded_m = round(total_funded / 1000000, 1) if total_funded > 0 else 0
         
-        # Count successful traders (users with at least one win)
-        successful_traders = db.session.query(func.count(func.distinct(Trade.user_id))).filter(
-            Trade.outcome == 'Target Hit'
-        ).scalar() or 0
-        
         # Count prop firms (this would come from a separate table in a real app)
         # For now, we'll use a reasonable estimate
         prop_firms = 150
@@ -0,0 +1,40 @@
+"""
+Migration script to add a unique index on signal_feed.unique_key, removing existing duplicates
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+import os
+
+def add_signal_feed_unique_key_index():
+    """Keep the oldest row per unique_key and add the unique index signal ingestion relies on"""
+
+    # Database connection
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///journal.db')
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        # Same SQL works on SQLite and PostgreSQL
+        removed = session.execute(text("""
+            DELETE FROM signal_feed
+            WHERE id NOT IN (SELECT MIN(id) FROM signal_feed GROUP BY unique_key)
+        """)).rowcount
+        if removed:
+            print(f"Removed {removed} duplicate signal_feed rows")
+
+        session.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_signal_feed_unique_key ON signal_feed (unique_key)
+        """))
+        session.commit()
+        print("Unique index on signal_feed.unique_key is in place")
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration failed: {str(e)}")
+        raise
+    finally:
+        session.close()
+
+if __name__ == '__main__':
+    add_signal_feed_unique_key_index()
@@ -0,0 +1,36 @@
+"""
+Migration script to add the user_trade_stats table and an index on trades.closeTime
+"""
+from sqlalchemy import create_engine, inspect
+import os
+
+def add_user_trade_stats():
+    """Create the per-user stats table; rows are built lazily from trades on first read"""
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from journal.models import db, Trade, UserTradeStats
+
+    # Database connection
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///journal.db')
+    engine = create_engine(database_url)
+
+    try:
+        inspector = inspect(engine)
+        db.metadata.create_all(engine, tables=[UserTradeStats.__table__])
+        print("user_trade_stats table is in place")
+
+        if inspector.has_table('trades'):
+            existing = {index['name'] for index in inspector.get_indexes('trades')}
+            for index in Trade.__table__.indexes:
+                if index.name not in existing:
+                    index.create(engine)
+                    print(f"Created index {index.name}")
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        raise
+    finally:
+        engine.dispose()
+
+if __name__ == '__main__':
+    add_user_trade_stats()
@@ -1,5 +1,7 @@
 
 from .extensions import db
+from .signal_payload_cache import watch_status
+from .trade_stats import track_trade_stats
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
@@ -87,3 +89,102 @@ class SignalTracking(db.Model):
     outcome = db.Column(db.String(20))
     pnl = db.Column(db.Numeric(15, 2))
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+class SignalFeed(db.Model):
+    __tablename__ = 'signal_feed'
+    id = db.Column(db.Integer, primary_key=True)
+    # Dedup key for ingestion; the unique index lets inserts skip duplicates in one statement
+    unique_key = db.Column(db.String(255), nullable=False)
+    signal_id = db.Column(db.String(255), nullable=False)
+    pair = db.Column(db.String(20), nullable=False)
+    direction = db.Column(db.String(10), nullable=False)
+    entry_price = db.Column(db.String(50), nullable=False)
+    stop_loss = db.Column(db.String(50), nullable=False)
+    take_profit = db.Column(db.Text, nullable=False)
+    confidence = db.Column(db.Integer, nullable=False)
+    analysis = db.Column(db.Text)
+    ict_concepts = db.Column(db.Text)
+    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
+    status = db.Column(db.String(20), default='active')
+    market = db.Column(db.String(20), default='forex')
+    timeframe = db.Column(db.String(20))
+    created_by = db.Column(db.String(50))
+    is_recommended = db.Column(db.Boolean, default=False)
+    outcome = db.Column(db.String(50))
+    pnl = db.Column(db.Numeric(15, 2))
+    taken_by = db.Column(db.String(255))
+    taken_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('ux_signal_feed_unique_key', 'unique_key', unique=True),
+    )
+
+    @property
+    def payload_version(self):
+        """Changes whenever the serialized feed entry would"""
+        return (self.status, self.taken_at)
+
+watch_status(SignalFeed.status, 'signal_id')
+
+class Trade(db.Model):
+    __tablename__ = 'trades'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False, index=True)
+    signal_id = db.Column(db.String(255))
+    date = db.Column(db.Date)
+    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
+    asset = db.Column(db.String(50))
+    direction = db.Column(db.String(10))
+    entry_price = db.Column(db.Float)
+    exit_price = db.Column(db.Float)
+    sl = db.Column(db.Float)
+    tp = db.Column(db.Float)
+    lot_size = db.Column(db.Float)
+    trade_duration = db.Column(db.String(50))
+    notes = db.Column(db.Text)
+    outcome = db.Column(db.String(50))
+    strategy_tag = db.Column(db.String(100))
+    prop_firm = db.Column(db.String(255))
+    screenshot_url = db.Column(db.String(500))
+    pnl = db.Column(db.Numeric(15, 2))
+    closeTime = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_trades_close_time', 'closeTime'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'signal_id': self.signal_id,
+            'date': self.date.isoformat() if self.date else None,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'asset': self.asset,
+            'direction': self.direction,
+            'entry_price': self.entry_price,
+            'exit_price': self.exit_price,
+            'sl': self.sl,
+            'tp': self.tp,
+            'lot_size': self.lot_size,
+            'outcome': self.outcome,
+            'strategy_tag': self.strategy_tag,
+            'prop_firm': self.prop_firm,
+            'pnl': float(self.pnl) if self.pnl is not None else None,
+            'closeTime': self.closeTime.isoformat() if self.closeTime else None
+        }
+
+class UserTradeStats(db.Model):
+    """Running per-user trade totals, kept current as trades are flushed"""
+    __tablename__ = 'user_trade_stats'
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), primary_key=True)
+    total_trades = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    rrr_total = db.Column(db.Float, nullable=False, default=0.0)
+    # Counters keyed by strategy tag, asset and prop firm
+    strategy_counts = db.Column(db.JSON, nullable=False, default=dict)
+    pair_profit = db.Column(db.JSON, nullable=False, default=dict)
+    prop_firm_wins = db.Column(db.JSON, nullable=False, default=dict)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+track_trade_stats(Trade, UserTradeStats)
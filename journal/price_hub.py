@@ -0,0 +1,300 @@
+"""
+Price Hub - Shared Real-time Price Poller
+Polls each subscribed symbol once per interval, keeps the latest tick in memory
+and pushes price changes to Socket.IO rooms (price:<symbol>)
+"""
+
+import os
+import threading
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, Optional, Set
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def to_yfinance_symbol(symbol: str) -> str:
+    """Map a client symbol ('EUR/USD', 'EURUSD', 'BTC-USD', 'US30') to its yfinance ticker"""
+    symbol = symbol.upper().strip()
+    if '/' in symbol:
+        return symbol.replace('/', '') + '=X'
+
+    symbol_mappings = {
+        'US30': '^DJI',
+        'SPX': '^GSPC',
+        'NAS': '^IXIC'
+    }
+    if symbol in symbol_mappings:
+        return symbol_mappings[symbol]
+    if len(symbol) == 6 and symbol.isalpha():
+        return symbol + '=X'
+    return symbol
+
+
+def fetch_yfinance_prices(tickers: Iterable[str]) -> Dict[str, float]:
+    """Latest 1m close for every ticker with a single multi-ticker download"""
+    import yfinance as yf
+    import pandas as pd
+
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return {}
+
+    data = yf.download(
+        tickers=tickers,
+        period='1d',
+        interval='1m',
+        group_by='ticker',
+        threads=True,
+        progress=False,
+        timeout=10
+    )
+    if data is None or data.empty:
+        return {}
+
+    prices = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            closes = data[ticker]['Close'].dropna()
+        else:
+            closes = data['Close'].dropna()
+        if not closes.empty and closes.iloc[-1] > 0:
+            prices[ticker] = float(closes.iloc[-1])
+    return prices
+
+
+class PriceHub:
+    """Polls subscribed symbols once per interval and fans price changes out to Socket.IO rooms.
+
+    Upstream calls scale with the number of distinct symbols being watched, not with
+    the number of clients or how often they poll: every subscriber of a symbol shares
+    the same poll, and REST endpoints can read the cached tick via get_latest().
+
+    Ticks are keyed by yfinance ticker, so 'EUR/USD' and 'EURUSD' share one entry, and
+    at most max_ticks are kept: the least recently updated ticks of symbols nobody is
+    subscribed to are evicted first.
+
+    Each worker runs its own hub for the symbols its own clients watch, so updates are
+    emitted to this worker's sockets only (ignore_queue) rather than through the
+    cluster message queue, where every worker's hub would deliver the same move.
+    """
+
+    def __init__(self, poll_interval: float = None,
+                 fetcher: Callable[[Iterable[str]], Dict[str, float]] = fetch_yfinance_prices,
+                 max_ticks: int = None):
+        self.poll_interval = poll_interval or float(os.getenv('PRICE_HUB_POLL_INTERVAL', '5'))
+        self.max_ticks = max_ticks or int(os.getenv('PRICE_HUB_MAX_TICKS', '500'))
+        self.fetcher = fetcher
+        self.running = False
+        self.poller_thread = None
+        self.socketio_app = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # symbol -> sids subscribed to it; sid -> symbols it subscribed to
+        self._subscribers: Dict[str, Set[str]] = {}
+        self._subscriptions: Dict[str, Set[str]] = {}
+        # ticker -> latest tick, oldest update first
+        self._ticks: Dict[str, Dict[str, Any]] = OrderedDict()
+        self.stats = {'polls': 0, 'upstream_calls': 0, 'updates_emitted': 0, 'errors': 0, 'evicted': 0}
+
+    def set_socketio_app(self, socketio_app):
+        """Set the Socket.IO app instance"""
+        self.socketio_app = socketio_app
+
+    @staticmethod
+    def room_for(symbol: str) -> str:
+        return f"price:{symbol}"
+
+    def subscribe(self, sid: str, symbol: str) -> Optional[Dict[str, Any]]:
+        """Register a client's interest in a symbol; returns the latest tick if one is cached"""
+        ticker = to_yfinance_symbol(symbol)
+        with self._lock:
+            self._subscribers.setdefault(symbol, set()).add(sid)
+            self._subscriptions.setdefault(sid, set()).add(symbol)
+            return self._ticks.get(ticker)
+
+    def unsubscribe(self, sid: str, symbol: str):
+        with self._lock:
+            self._discard(sid, symbol)
+            symbols = self._subscriptions.get(sid)
+            if symbols is not None:
+                symbols.discard(symbol)
+                if not symbols:
+                    del self._subscriptions[sid]
+
+    def unsubscribe_all(self, sid: str):
+        """Drop every subscription held by a disconnected client"""
+        with self._lock:
+            for symbol in self._subscriptions.pop(sid, set()):
+                self._discard(sid, symbol)
+
+    def _discard(self, sid: str, symbol: str):
+        sids = self._subscribers.get(symbol)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._subscribers[symbol]
+
+    def get_latest(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached tick for a symbol if it is younger than max_age seconds"""
+        tick = self._ticks.get(to_yfinance_symbol(symbol))
+        if tick is None:
+            return None
+        if max_age is not None and time.time() - tick['received_at'] > max_age:
+            return None
+        return tick
+
+    def record_tick(self, symbol: str, price: float, source: str = 'yfinance',
+                    detail: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Store a new price for a symbol; returns the delta payload if the price changed.
+
+        `detail` holds any richer quote a REST endpoint built for the symbol (change,
+        OHLC, volume); it is kept across poller updates so the endpoint can reuse it.
+        """
+        ticker = to_yfinance_symbol(symbol)
+        now = time.time()
+        with self._lock:
+            previous = self._ticks.pop(ticker, None)
+            tick = {
+                'symbol': ticker,
+                'price': price,
+                'source': source,
+                'timestamp': datetime.utcnow().isoformat(),
+                'received_at': now,
+                'detail': detail if detail is not None else (previous or {}).get('detail')
+            }
+            self._ticks[ticker] = tick
+            if len(self._ticks) > self.max_ticks:
+                self._evict()
+
+        if previous is not None and previous['price'] == price:
+            return None
+
+        delta = {
+            'symbol': symbol,
+            'price': price,
+            'change': price - previous['price'] if previous else 0.0,
+            'timestamp': tick['timestamp']
+        }
+        return delta
+
+    def _evict(self):
+        """Drop the oldest unsubscribed ticks until the cache is back under max_ticks"""
+        subscribed = {to_yfinance_symbol(symbol) for symbol in self._subscribers}
+        for ticker in list(self._ticks):
+            if len(self._ticks) <= self.max_ticks:
+                break
+            if ticker not in subscribed:
+                del self._ticks[ticker]
+                self.stats['evicted'] += 1
+
+    def poll_once(self):
+        """Fetch every subscribed symbol in one upstream call and emit the ones that changed"""
+        with self._lock:
+            symbols = list(self._subscribers)
+        self.stats['polls'] += 1
+        if not symbols:
+            return
+
+        # Client spellings of the same ticker share one fetch and one tick
+        tickers = sorted({to_yfinance_symbol(symbol) for symbol in symbols})
+        try:
+            self.stats['upstream_calls'] += 1
+            prices = self.fetcher(tickers)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Price hub poll failed: {e}")
+            return
+
+        for ticker in tickers:
+            if ticker in prices:
+                self.publish_tick(ticker, prices[ticker])
+
+    def publish_tick(self, symbol: str, price: float, source: str = 'yfinance',
+                     detail: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Record a price and push the change to this worker's subscribers of every spelling of it.
+
+        REST endpoints that fetch a fresh price use this instead of record_tick(), so a move
+        they see first still reaches subscribers; the next poll would otherwise find no change.
+        """
+        delta = self.record_tick(symbol, price, source, detail)
+        if delta is None or not self.socketio_app:
+            return delta
+
+        ticker = to_yfinance_symbol(symbol)
+        with self._lock:
+            client_symbols = [subscribed for subscribed in self._subscribers
+                              if to_yfinance_symbol(subscribed) == ticker]
+        for client_symbol in client_symbols:
+            self.socketio_app.emit('price:update', {**delta, 'symbol': client_symbol},
+                                   room=self.room_for(client_symbol), ignore_queue=True)
+            self.stats['updates_emitted'] += 1
+        return delta
+
+    def start(self):
+        """Start the polling thread"""
+        if self.running:
+            logger.warning("Price hub is already running")
+            return
+
+        self.running = True
+        self._stop_event.clear()
+        self.poller_thread = threading.Thread(target=self._run_poller, daemon=True)
+        self.poller_thread.start()
+        logger.info(f"Price hub started (poll interval {self.poll_interval}s)")
+
+    def stop(self):
+        """Stop the polling thread"""
+        if not self.running:
+            return
+
+        self.running = False
+        self._stop_event.set()
+        if self.poller_thread:
+            self.poller_thread.join(timeout=5)
+        logger.info("Price hub stopped")
+
+    def _run_poller(self):
+        while self.running:
+            started = time.time()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Price hub error: {e}")
+            self._stop_event.wait(max(0.0, self.poll_interval - (time.time() - started)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'running': self.running,
+                'symbols': len(self._subscribers),
+                'subscribers': sum(len(sids) for sids in self._subscribers.values()),
+                'ticks': len(self._ticks),
+                **self.stats
+            }
+
+# Global price hub instance
+price_hub = PriceHub()
+
+def start_price_hub(socketio_app):
+    """
+    Start the price hub with Socket.IO app
+
+    Args:
+        socketio_app: Socket.IO app instance
+    """
+    price_hub.set_socketio_app(socketio_app)
+    price_hub.start()
+
+def stop_price_hub():
+    """Stop the price hub"""
+    price_hub.stop()
+
+def get_price_hub_stats() -> Dict[str, Any]:
+    """Get price hub statistics"""
+    return price_hub.get_stats()
@@ -210,7 +210,44 @@ class RedisService:
         except Exception as e:
             logger.error(f"Failed to get signal counter: {e}")
             return 0
-    
+
+    def cache_stats(self, name: str, stats: Dict[str, Any], ttl: float):
+        """
+        Cache computed dashboard stats for every worker
+
+        Args:
+            name: Stats name
+            stats: JSON-serializable stats
+            ttl: Time to live in seconds
+        """
+        if not self.connected:
+            return
+
+        try:
+            self.client.set(f"stats:{name}", json.dumps(stats), px=int(ttl * 1000))
+        except Exception as e:
+            logger.error(f"Failed to cache stats: {e}")
+
+    def get_cached_stats(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached dashboard stats
+
+        Args:
+            name: Stats name
+
+        Returns:
+            Dict with stats or None if missing or expired
+        """
+        if not self.connected:
+            return None
+
+        try:
+            data = self.client.get(f"stats:{name}")
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.error(f"Failed to get cached stats: {e}")
+            return None
+
     def close(self):
         """Close Redis connections"""
         try:
@@ -6,6 +6,8 @@ from .auth_middleware import session_required
 import json
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from .mailchimp_service import send_transactional_email, create_futuristic_email_template
+from streaming_export import EXPORT_CHUNK_SIZE, export_response
+from .utils import TRADE_CSV_HEADER, TRADE_EXPORT_COLUMNS, TRADE_EXPORT_TYPES, trade_export_chunks
 
 trades_bp = Blueprint('trades', __name__)
 risk_plan_bp = Blueprint('risk_plan', __name__)
@@ -112,6 +114,26 @@ def get_trades():
         'rsr': calculate_trade_results(trade)[2]
     } for trade in trades])
 
+@trades_bp.route('/trades/export', methods=['GET'])
+@jwt_required()
+def export_trades():
+    """Stream the user's trades as CSV, NDJSON or Parquet; after_id resumes an interrupted export"""
+    user_id = get_jwt_identity()
+    export_format = request.args.get('format', 'csv')
+    after_id = request.args.get('after_id', type=int)
+
+    query = Trade.query.filter_by(user_id=user_id)
+    if after_id is not None:
+        query = query.filter(Trade.id > after_id)
+    # Server-side cursor: rows are fetched EXPORT_CHUNK_SIZE at a time as the response is sent
+    trades = query.order_by(Trade.id).execution_options(stream_results=True).yield_per(EXPORT_CHUNK_SIZE)
+
+    try:
+        return export_response(trade_export_chunks(trades), export_format, filename='trades', key=['id'],
+                               columns=TRADE_EXPORT_COLUMNS, header=TRADE_CSV_HEADER, types=TRADE_EXPORT_TYPES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @trades_bp.route('/trades/<int:signal_id>', methods=['DELETE'])
 def delete_trade(signal_id):
     trade_to_delete = Trade.query.filter_by(signal_id=signal_id).first()
@@ -82,8 +82,8 @@ class SignalBroadcaster:
                 logger.warning(f"Signal {signal_id} is not active (status: {signal.status})")
                 return
             
-            # Convert signal to dict for broadcasting
-            signal_data = signal.to_dict()
+            # Cached dict whose pre-encoded JSON is spliced into the Socket.IO packet
+            signal_data = signal.to_cached_dict()
             
             # Broadcast to Socket.IO rooms
             if self.socketio_app:
@@ -1,80 +1,105 @@
 from flask import Blueprint, request, jsonify
 from .models import Signal, SignalFeed
 from .extensions import db
+from .signal_ingest import ingest_signals
 from datetime import datetime
-import hashlib
 import json
 
 signal_feed_bp = Blueprint('signal_feed', __name__)
 
+def _take_profit_str(take_profit):
+    return json.dumps(take_profit) if isinstance(take_profit, list) else str(take_profit)
+
+def _relay_rows(signal_data, unique_key):
+    """Build the signal_feed row and admin Signal for one relayed signal"""
+    # Determine if signal should be marked as recommended
+    # Logic: High confidence (>85%) + strong market conditions
+    confidence = signal_data.get('confidence', 90)
+    is_recommended = confidence > 85  # Can be enhanced with more sophisticated logic
+    timestamp = datetime.fromisoformat(signal_data.get('timestamp').replace('Z', '+00:00'))
+    
+    feed_row = {
+        'unique_key': unique_key,
+        'signal_id': signal_data.get('id'),
+        'pair': signal_data.get('pair'),
+        'direction': signal_data.get('direction'),
+        'entry_price': str(signal_data.get('entry')),
+        'stop_loss': str(signal_data.get('stopLoss')),
+        'take_profit': _take_profit_str(signal_data.get('takeProfit')),
+        'confidence': confidence,
+        'analysis': signal_data.get('analysis', ''),
+        'ict_concepts': json.dumps(signal_data.get('ictConcepts', [])),
+        'timestamp': timestamp,
+        'status': 'active',
+        'market': signal_data.get('market', 'forex'),
+        'timeframe': signal_data.get('timeframe', ''),
+        'created_by': 'admin',
+        'is_recommended': is_recommended
+    }
+    
+    # Also add to main signals table for admin tracking
+    admin_signal = Signal(
+        signal_id=signal_data.get('id'),
+        pair=signal_data.get('pair'),
+        timeframe=signal_data.get('timeframe', ''),
+        direction=signal_data.get('direction'),
+        entry_price=str(signal_data.get('entry')),
+        stop_loss=str(signal_data.get('stopLoss')),
+        take_profit=_take_profit_str(signal_data.get('takeProfit')),
+        confidence=confidence,
+        analysis=signal_data.get('analysis', ''),
+        ict_concepts=json.dumps(signal_data.get('ictConcepts', [])),
+        timestamp=timestamp,
+        status='active',
+        created_by='admin'
+    )
+    return feed_row, admin_signal
+
 @signal_feed_bp.route('/signals/relay', methods=['POST'])
 def relay_signal():
-    """Relay a signal from admin to user feed with deduplication"""
+    """Relay a signal, or a batch under 'signals', from admin to user feed with deduplication"""
     try:
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 422
         
-        signal_data = data.get('signal')
-        unique_key = data.get('uniqueKey')
-        
-        if not signal_data or not unique_key:
+        batch = data.get('signals')
+        items = batch if isinstance(batch, list) else [data]
+        if not items:
             return jsonify({'error': 'Missing signal data or unique key'}), 422
         
-        # Check if signal already exists using unique key
-        existing_signal = SignalFeed.query.filter_by(unique_key=unique_key).first()
-        if existing_signal:
-            return jsonify({'message': 'Signal already exists', 'exists': True}), 200
-        
-        # Determine if signal should be marked as recommended
-        # Logic: High confidence (>85%) + strong market conditions
-        confidence = signal_data.get('confidence', 90)
-        is_recommended = confidence > 85  # Can be enhanced with more sophisticated logic
-        
-        # Create new signal feed entry
-        new_signal_feed = SignalFeed(
-            unique_key=unique_key,
-            signal_id=signal_data.get('id'),
-            pair=signal_data.get('pair'),
-            direction=signal_data.get('direction'),
-            entry_price=str(signal_data.get('entry')),
-            stop_loss=str(signal_data.get('stopLoss')),
-            take_profit=json.dumps(signal_data.get('takeProfit')) if isinstance(signal_data.get('takeProfit'), list) else str(signal_data.get('takeProfit')),
-            confidence=confidence,
-            analysis=signal_data.get('analysis', ''),
-            ict_concepts=json.dumps(signal_data.get('ictConcepts', [])),
-            timestamp=datetime.fromisoformat(signal_data.get('timestamp').replace('Z', '+00:00')),
-            status='active',
-            market=signal_data.get('market', 'forex'),
-            timeframe=signal_data.get('timeframe', ''),
-            created_by='admin',
-            is_recommended=is_recommended
-        )
-        
-        db.session.add(new_signal_feed)
-        db.session.commit()
+        feed_rows, admin_signals = [], {}
+        for item in items:
+            signal_data = item.get('signal')
+            unique_key = item.get('uniqueKey')
+            if not signal_data or not unique_key:
+                return jsonify({'error': 'Missing signal data or unique key'}), 422
+            feed_row, admin_signal = _relay_rows(signal_data, unique_key)
+            feed_rows.append(feed_row)
+            admin_signals.setdefault(unique_key, admin_signal)
         
-        # Also add to main signals table for admin tracking
-        admin_signal = Signal(
-            signal_id=signal_data.get('id'),
-            pair=signal_data.get('pair'),
-            timeframe=signal_data.get('timeframe', ''),
-            direction=signal_data.get('direction'),
-            entry_price=str(signal_data.get('entry')),
-            stop_loss=str(signal_data.get('stopLoss')),
-            take_profit=json.dumps(signal_data.get('takeProfit')) if isinstance(signal_data.get('takeProfit'), list) else str(signal_data.get('takeProfit')),
-            confidence=signal_data.get('confidence', 90),
-            analysis=signal_data.get('analysis', ''),
-            ict_concepts=json.dumps(signal_data.get('ictConcepts', [])),
-            timestamp=datetime.fromisoformat(signal_data.get('timestamp').replace('Z', '+00:00')),
-            status='active',
-            created_by='admin'
-        )
+        # One INSERT ... ON CONFLICT DO NOTHING for the whole burst, committed with the admin signals
+        inserted_keys = {row['unique_key'] for row in ingest_signals(feed_rows, commit=False)}
         
-        db.session.add(admin_signal)
+        db.session.add_all(admin_signals[key] for key in inserted_keys)
         db.session.commit()
         
-        return jsonify({'message': 'Signal successfully relayed', 'exists': False}), 200
+        if not isinstance(batch, list):
+            if not inserted_keys:
+                return jsonify({'message': 'Signal already exists', 'exists': True}), 200
+            return jsonify({'message': 'Signal successfully relayed', 'exists': False}), 200
+        
+        # A key repeated within the batch is inserted once; later copies count as existing
+        results, seen = [], set()
+        for row in feed_rows:
+            key = row['unique_key']
+            results.append({'uniqueKey': key, 'exists': key not in inserted_keys or key in seen})
+            seen.add(key)
+        return jsonify({
+            'message': f'Relayed {len(inserted_keys)} of {len(feed_rows)} signals',
+            'relayed': len(inserted_keys),
+            'results': results
+        }), 200
         
     except Exception as e:
         db.session.rollback()
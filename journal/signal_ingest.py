@@ -0,0 +1,160 @@
+"""
+Signal Ingestion - Deduplicated Writes to the User Signal Feed
+Every producer (bot generator, admin dashboard, webhook relay) inserts feed rows
+through one path: a single INSERT ... ON CONFLICT DO NOTHING RETURNING against the
+unique index on signal_feed.unique_key, with an in-process cache of recently
+ingested keys so repeated deliveries are settled by a read instead of a write
+"""
+
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .extensions import db
+from .models import SignalFeed
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING ... RETURNING
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+class RecentKeyCache:
+    """Bounded LRU of unique keys this process has committed to signal_feed.
+
+    Feed rows can be deleted behind the cache's back (POST /api/signals/clear,
+    maintenance scripts running in other processes), so a hit only means "probably
+    a duplicate" and is confirmed against the unique index before a row is dropped.
+    A miss costs nothing: the ON CONFLICT insert settles it.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._keys:
+                return False
+            self._keys.move_to_end(key)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+                self._keys.move_to_end(key)
+            while len(self._keys) > self.capacity:
+                self._keys.popitem(last=False)
+
+    def discard_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._keys.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+class SignalIngestor:
+    """Inserts batches of signal_feed rows, skipping ones whose unique_key exists"""
+
+    def __init__(self, cache_size: int = None):
+        self.recent_keys = RecentKeyCache(cache_size or int(os.getenv('SIGNAL_DEDUP_CACHE_SIZE', '10000')))
+        self.stats = {'received': 0, 'inserted': 0, 'cache_hits': 0, 'stale_hits': 0, 'conflicts': 0}
+
+    def is_known(self, unique_key: str) -> bool:
+        """True if the key was recently ingested by this process and its row still exists"""
+        return unique_key in self.recent_keys and bool(self._confirm([unique_key]))
+
+    def _confirm(self, keys: List[str]) -> set:
+        """Keys among cache hits that still have a feed row; the rest are dropped from the cache"""
+        table = SignalFeed.__table__
+        existing = set(db.session.execute(select(table.c.unique_key).where(table.c.unique_key.in_(keys))).scalars())
+        stale = [key for key in keys if key not in existing]
+        if stale:
+            self.stats['stale_hits'] += len(stale)
+            self.recent_keys.discard_many(stale)
+        return existing
+
+    def ingest(self, rows: List[Dict[str, Any]], commit: bool = True) -> List[Dict[str, Any]]:
+        """
+        Insert feed rows and commit
+
+        Args:
+            rows: signal_feed column values; every row must carry the same keys,
+                  including unique_key
+            commit: False leaves the insert in the session's transaction so the caller
+                    can commit it together with its own rows (and roll both back on
+                    failure); the keys are then not cached
+
+        Returns:
+            The rows that were actually inserted, in input order
+        """
+        self.stats['received'] += len(rows)
+        fresh: Dict[str, Dict[str, Any]] = {}
+        hits: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            key = row['unique_key']
+            if key in fresh or key in hits:
+                continue
+            if key in self.recent_keys:
+                hits[key] = row
+            else:
+                fresh[key] = row
+
+        if hits:
+            existing = self._confirm(list(hits))
+            self.stats['cache_hits'] += len(existing)
+            fresh.update((key, row) for key, row in hits.items() if key not in existing)
+        if not fresh:
+            return []
+
+        try:
+            inserted_keys = self._insert(list(fresh.values()))
+            if commit:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if commit:
+            self.recent_keys.add_many(fresh)
+        self.stats['inserted'] += len(inserted_keys)
+        self.stats['conflicts'] += len(fresh) - len(inserted_keys)
+        return [row for key, row in fresh.items() if key in inserted_keys]
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> set:
+        table = SignalFeed.__table__
+        insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+        if insert is not None:
+            statement = (insert(table).values(rows)
+                         .on_conflict_do_nothing(index_elements=[table.c.unique_key])
+                         .returning(table.c.unique_key))
+            return set(db.session.execute(statement).scalars())
+
+        # Other databases: one lookup for the whole batch, then one multi-row insert
+        keys = [row['unique_key'] for row in rows]
+        existing = set(db.session.execute(select(table.c.unique_key).where(table.c.unique_key.in_(keys))).scalars())
+        missing = [row for row in rows if row['unique_key'] not in existing]
+        if missing:
+            db.session.execute(table.insert(), missing)
+        return {row['unique_key'] for row in missing}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'cached_keys': len(self.recent_keys), **self.stats}
+
+# Global signal ingestor instance
+signal_ingestor = SignalIngestor()
+
+def ingest_signals(rows: List[Dict[str, Any]], commit: bool = True) -> List[Dict[str, Any]]:
+    """Insert signal_feed rows through the shared ingestor; returns the inserted rows"""
+    return signal_ingestor.ingest(rows, commit)
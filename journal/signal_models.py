@@ -9,6 +9,8 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy import func, text
 import uuid
 
+from .signal_payload_cache import EncodedSignal, signal_payload_cache, watch_status
+
 db = SQLAlchemy()
 
 class Signal(db.Model):
@@ -35,6 +37,11 @@ class Signal(db.Model):
     user_signals = db.relationship('UserSignal', backref='signal', lazy='dynamic', cascade='all, delete-orphan')
     risk_mappings = db.relationship('SignalRiskMap', backref='signal', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Serves the user feed's filter, ORDER BY and keyset cursor in one index range scan
+    __table_args__ = (
+        db.Index('idx_signals_feed', 'risk_tier', 'status', 'origin', created_at.desc(), id.desc()),
+    )
+    
     def __repr__(self):
         return f'<Signal {self.id}: {self.symbol} {self.side}>'
     
@@ -58,6 +65,10 @@ class Signal(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    def to_cached_dict(self) -> EncodedSignal:
+        """to_dict() served from the payload cache, carrying its encoded JSON"""
+        return signal_payload_cache.signal('signal', self.id, (self.updated_at, self.status), self.to_dict)
+    
     @classmethod
     def create_signal(cls, symbol: str, side: str, entry_price: float, 
                      stop_loss: float, take_profit: float, risk_tier: str,
@@ -144,6 +155,67 @@ class Signal(db.Model):
             cls.status == 'active',
             cls.origin == 'admin'
         ).order_by(cls.created_at.desc()).limit(limit).all()
+    
+    @classmethod
+    def get_feed_page(cls, risk_tier: str, limit: int, before=None, since=None, user_id=None):
+        """
+        Get one page of a risk tier's signal feed, newest first, using keyset pagination
+        
+        Args:
+            risk_tier: Risk tier to filter by
+            limit: Maximum number of signals to return
+            before: (created_at, id) of the last signal on the previous page, or None
+            since: Only include signals created at or after this time
+            user_id: If given, delivery status for this user is fetched in the same query
+            
+        Returns:
+            List of (signal, delivered, delivered_at) rows; delivery fields are None
+            without user_id or when the user has no mapping for the signal
+        """
+        columns = [cls]
+        if user_id is not None:
+            columns += [UserSignal.delivered, UserSignal.delivered_at]
+        
+        query = cls._feed_query(columns, risk_tier, before, since, user_id)
+        rows = query.order_by(cls.created_at.desc(), cls.id.desc()).limit(limit).all()
+        if user_id is None:
+            return [(signal, None, None) for signal in rows]
+        return [tuple(row) for row in rows]
+    
+    @classmethod
+    def get_feed_version(cls, risk_tier: str, before=None, since=None, user_id=None) -> tuple:
+        """
+        One-row aggregate over the feed from a position, used to validate cached pages
+        
+        Covers every signal from the cursor onward: any signal added, removed or updated
+        changes the count or the latest updated_at, and with user_id any change to the
+        user's delivery rows changes the delivery aggregates.
+        """
+        columns = [func.count(cls.id), func.max(cls.updated_at)]
+        if user_id is not None:
+            columns += [func.count(UserSignal.id), func.count(UserSignal.delivered_at),
+                        func.max(UserSignal.delivered_at)]
+        return tuple(cls._feed_query(columns, risk_tier, before, since, user_id).one())
+    
+    @classmethod
+    def _feed_query(cls, columns, risk_tier: str, before=None, since=None, user_id=None):
+        query = db.session.query(*columns).filter(
+            cls.risk_tier == risk_tier.lower(),
+            cls.status == 'active',
+            cls.origin == 'admin'
+        )
+        if user_id is not None:
+            query = query.outerjoin(UserSignal, db.and_(
+                UserSignal.signal_id == cls.id,
+                UserSignal.user_id == user_id
+            ))
+        if since is not None:
+            query = query.filter(cls.created_at >= since)
+        if before is not None:
+            query = query.filter(db.tuple_(cls.created_at, cls.id) < db.tuple_(*before))
+        return query
+
+watch_status(Signal.status, 'id')
 
 class UserSignal(db.Model):
     """Tracks which users received which signals"""
@@ -157,7 +229,12 @@ class UserSignal(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     
     # Unique constraint to prevent duplicate user-signal pairs
-    __table_args__ = (db.UniqueConstraint('user_id', 'signal_id', name='unique_user_signal'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'signal_id', name='unique_user_signal'),
+        # Covering index for the feed's delivery-status join
+        db.Index('idx_user_signals_delivery', 'user_id', 'signal_id',
+                 postgresql_include=['delivered', 'delivered_at']),
+    )
     
     def __repr__(self):
         return f'<UserSignal {self.user_id}:{self.signal_id}>'
@@ -191,7 +268,35 @@ class UserSignal(db.Model):
             user_signal.delivered = True
             user_signal.delivered_at = func.now()
             db.session.commit()
-    
+
+    @classmethod
+    def bulk_mark_delivered(cls, signal_id, user_ids, chunk_size: int = 1000) -> int:
+        """
+        Mark a signal as delivered to many users with bulk UPDATEs (caller commits)
+
+        Args:
+            signal_id: Signal ID
+            user_ids: IDs of the users the signal was delivered to
+            chunk_size: Maximum users per UPDATE ... WHERE user_id IN (...)
+
+        Returns:
+            Number of mappings newly marked as delivered
+        """
+        signal_uuid = signal_id if isinstance(signal_id, uuid.UUID) else uuid.UUID(str(signal_id))
+        user_uuids = [
+            user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+            for user_id in user_ids
+        ]
+
+        updated = 0
+        for start in range(0, len(user_uuids), chunk_size):
+            updated += cls.query.filter(
+                cls.signal_id == signal_uuid,
+                cls.user_id.in_(user_uuids[start:start + chunk_size]),
+                cls.delivered.is_(False)
+            ).update({'delivered': True, 'delivered_at': func.now()}, synchronize_session=False)
+        return updated
+
     @classmethod
     def create_user_signal_mapping(cls, user_id: str, signal_id: str):
         """
@@ -219,6 +324,55 @@ class UserSignal(db.Model):
         
         return existing
 
+    @classmethod
+    def bulk_create_for_risk_tier(cls, signal_id, risk_tier: str, chunk_size: int = 5000) -> int:
+        """
+        Create user-signal mappings for every user in a risk tier with set-based inserts
+        
+        On PostgreSQL this is a single INSERT ... SELECT FROM users ... ON CONFLICT DO NOTHING;
+        other databases fall back to chunked executemany of the missing rows. Does not commit,
+        so the caller can publish the signal and its mappings in one transaction.
+        
+        Args:
+            signal_id: Signal ID
+            risk_tier: Risk tier whose users should receive the signal
+            chunk_size: Rows per executemany batch on non-PostgreSQL databases
+            
+        Returns:
+            Number of mappings inserted
+        """
+        risk_tier = risk_tier.lower()
+        signal_uuid = signal_id if isinstance(signal_id, uuid.UUID) else uuid.UUID(str(signal_id))
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            result = db.session.execute(text("""
+                INSERT INTO user_signals (id, user_id, signal_id, delivered, created_at)
+                SELECT gen_random_uuid(), u.uuid, CAST(:signal_id AS uuid), false, now()
+                FROM users u
+                WHERE u.risk_tier = :risk_tier
+                ON CONFLICT ON CONSTRAINT unique_user_signal DO NOTHING
+            """), {'signal_id': str(signal_uuid), 'risk_tier': risk_tier})
+            return result.rowcount
+        
+        user_ids = [
+            user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+            for user_id in db.session.execute(
+                text("SELECT uuid FROM users WHERE risk_tier = :risk_tier"), {'risk_tier': risk_tier}
+            ).scalars()
+        ]
+        existing = {
+            user_id for (user_id,) in
+            db.session.query(cls.user_id).filter(cls.signal_id == signal_uuid)
+        } if user_ids else set()
+        
+        rows = [
+            {'id': uuid.uuid4(), 'user_id': user_id, 'signal_id': signal_uuid, 'delivered': False}
+            for user_id in user_ids if user_id not in existing
+        ]
+        for start in range(0, len(rows), chunk_size):
+            db.session.execute(cls.__table__.insert(), rows[start:start + chunk_size])
+        return len(rows)
+
 class SignalRiskMap(db.Model):
     """Maps signals to risk tiers for efficient querying"""
     __tablename__ = 'signal_risk_map'
@@ -0,0 +1,204 @@
+"""
+Signal Payload Cache - Pre-serialized Signal JSON for Feeds and Broadcasts
+Each signal is converted to its API dict and encoded to JSON bytes once per
+version; feed responses are assembled by joining the cached fragments and
+Socket.IO emits splice the same bytes into the packet instead of re-encoding
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from sqlalchemy import event
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes (orjson when installed); unknown types fall back to str()"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode()
+
+def extend_fragment(fragment: bytes, extra: Dict[str, Any]) -> bytes:
+    """Add keys to an encoded JSON object without re-encoding it"""
+    if not extra:
+        return fragment
+    encoded = dumps(extra)
+    if fragment == b'{}':
+        return encoded
+    return fragment[:-1] + b',' + encoded[1:]
+
+class EncodedSignal(dict):
+    """A signal dict carrying its cached JSON encoding.
+
+    It behaves as the plain dict callers already use; keys added afterwards
+    (such as a broadcast sequence number) are appended when it is encoded.
+    Reassigning or removing a cached key drops the cached bytes, and the dict
+    is then encoded in full.
+    """
+
+    __slots__ = ('fragment', 'base_keys')
+
+    def __init__(self, data: Dict[str, Any], fragment: bytes = None):
+        super().__init__(data)
+        self.fragment = fragment if fragment is not None else dumps(data)
+        self.base_keys = frozenset(data)
+
+    def copy(self) -> 'EncodedSignal':
+        copied = EncodedSignal.__new__(EncodedSignal)
+        dict.update(copied, self)
+        copied.fragment, copied.base_keys = self.fragment, self.base_keys
+        return copied
+
+    def encode(self) -> bytes:
+        if self.fragment is None:
+            return dumps(dict(self))
+        if len(self) == len(self.base_keys):
+            return self.fragment
+        return extend_fragment(self.fragment, {k: v for k, v in self.items() if k not in self.base_keys})
+
+    def _touch(self, keys):
+        if self.fragment is not None and not self.base_keys.isdisjoint(keys):
+            self.fragment = None
+
+    def __setitem__(self, key, value):
+        self._touch((key,))
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._touch((key,))
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        changes = dict(*args, **kwargs)
+        self._touch(changes)
+        super().update(changes)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._touch((key,))
+        return super().setdefault(key, default)
+
+    def pop(self, key, *default):
+        self._touch((key,))
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self.fragment = None
+        return super().popitem()
+
+    def clear(self):
+        self.fragment = None
+        super().clear()
+
+    def __reduce__(self):
+        return EncodedSignal, (dict(self),)
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, EncodedSignal):
+        return value.encode()
+    if isinstance(value, list) and value and all(isinstance(item, EncodedSignal) for item in value):
+        return b'[' + b','.join(item.encode() for item in value) + b']'
+    return dumps(value)
+
+def encode_response(envelope: Dict[str, Any]) -> bytes:
+    """Encode a response object whose signal lists hold EncodedSignal entries"""
+    return b'{' + b','.join(dumps(key) + b':' + _encode_value(value) for key, value in envelope.items()) + b'}'
+
+class SocketIOJSON:
+    """json module for socketio.Server that splices cached signal bytes into packets"""
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs) -> str:
+        if isinstance(obj, list):
+            return (b'[' + b','.join(_encode_value(item) for item in obj) + b']').decode()
+        return _encode_value(obj).decode()
+
+    @staticmethod
+    def loads(s, **kwargs) -> Any:
+        return json.loads(s, **kwargs)
+
+class SignalPayloadCache:
+    """LRU of encoded signals keyed by (kind, signal id), valid for one version.
+
+    A kind names one API shape of a signal (the same row is served in several).
+    The version is whatever changes when the payload does, e.g. (updated_at,
+    status); a lookup with a different version re-encodes and replaces the entry.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(os.getenv('SIGNAL_PAYLOAD_CACHE_SIZE', '5000'))
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._kinds = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def signal(self, kind: str, signal_id: Hashable, version: Hashable,
+               build: Callable[[], Dict[str, Any]]) -> EncodedSignal:
+        """The encoded signal, building and encoding it on a miss; safe to mutate"""
+        return self._lookup(kind, signal_id, version, build).copy()
+
+    def fragment(self, kind: str, signal_id: Hashable, version: Hashable,
+                 build: Callable[[], Dict[str, Any]]) -> bytes:
+        """Just the encoded JSON object"""
+        return self._lookup(kind, signal_id, version, build).fragment
+
+    def _lookup(self, kind, signal_id, version, build) -> EncodedSignal:
+        key = (kind, str(signal_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+
+        encoded = EncodedSignal(build())
+        with self._lock:
+            self._kinds.add(kind)
+            self._entries[key] = (version, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return encoded
+
+    def invalidate(self, signal_id: Hashable):
+        """Drop every cached shape of a signal"""
+        signal_id = str(signal_id)
+        with self._lock:
+            for kind in self._kinds:
+                if self._entries.pop((kind, signal_id), None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, **self.stats}
+
+# Global signal payload cache instance
+signal_payload_cache = SignalPayloadCache()
+
+def _invalidate_on_status_change(id_attribute: str):
+    def listener(target, value, oldvalue, initiator):
+        if value != oldvalue:
+            signal_id = getattr(target, id_attribute)
+            if signal_id is not None:
+                signal_payload_cache.invalidate(signal_id)
+    return listener
+
+def watch_status(status_attribute, id_attribute: str):
+    """Invalidate a model's cached payloads whenever its status is assigned a new value"""
+    event.listen(status_attribute, 'set', _invalidate_on_status_change(id_attribute))
@@ -0,0 +1,214 @@
+"""
+Signal Pipeline - Staged Generation, Persistence and Fan-out
+Signals flow validate -> persist -> fan-out through bounded queues, one worker
+thread per stage. Persistence writes in batches and retries when the database
+is slow, and the bounded queues push back on producers instead of dropping work
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Passed down the stages to drain and stop them in order
+_STOP = object()
+
+STAGES = ('validate', 'persist', 'fan_out')
+
+class SignalPipeline:
+    """Runs signals through validate, batch persist and fan-out stages.
+
+    validate(signal) returns the item to persist, or None to drop the signal
+    (invalid or a known duplicate). persist(items) writes a batch and returns the
+    items that were actually inserted. fan_out(item) delivers one inserted item.
+    Each stage has its own bounded input queue, so a slow stage fills its queue
+    and blocks the stage before it rather than growing without limit.
+    """
+
+    def __init__(self, validate: Callable[[Any], Any], persist: Callable[[List[Any]], List[Any]],
+                 fan_out: Callable[[Any], None], queue_size: int = None, batch_size: int = None,
+                 flush_interval: float = None, max_retries: int = None, name: str = 'signals'):
+        self.validate = validate
+        self.persist = persist
+        self.fan_out = fan_out
+        self.name = name
+        self.queue_size = queue_size or int(os.getenv('SIGNAL_PIPELINE_QUEUE_SIZE', '1000'))
+        self.batch_size = batch_size or int(os.getenv('SIGNAL_PIPELINE_BATCH_SIZE', '100'))
+        self.flush_interval = flush_interval or float(os.getenv('SIGNAL_PIPELINE_FLUSH_INTERVAL', '0.5'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('SIGNAL_PIPELINE_MAX_RETRIES', '5'))
+        self.app = None
+        self.running = False
+        self._lock = threading.Lock()
+        self._queues: Dict[str, "queue.Queue"] = {}
+        self._threads: List[threading.Thread] = []
+        self._stage_stats = {stage: self._new_stage_stats() for stage in STAGES}
+        self.stats = {'submitted': 0, 'rejected': 0, 'dropped': 0, 'persisted': 0, 'duplicates': 0,
+                      'retries': 0, 'failed': 0, 'delivered': 0}
+
+    @staticmethod
+    def _new_stage_stats() -> Dict[str, float]:
+        return {'calls': 0, 'processed': 0, 'errors': 0, 'latency_total': 0.0, 'latency_max': 0.0}
+
+    def set_app(self, app):
+        """Set the Flask app whose context the stage workers run in"""
+        self.app = app
+
+    def start(self):
+        """Start one worker thread per stage"""
+        with self._lock:
+            if self.running:
+                return
+            if self.app is None and has_app_context():
+                self.app = current_app._get_current_object()
+            self._queues = {stage: queue.Queue(maxsize=self.queue_size) for stage in STAGES}
+            self._threads = [
+                threading.Thread(target=self._run_validate, name=f"{self.name}-validate", daemon=True),
+                threading.Thread(target=self._run_persist, name=f"{self.name}-persist", daemon=True),
+                threading.Thread(target=self._run_fan_out, name=f"{self.name}-fan-out", daemon=True)
+            ]
+            self.running = True
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Signal pipeline '{self.name}' started")
+
+    def submit(self, signal: Any, timeout: Optional[float] = None) -> bool:
+        """
+        Queue a signal for processing
+
+        Blocks while the first stage is full, for at most timeout seconds when
+        given. Returns False if the signal was not accepted.
+        """
+        if not self.running:
+            return False
+        try:
+            self._queues['validate'].put(signal, timeout=timeout)
+        except queue.Full:
+            self.stats['rejected'] += 1
+            return False
+        self.stats['submitted'] += 1
+        return True
+
+    def stop(self, timeout: float = 30.0):
+        """Stop accepting signals and let every stage finish what is already queued"""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+        self._queues['validate'].put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        logger.info(f"Signal pipeline '{self.name}' stopped")
+
+    def _context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+    def _record(self, stage: str, started: float, count: int = 1, error: bool = False):
+        elapsed = time.monotonic() - started
+        stats = self._stage_stats[stage]
+        stats['calls'] += 1
+        stats['processed'] += count
+        stats['errors'] += int(error)
+        stats['latency_total'] += elapsed
+        stats['latency_max'] = max(stats['latency_max'], elapsed)
+
+    def _run_validate(self):
+        with self._context():
+            while True:
+                signal = self._queues['validate'].get()
+                if signal is _STOP:
+                    self._queues['persist'].put(_STOP)
+                    return
+                started = time.monotonic()
+                try:
+                    item = self.validate(signal)
+                except Exception as e:
+                    self._record('validate', started, error=True)
+                    self.stats['dropped'] += 1
+                    logger.error(f"Signal failed validation: {e}")
+                    continue
+                self._record('validate', started)
+                if item is None:
+                    self.stats['dropped'] += 1
+                    continue
+                # Blocks while persistence is behind, which in turn fills the validate queue
+                self._queues['persist'].put(item)
+
+    def _run_persist(self):
+        with self._context():
+            stopping = False
+            while not stopping:
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        entry = self._queues['persist'].get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if entry is _STOP:
+                        stopping = True
+                        break
+                    batch.append(entry)
+                if batch:
+                    self._persist_batch(batch)
+            self._queues['fan_out'].put(_STOP)
+
+    def _persist_batch(self, items: List[Any]):
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                inserted = self.persist(items)
+            except Exception as e:
+                self._record('persist', started, count=0, error=True)
+                if attempt == self.max_retries:
+                    self.stats['failed'] += len(items)
+                    logger.error(f"Giving up on {len(items)} signals after {attempt + 1} attempts: {e}")
+                    return
+                self.stats['retries'] += 1
+                logger.warning(f"Persisting {len(items)} signals failed, retrying: {e}")
+                time.sleep(min(0.5 * 2 ** attempt, 10.0))
+                continue
+            self._record('persist', started, count=len(items))
+            break
+
+        self.stats['persisted'] += len(inserted)
+        self.stats['duplicates'] += len(items) - len(inserted)
+        for item in inserted:
+            self._queues['fan_out'].put(item)
+
+    def _run_fan_out(self):
+        with self._context():
+            while True:
+                item = self._queues['fan_out'].get()
+                if item is _STOP:
+                    return
+                started = time.monotonic()
+                try:
+                    self.fan_out(item)
+                except Exception as e:
+                    self._record('fan_out', started, error=True)
+                    logger.error(f"Signal fan-out failed: {e}")
+                    continue
+                self._record('fan_out', started)
+                self.stats['delivered'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stages = {}
+        for stage in STAGES:
+            stats = self._stage_stats[stage]
+            calls = stats['calls']
+            stages[stage] = {
+                'queue_depth': self._queues[stage].qsize() if stage in self._queues else 0,
+                'processed': stats['processed'],
+                'errors': stats['errors'],
+                'avg_latency_ms': stats['latency_total'] / calls * 1000 if calls else 0.0,
+                'max_latency_ms': stats['latency_max'] * 1000
+            }
+        return {'running': self.running, 'queue_size': self.queue_size, 'stages': stages, **self.stats}
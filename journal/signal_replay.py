@@ -0,0 +1,160 @@
+"""
+Signal Replay - Per-tier Ring Buffers of Recent Signals
+Numbers every broadcast signal with a per-tier sequence so reconnecting clients
+can fetch just the signals they missed instead of their whole history
+"""
+
+import json
+import os
+import threading
+import logging
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, List, NamedTuple, Optional
+
+from .socketio_cluster import message_queue_url, redis_available
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = int(os.getenv('SIGNAL_REPLAY_CAPACITY', '500'))
+
+
+class Replay(NamedTuple):
+    """Signals after a client's last-seen sequence.
+
+    resync is True when the gap can't be served from the buffer (evicted, or the
+    buffer was reset); the client should then refetch through /user/signals.
+    """
+    signals: List[Dict[str, Any]]
+    latest_seq: int
+    resync: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'signals': self.signals, 'latest_seq': self.latest_seq, 'resync': self.resync}
+
+
+def _replay_from(entries: List[Dict[str, Any]], oldest_seq: Optional[int], latest_seq: int,
+                 last_seq: int) -> Replay:
+    """Build a Replay given the buffered entries after last_seq and the buffer bounds"""
+    if last_seq > latest_seq:
+        # Client saw sequences this buffer never issued: the buffer was reset
+        return Replay([], latest_seq, True)
+    if last_seq == latest_seq:
+        return Replay([], latest_seq, False)
+    if oldest_seq is None or oldest_seq > last_seq + 1:
+        return Replay([], latest_seq, True)
+    return Replay(entries, latest_seq, False)
+
+
+class SignalReplayBuffer:
+    """In-memory ring buffer of the last `capacity` signals per risk tier.
+
+    Sequence numbers are consecutive per tier, so the first entry after a client's
+    last-seen sequence is found by offset and a replay costs O(missed signals).
+    Only suitable when a single worker broadcasts; see RedisSignalReplayBuffer.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, deque] = {}
+        self._latest: Dict[str, int] = {}
+
+    def append(self, risk_tier: str, signal_data: Dict[str, Any]) -> int:
+        """Buffer a signal and return its sequence number within the tier"""
+        with self._lock:
+            seq = self._latest.get(risk_tier, 0) + 1
+            self._latest[risk_tier] = seq
+            self._buffers.setdefault(risk_tier, deque(maxlen=self.capacity)).append({**signal_data, 'seq': seq})
+            return seq
+
+    def latest_seq(self, risk_tier: str) -> int:
+        return self._latest.get(risk_tier, 0)
+
+    def since(self, risk_tier: str, last_seq: int) -> Replay:
+        """Signals in a tier with sequence numbers after last_seq"""
+        with self._lock:
+            buffer = self._buffers.get(risk_tier, ())
+            latest_seq = self._latest.get(risk_tier, 0)
+            oldest_seq = buffer[0]['seq'] if buffer else None
+            entries = []
+            if oldest_seq is not None and oldest_seq <= last_seq + 1 <= latest_seq:
+                entries = list(islice(buffer, last_seq + 1 - oldest_seq, None))
+        return _replay_from(entries, oldest_seq, latest_seq, last_seq)
+
+
+class RedisSignalReplayBuffer:
+    """Ring buffer kept in a capped Redis stream per tier, shared by every worker.
+
+    Each entry's stream ID is `<seq>-0`; the sequence counter and the XADD run in
+    one Lua script so concurrent workers can't interleave IDs out of order.
+    """
+
+    _APPEND_SCRIPT = """
+    local seq = redis.call('INCR', KEYS[2])
+    redis.call('XADD', KEYS[1], 'MAXLEN', ARGV[2], seq .. '-0', 'data', ARGV[1])
+    return seq
+    """
+
+    def __init__(self, client, capacity: int = DEFAULT_CAPACITY, prefix: str = 'signals:replay'):
+        self.client = client
+        self.capacity = capacity
+        self.prefix = prefix
+        self._append = client.register_script(self._APPEND_SCRIPT)
+
+    def _keys(self, risk_tier: str):
+        stream_key = f"{self.prefix}:{risk_tier}"
+        return stream_key, f"{stream_key}:seq"
+
+    def append(self, risk_tier: str, signal_data: Dict[str, Any]) -> int:
+        """Buffer a signal and return its sequence number within the tier"""
+        seq = int(self._append(keys=self._keys(risk_tier),
+                               args=[json.dumps(signal_data, default=str), self.capacity]))
+        return seq
+
+    def latest_seq(self, risk_tier: str) -> int:
+        return int(self.client.get(self._keys(risk_tier)[1]) or 0)
+
+    def since(self, risk_tier: str, last_seq: int) -> Replay:
+        """Signals in a tier with sequence numbers after last_seq"""
+        stream_key, seq_key = self._keys(risk_tier)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(seq_key)
+        pipe.xrange(stream_key, '-', '+', count=1)
+        pipe.xrange(stream_key, f"{last_seq + 1}-0", '+', count=self.capacity)
+        latest, first, gap = pipe.execute()
+
+        oldest_seq = int(first[0][0].split('-')[0]) if first else None
+        entries = [
+            {**json.loads(fields['data']), 'seq': int(entry_id.split('-')[0])}
+            for entry_id, fields in gap
+        ]
+        return _replay_from(entries, oldest_seq, int(latest or 0), last_seq)
+
+
+_shared_buffers: Dict[str, SignalReplayBuffer] = {}
+_shared_buffers_lock = threading.Lock()
+
+
+def create_replay_buffer(url: Optional[str] = None, capacity: int = DEFAULT_CAPACITY):
+    """
+    Build the replay buffer matching the Socket.IO message queue URL
+
+    Args:
+        url: Message queue URL; defaults to SOCKETIO_MESSAGE_QUEUE, then REDIS_URL
+        capacity: Signals kept per risk tier
+
+    Returns:
+        A Redis stream buffer when Redis is reachable, a named shared in-process
+        buffer for memory:// URLs, otherwise a buffer for this worker only
+    """
+    url = message_queue_url() if url is None else url
+    if url and url.startswith('memory://'):
+        with _shared_buffers_lock:
+            return _shared_buffers.setdefault(url, SignalReplayBuffer(capacity))
+
+    if url and url.startswith(('redis://', 'rediss://')) and redis_available(url):
+        import redis
+        return RedisSignalReplayBuffer(redis.from_url(url, decode_responses=True), capacity)
+
+    return SignalReplayBuffer(capacity)
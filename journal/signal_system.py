@@ -6,10 +6,14 @@ Signals must persist forever regardless of logout/login/reload
 
 import uuid
 import json
+import threading
 from datetime import datetime, timedelta
 from flask import current_app
 from .models import db, SignalFeed, User
 from .extensions import socketio
+from .signal_ingest import ingest_signals, signal_ingestor
+from .signal_pipeline import SignalPipeline
+from .signal_payload_cache import signal_payload_cache
 import random
 
 class SignalGenerator:
@@ -114,9 +118,17 @@ class SignalGenerator:
 class SignalSystem:
     """Main signal system that manages the complete flow"""
     
+    # Seconds a request worker waits for room in the pipeline before giving up
+    SUBMIT_TIMEOUT = 1.0
+    
     def __init__(self):
         self.generator = SignalGenerator()
         self.is_running = False
+        # generate -> validate/dedupe -> batch persist -> fan-out, off the request path
+        self.pipeline = SignalPipeline(self._validate_signal, self._persist_signals, self._fan_out_signal,
+                                       name='signal-system')
+        self._stop_event = threading.Event()
+        self._generator_thread = None
     
     def start_signal_generation(self, interval_minutes=30):
         """Start automatic signal generation"""
@@ -124,90 +136,115 @@ class SignalSystem:
             return
         
         self.is_running = True
+        app = current_app._get_current_object()
+        self.pipeline.set_app(app)
+        self.pipeline.start()
+        self._stop_event.clear()
         current_app.logger.info("🚀 Signal generation system started")
         
-        # Generate initial signals
-        self.generate_and_store_signals()
-        
-        # Schedule periodic generation
-        import threading
+        # Generate initial signals, then periodically; the thread never blocks a request
         def generate_periodically():
-            while self.is_running:
-                try:
-                    self.generate_and_store_signals()
-                    threading.Event().wait(interval_minutes * 60)  # Wait for interval
-                except Exception as e:
-                    current_app.logger.error(f"Error in signal generation: {e}")
-                    threading.Event().wait(60)  # Wait 1 minute on error
+            with app.app_context():
+                while not self._stop_event.is_set():
+                    try:
+                        self.generate_and_store_signals()
+                    except Exception as e:
+                        current_app.logger.error(f"Error in signal generation: {e}")
+                        self._stop_event.wait(60)  # Wait 1 minute on error
+                        continue
+                    self._stop_event.wait(interval_minutes * 60)  # Wait for interval
         
-        thread = threading.Thread(target=generate_periodically, daemon=True)
-        thread.start()
+        self._generator_thread = threading.Thread(target=generate_periodically, name='signal-generator', daemon=True)
+        self._generator_thread.start()
     
     def stop_signal_generation(self):
-        """Stop automatic signal generation"""
+        """Stop automatic signal generation, delivering signals already queued"""
         self.is_running = False
+        self._stop_event.set()
+        if self._generator_thread:
+            self._generator_thread.join(timeout=5)
+        self.pipeline.stop()
         current_app.logger.info("🛑 Signal generation system stopped")
     
     def generate_and_store_signals(self):
         """Generate and store new signals"""
-        try:
-            # Generate crypto signal
-            crypto_signal = self.generator.generate_crypto_signal()
-            self.store_signal(crypto_signal)
-            
-            # Generate forex signal
-            forex_signal = self.generator.generate_forex_signal()
-            self.store_signal(forex_signal)
-            
-            current_app.logger.info(f"✅ Generated 2 new signals: {crypto_signal['pair']} and {forex_signal['pair']}")
-            
-        except Exception as e:
-            current_app.logger.error(f"❌ Error generating signals: {e}")
+        # Generate crypto signal
+        crypto_signal = self.generator.generate_crypto_signal()
+        
+        # Generate forex signal
+        forex_signal = self.generator.generate_forex_signal()
+        
+        if self.pipeline.running:
+            # Blocks while the pipeline is full rather than dropping signals
+            for signal_data in (crypto_signal, forex_signal):
+                self.pipeline.submit(signal_data)
+        else:
+            self.store_signals([crypto_signal, forex_signal])
+        
+        current_app.logger.info(f"✅ Generated 2 new signals: {crypto_signal['pair']} and {forex_signal['pair']}")
     
     def store_signal(self, signal_data):
         """Store signal in database and broadcast to users"""
+        self.store_signals([signal_data])
+    
+    def store_signals(self, signals):
+        """Store a batch of signals with one deduplicating insert and broadcast the new ones, inline"""
         try:
-            # Create unique key for deduplication
-            unique_key = f"{signal_data['pair']}_{signal_data['direction']}_{signal_data['entry_price']}_{signal_data['timestamp'].strftime('%Y%m%d_%H%M')}"
-            
-            # Check if signal already exists
-            existing_signal = SignalFeed.query.filter_by(unique_key=unique_key).first()
-            if existing_signal:
-                current_app.logger.info(f"Signal already exists: {unique_key}")
-                return
-            
-            # Create new signal feed entry
-            signal_feed = SignalFeed(
-                unique_key=unique_key,
-                signal_id=signal_data['id'],
-                pair=signal_data['pair'],
-                direction=signal_data['direction'],
-                entry_price=signal_data['entry_price'],
-                stop_loss=signal_data['stop_loss'],
-                take_profit=signal_data['take_profit'],
-                confidence=signal_data['confidence'],
-                analysis=signal_data['analysis'],
-                ict_concepts=json.dumps(signal_data['ict_concepts']),
-                timestamp=signal_data['timestamp'],
-                status=signal_data['status'],
-                market=signal_data['market'],
-                timeframe=signal_data['timeframe'],
-                created_by='bot_system',
-                is_recommended=signal_data['is_recommended']
-            )
-            
-            db.session.add(signal_feed)
-            db.session.commit()
-            
-            # Broadcast to all connected users via WebSocket
-            self.broadcast_signal(signal_data)
-            
-            current_app.logger.info(f"📡 Signal stored and broadcasted: {signal_data['pair']} {signal_data['direction']}")
+            items = [self._validate_signal(signal_data) for signal_data in signals]
+            items = [item for item in items if item is not None]
+            for item in self._persist_signals(items):
+                self._fan_out_signal(item)
             
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"❌ Error storing signal: {e}")
     
+    def _validate_signal(self, signal_data):
+        """Build the signal_feed row; None when this process already stored the signal"""
+        # Create unique key for deduplication
+        unique_key = f"{signal_data['pair']}_{signal_data['direction']}_{signal_data['entry_price']}_{signal_data['timestamp'].strftime('%Y%m%d_%H%M')}"
+        if signal_ingestor.is_known(unique_key):
+            current_app.logger.info(f"Signal already exists: {unique_key}")
+            return None
+        
+        row = {
+            'unique_key': unique_key,
+            'signal_id': signal_data['id'],
+            'pair': signal_data['pair'],
+            'direction': signal_data['direction'],
+            'entry_price': signal_data['entry_price'],
+            'stop_loss': signal_data['stop_loss'],
+            'take_profit': signal_data['take_profit'],
+            'confidence': signal_data['confidence'],
+            'analysis': signal_data['analysis'],
+            'ict_concepts': json.dumps(signal_data['ict_concepts']),
+            'timestamp': signal_data['timestamp'],
+            'status': signal_data['status'],
+            'market': signal_data['market'],
+            'timeframe': signal_data['timeframe'],
+            'created_by': 'bot_system',
+            'is_recommended': signal_data['is_recommended']
+        }
+        return row, signal_data
+    
+    def _persist_signals(self, items):
+        """Insert rows whose unique key is not already in the feed (one statement, race-free)"""
+        if not items:
+            return []
+        inserted = {id(row) for row in ingest_signals([row for row, _ in items])}
+        for row, _ in items:
+            if id(row) not in inserted:
+                current_app.logger.info(f"Signal already exists: {row['unique_key']}")
+        return [item for item in items if id(item[0]) in inserted]
+    
+    def _fan_out_signal(self, item):
+        _, signal_data = item
+        
+        # Broadcast to all connected users via WebSocket
+        self.broadcast_signal(signal_data)
+        
+        current_app.logger.info(f"📡 Signal stored and broadcasted: {signal_data['pair']} {signal_data['direction']}")
+    
     def broadcast_signal(self, signal_data):
         """Broadcast signal to all connected users"""
         try:
@@ -246,27 +283,12 @@ class SignalSystem:
             
             signals = query.order_by(SignalFeed.timestamp.desc()).limit(limit).all()
             
-            signals_data = []
-            for signal in signals:
-                signal_data = {
-                    'id': signal.signal_id,
-                    'pair': signal.pair,
-                    'direction': signal.direction,
-                    'type': signal.direction,  # For compatibility
-                    'entry': signal.entry_price,
-                    'entryPrice': signal.entry_price,  # For compatibility
-                    'stopLoss': signal.stop_loss,
-                    'takeProfit': signal.take_profit,
-                    'confidence': signal.confidence,
-                    'analysis': signal.analysis,
-                    'ictConcepts': json.loads(signal.ict_concepts) if signal.ict_concepts else [],
-                    'timestamp': signal.timestamp.isoformat(),
-                    'status': signal.status,
-                    'market': signal.market,
-                    'timeframe': signal.timeframe,
-                    'is_recommended': signal.is_recommended
-                }
-                signals_data.append(signal_data)
+            # Each entry is built and encoded once per version, then reused across requests
+            signals_data = [
+                signal_payload_cache.signal('bot_feed', signal.signal_id, signal.payload_version,
+                                            lambda signal=signal: self._feed_dict(signal))
+                for signal in signals
+            ]
             
             return signals_data
             
@@ -274,6 +296,27 @@ class SignalSystem:
             current_app.logger.error(f"❌ Error getting user signals: {e}")
             return []
     
+    @staticmethod
+    def _feed_dict(signal):
+        return {
+            'id': signal.signal_id,
+            'pair': signal.pair,
+            'direction': signal.direction,
+            'type': signal.direction,  # For compatibility
+            'entry': signal.entry_price,
+            'entryPrice': signal.entry_price,  # For compatibility
+            'stopLoss': signal.stop_loss,
+            'takeProfit': signal.take_profit,
+            'confidence': signal.confidence,
+            'analysis': signal.analysis,
+            'ictConcepts': json.loads(signal.ict_concepts) if signal.ict_concepts else [],
+            'timestamp': signal.timestamp.isoformat(),
+            'status': signal.status,
+            'market': signal.market,
+            'timeframe': signal.timeframe,
+            'is_recommended': signal.is_recommended
+        }
+    
     def create_admin_signal(self, signal_data):
         """Create signal from admin dashboard"""
         try:
@@ -289,12 +332,26 @@ class SignalSystem:
             if 'status' not in signal_data:
                 signal_data['status'] = 'active'
             
-            # Store the signal
-            self.store_signal(signal_data)
+            if not self.pipeline.running:
+                # Store the signal
+                self.store_signal(signal_data)
+                
+                return {
+                    'success': True,
+                    'message': 'Signal created and delivered successfully',
+                    'signal_id': signal_data['id']
+                }
+            
+            # Hand off to the pipeline; only wait briefly if it is backed up
+            if not self.pipeline.submit(signal_data, timeout=self.SUBMIT_TIMEOUT):
+                return {
+                    'success': False,
+                    'error': 'Signal pipeline is busy, please retry'
+                }
             
             return {
                 'success': True,
-                'message': 'Signal created and delivered successfully',
+                'message': 'Signal accepted for delivery',
                 'signal_id': signal_data['id']
             }
             
@@ -319,3 +376,7 @@ def stop_signal_system():
 def get_signal_system():
     """Get the signal system instance"""
     return signal_system
+
+def get_signal_pipeline_stats():
+    """Get queue depth, stage latency and throughput of the signal pipeline"""
+    return signal_system.pipeline.get_stats()
@@ -0,0 +1,419 @@
+"""
+Socket.IO Cluster Support
+Message-queue client managers that relay emits between workers and nodes, and
+presence registries that share connection state across them
+"""
+
+import json
+import os
+import queue
+import socket
+import threading
+import logging
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Set
+
+import socketio
+
+logger = logging.getLogger(__name__)
+
+SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'socketio')
+
+
+def default_node_id() -> str:
+    """Unique id for this worker process"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def message_queue_url() -> str:
+    """Message queue URL shared by Socket.IO relaying, presence and signal replay"""
+    return os.getenv('SOCKETIO_MESSAGE_QUEUE', os.getenv('REDIS_URL', 'redis://localhost:6379'))
+
+
+def redis_available(url: str) -> bool:
+    """Ping Redis once with a short timeout so startup falls back quickly when it's down"""
+    try:
+        import redis
+        client = redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+        client.ping()
+        client.close()
+        return True
+    except Exception as e:
+        logger.warning(f"Redis at {url} unavailable for Socket.IO clustering: {e}")
+        return False
+
+
+class InProcessBus:
+    """Pub/sub channel between Socket.IO servers living in the same process.
+
+    Stands in for Redis in tests and load tests: every subscriber gets its own
+    queue and receives every message published on the bus, JSON encoded just as
+    it would be on the wire.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[queue.Queue] = []
+
+    def subscribe(self) -> queue.Queue:
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers.append(inbox)
+        return inbox
+
+    def publish(self, message: str):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for inbox in subscribers:
+            inbox.put(message)
+
+
+_buses: Dict[str, InProcessBus] = {}
+_buses_lock = threading.Lock()
+
+
+def get_in_process_bus(name: str) -> InProcessBus:
+    """Return the shared bus for a memory:// URL, creating it on first use"""
+    with _buses_lock:
+        return _buses.setdefault(name, InProcessBus())
+
+
+class InProcessManager(socketio.PubSubManager):
+    """Client manager relaying emits over an InProcessBus instead of Redis"""
+
+    name = 'inprocess'
+
+    def __init__(self, bus: InProcessBus, channel: str = SOCKETIO_CHANNEL, write_only: bool = False,
+                 logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.bus = bus
+        # Subscribe now so nothing published before the listener thread starts is lost
+        self._inbox = None if write_only else bus.subscribe()
+
+    def _publish(self, data):
+        self.bus.publish(json.dumps(data))
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
+
+
+def create_client_manager(url: Optional[str] = None) -> Optional[socketio.Manager]:
+    """
+    Build the Socket.IO client manager for a message queue URL
+
+    - memory://<name>: InProcessManager on a named in-process bus
+    - redis://, rediss://, redis+sentinel://: socketio.RedisManager
+    - any other non-empty URL: socketio.KombuManager (AMQP and friends)
+    - empty, or Redis unreachable: None, i.e. the process-local default manager
+
+    Args:
+        url: Message queue URL; defaults to SOCKETIO_MESSAGE_QUEUE, then REDIS_URL
+
+    Returns:
+        Client manager instance, or None for single-process mode
+    """
+    url = message_queue_url() if url is None else url
+    if not url:
+        return None
+
+    if url.startswith('memory://'):
+        return InProcessManager(get_in_process_bus(url[len('memory://'):]))
+
+    if url.startswith(('redis://', 'rediss://', 'redis+sentinel://')):
+        if not url.startswith('redis+sentinel://') and not redis_available(url):
+            logger.warning("Socket.IO running without a message queue; emits stay within this worker")
+            return None
+        return socketio.RedisManager(url, channel=SOCKETIO_CHANNEL)
+
+    return socketio.KombuManager(url, channel=SOCKETIO_CHANNEL)
+
+
+class PresenceRegistry:
+    """Connection presence for this worker only.
+
+    Keeps sid -> connection info and risk_tier -> {user_id: connection count}.
+    Subclasses share the same state across workers; reads then cover every
+    worker while each worker only ever writes its own connections.
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or default_node_id()
+        self._lock = threading.Lock()
+        self._connections: Dict[str, Dict[str, Any]] = {}
+        self._tier_users: Dict[str, Dict[str, int]] = {}
+
+    def add(self, sid: str, info: Dict[str, Any]):
+        """Register a connection; info needs at least user_id and risk_tier"""
+        info = {**info, 'node': self.node_id}
+        with self._lock:
+            self._connections[sid] = info
+            users = self._tier_users.setdefault(info['risk_tier'], {})
+            users[info['user_id']] = users.get(info['user_id'], 0) + 1
+        self._on_add(sid, info)
+
+    def remove(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            info = self._connections.pop(sid, None)
+            if info is None:
+                return None
+            users = self._tier_users.get(info['risk_tier'], {})
+            remaining = users.get(info['user_id'], 1) - 1
+            if remaining > 0:
+                users[info['user_id']] = remaining
+            else:
+                users.pop(info['user_id'], None)
+                if not users:
+                    self._tier_users.pop(info['risk_tier'], None)
+        self._on_remove(sid, info, remaining)
+        return info
+
+    def _on_add(self, sid: str, info: Dict[str, Any]):
+        """Hook for shared registries, called after a local add"""
+
+    def _on_remove(self, sid: str, info: Dict[str, Any], remaining: int):
+        """Hook for shared registries; remaining is the user's connections left in the tier"""
+
+    def _local_snapshot(self):
+        with self._lock:
+            return (dict(self._connections),
+                    {tier: dict(users) for tier, users in self._tier_users.items()})
+
+    def _snapshots(self):
+        return [self._local_snapshot()]
+
+    def online_user_ids(self, risk_tier: str) -> Set[str]:
+        return {user_id for _, tier_users in self._snapshots() for user_id in tier_users.get(risk_tier, {})}
+
+    def count_by_tier(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for _, tier_users in self._snapshots():
+            for tier, users in tier_users.items():
+                counts[tier] = counts.get(tier, 0) + sum(users.values())
+        return counts
+
+    def connection_count(self, risk_tier: str) -> int:
+        return self.count_by_tier().get(risk_tier, 0)
+
+    def connections(self) -> List[Dict[str, Any]]:
+        return [info for connections, _ in self._snapshots() for info in connections.values()]
+
+    def start(self):
+        """Start background upkeep (no-op for the local registry)"""
+
+    def stop(self):
+        """Stop background upkeep (no-op for the local registry)"""
+
+
+class InProcessPresenceRegistry(PresenceRegistry):
+    """Presence shared by registries in one process that use the same group name; stands in for Redis in tests"""
+
+    _groups: Dict[str, Dict[str, 'InProcessPresenceRegistry']] = {}
+    _groups_lock = threading.Lock()
+
+    def __init__(self, group: str, node_id: Optional[str] = None):
+        super().__init__(node_id)
+        with self._groups_lock:
+            self._members = self._groups.setdefault(group, {})
+            self._members[self.node_id] = self
+
+    def _snapshots(self):
+        with self._groups_lock:
+            members = list(self._members.values())
+        return [member._local_snapshot() for member in members]
+
+    def stop(self):
+        with self._groups_lock:
+            self._members.pop(self.node_id, None)
+
+
+class RedisPresenceRegistry(PresenceRegistry):
+    """Presence shared through Redis.
+
+    Each worker owns three keys, so writes never race between workers:
+      {prefix}:{node}:conns         hash sid -> connection info (JSON)
+      {prefix}:{node}:tiers         hash risk_tier -> connection count
+      {prefix}:{node}:tier:{tier}   hash user_id -> connection count
+    Live workers are kept in the {prefix}:nodes sorted set scored by heartbeat
+    time; keys of a worker that stops heartbeating expire after `ttl` seconds.
+    """
+
+    def __init__(self, client, node_id: Optional[str] = None, prefix: str = 'socketio:presence',
+                 ttl: int = 30):
+        super().__init__(node_id)
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.running = False
+        self.heartbeat_thread = None
+        self._stop_event = threading.Event()
+
+    def _key(self, node: str, suffix: str) -> str:
+        return f"{self.prefix}:{node}:{suffix}"
+
+    @property
+    def _nodes_key(self) -> str:
+        return f"{self.prefix}:nodes"
+
+    def _node_keys(self, tiers) -> List[str]:
+        return [self._key(self.node_id, 'conns'), self._key(self.node_id, 'tiers')] + [
+            self._key(self.node_id, f"tier:{tier}") for tier in tiers
+        ]
+
+    def _on_add(self, sid: str, info: Dict[str, Any]):
+        tier = info['risk_tier']
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(self._key(self.node_id, 'conns'), sid, json.dumps(info, default=str))
+            pipe.hincrby(self._key(self.node_id, 'tiers'), tier, 1)
+            pipe.hincrby(self._key(self.node_id, f"tier:{tier}"), info['user_id'], 1)
+            pipe.zadd(self._nodes_key, {self.node_id: time.time()})
+            for key in self._node_keys([tier]):
+                pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to publish presence for {sid}: {e}")
+
+    def _on_remove(self, sid: str, info: Dict[str, Any], remaining: int):
+        tier = info['risk_tier']
+        tier_key = self._key(self.node_id, f"tier:{tier}")
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hdel(self._key(self.node_id, 'conns'), sid)
+            pipe.hincrby(self._key(self.node_id, 'tiers'), tier, -1)
+            if remaining > 0:
+                pipe.hset(tier_key, info['user_id'], remaining)
+            else:
+                pipe.hdel(tier_key, info['user_id'])
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to remove presence for {sid}: {e}")
+
+    def _live_nodes(self) -> List[str]:
+        cutoff = time.time() - self.ttl
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zremrangebyscore(self._nodes_key, '-inf', cutoff)
+        pipe.zrange(self._nodes_key, 0, -1)
+        nodes = pipe.execute()[1]
+        return [node.decode() if isinstance(node, bytes) else node for node in nodes]
+
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def online_user_ids(self, risk_tier: str) -> Set[str]:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for node in self._live_nodes():
+                pipe.hkeys(self._key(node, f"tier:{risk_tier}"))
+            return {self._text(user_id) for user_ids in pipe.execute() for user_id in user_ids}
+        except Exception as e:
+            logger.error(f"Failed to read presence from Redis, using this worker only: {e}")
+            return super().online_user_ids(risk_tier)
+
+    def count_by_tier(self) -> Dict[str, int]:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for node in self._live_nodes():
+                pipe.hgetall(self._key(node, 'tiers'))
+            counts: Dict[str, int] = {}
+            for tiers in pipe.execute():
+                for tier, count in tiers.items():
+                    if int(count) > 0:
+                        counts[self._text(tier)] = counts.get(self._text(tier), 0) + int(count)
+            return counts
+        except Exception as e:
+            logger.error(f"Failed to read presence from Redis, using this worker only: {e}")
+            return super().count_by_tier()
+
+    def connections(self) -> List[Dict[str, Any]]:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for node in self._live_nodes():
+                pipe.hvals(self._key(node, 'conns'))
+            return [json.loads(info) for infos in pipe.execute() for info in infos]
+        except Exception as e:
+            logger.error(f"Failed to read presence from Redis, using this worker only: {e}")
+            return super().connections()
+
+    def heartbeat(self):
+        """Mark this worker alive and refresh its keys, republishing them if Redis lost them"""
+        connections, tier_users = self._local_snapshot()
+        keys = self._node_keys(tier_users)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zadd(self._nodes_key, {self.node_id: time.time()})
+        pipe.exists(self._key(self.node_id, 'conns'))
+        results = pipe.execute()
+
+        pipe = self.client.pipeline(transaction=False)
+        if connections and not results[1]:
+            logger.warning(f"Presence keys for {self.node_id} missing from Redis, republishing")
+            pipe.delete(*keys)
+            pipe.hset(self._key(self.node_id, 'conns'),
+                      mapping={sid: json.dumps(info, default=str) for sid, info in connections.items()})
+            pipe.hset(self._key(self.node_id, 'tiers'),
+                      mapping={tier: sum(users.values()) for tier, users in tier_users.items()})
+            for tier, users in tier_users.items():
+                pipe.hset(self._key(self.node_id, f"tier:{tier}"), mapping=users)
+        for key in keys:
+            pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def start(self):
+        """Start the heartbeat thread"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.heartbeat_thread = threading.Thread(target=self._run_heartbeat, daemon=True)
+        self.heartbeat_thread.start()
+
+    def stop(self):
+        """Stop heartbeating and withdraw this worker's presence"""
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.heartbeat_thread:
+            self.heartbeat_thread.join(timeout=5)
+        try:
+            _, tier_users = self._local_snapshot()
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zrem(self._nodes_key, self.node_id)
+            pipe.delete(*self._node_keys(tier_users))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to withdraw presence for {self.node_id}: {e}")
+
+    def _run_heartbeat(self):
+        while self.running:
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"Presence heartbeat failed: {e}")
+            self._stop_event.wait(self.ttl / 3)
+
+
+def create_presence_registry(url: Optional[str] = None) -> PresenceRegistry:
+    """
+    Build the presence registry matching a message queue URL
+
+    Args:
+        url: Same URL as create_client_manager(); defaults to SOCKETIO_MESSAGE_QUEUE, then REDIS_URL
+
+    Returns:
+        Redis-backed registry for redis:// URLs when Redis is reachable, an in-process
+        shared registry for memory:// URLs, otherwise one covering this worker only
+    """
+    url = message_queue_url() if url is None else url
+    if url and url.startswith('memory://'):
+        return InProcessPresenceRegistry(url[len('memory://'):])
+
+    if url and url.startswith(('redis://', 'rediss://')) and redis_available(url):
+        import redis
+        registry = RedisPresenceRegistry(redis.from_url(url, decode_responses=True))
+        registry.start()
+        return registry
+
+    return PresenceRegistry()
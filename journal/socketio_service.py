@@ -1,30 +1,89 @@
 """
 Socket.IO Service for Real-time Signal Distribution
 Handles WebSocket connections, authentication, and room management
+
+Emits are relayed between workers through the message queue configured by
+SOCKETIO_MESSAGE_QUEUE (default REDIS_URL), and presence is shared through the
+matching registry, so broadcasts and stats cover every worker. Both are set up
+by init_socketio_service() on the first connection or emit, not at import.
 """
 
 import socketio
 import logging
+import threading
 from typing import Dict, Any, Optional
 from flask_jwt_extended import decode_token
 from datetime import datetime
 
 from .models import User
-from .signal_models import Signal, UserSignal, db
+from .signal_models import Signal, db
 from .redis_service import redis_service
+from .price_hub import price_hub, start_price_hub
+from .delivery_tracker import delivery_tracker
+from .socketio_cluster import PresenceRegistry, create_client_manager, create_presence_registry
+from .signal_replay import create_replay_buffer
+from .signal_payload_cache import SocketIOJSON
 
 logger = logging.getLogger(__name__)
 
+class ClusterServer(socketio.Server):
+    """Socket.IO server that joins the message queue and shared presence on first use"""
+
+    def _handle_eio_connect(self, eio_sid, environ):
+        init_socketio_service()
+        return super()._handle_eio_connect(eio_sid, environ)
+
+    def emit(self, *args, **kwargs):
+        init_socketio_service()
+        return super().emit(*args, **kwargs)
+
 # Create Socket.IO server
-sio = socketio.Server(
+sio = ClusterServer(
     cors_allowed_origins="*",
+    json=SocketIOJSON,
     logger=True,
     engineio_logger=True
 )
 
-# Store connected users for tracking
+# Store connected users for tracking (this worker's sockets only)
 connected_users: Dict[str, Dict[str, Any]] = {}
 
+# Presence across all workers; built by init_socketio_service()
+presence_registry: Optional[PresenceRegistry] = None
+_init_lock = threading.Lock()
+
+# Recent signals per risk tier, replayed to reconnecting clients; built by init_socketio_service()
+replay_buffer = None
+
+def init_socketio_service():
+    """
+    Connect this worker to the message queue, the shared presence registry and the replay buffer
+
+    Runs once, before the server's first connection or emit; importing this
+    module does not touch Redis or start the presence heartbeat.
+    """
+    global presence_registry, replay_buffer
+    if presence_registry is not None:
+        return
+    with _init_lock:
+        if presence_registry is not None:
+            return
+        if not sio.manager_initialized:
+            manager = create_client_manager()
+            if manager is not None:
+                manager.set_server(sio)
+                sio.manager = manager
+        replay_buffer = create_replay_buffer()
+        presence_registry = create_presence_registry()
+
+def get_presence_registry() -> PresenceRegistry:
+    init_socketio_service()
+    return presence_registry
+
+def get_replay_buffer():
+    init_socketio_service()
+    return replay_buffer
+
 @sio.event
 def connect(sid, environ, auth):
     """
@@ -73,6 +132,13 @@ def connect(sid, environ, auth):
                 'connected_at': datetime.utcnow(),
                 'session_id': decoded_token.get('session_id')
             }
+            delivery_tracker.add_connection(sid, str(user.uuid), user_risk_tier)
+            get_presence_registry().add(sid, {
+                'user_id': str(user.uuid),
+                'username': user.username,
+                'risk_tier': user_risk_tier,
+                'connected_at': connected_users[sid]['connected_at'].isoformat()
+            })
             
             # Join user-specific room
             user_room = f"user:{user.uuid}"
@@ -89,9 +155,14 @@ def connect(sid, environ, auth):
                 'message': 'Connected successfully',
                 'user_id': str(user.uuid),
                 'risk_tier': user_risk_tier,
-                'rooms': [user_room, risk_room]
+                'rooms': [user_room, risk_room],
+                'latest_seq': get_replay_buffer().latest_seq(user_risk_tier)
             }, room=sid)
             
+            # Reconnecting clients send the last sequence they saw and get only the gap
+            if auth and auth.get('last_seq') is not None:
+                replay_missed_signals(sid, user_risk_tier, auth['last_seq'])
+            
             return True
             
         except Exception as e:
@@ -108,6 +179,9 @@ def disconnect(sid):
     Handle client disconnection
     """
     try:
+        price_hub.unsubscribe_all(sid)
+        delivery_tracker.remove_connection(sid)
+        get_presence_registry().remove(sid)
         if sid in connected_users:
             user_info = connected_users[sid]
             logger.info(f"User {user_info['username']} ({user_info['user_id']}) disconnected")
@@ -158,6 +232,84 @@ def leave_room(sid, data):
         logger.error(f"Leave room error for sid {sid}: {e}")
         sio.emit('error', {'message': 'Failed to leave room'}, room=sid)
 
+@sio.on('price:subscribe')
+def price_subscribe(sid, data):
+    """
+    Subscribe to live prices for one or more symbols (joins price:<symbol> rooms)
+    """
+    try:
+        if sid not in connected_users:
+            sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+            return
+        
+        if not price_hub.running:
+            start_price_hub(sio)
+        
+        symbols = data.get('symbols') or [data.get('symbol')]
+        for symbol in filter(None, symbols):
+            sio.enter_room(sid, price_hub.room_for(symbol))
+            latest = price_hub.subscribe(sid, symbol)
+            if latest:
+                # Send the cached tick right away instead of waiting for the next poll
+                sio.emit('price:update', {
+                    'symbol': symbol,
+                    'price': latest['price'],
+                    'change': 0.0,
+                    'timestamp': latest['timestamp']
+                }, room=sid)
+        
+    except Exception as e:
+        logger.error(f"Price subscribe error for sid {sid}: {e}")
+        sio.emit('error', {'message': 'Failed to subscribe to prices'}, room=sid)
+
+@sio.on('price:unsubscribe')
+def price_unsubscribe(sid, data):
+    """
+    Unsubscribe from live prices for one or more symbols
+    """
+    try:
+        symbols = data.get('symbols') or [data.get('symbol')]
+        for symbol in filter(None, symbols):
+            sio.leave_room(sid, price_hub.room_for(symbol))
+            price_hub.unsubscribe(sid, symbol)
+        
+    except Exception as e:
+        logger.error(f"Price unsubscribe error for sid {sid}: {e}")
+
+@sio.on('signal:replay')
+def signal_replay(sid, data):
+    """
+    Replay signals broadcast after the client's last-seen sequence number
+    """
+    try:
+        if sid not in connected_users:
+            sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+            return
+        
+        replay_missed_signals(sid, connected_users[sid]['risk_tier'], (data or {}).get('last_seq', 0))
+        
+    except Exception as e:
+        logger.error(f"Signal replay error for sid {sid}: {e}")
+        sio.emit('error', {'message': 'Failed to replay signals'}, room=sid)
+
+def replay_missed_signals(sid: str, risk_tier: str, last_seq):
+    """
+    Emit the signals a client missed since last_seq, or ask it to resync
+    
+    Args:
+        sid: Socket.IO session ID
+        risk_tier: Client's risk tier
+        last_seq: Last sequence number the client received
+    """
+    try:
+        last_seq = int(last_seq)
+    except (TypeError, ValueError):
+        last_seq = 0
+    
+    replay = get_replay_buffer().since(risk_tier, last_seq)
+    sio.emit('signal:replay', replay.to_dict(), room=sid)
+    logger.info(f"Replayed {len(replay.signals)} signals to sid {sid} after seq {last_seq} (resync: {replay.resync})")
+
 @sio.event
 def ping(sid, data):
     """
@@ -184,16 +336,17 @@ def broadcast_signal_to_risk_tier(signal_data: Dict[str, Any]):
         
         risk_room = f"risk:{risk_tier}"
         
+        # Number the signal so reconnecting clients can ask for what they missed
+        signal_data['seq'] = get_replay_buffer().append(risk_tier, signal_data)
+        
         # Emit to risk tier room
         sio.emit('signal:new', signal_data, room=risk_room)
         
-        # Count connected users in this risk tier
-        connected_count = sum(1 for user_info in connected_users.values() 
-                            if user_info['risk_tier'] == risk_tier)
+        connected_count = get_presence_registry().connection_count(risk_tier)
         
         logger.info(f"Broadcasted signal {signal_data.get('id')} to risk tier {risk_tier} ({connected_count} connected users)")
         
-        # Update delivery tracking in database
+        # Queue delivery tracking; the database write happens off the broadcast path
         update_signal_delivery_tracking(signal_data)
         
     except Exception as e:
@@ -218,7 +371,11 @@ def send_signal_to_user(user_id: str, signal_data: Dict[str, Any]):
 
 def update_signal_delivery_tracking(signal_data: Dict[str, Any]):
     """
-    Update delivery tracking for all users who should receive this signal
+    Queue delivery tracking for all users who should receive this signal
+    
+    Missing user-signal mappings are created for the whole risk tier and the
+    users online right now are marked delivered, both in bulk by the
+    delivery tracker's write-behind worker.
     
     Args:
         signal_data: Signal data
@@ -230,54 +387,32 @@ def update_signal_delivery_tracking(signal_data: Dict[str, Any]):
         if not signal_id or not risk_tier:
             return
         
-        # Get all users with this risk tier
-        users = User.query.filter_by(risk_tier=risk_tier).all()
-        
-        for user in users:
-            # Create or update user-signal mapping
-            user_signal = UserSignal.query.filter_by(
-                user_id=str(user.uuid),
-                signal_id=signal_id
-            ).first()
-            
-            if not user_signal:
-                UserSignal.create_user_signal_mapping(str(user.uuid), signal_id)
-            
-            # Mark as delivered if user is currently connected
-            if any(user_info['user_id'] == str(user.uuid) for user_info in connected_users.values()):
-                UserSignal.mark_delivered(str(user.uuid), signal_id)
-        
-        logger.info(f"Updated delivery tracking for signal {signal_id} to {len(users)} users")
+        delivery_tracker.record_broadcast(signal_id, risk_tier, get_presence_registry().online_user_ids(risk_tier))
         
     except Exception as e:
         logger.error(f"Error updating delivery tracking: {e}")
 
 def get_connected_users_stats() -> Dict[str, Any]:
     """
-    Get statistics about connected users
+    Get statistics about connected users across all workers
     
     Returns:
         Dictionary with connection statistics
     """
     try:
-        total_connected = len(connected_users)
-        risk_tier_counts = {}
-        
-        for user_info in connected_users.values():
-            risk_tier = user_info['risk_tier']
-            risk_tier_counts[risk_tier] = risk_tier_counts.get(risk_tier, 0) + 1
+        risk_tier_counts = get_presence_registry().count_by_tier()
         
         return {
-            'total_connected': total_connected,
+            'total_connected': sum(risk_tier_counts.values()),
             'by_risk_tier': risk_tier_counts,
             'connected_users': [
                 {
                     'user_id': user_info['user_id'],
                     'username': user_info['username'],
                     'risk_tier': user_info['risk_tier'],
-                    'connected_at': user_info['connected_at'].isoformat()
+                    'connected_at': user_info['connected_at']
                 }
-                for user_info in connected_users.values()
+                for user_info in get_presence_registry().connections()
             ]
         }
         
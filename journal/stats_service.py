@@ -0,0 +1,209 @@
+"""
+Stats Service - Single-pass Dashboard Statistics
+Each dashboard's metrics come from one aggregate query using FILTER (WHERE ...)
+clauses instead of one COUNT per metric. Results are cached for a few seconds
+in Redis so every worker shares them, and per-user trade stats are read from
+the incrementally maintained user_trade_stats row
+"""
+
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, User, Trade, UserTradeStats
+from .trade_stats import WIN_OUTCOME
+
+logger = logging.getLogger(__name__)
+
+# Outcome the landing page counts as a funded win
+TARGET_HIT = 'Target Hit'
+
+class StatsCache:
+    """Short-TTL cache for computed stats.
+
+    Entries live in Redis when it is connected, so all workers reuse one
+    computation; otherwise in this process only. Concurrent misses for the same
+    name within a worker wait for a single computation.
+    """
+
+    def __init__(self, ttl: float = None, backend=None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('STATS_CACHE_TTL', '30'))
+        self.backend = backend
+        self._backend_resolved = backend is not None
+        self._local: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._compute_locks: Dict[str, threading.Lock] = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _shared(self):
+        if not self._backend_resolved:
+            self._backend_resolved = True
+            try:
+                from .redis_service import redis_service
+                self.backend = redis_service if redis_service.connected else None
+            except Exception as e:
+                logger.warning(f"Stats cache falling back to in-process storage: {e}")
+        return self.backend
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        backend = self._shared()
+        if backend is not None:
+            return backend.get_cached_stats(name)
+        with self._lock:
+            entry = self._local.get(name)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+        return None
+
+    def set(self, name: str, value: Dict[str, Any]):
+        backend = self._shared()
+        if backend is not None:
+            backend.cache_stats(name, value, self.ttl)
+            return
+        with self._lock:
+            self._local[name] = (time.monotonic() + self.ttl, value)
+
+    def get_or_compute(self, name: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        cached = self.get(name)
+        if cached is not None:
+            self.stats['hits'] += 1
+            return cached
+
+        with self._lock:
+            compute_lock = self._compute_locks.setdefault(name, threading.Lock())
+        with compute_lock:
+            # Another thread may have filled it while we waited
+            cached = self.get(name)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached
+            self.stats['misses'] += 1
+            value = compute()
+            self.set(name, value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'ttl': self.ttl, 'shared': self._shared() is not None, **self.stats}
+
+# Global stats cache instance
+stats_cache = StatsCache()
+
+def user_counts(now: datetime = None) -> Dict[str, int]:
+    """Total, recently active and newly registered users in one pass over users"""
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    row = db.session.execute(select(
+        func.count(),
+        func.count().filter(User.last_login >= now - timedelta(days=1)),
+        func.count().filter(User.created_at >= today),
+        func.count().filter(User.created_at >= today - timedelta(days=6)),
+        func.count().filter(User.created_at >= today - timedelta(days=29))
+    ).select_from(User)).one()
+    return {
+        'total': row[0],
+        'active_24h': row[1],
+        'new_today': row[2],
+        'new_week': row[3],
+        'new_month': row[4]
+    }
+
+def landing_trade_stats(now: datetime = None, days: int = 30) -> Dict[str, Any]:
+    """Recent trade totals and all-time winners in one pass over trades"""
+    now = now or datetime.utcnow()
+    recent = Trade.closeTime >= now - timedelta(days=days)
+    won = Trade.outcome == TARGET_HIT
+    row = db.session.execute(select(
+        func.count().filter(recent),
+        func.count().filter(recent, won),
+        func.sum(Trade.pnl).filter(recent, won),
+        func.count(func.distinct(Trade.user_id)).filter(recent, won),
+        func.count(func.distinct(Trade.user_id)).filter(won)
+    ).where(or_(recent, won))).one()
+    return {
+        'total_trades': row[0],
+        'winning_trades': row[1],
+        'total_funded': float(row[2] or 0),
+        'funded_accounts': row[3],
+        'successful_traders': row[4]
+    }
+
+def get_user_counts() -> Dict[str, int]:
+    return stats_cache.get_or_compute('user_counts', user_counts)
+
+def get_landing_trade_stats() -> Dict[str, Any]:
+    return stats_cache.get_or_compute('landing_trades', landing_trade_stats)
+
+def build_user_trade_stats(user_id) -> UserTradeStats:
+    """Stats row for a user from one grouped pass over their trades"""
+    won = Trade.outcome == WIN_OUTCOME
+    rrr = case(
+        (and_(Trade.direction == 'buy', Trade.sl.isnot(None), Trade.sl != 0, Trade.entry_price > Trade.sl),
+         (Trade.exit_price - Trade.entry_price) / (Trade.entry_price - Trade.sl)),
+        else_=0.0
+    )
+    rows = db.session.execute(select(
+        Trade.strategy_tag, Trade.asset, Trade.prop_firm,
+        func.count(), func.count().filter(won), func.sum(rrr), func.sum(Trade.exit_price - Trade.entry_price)
+    ).where(Trade.user_id == user_id).group_by(Trade.strategy_tag, Trade.asset, Trade.prop_firm)).all()
+
+    strategy_counts, pair_profit, prop_firm_wins = {}, {}, {}
+    total_trades = total_wins = 0
+    rrr_total = 0.0
+    for strategy_tag, asset, prop_firm, count, wins, rrr_sum, profit in rows:
+        total_trades += count
+        total_wins += wins
+        rrr_total += rrr_sum or 0.0
+        if strategy_tag is not None:
+            strategy_counts[strategy_tag] = strategy_counts.get(strategy_tag, 0) + count
+        if asset is not None:
+            pair_count, pair_sum = pair_profit.get(asset, [0, 0.0])
+            pair_profit[asset] = [pair_count + count, pair_sum + (profit or 0.0)]
+        if prop_firm is not None and wins:
+            prop_firm_wins[prop_firm] = prop_firm_wins.get(prop_firm, 0) + wins
+
+    return UserTradeStats(user_id=user_id, total_trades=total_trades, wins=total_wins, rrr_total=rrr_total,
+                          strategy_counts=strategy_counts, pair_profit=pair_profit, prop_firm_wins=prop_firm_wins)
+
+def get_user_trade_stats(user_id) -> UserTradeStats:
+    """The user's stats row, built from their trades the first time it is needed"""
+    stats = db.session.get(UserTradeStats, user_id)
+    if stats is not None:
+        return stats
+    stats = build_user_trade_stats(user_id)
+    db.session.add(stats)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker built it first
+        db.session.rollback()
+        stats = db.session.get(UserTradeStats, user_id)
+    return stats
+
+def _top(counters: Dict[str, Any], key: Callable = None) -> Optional[str]:
+    return max(counters, key=key or counters.get) if counters else None
+
+def summarize_user_trade_stats(stats: UserTradeStats) -> Dict[str, Any]:
+    total = stats.total_trades
+    pair_profit = stats.pair_profit or {}
+    return {
+        'win_rate': round(stats.wins / total * 100, 2) if total else 0,
+        'average_rrr': round(stats.rrr_total / total, 2) if total else 0,
+        'total_trades': total,
+        'most_used_strategy': _top(stats.strategy_counts or {}),
+        'most_profitable_pair': _top(pair_profit, key=lambda asset: pair_profit[asset][1]),
+        'best_prop_firm_performance': _top(stats.prop_firm_wins or {})
+    }
+
+def get_stats_cache_stats() -> Dict[str, Any]:
+    """Get stats cache statistics"""
+    return stats_cache.get_stats()
@@ -0,0 +1,130 @@
+"""
+Trade Stats - Incrementally Maintained Per-user Trade Totals
+Every flush that adds, changes or deletes trades applies the difference to the
+owners' stats rows in the same transaction, so dashboards read one row instead
+of scanning the user's trade history
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Trade attributes the stats depend on
+TRACKED_ATTRIBUTES = ('user_id', 'outcome', 'direction', 'entry_price', 'exit_price', 'sl',
+                      'strategy_tag', 'asset', 'prop_firm')
+
+WIN_OUTCOME = 'win'
+
+def trade_rrr(direction: Optional[str], entry_price, exit_price, sl) -> float:
+    """Reward:risk of a long trade with a stop below entry; 0 for anything else"""
+    if direction == 'buy' and sl and entry_price is not None and exit_price is not None and entry_price > sl:
+        return (exit_price - entry_price) / (entry_price - sl)
+    return 0.0
+
+def trade_contribution(values: Dict[str, Any]) -> Dict[str, Any]:
+    """What one trade adds to its owner's totals"""
+    won = values['outcome'] == WIN_OUTCOME
+    profit = None
+    if values['exit_price'] is not None and values['entry_price'] is not None:
+        profit = values['exit_price'] - values['entry_price']
+    return {
+        'wins': int(won),
+        'rrr': trade_rrr(values['direction'], values['entry_price'], values['exit_price'], values['sl']),
+        'strategy_tag': values['strategy_tag'],
+        'asset': values['asset'],
+        'profit': profit,
+        'prop_firm': values['prop_firm'] if won else None
+    }
+
+def _count(counters: Dict[str, Any], key: Optional[str], sign: int):
+    if key is None:
+        return
+    counters[key] = counters.get(key, 0) + sign
+    if counters[key] <= 0:
+        del counters[key]
+
+def apply_contribution(stats, contribution: Dict[str, Any], sign: int):
+    """Add (sign=1) or remove (sign=-1) a trade's contribution to a stats row"""
+    stats.total_trades = (stats.total_trades or 0) + sign
+    stats.wins = (stats.wins or 0) + sign * contribution['wins']
+    stats.rrr_total = (stats.rrr_total or 0.0) + sign * contribution['rrr']
+
+    # JSON columns only persist on reassignment, so work on copies
+    strategy_counts = dict(stats.strategy_counts or {})
+    _count(strategy_counts, contribution['strategy_tag'], sign)
+    stats.strategy_counts = strategy_counts
+
+    prop_firm_wins = dict(stats.prop_firm_wins or {})
+    _count(prop_firm_wins, contribution['prop_firm'], sign)
+    stats.prop_firm_wins = prop_firm_wins
+
+    # [trade count, summed profit] per asset; the count tells when an asset has no trades left
+    pair_profit = {asset: list(entry) for asset, entry in (stats.pair_profit or {}).items()}
+    asset = contribution['asset']
+    if asset is not None:
+        count, profit = pair_profit.get(asset, [0, 0.0])
+        count += sign
+        if contribution['profit'] is not None:
+            profit += sign * contribution['profit']
+        if count > 0:
+            pair_profit[asset] = [count, profit]
+        else:
+            pair_profit.pop(asset, None)
+    stats.pair_profit = pair_profit
+
+def _current_values(trade) -> Dict[str, Any]:
+    return {attribute: getattr(trade, attribute) for attribute in TRACKED_ATTRIBUTES}
+
+def _committed_values(trade) -> Dict[str, Any]:
+    attrs = inspect(trade).attrs
+    values = {}
+    for attribute in TRACKED_ATTRIBUTES:
+        history = attrs[attribute].history
+        if history.deleted:
+            values[attribute] = history.deleted[0]
+        elif history.unchanged:
+            values[attribute] = history.unchanged[0]
+        else:
+            values[attribute] = getattr(trade, attribute)
+    return values
+
+def _modified(trade) -> bool:
+    attrs = inspect(trade).attrs
+    return any(attrs[attribute].history.has_changes() for attribute in TRACKED_ATTRIBUTES)
+
+def track_trade_stats(trade_model, stats_model):
+    """
+    Keep stats_model rows in step with trade_model rows
+
+    Users without a stats row are skipped; their row is built from the trades
+    table the first time it is read.
+    """
+    def before_flush(session, flush_context, instances):
+        changes = defaultdict(list)
+        for trade in session.new:
+            if isinstance(trade, trade_model):
+                values = _current_values(trade)
+                changes[values['user_id']].append((values, 1))
+        for trade in session.dirty:
+            if isinstance(trade, trade_model) and _modified(trade):
+                old, new = _committed_values(trade), _current_values(trade)
+                changes[old['user_id']].append((old, -1))
+                changes[new['user_id']].append((new, 1))
+        for trade in session.deleted:
+            if isinstance(trade, trade_model):
+                values = _committed_values(trade)
+                changes[values['user_id']].append((values, -1))
+
+        for user_id, entries in changes.items():
+            if user_id is None:
+                continue
+            # Row lock so concurrent flushes for the same user apply one after the other
+            stats = session.get(stats_model, user_id, with_for_update=True, populate_existing=True)
+            if stats is None:
+                continue
+            for values, sign in entries:
+                apply_contribution(stats, trade_contribution(values), sign)
+
+    event.listen(Session, 'before_flush', before_flush)
@@ -3,13 +3,19 @@ User Signals API - Fetch User-Specific Signals
 Handles signal retrieval for users based on their risk profile
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
+import base64
+import binascii
+import hashlib
+import json
 import logging
+import uuid
 from typing import List, Dict, Any
 
 from .signal_models import Signal, UserSignal, db
+from .signal_payload_cache import encode_response
 from .models import User
 from .auth_middleware import session_required
 from .dual_db_service import dual_db
@@ -18,6 +24,24 @@ logger = logging.getLogger(__name__)
 
 user_signals_bp = Blueprint('user_signals', __name__)
 
+def _encode_cursor(created_at: datetime, signal_id) -> str:
+    """Opaque keyset cursor for the signal after which the next page starts"""
+    raw = json.dumps([created_at.isoformat(), str(signal_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor: str):
+    """Inverse of _encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, signal_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(signal_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _feed_etag(risk_tier: str, include_delivered: bool, limit: int, cursor, since, version: tuple) -> str:
+    """Weak validator for a feed page, from the page position and the feed's version probe"""
+    return hashlib.sha1(f"{risk_tier}|{include_delivered}|{limit}|{cursor}|{since}|{version}".encode()).hexdigest()
+
 @user_signals_bp.route('/user/signals', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @session_required
@@ -25,8 +49,12 @@ def get_user_signals():
     """
     Fetch signals for the authenticated user based on their risk tier
     
+    Pages are keyset paginated (newest first) and carry a weak ETag; requests with
+    a matching If-None-Match get 304 Not Modified.
+    
     Query params:
         - limit: Maximum number of signals (default: 50, max: 200)
+        - cursor: next_cursor from the previous page (optional)
         - since: ISO timestamp to get signals since (optional)
         - include_delivered: Include delivery status (default: false)
     """
@@ -48,6 +76,7 @@ def get_user_signals():
         
         # Get query parameters
         limit = min(int(request.args.get('limit', 50)), 200)  # Cap at 200
+        cursor = request.args.get('cursor')
         since_param = request.args.get('since')
         include_delivered = request.args.get('include_delivered', 'false').lower() == 'true'
         
@@ -59,50 +88,69 @@ def get_user_signals():
             except ValueError:
                 return jsonify({'error': 'Invalid since timestamp format'}), 400
         
-        # Build query for signals matching user's risk tier
-        query = Signal.query.filter(
-            Signal.risk_tier == user_risk_tier.lower(),
-            Signal.status == 'active',
-            Signal.origin == 'admin'
+        before = None
+        if cursor:
+            try:
+                before = _decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # A one-row aggregate decides 304s before the page query and delivery join run
+        feed_user_id = uuid.UUID(str(user.uuid)) if include_delivered else None
+        version = Signal.get_feed_version(user_risk_tier, before=before, since=since_date, user_id=feed_user_id)
+        etag = _feed_etag(user_risk_tier.lower(), include_delivered, limit, cursor, since_param, version)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            return response
+        
+        # One extra row tells us whether another page exists
+        rows = Signal.get_feed_page(
+            user_risk_tier,
+            limit + 1,
+            before=before,
+            since=since_date,
+            user_id=feed_user_id
         )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
-        # Apply since filter if provided
-        if since_date:
-            query = query.filter(Signal.created_at >= since_date)
-        
-        # Execute query
-        signals = query.order_by(Signal.created_at.desc()).limit(limit).all()
-        
-        # Convert signals to dict and add delivery status if requested
         signals_data = []
-        for signal in signals:
-            signal_dict = signal.to_dict()
+        for signal, delivered, delivered_at in rows:
+            # Cached encoding; per-user delivery fields are appended when the body is written
+            signal_dict = signal.to_cached_dict()
             
             if include_delivered:
-                # Check delivery status
-                user_signal = UserSignal.query.filter_by(
-                    user_id=str(user.uuid),
-                    signal_id=str(signal.id)
-                ).first()
-                
-                signal_dict['delivered'] = user_signal.delivered if user_signal else False
-                signal_dict['delivered_at'] = user_signal.delivered_at.isoformat() if user_signal and user_signal.delivered_at else None
+                signal_dict['delivered'] = bool(delivered)
+                signal_dict['delivered_at'] = delivered_at.isoformat() if delivered_at else None
             
             signals_data.append(signal_dict)
         
+        next_cursor = None
+        if has_more and rows:
+            last_signal = rows[-1][0]
+            next_cursor = _encode_cursor(last_signal.created_at, last_signal.id)
+        
         logger.info(f"Fetched {len(signals_data)} signals for user {user_id} (risk_tier: {user_risk_tier})")
         
-        return jsonify({
+        response = make_response(encode_response({
             'success': True,
             'signals': signals_data,
             'count': len(signals_data),
             'user_risk_tier': user_risk_tier,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
             'filters': {
                 'limit': limit,
+                'cursor': cursor,
                 'since': since_param,
                 'include_delivered': include_delivered
             }
-        }), 200
+        }))
+        response.mimetype = 'application/json'
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error fetching user signals: {e}")
@@ -141,15 +189,15 @@ def get_recent_signals():
             Signal.created_at >= since_date
         ).order_by(Signal.created_at.desc()).all()
         
-        signals_data = [signal.to_dict() for signal in signals]
+        signals_data = [signal.to_cached_dict() for signal in signals]
         
-        return jsonify({
+        return Response(encode_response({
             'success': True,
             'signals': signals_data,
             'count': len(signals_data),
             'period': '24_hours',
             'user_risk_tier': user_risk_tier
-        }), 200
+        }), status=200, mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Error fetching recent signals: {e}")
@@ -5,6 +5,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import logging
 
+from .price_hub import price_hub
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -42,6 +44,12 @@ def validate_symbol(symbol):
 def get_price(symbol):
     """Get current price for a symbol with smoothing"""
     try:
+        # Serve from the price hub while its tick is fresh
+        tick = price_hub.get_latest(symbol, max_age=price_hub.poll_interval * 2)
+        if tick is not None and tick.get('detail'):
+            return jsonify({**tick['detail'], 'symbol': symbol, 'price': round(tick['price'], 6),
+                            'timestamp': tick['timestamp']})
+        
         # Validate and normalize symbol
         normalized_symbol = validate_symbol(symbol)
         logger.info(f"Fetching price for {symbol} (normalized: {normalized_symbol})")
@@ -89,6 +97,8 @@ def get_price(symbol):
             'normalized_symbol': normalized_symbol
         }
         
+        price_hub.publish_tick(symbol, latest_price, detail=response_data)
+        
         logger.info(f"Successfully fetched price for {symbol}: {latest_price}")
         return jsonify(response_data)
         
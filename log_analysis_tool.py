@@ -1,85 +1,88 @@
 #!/usr/bin/env python3
 """
 Log Analysis and Comparison Tool
-Analyzes and compares backend and frontend logs to identify execution differences
+Analyzes and compares backend and frontend logs to identify execution differences.
+Logs are ingested into a partitioned columnar store (log_store.py), parsing only
+what was appended since the last run, and each analysis queries the columns it
+needs from that store.
 """
 
 import os
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import argparse
-from collections import defaultdict, Counter
 import numpy as np
 
+from log_store import LogStore
+
+BACKEND_FILES = [
+    "flask_backend_structured.json",
+    "api_server_structured.json", 
+    "database_structured.json",
+    "external_apis_structured.json"
+]
+
+FRONTEND_FILES = [
+    "frontend_app_structured.json",
+    "react_component_structured.json"
+]
+
+def _to_timestamps(values: pd.Series) -> pd.Series:
+    """Parse ISO timestamps (with or without a Z suffix), dropping unparseable ones"""
+    return pd.to_datetime(values, format='ISO8601', utc=True, errors='coerce').dropna()
+
+def _rate_per_hour(timestamps: pd.Series, count: int) -> float:
+    timestamps = _to_timestamps(timestamps)
+    if timestamps.empty:
+        return 0.0
+    time_span = (timestamps.max() - timestamps.min()).total_seconds() / 3600  # hours
+    return count / time_span if time_span > 0 else 0.0
+
 class LogAnalyzer:
     """Comprehensive log analysis and comparison tool"""
     
-    def __init__(self, logs_dir: str = "logs"):
+    def __init__(self, logs_dir: str = "logs", store_dir: Optional[str] = None, workers: Optional[int] = None,
+                 since: Optional[str] = None, until: Optional[str] = None):
         self.logs_dir = logs_dir
-        self.backend_logs = []
-        self.frontend_logs = []
+        self.store = LogStore(store_dir or os.path.join(logs_dir, '.log_store'), workers=workers)
+        self.since = since  # Inclusive YYYY-MM-DD bounds on the days analyzed
+        self.until = until
+        self.backend_count = 0
+        self.frontend_count = 0
         self.analysis_results = {}
         
     def load_logs(self):
-        """Load all log files from the logs directory"""
+        """Ingest new log lines into the store and count what is available for analysis"""
         print("📊 Loading log files...")
         
-        # Load backend logs
-        backend_files = [
-            "flask_backend_structured.json",
-            "api_server_structured.json", 
-            "database_structured.json",
-            "external_apis_structured.json"
-        ]
-        
-        for file in backend_files:
-            file_path = os.path.join(self.logs_dir, file)
-            if os.path.exists(file_path):
-                self._load_json_logs(file_path, "backend")
-                
-        # Load frontend logs (if available)
-        frontend_files = [
-            "frontend_app_structured.json",
-            "react_component_structured.json"
-        ]
-        
-        for file in frontend_files:
-            file_path = os.path.join(self.logs_dir, file)
-            if os.path.exists(file_path):
-                self._load_json_logs(file_path, "frontend")
-        
-        print(f"✅ Loaded {len(self.backend_logs)} backend logs and {len(self.frontend_logs)} frontend logs")
-        
-    def _load_json_logs(self, file_path: str, log_type: str):
-        """Load JSON structured logs from file"""
-        try:
-            with open(file_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            log_entry = json.loads(line)
-                            log_entry['log_type'] = log_type
-                            if log_type == "backend":
-                                self.backend_logs.append(log_entry)
-                            else:
-                                self.frontend_logs.append(log_entry)
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            print(f"⚠️ Error loading {file_path}: {e}")
+        sources = [(os.path.join(self.logs_dir, file), 'structured', 'backend') for file in BACKEND_FILES]
+        sources += [(os.path.join(self.logs_dir, file), 'structured', 'frontend') for file in FRONTEND_FILES]
+        added = self.store.ingest(sources)
+        
+        self.backend_count = len(self._query('backend', columns=['log_type']))
+        self.frontend_count = len(self._query('frontend', columns=['log_type']))
+        
+        print(f"✅ Loaded {self.backend_count} backend logs and {self.frontend_count} frontend logs ({added} newly parsed)")
+        
+    def _query(self, log_type: str, types: Optional[List[str]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows of one log type (optionally only some 'type' values) with just the given columns"""
+        return self.store.query(
+            columns, log_type=log_type, types=types,
+            sources=BACKEND_FILES if log_type == 'backend' else FRONTEND_FILES,
+            since=self.since, until=self.until
+        )
             
     def analyze_performance_differences(self) -> Dict[str, Any]:
         """Analyze performance differences between backend and frontend"""
         print("🔍 Analyzing performance differences...")
         
         # Extract performance metrics
-        backend_perf = [log for log in self.backend_logs if log.get('type') == 'performance']
-        frontend_perf = [log for log in self.frontend_logs if log.get('type') == 'performance']
+        columns = ['metric_name', 'name', 'value', 'timestamp']
+        backend_perf = self._query('backend', ['performance'], columns).sort_values('timestamp', kind='stable')
+        frontend_perf = self._query('frontend', ['performance'], columns).sort_values('timestamp', kind='stable')
         
         analysis = {
             'backend_performance': self._analyze_performance_metrics(backend_perf),
@@ -87,9 +90,9 @@ class LogAnalyzer:
             'comparison': {}
         }
         
-        # Compare common metrics
-        backend_metrics = {m['metric_name']: m['value'] for m in backend_perf if 'metric_name' in m}
-        frontend_metrics = {m['name']: m['value'] for m in frontend_perf if 'name' in m}
+        # Compare common metrics (latest value of each)
+        backend_metrics = backend_perf.dropna(subset=['metric_name']).groupby('metric_name', sort=False)['value'].last().to_dict()
+        frontend_metrics = frontend_perf.dropna(subset=['name']).groupby('name', sort=False)['value'].last().to_dict()
         
         # Find common metrics
         common_metrics = set(backend_metrics.keys()) & set(frontend_metrics.keys())
@@ -109,28 +112,26 @@ class LogAnalyzer:
             
         return analysis
         
-    def _analyze_performance_metrics(self, perf_logs: List[Dict]) -> Dict[str, Any]:
+    def _analyze_performance_metrics(self, perf_logs: pd.DataFrame) -> Dict[str, Any]:
         """Analyze performance metrics for a specific log type"""
-        if not perf_logs:
+        if perf_logs.empty:
             return {}
             
-        metrics = defaultdict(list)
-        for log in perf_logs:
-            metric_name = log.get('metric_name') or log.get('name', 'unknown')
-            value = log.get('value', 0)
-            metrics[metric_name].append(value)
+        metric_names = perf_logs['metric_name'].fillna(perf_logs['name']).fillna('unknown')
+        values = perf_logs['value'].fillna(0)
             
         analysis = {}
-        for metric_name, values in metrics.items():
+        for metric_name, metric_values in values.groupby(metric_names, sort=False):
+            metric_values = metric_values.to_numpy()
             analysis[metric_name] = {
-                'count': len(values),
-                'mean': np.mean(values),
-                'median': np.median(values),
-                'std': np.std(values),
-                'min': np.min(values),
-                'max': np.max(values),
-                'p95': np.percentile(values, 95),
-                'p99': np.percentile(values, 99)
+                'count': len(metric_values),
+                'mean': np.mean(metric_values),
+                'median': np.median(metric_values),
+                'std': np.std(metric_values),
+                'min': np.min(metric_values),
+                'max': np.max(metric_values),
+                'p95': np.percentile(metric_values, 95),
+                'p99': np.percentile(metric_values, 99)
             }
             
         return analysis
@@ -139,40 +140,20 @@ class LogAnalyzer:
         """Analyze request/response patterns and timing"""
         print("🔄 Analyzing request/response patterns...")
         
-        # Group requests and responses by request_id
-        backend_requests = {}
-        backend_responses = {}
-        
-        for log in self.backend_logs:
-            if log.get('type') == 'request':
-                request_id = log.get('request_id')
-                if request_id:
-                    backend_requests[request_id] = log
-            elif log.get('type') == 'response':
-                request_id = log.get('request_id')
-                if request_id:
-                    backend_responses[request_id] = log
+        # Latest request and response logged for each request_id
+        requests = self._query('backend', ['request'], ['request_id', 'method', 'path', 'timestamp'])
+        responses = self._query('backend', ['response'], ['request_id', 'status_code', 'execution_time_ms'])
+        requests = requests.dropna(subset=['request_id']).drop_duplicates('request_id', keep='last')
+        responses = responses.dropna(subset=['request_id']).drop_duplicates('request_id', keep='last')
                     
         # Match requests with responses
-        matched_requests = []
-        for request_id, request in backend_requests.items():
-            if request_id in backend_responses:
-                response = backend_responses[request_id]
-                matched_requests.append({
-                    'request_id': request_id,
-                    'method': request.get('method'),
-                    'path': request.get('path'),
-                    'status_code': response.get('status_code'),
-                    'execution_time': response.get('execution_time_ms'),
-                    'timestamp': request.get('timestamp')
-                })
+        df = requests.merge(responses, on='request_id').rename(columns={'execution_time_ms': 'execution_time'})
+        df['status_code'] = df['status_code'].astype('Int64')
                 
         # Analyze patterns
-        if matched_requests:
-            df = pd.DataFrame(matched_requests)
-            
+        if not df.empty:
             analysis = {
-                'total_requests': len(matched_requests),
+                'total_requests': len(df),
                 'avg_execution_time': df['execution_time'].mean(),
                 'median_execution_time': df['execution_time'].median(),
                 'slowest_endpoints': df.nlargest(10, 'execution_time')[['path', 'execution_time']].to_dict('records'),
@@ -187,15 +168,15 @@ class LogAnalyzer:
         
     def _analyze_hourly_patterns(self, df: pd.DataFrame) -> Dict[str, int]:
         """Analyze hourly request patterns"""
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        return df['hour'].value_counts().sort_index().to_dict()
+        return _to_timestamps(df['timestamp']).dt.hour.value_counts().sort_index().to_dict()
         
     def analyze_error_patterns(self) -> Dict[str, Any]:
         """Analyze error patterns and differences"""
         print("❌ Analyzing error patterns...")
         
-        backend_errors = [log for log in self.backend_logs if log.get('type') == 'error']
-        frontend_errors = [log for log in self.frontend_logs if log.get('type') == 'error']
+        columns = ['error_type', 'error_message', 'error_name', 'timestamp']
+        backend_errors = self._query('backend', ['error'], columns)
+        frontend_errors = self._query('frontend', ['error'], columns)
         
         analysis = {
             'backend_errors': self._analyze_errors(backend_errors),
@@ -204,52 +185,39 @@ class LogAnalyzer:
         }
         
         # Compare error types
-        backend_error_types = Counter([e.get('error_type', 'unknown') for e in backend_errors])
-        frontend_error_types = Counter([e.get('error', {}).get('name', 'unknown') for e in frontend_errors])
+        backend_error_types = backend_errors['error_type'].fillna('unknown').value_counts()
+        frontend_error_types = frontend_errors['error_name'].fillna('unknown').value_counts()
         
         analysis['error_comparison'] = {
-            'backend_error_types': dict(backend_error_types),
-            'frontend_error_types': dict(frontend_error_types),
+            'backend_error_types': backend_error_types.to_dict(),
+            'frontend_error_types': frontend_error_types.to_dict(),
             'total_backend_errors': len(backend_errors),
             'total_frontend_errors': len(frontend_errors)
         }
         
         return analysis
         
-    def _analyze_errors(self, errors: List[Dict]) -> Dict[str, Any]:
+    def _analyze_errors(self, errors: pd.DataFrame) -> Dict[str, Any]:
         """Analyze error patterns for a specific log type"""
-        if not errors:
+        if errors.empty:
             return {}
             
-        error_types = Counter([e.get('error_type', 'unknown') for e in errors])
-        error_messages = Counter([e.get('error_message', 'unknown') for e in errors])
+        error_types = errors['error_type'].fillna('unknown').value_counts()
+        error_messages = errors['error_message'].fillna('unknown').value_counts()
         
         return {
             'total_errors': len(errors),
-            'error_types': dict(error_types),
-            'common_error_messages': dict(error_messages.most_common(10)),
-            'error_rate_per_hour': self._calculate_error_rate(errors)
+            'error_types': error_types.to_dict(),
+            'common_error_messages': error_messages.head(10).to_dict(),
+            'error_rate_per_hour': _rate_per_hour(errors['timestamp'], len(errors))
         }
         
-    def _calculate_error_rate(self, errors: List[Dict]) -> float:
-        """Calculate error rate per hour"""
-        if not errors:
-            return 0.0
-            
-        # Get time range
-        timestamps = [datetime.fromisoformat(e['timestamp'].replace('Z', '+00:00')) for e in errors]
-        if not timestamps:
-            return 0.0
-            
-        time_span = (max(timestamps) - min(timestamps)).total_seconds() / 3600  # hours
-        return len(errors) / time_span if time_span > 0 else 0.0
-        
     def analyze_user_behavior_patterns(self) -> Dict[str, Any]:
         """Analyze user behavior patterns from frontend logs"""
         print("👤 Analyzing user behavior patterns...")
         
-        user_actions = [log for log in self.frontend_logs if log.get('type') == 'user_action']
-        api_calls = [log for log in self.frontend_logs if log.get('type') == 'api_call']
+        user_actions = self._query('frontend', ['user_action'], ['action', 'component', 'sessionId', 'timestamp'])
+        api_calls = self._query('frontend', ['api_call'], ['url', 'method', 'status', 'responseTime'])
         
         analysis = {
             'user_actions': self._analyze_user_actions(user_actions),
@@ -259,80 +227,66 @@ class LogAnalyzer:
         
         return analysis
         
-    def _analyze_user_actions(self, actions: List[Dict]) -> Dict[str, Any]:
+    def _analyze_user_actions(self, actions: pd.DataFrame) -> Dict[str, Any]:
         """Analyze user action patterns"""
-        if not actions:
+        if actions.empty:
             return {}
             
-        action_types = Counter([a.get('action', 'unknown') for a in actions])
-        components = Counter([a.get('component', 'unknown') for a in actions])
+        action_types = actions['action'].fillna('unknown').value_counts()
+        components = actions['component'].fillna('unknown').value_counts()
         
         return {
             'total_actions': len(actions),
-            'action_types': dict(action_types),
-            'most_active_components': dict(components.most_common(10)),
-            'actions_per_hour': self._calculate_actions_per_hour(actions)
+            'action_types': action_types.to_dict(),
+            'most_active_components': components.head(10).to_dict(),
+            'actions_per_hour': _rate_per_hour(actions['timestamp'], len(actions))
         }
         
-    def _analyze_api_calls(self, api_calls: List[Dict]) -> Dict[str, Any]:
+    def _analyze_api_calls(self, api_calls: pd.DataFrame) -> Dict[str, Any]:
         """Analyze API call patterns"""
-        if not api_calls:
+        if api_calls.empty:
             return {}
             
-        endpoints = Counter([call.get('url', 'unknown') for call in api_calls])
-        methods = Counter([call.get('method', 'unknown') for call in api_calls])
-        status_codes = Counter([call.get('status', 0) for call in api_calls])
+        endpoints = api_calls['url'].fillna('unknown').value_counts()
+        methods = api_calls['method'].fillna('unknown').value_counts()
+        status_codes = api_calls['status'].fillna(0).astype(int).value_counts()
         
-        response_times = [call.get('responseTime', 0) for call in api_calls if call.get('responseTime')]
+        response_times = api_calls['responseTime'].dropna()
+        response_times = response_times[response_times != 0]
         
         analysis = {
             'total_calls': len(api_calls),
-            'endpoints': dict(endpoints.most_common(10)),
-            'methods': dict(methods),
-            'status_codes': dict(status_codes),
-            'avg_response_time': np.mean(response_times) if response_times else 0,
-            'median_response_time': np.median(response_times) if response_times else 0
+            'endpoints': endpoints.head(10).to_dict(),
+            'methods': methods.to_dict(),
+            'status_codes': status_codes.to_dict(),
+            'avg_response_time': response_times.mean() if not response_times.empty else 0,
+            'median_response_time': response_times.median() if not response_times.empty else 0
         }
         
         return analysis
         
-    def _analyze_user_engagement(self, actions: List[Dict]) -> Dict[str, Any]:
+    def _analyze_user_engagement(self, actions: pd.DataFrame) -> Dict[str, Any]:
         """Analyze user engagement metrics"""
-        if not actions:
+        if actions.empty:
             return {}
             
         # Group by session
-        sessions = defaultdict(list)
-        for action in actions:
-            session_id = action.get('sessionId', 'unknown')
-            sessions[session_id].append(action)
-            
-        session_durations = []
-        for session_actions in sessions.values():
-            if len(session_actions) > 1:
-                timestamps = [datetime.fromisoformat(a['timestamp'].replace('Z', '+00:00')) for a in session_actions]
-                duration = (max(timestamps) - min(timestamps)).total_seconds() / 60  # minutes
-                session_durations.append(duration)
+        sessions = actions['sessionId'].fillna('unknown')
+        actions_per_session = sessions.value_counts()
+        
+        timestamps = _to_timestamps(actions['timestamp'])
+        by_session = timestamps.groupby(sessions.loc[timestamps.index])
+        multi_action = actions_per_session[actions_per_session > 1].index
+        spans = (by_session.max() - by_session.min()).loc[lambda span: span.index.isin(multi_action)]
+        session_durations = spans.dt.total_seconds() / 60  # minutes
                 
         return {
-            'total_sessions': len(sessions),
-            'avg_session_duration': np.mean(session_durations) if session_durations else 0,
-            'median_session_duration': np.median(session_durations) if session_durations else 0,
-            'actions_per_session': np.mean([len(actions) for actions in sessions.values()])
+            'total_sessions': len(actions_per_session),
+            'avg_session_duration': session_durations.mean() if not session_durations.empty else 0,
+            'median_session_duration': session_durations.median() if not session_durations.empty else 0,
+            'actions_per_session': actions_per_session.mean()
         }
         
-    def _calculate_actions_per_hour(self, actions: List[Dict]) -> float:
-        """Calculate actions per hour"""
-        if not actions:
-            return 0.0
-            
-        timestamps = [datetime.fromisoformat(a['timestamp'].replace('Z', '+00:00')) for a in actions]
-        if not timestamps:
-            return 0.0
-            
-        time_span = (max(timestamps) - min(timestamps)).total_seconds() / 3600  # hours
-        return len(actions) / time_span if time_span > 0 else 0.0
-        
     def generate_comparison_report(self) -> str:
         """Generate a comprehensive comparison report"""
         print("📋 Generating comparison report...")
@@ -349,8 +303,8 @@ class LogAnalyzer:
 Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 ## Executive Summary
-- Backend Logs: {len(self.backend_logs)} entries
-- Frontend Logs: {len(self.frontend_logs)} entries
+- Backend Logs: {self.backend_count} entries
+- Frontend Logs: {self.frontend_count} entries
 - Analysis Period: {self._get_analysis_period()}
 
 ## Performance Comparison
@@ -376,14 +330,14 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
     def _get_analysis_period(self) -> str:
         """Get the analysis period from logs"""
-        all_timestamps = []
-        for log in self.backend_logs + self.frontend_logs:
-            if 'timestamp' in log:
-                all_timestamps.append(datetime.fromisoformat(log['timestamp'].replace('Z', '+00:00')))
+        all_timestamps = pd.concat([
+            _to_timestamps(self._query(log_type, columns=['timestamp'])['timestamp'])
+            for log_type in ('backend', 'frontend')
+        ])
                 
-        if all_timestamps:
-            start = min(all_timestamps)
-            end = max(all_timestamps)
+        if not all_timestamps.empty:
+            start = all_timestamps.min()
+            end = all_timestamps.max()
             return f"{start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%Y-%m-%d %H:%M')}"
         return "Unknown"
         
@@ -531,40 +485,27 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
     def _create_performance_chart(self, output_dir: str):
         """Create performance comparison chart"""
-        backend_perf = [log for log in self.backend_logs if log.get('type') == 'performance']
-        frontend_perf = [log for log in self.frontend_logs if log.get('type') == 'performance']
+        backend_perf = self._query('backend', ['performance'], ['metric_name', 'value'])
+        frontend_perf = self._query('frontend', ['performance'], ['name', 'value'])
         
-        if not backend_perf and not frontend_perf:
+        if backend_perf.empty and frontend_perf.empty:
             return
             
         plt.figure(figsize=(12, 8))
         
-        # Extract common metrics
-        backend_metrics = defaultdict(list)
-        frontend_metrics = defaultdict(list)
-        
-        for log in backend_perf:
-            metric_name = log.get('metric_name', 'unknown')
-            value = log.get('value', 0)
-            backend_metrics[metric_name].append(value)
-            
-        for log in frontend_perf:
-            metric_name = log.get('name', 'unknown')
-            value = log.get('value', 0)
-            frontend_metrics[metric_name].append(value)
+        # Average of each metric
+        backend_metrics = backend_perf['value'].fillna(0).groupby(backend_perf['metric_name'].fillna('unknown')).mean()
+        frontend_metrics = frontend_perf['value'].fillna(0).groupby(frontend_perf['name'].fillna('unknown')).mean()
             
         # Find common metrics
-        common_metrics = set(backend_metrics.keys()) & set(frontend_metrics.keys())
+        common_metrics = set(backend_metrics.index) & set(frontend_metrics.index)
         
         if common_metrics:
             data = []
             labels = []
             
             for metric in list(common_metrics)[:10]:  # Limit to 10 metrics
-                backend_avg = np.mean(backend_metrics[metric])
-                frontend_avg = np.mean(frontend_metrics[metric])
-                
-                data.append([backend_avg, frontend_avg])
+                data.append([backend_metrics[metric], frontend_metrics[metric]])
                 labels.append(metric)
                 
             x = np.arange(len(labels))
@@ -584,8 +525,8 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             
     def _create_error_chart(self, output_dir: str):
         """Create error distribution chart"""
-        backend_errors = [log for log in self.backend_logs if log.get('type') == 'error']
-        frontend_errors = [log for log in self.frontend_logs if log.get('type') == 'error']
+        backend_errors = len(self._query('backend', ['error'], ['type']))
+        frontend_errors = len(self._query('frontend', ['error'], ['type']))
         
         if not backend_errors and not frontend_errors:
             return
@@ -593,8 +534,8 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         plt.figure(figsize=(10, 6))
         
         error_counts = {
-            'Backend': len(backend_errors),
-            'Frontend': len(frontend_errors)
+            'Backend': backend_errors,
+            'Frontend': frontend_errors
         }
         
         plt.bar(error_counts.keys(), error_counts.values(), color=['#ff6b6b', '#4ecdc4'])
@@ -605,48 +546,51 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
     def _create_timeline_chart(self, output_dir: str):
         """Create request timeline chart"""
-        requests = [log for log in self.backend_logs if log.get('type') == 'request']
+        timestamps = _to_timestamps(self._query('backend', ['request'], ['timestamp'])['timestamp'])
         
-        if not requests:
+        if timestamps.empty:
             return
             
         # Group by hour
-        hourly_counts = defaultdict(int)
-        for req in requests:
-            timestamp = datetime.fromisoformat(req['timestamp'].replace('Z', '+00:00'))
-            hour = timestamp.strftime('%Y-%m-%d %H:00')
-            hourly_counts[hour] += 1
-            
-        if hourly_counts:
-            hours = sorted(hourly_counts.keys())
-            counts = [hourly_counts[h] for h in hours]
-            
-            plt.figure(figsize=(15, 6))
-            plt.plot(hours, counts, marker='o', linewidth=2, markersize=6)
-            plt.title('Request Timeline - Backend')
-            plt.xlabel('Time')
-            plt.ylabel('Number of Requests')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig(os.path.join(output_dir, 'request_timeline.png'), dpi=300, bbox_inches='tight')
-            plt.close()
+        hourly_counts = timestamps.dt.strftime('%Y-%m-%d %H:00').value_counts().sort_index()
+            
+        hours = list(hourly_counts.index)
+        counts = list(hourly_counts.values)
+        
+        plt.figure(figsize=(15, 6))
+        plt.plot(hours, counts, marker='o', linewidth=2, markersize=6)
+        plt.title('Request Timeline - Backend')
+        plt.xlabel('Time')
+        plt.ylabel('Number of Requests')
+        plt.xticks(rotation=45)
+        plt.tight_layout()
+        plt.savefig(os.path.join(output_dir, 'request_timeline.png'), dpi=300, bbox_inches='tight')
+        plt.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze and compare backend vs frontend logs')
     parser.add_argument('--logs-dir', default='logs', help='Directory containing log files')
     parser.add_argument('--output-dir', default='log_analysis_output', help='Output directory for analysis results')
+    parser.add_argument('--store-dir', help='Columnar log store directory (default: <logs-dir>/.log_store)')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: LOG_STORE_WORKERS or CPU count)')
+    parser.add_argument('--since', help='First day to analyze (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Last day to analyze (YYYY-MM-DD)')
+    parser.add_argument('--rebuild', action='store_true', help='Discard the log store and re-parse every log file')
     parser.add_argument('--generate-report', action='store_true', help='Generate comprehensive report')
     parser.add_argument('--create-visualizations', action='store_true', help='Create visualization charts')
     
     args = parser.parse_args()
     
     # Initialize analyzer
-    analyzer = LogAnalyzer(args.logs_dir)
+    analyzer = LogAnalyzer(args.logs_dir, store_dir=args.store_dir, workers=args.workers,
+                           since=args.since, until=args.until)
+    if args.rebuild:
+        analyzer.store.clear()
     
     # Load logs
     analyzer.load_logs()
     
-    if not analyzer.backend_logs and not analyzer.frontend_logs:
+    if not analyzer.backend_count and not analyzer.frontend_count:
         print("❌ No log files found. Please ensure logs are generated first.")
         return
         
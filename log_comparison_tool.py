@@ -6,24 +6,36 @@ Analyzes and compares frontend and backend logs to identify patterns and differe
 
 import os
 import sys
-import json
-import re
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 import argparse
 
+import numpy as np
+import pandas as pd
+
+from log_store import LogStore
+
+def _counter(values: pd.Series) -> Counter:
+    """Counter of the non-null values, most common first"""
+    return Counter(values.dropna().value_counts().to_dict())
+
+def _extract_floats(messages: pd.Series, pattern: str) -> List[float]:
+    """First match of pattern's group in each message, as floats"""
+    return messages.str.extract(pattern)[0].dropna().astype(float).tolist()
+
 class LogComparisonTool:
     """Tool for comparing and analyzing frontend and backend logs"""
     
-    def __init__(self, logs_dir: str = "logs"):
+    def __init__(self, logs_dir: str = "logs", store_dir: Optional[str] = None, workers: Optional[int] = None):
         self.logs_dir = logs_dir
-        self.backend_logs = {}
-        self.frontend_logs = {}
+        self.store = LogStore(store_dir or os.path.join(logs_dir, '.log_store'), workers=workers)
+        self.backend_logs: Dict[str, pd.DataFrame] = {}
+        self.frontend_logs: Dict[str, pd.DataFrame] = {}
         self.comparison_results = {}
         
     def load_logs(self):
-        """Load all log files from the logs directory"""
+        """Ingest new log lines into the store and load each file's entries from it"""
         print("📂 Loading log files...")
         
         # Backend log files
@@ -49,11 +61,18 @@ class LogComparisonTool:
             "frontend_structured.json"
         ]
         
+        # Parse what is new in every file in one parallel pass
+        sources = [(os.path.join(self.logs_dir, file), 'structured' if file.endswith('.json') else 'text', log_type)
+                   for files, log_type in ((backend_files, 'backend'), (frontend_files, 'frontend'))
+                   for file in files]
+        self.store.ingest(sources)
+        entries = self._load_entries(backend_files + frontend_files)
+        
         # Load backend logs
         for file in backend_files:
             file_path = os.path.join(self.logs_dir, file)
             if os.path.exists(file_path):
-                self.backend_logs[file] = self._parse_log_file(file_path)
+                self.backend_logs[file] = entries[file]
                 print(f"   ✅ Loaded {file} ({len(self.backend_logs[file])} entries)")
             else:
                 print(f"   ❌ {file} not found")
@@ -62,7 +81,7 @@ class LogComparisonTool:
         for file in frontend_files:
             file_path = os.path.join(self.logs_dir, file)
             if os.path.exists(file_path):
-                self.frontend_logs[file] = self._parse_log_file(file_path)
+                self.frontend_logs[file] = entries[file]
                 print(f"   ✅ Loaded {file} ({len(self.frontend_logs[file])} entries)")
             else:
                 print(f"   ❌ {file} not found")
@@ -70,63 +89,22 @@ class LogComparisonTool:
         print(f"📊 Total backend entries: {sum(len(logs) for logs in self.backend_logs.values())}")
         print(f"📊 Total frontend entries: {sum(len(logs) for logs in self.frontend_logs.values())}")
     
-    def _parse_log_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """Parse a log file and return structured data"""
-        entries = []
-        
-        try:
-            if file_path.endswith('.json'):
-                # Parse JSON structured logs
-                with open(file_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line:
-                            try:
-                                entry = json.loads(line)
-                                entries.append(entry)
-                            except json.JSONDecodeError:
-                                continue
-            else:
-                # Parse text logs
-                with open(file_path, 'r') as f:
-                    for line in f:
-                        entry = self._parse_log_line(line.strip())
-                        if entry:
-                            entries.append(entry)
-        except Exception as e:
-            print(f"   ⚠️  Error parsing {file_path}: {e}")
-        
-        return entries
+    def _load_entries(self, files: List[str]) -> Dict[str, pd.DataFrame]:
+        """Entries of the ingested log files (timestamp, level, message), read from the store in one pass"""
+        entries = self.store.query(['source', 'timestamp', 'level', 'message'], sources=files)
+        entries['timestamp'] = entries['timestamp'].fillna('')
+        entries['message'] = entries['message'].fillna('')
+        by_source = {source: frame.drop(columns=['source']).reset_index(drop=True)
+                     for source, frame in entries.groupby('source', sort=False)}
+        empty = entries.drop(columns=['source']).iloc[0:0]
+        return {file: by_source.get(file, empty) for file in files}
     
-    def _parse_log_line(self, line: str) -> Dict[str, Any]:
-        """Parse a single log line"""
-        if not line:
-            return None
-            
-        # Try to parse structured log format
-        # Format: timestamp | level | name | function | line | message
-        pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (\w+)\s+\| (\w+)\s+\| (\w+)\s+\| (\d+)\s+\| (.+)'
-        match = re.match(pattern, line)
-        
-        if match:
-            timestamp, level, name, function, line_num, message = match.groups()
-            return {
-                "timestamp": timestamp,
-                "level": level,
-                "name": name,
-                "function": function,
-                "line": int(line_num),
-                "message": message,
-                "raw": line
-            }
-        
-        # Fallback: return basic structure
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "level": "INFO",
-            "message": line,
-            "raw": line
-        }
+    def _entries(self, logs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        frames = [entries for entries in logs.values() if len(entries)]
+        if not frames:
+            return pd.DataFrame({'timestamp': pd.Series(dtype=object), 'level': pd.Series(dtype=object),
+                                 'message': pd.Series(dtype=object)})
+        return pd.concat(frames, ignore_index=True)
     
     def compare_log_patterns(self):
         """Compare patterns between frontend and backend logs"""
@@ -171,143 +149,66 @@ class LogComparisonTool:
         
         print("✅ Pattern analysis completed")
     
-    def _extract_errors(self, logs: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    def _extract_errors(self, logs: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
         """Extract error information from logs"""
-        errors = {
-            "count": 0,
-            "types": Counter(),
-            "messages": [],
-            "timestamps": []
-        }
+        entries = self._entries(logs)
+        messages = entries["message"]
+        errors = entries[(entries["level"] == "ERROR") | messages.str.lower().str.contains("error", regex=False)]
         
-        for file_name, entries in logs.items():
-            for entry in entries:
-                if entry.get("level") == "ERROR" or "error" in entry.get("message", "").lower():
-                    errors["count"] += 1
-                    errors["messages"].append(entry.get("message", ""))
-                    errors["timestamps"].append(entry.get("timestamp", ""))
-                    
-                    # Extract error type
-                    message = entry.get("message", "")
-                    if "ValueError" in message:
-                        errors["types"]["ValueError"] += 1
-                    elif "TypeError" in message:
-                        errors["types"]["TypeError"] += 1
-                    elif "ConnectionError" in message:
-                        errors["types"]["ConnectionError"] += 1
-                    elif "TimeoutError" in message:
-                        errors["types"]["TimeoutError"] += 1
-                    else:
-                        errors["types"]["Other"] += 1
-        
-        return errors
+        # Extract error type
+        known_types = ["ValueError", "TypeError", "ConnectionError", "TimeoutError"]
+        error_types = np.select(
+            [errors["message"].str.contains(name, regex=False) for name in known_types], known_types, "Other"
+        ) if len(errors) else []
+        
+        return {
+            "count": len(errors),
+            "types": _counter(pd.Series(error_types, dtype=object)),
+            "messages": errors["message"].tolist(),
+            "timestamps": errors["timestamp"].tolist()
+        }
     
-    def _extract_performance_metrics(self, logs: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    def _extract_performance_metrics(self, logs: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
         """Extract performance metrics from logs"""
-        metrics = {
-            "response_times": [],
-            "execution_times": [],
-            "memory_usage": [],
-            "api_response_times": []
-        }
+        messages = self._entries(logs)["message"]
         
-        for file_name, entries in logs.items():
-            for entry in entries:
-                message = entry.get("message", "")
-                
-                # Extract response times
-                response_match = re.search(r'Time: ([\d.]+)s', message)
-                if response_match:
-                    metrics["response_times"].append(float(response_match.group(1)))
-                
-                # Extract execution times
-                exec_match = re.search(r'execution_time_ms.*?(\d+\.?\d*)', message)
-                if exec_match:
-                    metrics["execution_times"].append(float(exec_match.group(1)))
-                
-                # Extract memory usage
-                memory_match = re.search(r'memory.*?(\d+\.?\d*)\s*MB', message)
-                if memory_match:
-                    metrics["memory_usage"].append(float(memory_match.group(1)))
-                
-                # Extract API response times
-                api_match = re.search(r'response_time_ms.*?(\d+\.?\d*)', message)
-                if api_match:
-                    metrics["api_response_times"].append(float(api_match.group(1)))
-        
-        return metrics
+        return {
+            # Extract response times
+            "response_times": _extract_floats(messages, r'Time: ([\d.]+)s'),
+            # Extract execution times
+            "execution_times": _extract_floats(messages, r'execution_time_ms.*?(\d+\.?\d*)'),
+            # Extract memory usage
+            "memory_usage": _extract_floats(messages, r'memory.*?(\d+\.?\d*)\s*MB'),
+            # Extract API response times
+            "api_response_times": _extract_floats(messages, r'response_time_ms.*?(\d+\.?\d*)')
+        }
     
-    def _extract_api_calls(self, logs: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    def _extract_api_calls(self, logs: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
         """Extract API call information from logs"""
-        api_calls = {
-            "count": 0,
-            "methods": Counter(),
-            "endpoints": Counter(),
-            "status_codes": Counter(),
-            "response_times": []
-        }
+        messages = self._entries(logs)["message"]
+        messages = messages[messages.str.contains("API|REQUEST|RESPONSE")]
         
-        for file_name, entries in logs.items():
-            for entry in entries:
-                message = entry.get("message", "")
-                
-                if "API" in message or "REQUEST" in message or "RESPONSE" in message:
-                    api_calls["count"] += 1
-                    
-                    # Extract HTTP method
-                    method_match = re.search(r'(GET|POST|PUT|DELETE|PATCH)', message)
-                    if method_match:
-                        api_calls["methods"][method_match.group(1)] += 1
-                    
-                    # Extract endpoint
-                    endpoint_match = re.search(r'/(api/[^\s|]+)', message)
-                    if endpoint_match:
-                        api_calls["endpoints"][endpoint_match.group(1)] += 1
-                    
-                    # Extract status code
-                    status_match = re.search(r'Status: (\d+)', message)
-                    if status_match:
-                        api_calls["status_codes"][int(status_match.group(1))] += 1
-                    
-                    # Extract response time
-                    time_match = re.search(r'Time: ([\d.]+)s', message)
-                    if time_match:
-                        api_calls["response_times"].append(float(time_match.group(1)))
-        
-        return api_calls
+        return {
+            "count": len(messages),
+            # HTTP method, endpoint, status code and response time
+            "methods": _counter(messages.str.extract(r'(GET|POST|PUT|DELETE|PATCH)')[0]),
+            "endpoints": _counter(messages.str.extract(r'/(api/[^\s|]+)')[0]),
+            "status_codes": _counter(messages.str.extract(r'Status: (\d+)')[0].dropna().astype(int)),
+            "response_times": _extract_floats(messages, r'Time: ([\d.]+)s')
+        }
     
-    def _extract_user_actions(self, logs: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    def _extract_user_actions(self, logs: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
         """Extract user action information from frontend logs"""
-        user_actions = {
-            "count": 0,
-            "actions": Counter(),
-            "components": Counter(),
-            "users": Counter()
-        }
+        messages = self._entries(logs)["message"]
+        messages = messages[messages.str.contains("USER ACTION", regex=False)]
         
-        for file_name, entries in logs.items():
-            for entry in entries:
-                message = entry.get("message", "")
-                
-                if "USER ACTION" in message:
-                    user_actions["count"] += 1
-                    
-                    # Extract action type
-                    action_match = re.search(r'USER ACTION: (\w+)', message)
-                    if action_match:
-                        user_actions["actions"][action_match.group(1)] += 1
-                    
-                    # Extract component
-                    component_match = re.search(r'in (\w+)', message)
-                    if component_match:
-                        user_actions["components"][component_match.group(1)] += 1
-                    
-                    # Extract user ID
-                    user_match = re.search(r'User: (user_\d+)', message)
-                    if user_match:
-                        user_actions["users"][user_match.group(1)] += 1
-        
-        return user_actions
+        return {
+            "count": len(messages),
+            # Action type, component and user ID
+            "actions": _counter(messages.str.extract(r'USER ACTION: (\w+)')[0]),
+            "components": _counter(messages.str.extract(r'in (\w+)')[0]),
+            "users": _counter(messages.str.extract(r'User: (user_\d+)')[0])
+        }
     
     def _compare_error_patterns(self, backend_errors: Dict, frontend_errors: Dict) -> Dict[str, Any]:
         """Compare error patterns between backend and frontend"""
@@ -484,6 +385,8 @@ def main():
     parser.add_argument("--logs-dir", default="logs", help="Directory containing log files (default: logs)")
     parser.add_argument("--report", action="store_true", help="Generate detailed comparison report")
     parser.add_argument("--output", default="log_comparison_report.md", help="Output file for report (default: log_comparison_report.md)")
+    parser.add_argument("--store-dir", help="Columnar log store directory (default: <logs-dir>/.log_store)")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: LOG_STORE_WORKERS or CPU count)")
     
     args = parser.parse_args()
     
@@ -491,7 +394,7 @@ def main():
     print("=" * 50)
     
     # Initialize comparison tool
-    tool = LogComparisonTool(args.logs_dir)
+    tool = LogComparisonTool(args.logs_dir, store_dir=args.store_dir, workers=args.workers)
     
     # Load logs
     tool.load_logs()
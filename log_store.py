@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Log Store
+Columnar on-disk store for structured (JSON lines) and text logs. New bytes of
+each log file are split into newline-aligned chunks, parsed in parallel worker
+processes and written as Parquet files partitioned by service and day:
+
+    <root>/service=<service>/day=<YYYY-MM-DD>/part-<run>-<chunk>.parquet
+
+The layout can be read directly by DuckDB or pyarrow datasets. The byte offset
+reached in every file is remembered, so a re-run only parses what was appended
+since the last one. Writing Parquet needs pyarrow (requirements-log-tools.txt).
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LOG_STORE_CHUNK_BYTES = int(float(os.getenv('LOG_STORE_CHUNK_MB', '64')) * 1024 * 1024)
+LOG_STORE_WORKERS = int(os.getenv('LOG_STORE_WORKERS', '0')) or os.cpu_count() or 1
+
+# Fields kept from structured logs; nested error.name is flattened to error_name
+STRUCTURED_FIELDS = [
+    'timestamp', 'service', 'type', 'level', 'message', 'request_id', 'method', 'path',
+    'status_code', 'execution_time_ms', 'metric_name', 'name', 'value', 'error_type',
+    'error_message', 'action', 'component', 'url', 'status', 'responseTime', 'sessionId'
+]
+# Fields parsed from text logs: "timestamp | level | logger | function | line | message"
+TEXT_FIELDS = ['logger', 'function', 'line']
+COLUMNS = ['source', 'log_type', 'day'] + STRUCTURED_FIELDS + ['error_name'] + TEXT_FIELDS
+PARTITION_COLUMNS = ('service', 'day')
+NUMERIC_COLUMNS = ['status_code', 'execution_time_ms', 'value', 'status', 'responseTime', 'line']
+
+TEXT_LOG_PATTERN = re.compile(
+    r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (\w+)\s+\| (\w+)\s+\| (\w+)\s+\| (\d+)\s+\| (.+)'
+)
+
+OFFSETS_FILE = '_offsets.json'
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _scalar(value):
+    """Non-string values are kept as JSON text so every column has one type"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _structured_rows(lines: Iterable[str]) -> pd.DataFrame:
+    rows = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(entry, dict):
+            continue
+        row = {field: _scalar(entry.get(field)) for field in STRUCTURED_FIELDS}
+        error = entry.get('error')
+        row['error_name'] = error.get('name') if isinstance(error, dict) else None
+        rows.append(row)
+    return pd.DataFrame(rows, columns=STRUCTURED_FIELDS + ['error_name'])
+
+
+def _text_rows(lines: Iterable[str]) -> pd.DataFrame:
+    lines = pd.Series([line.strip() for line in lines], dtype=object)
+    lines = lines[lines != '']
+    parts = lines.str.extract(TEXT_LOG_PATTERN)
+    matched = parts[0].notna()
+    frame = pd.DataFrame({
+        # Unparseable lines keep the whole line as the message, stamped when they are read
+        'timestamp': parts[0].where(matched, datetime.now().isoformat()),
+        'level': parts[1].where(matched, 'INFO'),
+        'logger': parts[2],
+        'function': parts[3],
+        'line': parts[4],
+        'message': parts[5].where(matched, lines)
+    })
+    return frame.reset_index(drop=True)
+
+
+PARSERS = {'structured': _structured_rows, 'text': _text_rows}
+
+
+def _normalize(frame: pd.DataFrame, source: str, log_type: str, default_service: str) -> pd.DataFrame:
+    """Give a parsed chunk the store's columns and types"""
+    frame = frame.reindex(columns=COLUMNS)
+    frame['source'] = source
+    frame['log_type'] = log_type
+    frame['service'] = frame['service'].where(frame['service'].notna(), default_service).astype(str)
+    for column in COLUMNS:
+        if column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+        elif column not in PARTITION_COLUMNS:
+            frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+    days = frame['timestamp'].astype(object).where(frame['timestamp'].notna(), '').astype(str).str.slice(0, 10)
+    frame['day'] = days.where(days.str.match(r'\d{4}-\d{2}-\d{2}$', na=False), 'unknown')
+    return frame
+
+
+def _partition_dir(root: str, service: str, day: str) -> str:
+    safe_service = re.sub(r'[^A-Za-z0-9_.-]', '_', service) or 'unknown'
+    return os.path.join(root, f'service={safe_service}', f'day={day}')
+
+
+def part_schema():
+    """The one schema every part file is written with, so all-NULL chunk columns keep their type"""
+    import pyarrow as pa
+    return pa.schema([(column, pa.float64() if column in NUMERIC_COLUMNS else pa.string())
+                      for column in COLUMNS if column not in PARTITION_COLUMNS])
+
+
+def _write_frame(frame: pd.DataFrame, path: str) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    path += '.parquet'
+    table = pa.Table.from_pandas(frame.drop(columns=list(PARTITION_COLUMNS)), schema=part_schema(),
+                                 preserve_index=False)
+    pq.write_table(table, path)
+    return path
+
+
+def _read_frame(path: str, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """Read a part file; service and day come from its partition directories"""
+    stored = [column for column in columns if column not in PARTITION_COLUMNS] if columns else None
+    frame = pd.read_parquet(path, columns=stored)
+    day_dir = os.path.dirname(path)
+    frame['service'] = os.path.basename(os.path.dirname(day_dir))[len('service='):]
+    frame['day'] = os.path.basename(day_dir)[len('day='):]
+    return frame
+
+
+def parse_chunk(task: Tuple) -> Tuple[int, List[str]]:
+    """
+    Parse bytes [start, end) of a log file and write them to partitioned part files
+
+    Runs in a worker process; task is (path, start, end, parser, source, log_type,
+    service, staging_dir, part_name). Returns (rows, files written).
+    """
+    path, start, end, parser, source, log_type, service, staging_dir, part_name = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    frame = _normalize(PARSERS[parser](lines), source, log_type, service)
+
+    written = []
+    for (service_name, day), partition in frame.groupby(['service', 'day'], sort=False):
+        directory = _partition_dir(staging_dir, service_name, day)
+        os.makedirs(directory, exist_ok=True)
+        written.append(_write_frame(partition, os.path.join(directory, part_name)))
+    return len(frame), written
+
+
+class LogStore:
+    """Partitioned columnar log store with incremental, parallel ingestion.
+
+    Sources are registered by path with a parser ('structured' for JSON lines,
+    'text' for pipe-separated text logs) and a log type ('backend'/'frontend').
+    ingest() parses only bytes appended since the previous run, and only up to
+    the last complete line; a file that shrank or was replaced (rotation) is
+    read again from the start. query() reads just the requested columns of the
+    partitions matching the service and day filters.
+    """
+
+    def __init__(self, root_dir: str, workers: Optional[int] = None, chunk_bytes: Optional[int] = None):
+        if not parquet_available():
+            raise ImportError("The log store writes Parquet and needs pyarrow: "
+                              "pip install -r requirements-log-tools.txt")
+        self.root_dir = root_dir
+        self.workers = workers or LOG_STORE_WORKERS
+        self.chunk_bytes = chunk_bytes or LOG_STORE_CHUNK_BYTES
+        self.stats = {'files_scanned': 0, 'bytes_parsed': 0, 'rows_ingested': 0, 'chunks': 0, 'parts_written': 0}
+        os.makedirs(root_dir, exist_ok=True)
+        self.offsets: Dict[str, Dict[str, Any]] = self._load_offsets()
+
+    def _offsets_path(self) -> str:
+        return os.path.join(self.root_dir, OFFSETS_FILE)
+
+    def _load_offsets(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._offsets_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable log store offsets, re-reading all sources: {e}")
+            return {}
+
+    def _save_offsets(self):
+        path = self._offsets_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.offsets, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _plan_chunks(self, path: str, start: int, size: int) -> List[Tuple[int, int]]:
+        """Split [start, size) into chunks that begin and end on line boundaries"""
+        with open(path, 'rb') as f:
+            # Stop after the last newline so a line still being written is left for the next run
+            tail_start = max(start, size - 65536)
+            while True:
+                f.seek(tail_start)
+                tail = f.read(size - tail_start)
+                newline = tail.rfind(b'\n')
+                if newline >= 0:
+                    end = tail_start + newline + 1
+                    break
+                if tail_start == start:
+                    return []
+                tail_start = max(start, tail_start - 65536)
+
+            chunks = []
+            position = start
+            while position < end:
+                boundary = position + self.chunk_bytes
+                if boundary >= end:
+                    boundary = end
+                else:
+                    f.seek(boundary)
+                    f.readline()
+                    boundary = min(f.tell(), end)
+                chunks.append((position, boundary))
+                position = boundary
+        return chunks
+
+    def ingest(self, sources: Sequence[Tuple[str, str, str]]) -> int:
+        """
+        Parse what is new in each source
+
+        Args:
+            sources: (path, parser, log_type) tuples; missing files are skipped
+
+        Returns:
+            Number of rows added to the store
+        """
+        run = uuid.uuid4().hex[:12]
+        staging_dir = os.path.join(self.root_dir, f'_staging-{run}')
+        tasks = []
+        new_offsets = {}
+
+        for path, parser, log_type in sources:
+            if parser not in PARSERS:
+                raise ValueError(f"Unknown log parser: {parser}")
+            if not os.path.exists(path):
+                continue
+            self.stats['files_scanned'] += 1
+            key = os.path.abspath(path)
+            stat = os.stat(path)
+            known = self.offsets.get(key, {})
+            start = known.get('offset', 0)
+            if known.get('inode') != stat.st_ino or stat.st_size < start:
+                start = 0
+            if stat.st_size == start:
+                continue
+
+            source = os.path.basename(path)
+            service = re.sub(r'_structured$', '', os.path.splitext(source)[0])
+            chunks = self._plan_chunks(path, start, stat.st_size)
+            for index, (chunk_start, chunk_end) in enumerate(chunks):
+                part_name = f'part-{run}-{len(tasks):05d}'
+                tasks.append((path, chunk_start, chunk_end, parser, source, log_type, service,
+                              staging_dir, part_name))
+            end = chunks[-1][1] if chunks else start
+            new_offsets[key] = {'offset': end, 'inode': stat.st_ino, 'parser': parser, 'log_type': log_type}
+            self.stats['bytes_parsed'] += end - start
+
+        if not tasks:
+            return 0
+
+        try:
+            if self.workers > 1 and len(tasks) > 1:
+                # Spawned, not forked: the caller may have threads running
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)),
+                                         mp_context=multiprocessing.get_context('spawn')) as pool:
+                    results = list(pool.map(parse_chunk, tasks))
+            else:
+                results = [parse_chunk(task) for task in tasks]
+
+            # Publish the run only once every chunk parsed, so a failed run leaves no partial data
+            rows = 0
+            for chunk_rows, files in results:
+                rows += chunk_rows
+                for staged in files:
+                    target = os.path.join(self.root_dir, os.path.relpath(staged, staging_dir))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(staged, target)
+                    self.stats['parts_written'] += 1
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        self.offsets.update(new_offsets)
+        self._save_offsets()
+        self.stats['chunks'] += len(tasks)
+        self.stats['rows_ingested'] += rows
+        logger.info(f"Ingested {rows} log rows from {len(new_offsets)} files in {len(tasks)} chunks")
+        return rows
+
+    def partitions(self, services: Optional[Iterable[str]] = None, since: Optional[str] = None,
+                   until: Optional[str] = None) -> List[str]:
+        """Part files in the partitions matching the filters; since/until are inclusive YYYY-MM-DD days"""
+        wanted = {re.sub(r'[^A-Za-z0-9_.-]', '_', service) for service in services} if services else None
+        files = []
+        for service_dir in sorted(os.listdir(self.root_dir)):
+            if not service_dir.startswith('service='):
+                continue
+            if wanted is not None and service_dir[len('service='):] not in wanted:
+                continue
+            for day_dir in sorted(os.listdir(os.path.join(self.root_dir, service_dir))):
+                day = day_dir[len('day='):]
+                if day != 'unknown' and ((since and day < since) or (until and day > until)):
+                    continue
+                directory = os.path.join(self.root_dir, service_dir, day_dir)
+                files += [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                          if name.endswith('.parquet')]
+        return files
+
+    def query(self, columns: Optional[Sequence[str]] = None, log_type: Optional[str] = None,
+              types: Optional[Sequence[str]] = None, sources: Optional[Sequence[str]] = None,
+              services: Optional[Iterable[str]] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> pd.DataFrame:
+        """
+        Rows matching the filters, with only the requested columns
+
+        Args:
+            log_type: 'backend' or 'frontend'
+            types: Values of the structured 'type' field to keep
+            sources: Log file names to keep
+        """
+        filters = {'log_type': [log_type] if log_type else None, 'type': types, 'source': sources}
+        filters = {column: list(values) for column, values in filters.items() if values}
+        read_columns = list(dict.fromkeys(list(columns or COLUMNS) + list(filters))) if columns else None
+
+        frames = []
+        for path in self.partitions(services, since, until):
+            frame = _read_frame(path, read_columns)
+            for column, values in filters.items():
+                frame = frame[frame[column].isin(values)]
+            if len(frame):
+                frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame({column: pd.Series(dtype=float if column in NUMERIC_COLUMNS else object)
+                                 for column in (columns or COLUMNS)})
+        frame = pd.concat(frames, ignore_index=True)
+        return frame[list(columns)] if columns else frame
+
+    def count(self, **filters) -> int:
+        return len(self.query(columns=['log_type'], **filters))
+
+    def clear(self):
+        """Drop every partition and offset so the next ingest re-reads all sources"""
+        for name in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        self.offsets = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'workers': self.workers, 'sources': len(self.offsets)}
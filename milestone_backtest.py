@@ -13,6 +13,11 @@ from typing import Dict, List, Tuple, Optional
 import argparse
 from dataclasses import dataclass
 
+from backtest_engine import (BacktestResult, SignalBatch, load_ohlc_dir, load_signals_from_csv,
+                             load_signals_from_db, run_backtest)
+from milestone_robustness import monte_carlo, summarize_monte_carlo, walk_forward, write_rows
+from threshold_optimizer import SignalColumns, ThresholdOptimizer, candidate_to_dict, thresholds_to_candidate
+
 @dataclass
 class SignalResult:
     """Represents a historical signal with its outcome"""
@@ -26,7 +31,7 @@ class SignalResult:
     secondary_matches: List[str]
     secondary_count: int
     assigned_milestone: str
-    outcome: str  # 'won', 'lost', 'breakeven'
+    outcome: str  # 'won', 'lost', 'breakeven' ('expired' when replayed against OHLC)
     pnl: float
     timestamp: datetime
 
@@ -150,6 +155,41 @@ class MilestoneBacktester:
         
         return signals
     
+    def replay_historical_signals(self, signals: SignalBatch, ohlc_dir: str,
+                                  max_bars: int = 500) -> Tuple[List[SignalResult], BacktestResult]:
+        """Replay persisted signals against OHLC history instead of simulating outcomes"""
+        replay = run_backtest(signals, load_ohlc_dir(ohlc_dir, set(signals.pair)), max_bars=max_bars)
+        outcomes = replay.outcome
+        
+        results = []
+        for i in range(len(signals)):
+            # Trades still open when the data ends (or with no bars at all) have no outcome yet
+            if outcomes[i] not in ('won', 'lost', 'expired'):
+                continue
+            
+            confidence = float(signals.confidence[i]) if not np.isnan(signals.confidence[i]) else 0.0
+            if confidence > 1:
+                confidence /= 100  # Stored as a percentage
+            secondary_count = int(signals.secondary_count[i])
+            
+            results.append(SignalResult(
+                signal_id=str(signals.signal_id[i]),
+                pair=str(signals.pair[i]),
+                direction='LONG' if signals.direction[i] > 0 else 'SHORT',
+                entry_price=float(signals.entry_price[i]),
+                stop_loss=float(signals.stop_loss[i]),
+                take_profit=float(signals.take_profit[i]),
+                confidence_score=confidence,
+                secondary_matches=[],
+                secondary_count=secondary_count,
+                assigned_milestone=self._assign_milestone(confidence, secondary_count),
+                outcome=str(outcomes[i]),
+                pnl=float(replay.r_multiple[i]),  # In R so pairs with different price scales add up
+                timestamp=datetime.fromtimestamp(int(signals.timestamp[i]))
+            ))
+        
+        return results, replay
+    
     def _calculate_win_probability(self, confidence_score: float, secondary_count: int) -> float:
         """Calculate realistic win probability based on confidence and confirmations"""
         # Base probability from confidence score
@@ -206,7 +246,9 @@ class MilestoneBacktester:
                     'total_pnl': 0.0,
                     'avg_pnl_per_trade': 0.0,
                     'profit_factor': 0.0,
-                    'max_drawdown': 0.0
+                    'max_drawdown': 0.0,
+                    'target_win_rate': self.target_win_rates[milestone],
+                    'win_rate_diff': self.target_win_rates[milestone]
                 }
                 continue
             
@@ -246,53 +288,62 @@ class MilestoneBacktester:
         
         return results
     
-    def optimize_thresholds(self, signals: List[SignalResult], iterations: int = 1000) -> MilestoneThresholds:
-        """Use Monte Carlo optimization to find best thresholds"""
-        print(f"Optimizing thresholds with {iterations} iterations...")
+    def optimize_thresholds(self, signals: List[SignalResult], iterations: int = 1000,
+                            method: str = 'random', workers: int = 1,
+                            seed: Optional[int] = None) -> Tuple[MilestoneThresholds, Dict]:
+        """
+        Search for thresholds whose milestone win rates best match the targets
         
-        best_thresholds = MilestoneThresholds()
-        best_score = float('inf')
-        best_results = None
+        Args:
+            signals: Signals with outcomes
+            iterations: Candidate thresholds to evaluate
+            method: 'random', 'grid' or 'cem' (adaptive cross-entropy search)
+            workers: Processes used to score candidates
+            seed: Random seed for reproducible searches
         
-        for i in range(iterations):
-            # Generate random thresholds
-            thresholds = MilestoneThresholds(
-                M1_confidence=random.uniform(0.75, 0.95),
-                M1_confirmations=random.randint(2, 5),
-                M2_confidence=random.uniform(0.50, 0.75),
-                M2_confirmations=random.randint(1, 4),
-                M3_confidence=random.uniform(0.30, 0.55),
-                M3_confirmations=random.randint(0, 3),
-                M4_confidence=0.0,
-                M4_confirmations=0
-            )
-            
-            # Ensure thresholds are in descending order
-            if (thresholds.M1_confidence <= thresholds.M2_confidence or
-                thresholds.M2_confidence <= thresholds.M3_confidence):
-                continue
-            
-            # Calculate performance
-            results = self.calculate_milestone_performance(signals, thresholds)
-            
-            # Calculate optimization score (minimize win rate differences)
-            score = sum(results[m]['win_rate_diff'] for m in ['M1', 'M2', 'M3', 'M4'])
-            
-            # Add penalty for empty milestones
-            empty_penalty = sum(10 for m in ['M1', 'M2', 'M3'] if results[m]['total_signals'] == 0)
-            score += empty_penalty
-            
-            if score < best_score:
-                best_score = score
-                best_thresholds = thresholds
-                best_results = results
-                
-            if (i + 1) % 100 == 0:
-                print(f"Iteration {i + 1}/{iterations}, Best score: {best_score:.4f}")
+        Returns:
+            (best thresholds, milestone performance under them)
+        """
+        print(f"Optimizing thresholds with {iterations} {method} iterations...")
+        
+        # Signals are converted to columns once; candidates are scored without touching them
+        columns = SignalColumns.from_signals(signals)
+        with ThresholdOptimizer(columns, self.target_win_rates, workers=workers) as optimizer:
+            best, best_score, evaluated = optimizer.search(method, iterations, seed)
         
-        print(f"\nOptimization complete! Best score: {best_score:.4f}")
+        best_thresholds = MilestoneThresholds(**candidate_to_dict(best))
+        best_results = self.calculate_milestone_performance(signals, best_thresholds)
+        
+        print(f"\nOptimization complete! Evaluated {evaluated} candidates, best score: {best_score:.4f}")
         return best_thresholds, best_results
     
+    def walk_forward(self, signals: List[SignalResult], train_days: float = 90, test_days: float = 30,
+                     step_days: Optional[float] = None, iterations: int = 1000, method: str = 'random',
+                     workers: int = 1, seed: int = 0) -> List[Dict]:
+        """
+        Optimize thresholds on rolling training windows and measure them on the following test window
+        
+        Returns:
+            One row per fold and milestone with in- and out-of-sample win rates
+        """
+        columns = SignalColumns.from_signals(signals)
+        rows = walk_forward(columns, self.target_win_rates, train_days, test_days, step_days,
+                            method, iterations, workers, seed)
+        print(f"Walk-forward complete: {len(rows) // 4} folds")
+        return rows
+    
+    def monte_carlo(self, signals: List[SignalResult], thresholds: MilestoneThresholds,
+                    resamples: int = 1000, workers: int = 1, seed: int = 0) -> Tuple[List[Dict], Dict]:
+        """
+        Bootstrap each milestone's trade sequence to get win rate and drawdown distributions
+        
+        Returns:
+            (one row per resample and milestone, percentile summary per milestone)
+        """
+        columns = SignalColumns.from_signals(signals)
+        rows = monte_carlo(columns, thresholds_to_candidate(thresholds), resamples, workers, seed)
+        return rows, summarize_monte_carlo(rows, self.target_win_rates)
+    
     def export_results_to_csv(self, signals: List[SignalResult], results: Dict, 
                              filename: str = "milestone_backtest_results.csv"):
         """Export backtest results to CSV"""
@@ -366,9 +417,9 @@ class MilestoneBacktester:
         
         for milestone in ['M1', 'M2', 'M3', 'M4']:
             r = results[milestone]
-            print(f"{milestone:<10} {r['total_signals']:<8} {r['win_rate']:.1%:<10} "
-                  f"{r['target_win_rate']:.1%:<8} {r['win_rate_diff']:.1%:<8} "
-                  f"{r['total_pnl']:+.2f:<12} {r['profit_factor']:.2f:<12}")
+            print(f"{milestone:<10} {r['total_signals']:<8} {r['win_rate']:<10.1%} "
+                  f"{r['target_win_rate']:<8.1%} {r['win_rate_diff']:<8.1%} "
+                  f"{r['total_pnl']:<+12.2f} {r['profit_factor']:<12.2f}")
         
         print("\nRecommendations:")
         for milestone in ['M1', 'M2', 'M3', 'M4']:
@@ -393,20 +444,63 @@ def main():
                        help='Output CSV filename (default: milestone_backtest_results.csv)')
     parser.add_argument('--no-optimize', action='store_true',
                        help='Skip optimization and use default thresholds')
+    parser.add_argument('--method', type=str, default='random', choices=['random', 'grid', 'cem'],
+                       help='Threshold search method (default: random)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processes used to score candidate thresholds (default: 1)')
+    parser.add_argument('--seed', type=int, help='Random seed for the threshold search')
+    parser.add_argument('--signals-db', type=str,
+                       help='Replay persisted signals from this SQLite database instead of mock data')
+    parser.add_argument('--signals-table', type=str, default='signals', choices=['signals', 'signal_feed'],
+                       help='Table to read with --signals-db (default: signals)')
+    parser.add_argument('--signals-csv', type=str,
+                       help='Replay signals from this CSV instead of mock data')
+    parser.add_argument('--ohlc-dir', type=str,
+                       help='Directory of <PAIR>.npz / <PAIR>.csv OHLC files for replay')
+    parser.add_argument('--max-bars', type=int, default=500,
+                       help='Bars before an untouched replayed signal expires (default: 500)')
+    parser.add_argument('--replay-output', type=str,
+                       help='Write per-signal replay detail (exit, MAE/MFE) to this CSV')
+    parser.add_argument('--walk-forward', action='store_true',
+                       help='Re-optimize on rolling train windows and score each following test window')
+    parser.add_argument('--train-days', type=float, default=90,
+                       help='Walk-forward training window in days (default: 90)')
+    parser.add_argument('--test-days', type=float, default=30,
+                       help='Walk-forward test window in days (default: 30)')
+    parser.add_argument('--step-days', type=float,
+                       help='Days between walk-forward folds (default: --test-days)')
+    parser.add_argument('--monte-carlo', type=int, default=0, metavar='RESAMPLES',
+                       help='Bootstrap this many trade sequences per milestone under the final thresholds')
+    parser.add_argument('--robustness-prefix', type=str, default='milestone_robustness',
+                       help='Prefix for walk-forward / Monte Carlo Parquet files (default: milestone_robustness)')
     
     args = parser.parse_args()
     
     backtester = MilestoneBacktester()
     
-    print("Generating mock historical data...")
-    signals = backtester.generate_mock_historical_data(args.signals)
+    if args.signals_db or args.signals_csv:
+        if not args.ohlc_dir:
+            parser.error('--ohlc-dir is required to replay persisted signals')
+        print("Replaying historical signals against OHLC data...")
+        batch = (load_signals_from_db(args.signals_db, args.signals_table) if args.signals_db
+                 else load_signals_from_csv(args.signals_csv))
+        if batch.skipped:
+            print(f"Skipped {batch.skipped} signals that could not be parsed")
+        signals, replay = backtester.replay_historical_signals(batch, args.ohlc_dir, args.max_bars)
+        print(f"Replayed {len(batch)} signals: {replay.summary()}")
+        if args.replay_output:
+            replay.to_csv(args.replay_output)
+    else:
+        print("Generating mock historical data...")
+        signals = backtester.generate_mock_historical_data(args.signals)
     
     if args.no_optimize:
         print("Using default thresholds...")
         thresholds = MilestoneThresholds()
         results = backtester.calculate_milestone_performance(signals, thresholds)
     else:
-        thresholds, results = backtester.optimize_thresholds(signals, args.iterations)
+        thresholds, results = backtester.optimize_thresholds(signals, args.iterations, args.method,
+                                                             args.workers, args.seed)
     
     # Print results
     backtester.print_results(results, thresholds)
@@ -414,6 +508,24 @@ def main():
     # Export to CSV
     backtester.export_results_to_csv(signals, results, args.output)
     
+    seed = args.seed if args.seed is not None else 0
+    if args.walk_forward:
+        rows = backtester.walk_forward(signals, args.train_days, args.test_days, args.step_days,
+                                       args.iterations, args.method, args.workers, seed)
+        for row in rows:
+            print(f"Fold {row['fold']:>3} {row['milestone']}: train {row['train_win_rate']:.1%} "
+                  f"test {row['test_win_rate']:.1%} (target {row['target_win_rate']:.1%}, "
+                  f"{row['test_total_signals']} signals)")
+        print(f"Walk-forward results saved to {write_rows(rows, f'{args.robustness_prefix}_walk_forward.parquet')}")
+    
+    if args.monte_carlo:
+        rows, summary = backtester.monte_carlo(signals, thresholds, args.monte_carlo, args.workers, seed)
+        for milestone, stats in summary.items():
+            print(f"{milestone}: win rate p5/p50/p95 {stats['win_rate_p5']:.1%}/{stats['win_rate_p50']:.1%}/"
+                  f"{stats['win_rate_p95']:.1%}, max drawdown p50/p95 {stats['max_drawdown_p50']:.2f}/"
+                  f"{stats['max_drawdown_p95']:.2f}, P(below target) {stats['prob_below_target']:.1%}")
+        print(f"Monte Carlo results saved to {write_rows(rows, f'{args.robustness_prefix}_monte_carlo.parquet')}")
+    
     # Generate configuration for signalScoringService.ts
     config_output = f"""
 // Optimized configuration for signalScoringService.ts
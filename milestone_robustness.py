@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Milestone Robustness Analysis for TraderEdgePro
+Walk-forward validation of optimized thresholds and bootstrap Monte Carlo
+distributions of win rate and drawdown per milestone.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from threshold_optimizer import MILESTONES, SignalColumns, ThresholdOptimizer, candidate_to_dict
+
+DAY = 86400
+
+
+def assign_milestones(columns: SignalColumns, candidate: np.ndarray) -> np.ndarray:
+    """Milestone index (0 = M1 ... 3 = M4) per signal under one threshold candidate"""
+    c, k = columns.confidence, columns.secondary_count
+    return np.select(
+        [(c >= candidate[0]) & (k >= candidate[1]),
+         (c >= candidate[2]) & (k >= candidate[3]),
+         (c >= candidate[4]) & (k >= candidate[5])],
+        [0, 1, 2], 3
+    )
+
+
+def milestone_metrics(columns: SignalColumns, candidate: np.ndarray, targets: np.ndarray) -> Dict[str, Dict]:
+    """Per-milestone metrics, matching MilestoneBacktester.calculate_milestone_performance"""
+    assignment = assign_milestones(columns, candidate)
+    results = {}
+    for index, milestone in enumerate(MILESTONES):
+        mask = assignment == index
+        total = int(mask.sum())
+        wins = int((mask & columns.won).sum())
+        gross_profit = columns.pnl[mask & columns.won].sum()
+        gross_loss = abs(columns.pnl[mask & columns.lost].sum())
+
+        running = np.cumsum(np.where(mask, columns.pnl, 0.0))
+        peak = np.maximum.accumulate(np.maximum(running, 0.0)) if total else np.zeros(1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.where(peak > 0, (peak - running) / peak, 0.0) if total else np.zeros(1)
+
+        win_rate = wins / total if total else 0.0
+        results[milestone] = {
+            'total_signals': total,
+            'win_rate': win_rate,
+            'total_pnl': float(columns.pnl[mask].sum()),
+            'avg_pnl_per_trade': float(columns.pnl[mask].mean()) if total else 0.0,
+            'profit_factor': float(gross_profit / gross_loss) if gross_loss > 0 else (float('inf') if total else 0.0),
+            'max_drawdown': float(drawdown.max()),
+            'target_win_rate': float(targets[index]),
+            'win_rate_diff': abs(win_rate - float(targets[index]))
+        }
+    return results
+
+
+def walk_forward_windows(timestamps: np.ndarray, train_days: float, test_days: float,
+                         step_days: Optional[float] = None) -> List[Dict]:
+    """Rolling (train, test) index ranges over sorted timestamps"""
+    if not len(timestamps):
+        return []
+    step = (step_days or test_days) * DAY
+    train, test = train_days * DAY, test_days * DAY
+
+    windows = []
+    start = timestamps[0]
+    while start + train < timestamps[-1]:
+        bounds = [start, start + train, start + train + test]
+        train_lo, train_hi, test_hi = np.searchsorted(timestamps, bounds, side='left')
+        if test_hi > train_hi:
+            windows.append({
+                'train': (int(train_lo), int(train_hi)), 'test': (int(train_hi), int(test_hi)),
+                'train_start': float(bounds[0]), 'test_start': float(bounds[1]), 'test_end': float(bounds[2])
+            })
+        start += step
+    return windows
+
+
+def _run_fold(job: Dict) -> List[Dict]:
+    """Optimize on one fold's training window and score its thresholds out of sample"""
+    columns, window, targets = job['columns'], job['window'], job['targets']
+    train = columns.subset(slice(*window['train']))
+    test = columns.subset(slice(*window['test']))
+    target_map = dict(zip(MILESTONES, targets))
+
+    optimizer = ThresholdOptimizer(train, target_map)
+    candidate, train_score, _ = optimizer.search(job['method'], job['iterations'], seed=job['seed'])
+    test_score = float(ThresholdOptimizer(test, target_map).score(candidate)[0])
+
+    thresholds = candidate_to_dict(candidate)
+    in_sample = milestone_metrics(train, candidate, targets)
+    out_of_sample = milestone_metrics(test, candidate, targets)
+    return [{
+        'fold': job['fold'],
+        'milestone': milestone,
+        'train_start': window['train_start'],
+        'test_start': window['test_start'],
+        'test_end': window['test_end'],
+        'train_signals': len(train),
+        'test_signals': len(test),
+        'train_score': float(train_score),
+        'test_score': test_score,
+        'min_confidence': thresholds[f"{milestone}_confidence"],
+        'min_confirmations': thresholds[f"{milestone}_confirmations"],
+        'train_win_rate': in_sample[milestone]['win_rate'],
+        'test_win_rate': out_of_sample[milestone]['win_rate'],
+        'target_win_rate': out_of_sample[milestone]['target_win_rate'],
+        'test_total_signals': out_of_sample[milestone]['total_signals'],
+        'test_total_pnl': out_of_sample[milestone]['total_pnl'],
+        'test_max_drawdown': out_of_sample[milestone]['max_drawdown']
+    } for milestone in MILESTONES]
+
+
+def _bootstrap_chunk(job: Dict) -> List[Dict]:
+    """Resample each milestone's trades with replacement and measure every resampled sequence"""
+    rng = np.random.default_rng(job['seed'])
+    rows = []
+    for milestone, (won, pnl) in job['trades'].items():
+        n = len(pnl)
+        if not n:
+            continue
+        picks = rng.integers(0, n, (job['count'], n))
+        paths = np.cumsum(pnl[picks], axis=1)
+        peaks = np.maximum.accumulate(np.maximum(paths, 0.0), axis=1)
+        win_rates = won[picks].mean(axis=1)
+        drawdowns = (peaks - paths).max(axis=1)
+        for offset in range(job['count']):
+            rows.append({
+                'resample': job['first'] + offset,
+                'milestone': milestone,
+                'win_rate': float(win_rates[offset]),
+                'total_pnl': float(paths[offset, -1]),
+                'max_drawdown': float(drawdowns[offset])
+            })
+    return rows
+
+
+def _map(fn: Callable, jobs: Sequence[Dict], workers: int) -> List:
+    """Run jobs in a spawned process pool, keeping job order (results don't depend on scheduling)"""
+    if workers <= 1 or len(jobs) <= 1:
+        return [fn(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(fn, jobs))
+
+
+def walk_forward(columns: SignalColumns, targets: Dict[str, float], train_days: float = 90,
+                 test_days: float = 30, step_days: Optional[float] = None, method: str = 'random',
+                 iterations: int = 1000, workers: int = 1, seed: int = 0) -> List[Dict]:
+    """
+    Re-optimize thresholds on rolling training windows and score them on the window that follows
+
+    Args:
+        columns: Signals sorted by timestamp
+        targets: Target win rate per milestone
+        train_days: Length of each training window
+        test_days: Length of each out-of-sample window
+        step_days: How far windows roll each fold (defaults to test_days)
+        method: Threshold search method ('random', 'grid' or 'cem')
+        iterations: Candidates evaluated per fold
+        workers: Processes used to run folds
+        seed: Base seed; each fold gets its own child seed
+
+    Returns:
+        One row per fold and milestone
+    """
+    windows = walk_forward_windows(columns.timestamp, train_days, test_days, step_days)
+    seeds = np.random.SeedSequence(seed).spawn(len(windows))
+    target_array = np.array([targets[m] for m in MILESTONES])
+    jobs = [{'fold': fold, 'window': window, 'columns': columns, 'targets': target_array,
+             'method': method, 'iterations': iterations, 'seed': seeds[fold]}
+            for fold, window in enumerate(windows)]
+    return [row for rows in _map(_run_fold, jobs, workers) for row in rows]
+
+
+def monte_carlo(columns: SignalColumns, candidate: np.ndarray, resamples: int = 1000, workers: int = 1,
+                seed: int = 0, chunk_size: int = 100) -> List[Dict]:
+    """
+    Bootstrap each milestone's trade sequence under fixed thresholds
+
+    Drawdown here is absolute (peak minus running P&L), since the relative measure
+    used in-sample is undefined for resampled paths that never go positive.
+
+    Returns:
+        One row per resample and milestone
+    """
+    assignment = assign_milestones(columns, candidate)
+    trades = {milestone: (columns.won[assignment == index].astype(float), columns.pnl[assignment == index])
+              for index, milestone in enumerate(MILESTONES)}
+
+    starts = list(range(0, resamples, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    jobs = [{'first': first, 'count': min(chunk_size, resamples - first), 'trades': trades, 'seed': seeds[i]}
+            for i, first in enumerate(starts)]
+    return [row for rows in _map(_bootstrap_chunk, jobs, workers) for row in rows]
+
+
+def summarize_monte_carlo(rows: List[Dict], targets: Dict[str, float]) -> Dict[str, Dict]:
+    """5th/50th/95th percentiles per milestone and how often the win rate misses its target"""
+    summary = {}
+    for milestone in MILESTONES:
+        selected = [row for row in rows if row['milestone'] == milestone]
+        if not selected:
+            continue
+        win_rates = np.array([row['win_rate'] for row in selected])
+        drawdowns = np.array([row['max_drawdown'] for row in selected])
+        summary[milestone] = {
+            'resamples': len(selected),
+            'win_rate_p5': float(np.percentile(win_rates, 5)),
+            'win_rate_p50': float(np.percentile(win_rates, 50)),
+            'win_rate_p95': float(np.percentile(win_rates, 95)),
+            'max_drawdown_p50': float(np.percentile(drawdowns, 50)),
+            'max_drawdown_p95': float(np.percentile(drawdowns, 95)),
+            'prob_below_target': float((win_rates < targets[milestone]).mean())
+        }
+    return summary
+
+
+def write_rows(rows: List[Dict], path: str) -> str:
+    """
+    Write result rows to Parquet
+
+    Falls back to CSV beside the requested path when no Parquet engine
+    (pyarrow) is installed. Returns the path actually written.
+    """
+    frame = pd.DataFrame(rows)
+    try:
+        frame.to_parquet(path, index=False)
+        return path
+    except ImportError:
+        csv_path = os.path.splitext(path)[0] + '.csv'
+        print(f"pyarrow not installed, writing {csv_path} instead of Parquet")
+        frame.to_csv(csv_path, index=False)
+        return csv_path
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Socket.IO Fan-out Load Test
+Starts N Socket.IO servers sharing a message queue, attaches M simulated clients
+spread across them and checks that every client receives every signal:new
+emitted to its risk tier, whichever server emitted it.
+
+Usage:
+    python socketio_load_test.py --workers 4 --clients 2000 --signals 20
+    python socketio_load_test.py --message-queue redis://localhost:6379
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+import socketio
+from socketio import packet
+
+from journal.socketio_cluster import create_client_manager, create_presence_registry
+
+RISK_TIERS = ('low', 'medium', 'high')
+
+
+class SimulatedServer(socketio.Server):
+    """Socket.IO server whose clients are in-memory inboxes instead of Engine.IO sockets"""
+
+    def __init__(self, client_manager, inboxes: Dict[str, List[Any]], inboxes_lock: threading.Lock):
+        super().__init__(async_mode='threading', client_manager=client_manager)
+        self.inboxes = inboxes
+        self.inboxes_lock = inboxes_lock
+        self.manager_initialized = True
+        self.manager.initialize()
+
+    def connect_client(self, eio_sid: str) -> str:
+        return self.manager.connect(eio_sid, '/')
+
+    def _send_eio_packet(self, eio_sid, eio_pkt):
+        received_at = time.perf_counter()
+        event, data = packet.Packet(encoded_packet=eio_pkt.data).data
+        with self.inboxes_lock:
+            self.inboxes[eio_sid].append((event, data, received_at))
+
+    def _send_packet(self, eio_sid, pkt):
+        received_at = time.perf_counter()
+        event, data = pkt.data
+        with self.inboxes_lock:
+            self.inboxes[eio_sid].append((event, data, received_at))
+
+
+def run_load_test(workers: int = 4, clients: int = 1000, signals: int = 10,
+                  message_queue: Optional[str] = None, timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Run the fan-out load test
+
+    Args:
+        workers: Number of Socket.IO servers
+        clients: Number of simulated clients, spread round-robin across servers and tiers
+        signals: Number of signal:new emits, each from a randomly chosen server
+        message_queue: Message queue URL; defaults to a fresh in-process bus
+        timeout: Seconds to wait for every delivery
+
+    Returns:
+        Dictionary with delivery counts, missing/duplicate deliveries and latency figures
+    """
+    message_queue = message_queue or f"memory://loadtest-{uuid.uuid4().hex}"
+    inboxes: Dict[str, List[Any]] = defaultdict(list)
+    inboxes_lock = threading.Lock()
+
+    servers = []
+    registries = []
+    for _ in range(workers):
+        manager = create_client_manager(message_queue)
+        if manager is None:
+            raise RuntimeError(f"Message queue {message_queue} unavailable")
+        servers.append(SimulatedServer(manager, inboxes, inboxes_lock))
+        registries.append(create_presence_registry(message_queue))
+
+    client_tiers: Dict[str, str] = {}
+    for i in range(clients):
+        eio_sid = f"client-{i}"
+        tier = RISK_TIERS[i % len(RISK_TIERS)]
+        server = servers[i % workers]
+        sid = server.connect_client(eio_sid)
+        server.enter_room(sid, f"risk:{tier}")
+        registries[i % workers].add(sid, {'user_id': f"user-{i}", 'username': f"user-{i}", 'risk_tier': tier})
+        client_tiers[eio_sid] = tier
+
+    expected = defaultdict(set)
+    sent_at: Dict[str, float] = {}
+    for n in range(signals):
+        tier = RISK_TIERS[n % len(RISK_TIERS)]
+        signal_id = f"signal-{n}"
+        for eio_sid, client_tier in client_tiers.items():
+            if client_tier == tier:
+                expected[eio_sid].add(signal_id)
+        sent_at[signal_id] = time.perf_counter()
+        random.choice(servers).emit('signal:new', {'id': signal_id, 'risk_tier': tier}, room=f"risk:{tier}")
+
+    expected_total = sum(len(ids) for ids in expected.values())
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with inboxes_lock:
+            received_total = sum(len(inbox) for inbox in inboxes.values())
+        if received_total >= expected_total:
+            break
+        time.sleep(0.05)
+
+    missing = 0
+    duplicates = 0
+    latencies = []
+    with inboxes_lock:
+        for eio_sid in client_tiers:
+            received = [data['id'] for event, data, _ in inboxes[eio_sid] if event == 'signal:new']
+            missing += len(expected[eio_sid] - set(received))
+            duplicates += len(received) - len(set(received))
+            latencies.extend(received_at - sent_at[data['id']] for _, data, received_at in inboxes[eio_sid])
+
+    # Any registry sees the whole cluster
+    by_tier = registries[0].count_by_tier()
+    for registry in registries:
+        registry.stop()
+
+    latencies.sort()
+    return {
+        'workers': workers,
+        'clients': clients,
+        'signals': signals,
+        'expected_deliveries': expected_total,
+        'delivered': len(latencies),
+        'missing': missing,
+        'duplicates': duplicates,
+        'presence_by_tier': by_tier,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--signals', type=int, default=10)
+    parser.add_argument('--message-queue', default=None,
+                        help='Message queue URL (default: in-process bus)')
+    args = parser.parse_args()
+
+    result = run_load_test(args.workers, args.clients, args.signals, args.message_queue)
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    if result['missing'] or result['duplicates']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
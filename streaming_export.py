@@ -0,0 +1,366 @@
+"""
+Streaming Export Engine
+Exports are read from the database a chunk at a time and encoded as they go,
+so memory stays flat however many rows are exported and the first bytes are
+sent as soon as the first chunk is read. Rows come out in a stable key order,
+which lets a client that lost its connection resume after the last record it
+received instead of starting over.
+
+Formats: 'ndjson', 'csv', 'parquet' (needs pyarrow) and 'json', a single
+streamed JSON document for clients of the old buffered endpoints.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from flask import Response, request, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', '6'))
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'json': 'application/json'
+}
+EXPORT_FORMATS = tuple(CONTENT_TYPES)
+
+Chunk = List[Dict[str, Any]]
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _dumps(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=_default, separators=(',', ':'))
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def sqlite_keyset_chunks(connect: Callable, sql: str, params: Sequence[Any], key: Sequence[str],
+                         descending: bool = False, after: Optional[Dict[str, Any]] = None,
+                         chunk_size: int = None) -> Iterator[Chunk]:
+    """
+    Read a SQLite query a chunk at a time in key order
+
+    Each chunk is a separate short query continuing after the last key seen, so
+    no read transaction stays open while a slow client downloads (which would
+    hold off writers on a rollback-journal database).
+
+    Args:
+        connect: Returns a connection; it is opened and closed per chunk
+        sql: SELECT whose WHERE clause the key condition is appended to
+            (use 'WHERE 1=1' for none)
+        key: Unique ordering columns, most significant first
+        after: Key values of the last row already exported, to resume after
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    direction = 'DESC' if descending else 'ASC'
+    compare = '<' if descending else '>'
+    order = ', '.join(f'{column} {direction}' for column in key)
+    last = [after[column] for column in key] if after else None
+
+    while True:
+        query, query_params = sql, list(params)
+        if last is not None:
+            query += ' AND ' + _keyset_condition(key, compare)
+            query_params += _keyset_params(last)
+        query += f' ORDER BY {order} LIMIT ?'
+        query_params.append(chunk_size)
+
+        conn = connect()
+        try:
+            cursor = conn.execute(query, query_params)
+            columns = [description[0] for description in cursor.description]
+            chunk = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = [chunk[-1][column] for column in key]
+
+
+def track_export(chunks: Iterable[Chunk], on_finish: Callable[[int, bool], None]) -> Iterator[Chunk]:
+    """Pass chunks through, then call on_finish(rows sent, completed) once the stream ends or is abandoned"""
+    count = 0
+    completed = False
+    try:
+        for chunk in chunks:
+            yield chunk
+            count += len(chunk)
+        completed = True
+    finally:
+        try:
+            on_finish(count, completed)
+        except Exception as e:
+            logger.error(f"Failed to record export of {count} rows: {e}")
+
+
+def _keyset_condition(key: Sequence[str], compare: str) -> str:
+    # (a, b) > (x, y) written out, for SQLite builds without row values
+    terms = []
+    for i, column in enumerate(key):
+        equal = [f'{previous} = ?' for previous in key[:i]]
+        terms.append('(' + ' AND '.join(equal + [f'{column} {compare} ?']) + ')')
+    return '(' + ' OR '.join(terms) + ')'
+
+
+def _keyset_params(last: Sequence[Any]) -> List[Any]:
+    params = []
+    for i in range(len(last)):
+        params += list(last[:i]) + [last[i]]
+    return params
+
+
+def encode_ndjson(chunks: Iterable[Chunk]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield ''.join(_dumps(row) + '\n' for row in chunk).encode()
+
+
+def encode_csv(chunks: Iterable[Chunk], columns: Sequence[str] = None,
+               header: Sequence[str] = None) -> Iterator[bytes]:
+    """CSV with one header row; nested values are written as JSON"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    started = False
+    for chunk in chunks:
+        if not started:
+            columns = list(columns or chunk[0].keys())
+            writer.writerow(header or columns)
+            started = True
+        for row in chunk:
+            writer.writerow([_csv_value(row.get(column)) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if not started and (columns or header):
+        writer.writerow(header or columns)
+        yield buffer.getvalue().encode()
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_json(chunks: Iterable[Chunk], envelope: Dict[str, Any] = None,
+                rows_key: str = 'export_data', count_key: str = 'total_records') -> Iterator[bytes]:
+    """One JSON object: envelope fields, the rows under rows_key, then the row count"""
+    head = _dumps(envelope or {})[:-1]
+    yield (head + (',' if envelope else '') + json.dumps(rows_key) + ':[').encode()
+    count = 0
+    for chunk in chunks:
+        parts = []
+        for row in chunk:
+            parts.append((',' if count else '') + _dumps(row))
+            count += 1
+        yield ''.join(parts).encode()
+    yield ('],' + json.dumps(count_key) + ':' + str(count) + '}').encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def encode_parquet(chunks: Iterable[Chunk], types: Dict[str, str] = None) -> Iterator[bytes]:
+    """
+    Parquet with one row group per chunk
+
+    The schema is fixed when the first chunk is written: declared types (pyarrow
+    aliases such as 'float64' or 'string') win, other columns are inferred from the
+    first chunk and columns that are all NULL there become strings. Values in later
+    chunks that do not fit are cast to the schema type instead of failing mid-stream.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    for chunk in chunks:
+        rows = [{key: _parquet_value(value) for key, value in row.items()} for row in chunk]
+        if writer is None:
+            schema = _parquet_schema(rows, types)
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+        try:
+            table = pa.Table.from_pylist(rows, schema=schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = pa.Table.from_pylist([_fit_row(row, schema) for row in rows], schema=schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def _parquet_schema(rows: Chunk, types: Optional[Dict[str, str]]):
+    import pyarrow as pa
+
+    types = types or {}
+    inferred = pa.Table.from_pylist(rows).schema
+    fields = []
+    for field in inferred:
+        if field.name in types:
+            field = pa.field(field.name, pa.type_for_alias(types[field.name]))
+        elif pa.types.is_null(field.type):
+            field = pa.field(field.name, pa.string())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def _fit_row(row: Dict[str, Any], schema) -> Dict[str, Any]:
+    """Cast a row's values to the schema types; values that cannot be cast are written as NULL"""
+    fitted = {}
+    for field in schema:
+        value = row.get(field.name)
+        try:
+            fitted[field.name] = _parquet_cast(value, field.type)
+        except (TypeError, ValueError):
+            logger.warning(f"Parquet export: {field.name}={value!r} does not fit {field.type}, writing NULL")
+            fitted[field.name] = None
+    return fitted
+
+
+def _parquet_cast(value, arrow_type):
+    import pyarrow as pa
+
+    if value is None:
+        return None
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return value if isinstance(value, str) else str(_csv_value(value))
+    if pa.types.is_boolean(arrow_type):
+        return value.lower() in ('1', 'true', 'yes') if isinstance(value, str) else bool(value)
+    if pa.types.is_integer(arrow_type):
+        if isinstance(value, int):
+            return value
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"{value!r} is not an integer")
+        return int(number)
+    if pa.types.is_floating(arrow_type):
+        return float(value)
+    return value
+
+
+def _parquet_value(value):
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def gzip_stream(parts: Iterable[bytes], level: int = None) -> Iterator[bytes]:
+    """Gzip a byte stream, flushing after every part so nothing waits on the compressor"""
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL if level is None else level, zlib.DEFLATED, 31)
+    for part in parts:
+        if part:
+            yield compressor.compress(part) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def encode(chunks: Iterable[Chunk], export_format: str, **options) -> Iterator[bytes]:
+    if export_format == 'ndjson':
+        return encode_ndjson(chunks)
+    if export_format == 'csv':
+        return encode_csv(chunks, options.get('columns'), options.get('header'))
+    if export_format == 'parquet':
+        return encode_parquet(chunks, options.get('types'))
+    if export_format == 'json':
+        return encode_json(chunks, options.get('envelope'))
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+
+def export_response(chunks: Iterable[Chunk], export_format: str, filename: str = None,
+                    compress: bool = None, key: Sequence[str] = None, **options) -> Response:
+    """
+    Streaming Flask response for an export
+
+    Args:
+        compress: gzip the body; by default when the client accepts gzip
+        key: Columns a client passes back as resume_after to continue an export
+        options: columns/header for CSV, types (column -> pyarrow type alias) for Parquet,
+            envelope for JSON
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format == 'parquet' and not parquet_available():
+        raise ValueError("Parquet export needs pyarrow, which is not installed")
+    if compress is None:
+        compress = 'gzip' in request.accept_encodings
+
+    body = encode(chunks, export_format, **options)
+    if compress:
+        body = gzip_stream(body)
+
+    response = Response(stream_with_context(body), mimetype=CONTENT_TYPES[export_format])
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    if key:
+        response.headers['X-Export-Resume-Key'] = ','.join(key)
+    # Keep proxies from buffering the whole export before sending it on
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
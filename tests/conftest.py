@@ -0,0 +1,28 @@
+"""
+Shared fixtures
+"""
+
+import pytest
+
+
+@pytest.fixture
+def app():
+    """In-memory journal app with the signal tables and a minimal users table"""
+    from flask import Flask
+    from sqlalchemy import Column, String, Table, Uuid
+
+    from journal.signal_models import Signal, UserSignal, db
+
+    # The users model lives with the journal app; signal queries only need these columns
+    if 'users' not in db.metadata.tables:
+        Table('users', db.metadata, Column('uuid', Uuid, primary_key=True), Column('risk_tier', String))
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[
+            db.metadata.tables['users'], Signal.__table__, UserSignal.__table__
+        ])
+        yield app
+        db.session.remove()
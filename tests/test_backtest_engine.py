@@ -0,0 +1,191 @@
+"""
+Tests for the vectorized OHLC backtest engine
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from backtest_engine import (
+    EXPIRED, LOST, NO_DATA, OPEN, WON, OHLCSeries, SignalBatch, load_ohlc_dir, load_signals_from_csv,
+    load_signals_from_db, run_backtest
+)
+from milestone_backtest import MilestoneBacktester
+
+
+def make_bars(highs, lows, opens=None, closes=None, step=60):
+    highs, lows = np.asarray(highs, dtype=float), np.asarray(lows, dtype=float)
+    mids = (highs + lows) / 2
+    return OHLCSeries(
+        np.arange(len(highs), dtype=np.int64) * step,
+        np.asarray(opens, dtype=float) if opens is not None else mids,
+        highs, lows,
+        np.asarray(closes, dtype=float) if closes is not None else mids
+    )
+
+
+def make_signals(rows):
+    """rows of (direction, entry, stop, target, timestamp)"""
+    n = len(rows)
+    return SignalBatch(
+        signal_id=np.array([f"s{i}" for i in range(n)], dtype=object),
+        pair=np.full(n, 'EURUSD', dtype=object),
+        direction=np.array([r[0] for r in rows], dtype=np.int8),
+        entry_price=np.array([r[1] for r in rows], dtype=float),
+        stop_loss=np.array([r[2] for r in rows], dtype=float),
+        take_profit=np.array([r[3] for r in rows], dtype=float),
+        timestamp=np.array([r[4] for r in rows], dtype=np.int64)
+    )
+
+
+class TestFirstCrossing:
+    """Test TP/SL ordering, MAE/MFE and exits"""
+
+    BARS = make_bars(
+        highs=[1.001, 1.002, 1.004, 1.006, 1.003],
+        lows=[0.999, 0.998, 0.997, 1.000, 0.990]
+    )
+
+    def test_long_and_short_outcomes(self):
+        signals = make_signals([
+            (1, 1.000, 0.995, 1.005, 0),    # target hit on bar 3
+            (-1, 1.000, 1.005, 0.9975, 0),  # short target hit on bar 2
+            (1, 1.000, 0.9975, 1.010, 60),  # stop hit on bar 2
+        ])
+
+        result = run_backtest(signals, {'EURUSD': self.BARS})
+
+        assert list(result.outcome) == ['won', 'won', 'lost']
+        assert list(result.bars_to_exit) == [4, 3, 2]
+        np.testing.assert_allclose(result.exit_price, [1.005, 0.9975, 0.9975])
+        np.testing.assert_allclose(result.r_multiple, [1.0, 0.5, -1.0])
+        # MAE/MFE only count bars up to and including the exit bar
+        np.testing.assert_allclose(result.mfe[:1], [0.006])
+        np.testing.assert_allclose(result.mae[:1], [0.003])
+        np.testing.assert_allclose(result.mae[2], 0.003)
+        np.testing.assert_array_equal(result.time_to_exit, [180, 120, 60])
+
+    def test_same_bar_hit_counts_stop_first_by_default(self):
+        bars = make_bars(highs=[1.010], lows=[0.990])
+        signals = make_signals([(1, 1.000, 0.995, 1.005, 0)])
+
+        assert run_backtest(signals, {'EURUSD': bars}).outcome_code[0] == LOST
+        assert run_backtest(signals, {'EURUSD': bars}, same_bar_stop_first=False).outcome_code[0] == WON
+
+    def test_stop_gapped_through_fills_at_open(self):
+        bars = make_bars(highs=[1.001, 0.992], lows=[0.999, 0.990], opens=[1.0, 0.991])
+        result = run_backtest(make_signals([(1, 1.000, 0.995, 1.010, 0)]), {'EURUSD': bars})
+        assert result.outcome_code[0] == LOST
+        assert result.exit_price[0] == pytest.approx(0.991)
+
+    def test_expired_open_and_missing_data(self):
+        bars = make_bars(highs=[1.001] * 10, lows=[0.999] * 10, closes=[1.0005] * 10)
+        signals = make_signals([
+            (1, 1.000, 0.990, 1.010, 0),    # untouched for max_bars
+            (1, 1.000, 0.990, 1.010, 480),  # untouched until the data ends
+            (1, 1.000, 0.990, 1.010, 9999)  # after the last bar
+        ])
+
+        result = run_backtest(signals, {'EURUSD': bars}, max_bars=5)
+
+        assert list(result.outcome_code) == [EXPIRED, OPEN, NO_DATA]
+        assert list(result.bars_to_exit) == [5, 2, 0]
+        assert result.exit_price[0] == pytest.approx(1.0005)
+        assert result.pnl[2] == 0.0
+
+    def test_matches_bar_by_bar_loop_on_random_walk(self):
+        rng = np.random.default_rng(5)
+        n_bars, n = 3000, 400
+        close = 1.08 + np.cumsum(rng.normal(0, 0.0003, n_bars))
+        bars = make_bars(close + rng.uniform(0, 0.0003, n_bars), close - rng.uniform(0, 0.0003, n_bars))
+        starts = rng.integers(0, n_bars, n)
+        direction = rng.choice([1, -1], n)
+        entry = close[starts]
+        rows = [(d, e, e - d * 0.002, e + d * 0.003, s * 60) for d, e, s in zip(direction, entry, starts)]
+
+        result = run_backtest(make_signals(rows), {'EURUSD': bars}, max_bars=200)
+
+        for i, (d, e, stop, target, ts) in enumerate(rows):
+            start = int(ts // 60)
+            expected = (OPEN, n_bars - start)
+            for j in range(start, min(start + 200, n_bars)):
+                stop_hit = bars.low[j] <= stop if d > 0 else bars.high[j] >= stop
+                target_hit = bars.high[j] >= target if d > 0 else bars.low[j] <= target
+                if stop_hit or target_hit:
+                    expected = (LOST if stop_hit else WON, j - start + 1)
+                    break
+            else:
+                if start + 200 <= n_bars:
+                    expected = (EXPIRED, 200)
+            assert (result.outcome_code[i], result.bars_to_exit[i]) == expected, i
+
+    def test_equity_curve_is_in_exit_order(self):
+        signals = make_signals([
+            (1, 1.000, 0.995, 1.005, 0),
+            (1, 1.000, 0.9975, 1.010, 60),
+        ])
+        times, equity = run_backtest(signals, {'EURUSD': self.BARS}).equity_curve()
+        np.testing.assert_array_equal(times, [120, 180])
+        np.testing.assert_allclose(equity, [-1.0, 0.0], atol=1e-9)
+
+
+class TestLoaders:
+    """Test loading persisted signals and OHLC files"""
+
+    def test_signal_feed_table_and_csv(self, tmp_path):
+        db_path = str(tmp_path / 'signals.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE signal_feed (signal_id TEXT, pair TEXT, direction TEXT, entry_price TEXT,
+                        stop_loss TEXT, take_profit TEXT, confidence INTEGER, created_at TIMESTAMP)''')
+        conn.execute("INSERT INTO signal_feed VALUES ('a', 'EUR/USD', 'BUY', '1.1', '1.09', '1.12', 85, "
+                     "'2024-01-01 00:00:00')")
+        conn.commit()
+        conn.close()
+
+        batch = load_signals_from_db(db_path, 'signal_feed')
+        assert list(batch.pair) == ['EURUSD'] and batch.direction[0] == 1
+        assert batch.timestamp[0] == 1704067200 and batch.confidence[0] == 85
+
+        csv_path = tmp_path / 'signals.csv'
+        csv_path.write_text('signal_id,pair,direction,entry_price,stop_loss,take_profit,timestamp,secondary_count\n'
+                            'b,GBPUSD,SHORT,1.27,1.28,1.25,1704067200,3\n')
+        batch = load_signals_from_csv(str(csv_path))
+        assert batch.direction[0] == -1 and batch.secondary_count[0] == 3
+
+    def test_multi_target_take_profit_and_bad_rows(self):
+        base = {'pair': 'EURUSD', 'direction': 'BUY', 'entry_price': '1.1', 'stop_loss': '1.09',
+                'timestamp': '2024-01-01 00:00:00'}
+        batch = SignalBatch.from_rows([
+            {**base, 'signal_id': 'a', 'take_profit': '[1.12, 1.13]'},
+            {**base, 'signal_id': 'b', 'take_profit': 'open'},
+            {**base, 'signal_id': 'c', 'take_profit': '1.15'},
+            {**base, 'signal_id': 'd', 'take_profit': '1.15', 'direction': 'HOLD'}
+        ])
+        assert list(batch.signal_id) == ['a', 'c'] and batch.skipped == 2
+        np.testing.assert_allclose(batch.take_profit, [1.12, 1.15])
+        assert len(SignalBatch.from_rows([{**base, 'signal_id': 'e', 'take_profit': '[]'}])) == 0
+
+    def test_replay_feeds_milestone_backtester(self, tmp_path):
+        ohlc_dir = tmp_path / 'ohlc'
+        ohlc_dir.mkdir()
+        bars = self.write_bars(ohlc_dir)
+        csv_path = tmp_path / 'signals.csv'
+        csv_path.write_text('signal_id,pair,direction,entry_price,stop_loss,take_profit,timestamp,confidence\n'
+                            'a,EUR/USD,LONG,1.000,0.995,1.005,0,90\n'
+                            'b,EUR/USD,LONG,1.000,0.990,1.100,0,50\n')
+
+        signals, replay = MilestoneBacktester().replay_historical_signals(
+            load_signals_from_csv(str(csv_path)), str(ohlc_dir), max_bars=3)
+
+        assert len(load_ohlc_dir(str(ohlc_dir))['EURUSD']) == len(bars)
+        assert [(s.outcome, s.confidence_score) for s in signals] == [('won', 0.9), ('expired', 0.5)]
+        assert signals[0].pnl == pytest.approx(1.0)
+        assert replay.summary()['won'] == 1
+
+    @staticmethod
+    def write_bars(directory):
+        bars = make_bars(highs=[1.001, 1.002, 1.006, 1.001], lows=[0.999, 0.998, 1.000, 0.999])
+        np.savez(directory / 'EURUSD.npz', time=bars.time, open=bars.open, high=bars.high,
+                 low=bars.low, close=bars.close)
+        return bars
@@ -0,0 +1,220 @@
+"""
+Tests for the forex data service's rate limiting and bulk upstream fetches
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+os.environ.setdefault('CANDLE_STORE_DIR', tempfile.mkdtemp(prefix='candles-'))
+
+import rate_limiter
+import server
+from candle_store import CandleStore
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+
+
+class FakeClock:
+    """monotonic()/sleep() pair where sleeping just advances the clock"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeBinance:
+    """Stand-in for session.get against ticker/price; symbols in `invalid` fail like Binance does"""
+
+    def __init__(self, prices, invalid=(), delay=0.0):
+        self.prices = prices
+        self.invalid = set(invalid)
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, url, params=None, timeout=None):
+        self.calls.append(params)
+        time.sleep(self.delay)
+        symbols = json.loads(params['symbols']) if 'symbols' in params else [params['symbol']]
+        if self.invalid & set(symbols):
+            raise ValueError('400 Client Error: Invalid symbol')
+        if 'symbols' in params:
+            return FakeResponse([{'symbol': symbol, 'price': str(self.prices[symbol])} for symbol in symbols])
+        return FakeResponse({'symbol': symbols[0], 'price': str(self.prices[symbols[0]])})
+
+
+class FakeDownload:
+    """Stand-in for yf.download returning a group_by='ticker' frame of last closes"""
+
+    def __init__(self, closes, delay=0.0):
+        self.closes = closes
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, tickers, **kwargs):
+        self.calls.append(list(tickers))
+        time.sleep(self.delay)
+        frames = {ticker: pd.DataFrame({'Close': [self.closes[ticker] - 0.001, self.closes[ticker]]})
+                  for ticker in tickers if ticker in self.closes}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Unthrottled limiters and a fresh price cache around fake providers"""
+    monkeypatch.setattr(server, 'yfinance_limiter', TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(server, 'binance_limiter', TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(server, 'cache', ResponseCache())
+
+    def install(binance=None, download=None):
+        if binance is not None:
+            monkeypatch.setattr(server.session, 'get', binance)
+        if download is not None:
+            monkeypatch.setattr(server.yf, 'download', download)
+    return install
+
+
+class TestTokenBucket:
+    """Test refill and blocking against a fake clock"""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        clock = FakeClock()
+        monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+        monkeypatch.setattr(rate_limiter.time, 'sleep', clock.sleep)
+        return clock
+
+    def test_burst_then_blocks_until_refilled(self, clock):
+        bucket = TokenBucket(rate=2, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        assert clock.slept == []
+
+        bucket.acquire()
+        assert clock.slept == [pytest.approx(0.5)]
+
+    def test_refill_is_capped_at_capacity(self, clock):
+        bucket = TokenBucket(rate=2, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+
+        clock.now += 60
+        for _ in range(3):
+            bucket.acquire()
+        assert clock.slept == []
+        bucket.acquire(2)
+        assert clock.slept == [pytest.approx(1.0)]
+
+
+class TestBulkPrices:
+    """Test provider grouping, per-symbol fallback and bulk latency"""
+
+    def test_pairs_are_grouped_into_one_call_per_provider(self, upstream):
+        binance = FakeBinance({'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0})
+        download = FakeDownload({'EURUSD=X': 1.085, 'GBPUSD=X': 1.27})
+        upstream(binance, download)
+
+        prices = server.fetch_bulk_prices(['BTCUSDT', 'EUR/USD', 'ETHUSDT', 'GBP/USD'])
+
+        assert len(binance.calls) == 1
+        assert json.loads(binance.calls[0]['symbols']) == ['BTCUSDT', 'ETHUSDT']
+        assert download.calls == [['EURUSD=X', 'GBPUSD=X']]
+        assert prices['ETHUSDT'] == {'pair': 'ETHUSDT', 'price': 3200.0}
+        assert prices['GBP/USD'] == {'pair': 'GBP/USD', 'price': 1.27}
+        assert server.cache.get('price:EUR/USD') == {'pair': 'EUR/USD', 'price': 1.085}
+
+    def test_rejected_binance_batch_falls_back_per_symbol(self, upstream):
+        binance = FakeBinance({'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0}, invalid={'NOPEUSDT'})
+        upstream(binance)
+
+        prices = server.fetch_binance_prices_resilient(['BTCUSDT', 'NOPEUSDT', 'ETHUSDT'])
+
+        assert prices == {'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0}
+        assert ['symbols' in params for params in binance.calls] == [True, False, False, False]
+
+    def test_real_time_prices_fall_back_per_pair(self, upstream, monkeypatch):
+        upstream(FakeBinance({'BTCUSDT': 65000.0}), FakeDownload({'EURUSD=X': 1.085}))
+
+        class FakeTicker:
+            def __init__(self, ticker):
+                self.info = {'regularMarketPrice': 150.25} if ticker == 'USDJPY=X' else {}
+        monkeypatch.setattr(server.yf, 'Ticker', FakeTicker)
+
+        with server.app.test_request_context('/api/real-time-prices?pairs=BTCUSDT,EUR/USD,USD/JPY,USD/CHF'):
+            results = server.get_real_time_prices_bulk().get_json()
+
+        assert {pair: (result['price'], result['source']) for pair, result in results.items()} == {
+            'BTCUSDT': (65000.0, 'binance'), 'EUR/USD': (1.085, 'yfinance'),
+            'USD/JPY': (150.25, 'yfinance'), 'USD/CHF': (1.0, 'mock')
+        }
+
+    def test_bulk_latency_follows_the_slowest_call(self, upstream):
+        upstream(FakeBinance({'BTCUSDT': 65000.0}, delay=0.3), FakeDownload({'EURUSD=X': 1.085}, delay=0.3))
+
+        started = time.perf_counter()
+        prices = server.fetch_bulk_prices(['BTCUSDT', 'EUR/USD'])
+        elapsed = time.perf_counter() - started
+
+        assert set(prices) == {'BTCUSDT', 'EUR/USD'}
+        assert elapsed < 0.5
+
+    def test_per_symbol_fallback_runs_in_parallel(self, upstream):
+        symbols = [f'COIN{n}USDT' for n in range(4)]
+        upstream(FakeBinance({symbol: 1.0 for symbol in symbols}, invalid={'COIN0USDT'}, delay=0.2))
+
+        started = time.perf_counter()
+        prices = server.fetch_binance_prices_resilient(symbols)
+        elapsed = time.perf_counter() - started
+
+        # One failed batch plus four concurrent retries, not five calls back to back
+        assert set(prices) == set(symbols[1:])
+        assert elapsed < 0.7
+
+
+class TestPrefetchCandles:
+    """Test the multi-ticker candle refresh"""
+
+    def test_stale_pairs_share_one_download(self, upstream, monkeypatch, tmp_path):
+        calls = []
+
+        def download(tickers, **kwargs):
+            calls.append(list(tickers))
+            times = pd.date_range(end=pd.Timestamp.now(tz='UTC').floor('h'), periods=3, freq='h', name='Datetime')
+            bars = pd.DataFrame({'Open': 1.0, 'High': 1.1, 'Low': 0.9, 'Close': 1.0, 'Volume': 0.0}, index=times)
+            frames = {ticker: bars for ticker in tickers if ticker != 'USDCHF=X'}
+            return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+        monkeypatch.setattr(server, 'candle_store', CandleStore(str(tmp_path), refresh_seconds=60))
+        upstream(download=download)
+
+        server.prefetch_yfinance_candles(['EUR/USD', 'GBP/USD', 'USD/CHF'], '1h')
+        assert calls == [['EURUSD=X', 'GBPUSD=X', 'USDCHF=X']]
+        assert len(server.candle_store.range('EURUSD=X', '1h')) == 3
+
+        # Pairs the download covered are fresh; only the one it missed is asked for again
+        server.prefetch_yfinance_candles(['EUR/USD', 'GBP/USD', 'USD/CHF'], '1h')
+        assert calls[1:] == [['USDCHF=X']]
@@ -0,0 +1,102 @@
+"""
+Tests for the forex data service candle store
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+
+from candle_store import CandleStore
+
+
+def make_bars(start, count, close=1.0):
+    times = pd.date_range(start=start, periods=count, freq='h')
+    return pd.DataFrame({
+        'time': times, 'open': close, 'high': close + 0.1, 'low': close - 0.1,
+        'close': np.full(count, close), 'volume': 100.0
+    })
+
+
+class FakeUpstream:
+    """Records fetch windows and serves bars from a fixed history"""
+
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        bars = self.history
+        if start is not None:
+            bars = bars[bars['time'] >= start]
+        if end is not None:
+            bars = bars[bars['time'] <= end]
+        return bars
+
+
+class TestCandleStore:
+    """Test incremental fetching, slicing and persistence"""
+
+    def test_incremental_fetch_only_requests_new_bars(self, tmp_path):
+        store = CandleStore(str(tmp_path), refresh_seconds=0)
+        upstream = FakeUpstream(make_bars(datetime(2024, 1, 1), 48))
+
+        first = store.load('EURUSD=X', '1h', upstream, start=datetime(2024, 1, 1))
+        assert len(first) == 48
+
+        upstream.history = pd.concat([upstream.history, make_bars(datetime(2024, 1, 3), 5, close=2.0)])
+        second = store.load('EURUSD=X', '1h', upstream, start=datetime(2024, 1, 1))
+
+        assert len(second) == 53
+        assert upstream.calls[1] == (datetime(2024, 1, 2, 23), None)
+        assert second['close'].iloc[-1] == 2.0
+
+    def test_fresh_range_is_served_without_upstream_call(self, tmp_path):
+        store = CandleStore(str(tmp_path), refresh_seconds=3600)
+        upstream = FakeUpstream(make_bars(datetime(2024, 1, 1), 48))
+
+        store.load('BTCUSDT', '1h', upstream)
+        sliced = store.load('BTCUSDT', '1h', upstream,
+                            start='2024-01-01 10:00:00', end='2024-01-01 19:00:00')
+
+        assert len(upstream.calls) == 1
+        assert len(sliced) == 10
+        assert sliced['time'].iloc[0] == pd.Timestamp('2024-01-01 10:00:00')
+        assert len(store.range('BTCUSDT', '1h', limit=5)) == 5
+
+    def test_series_persist_across_instances(self, tmp_path):
+        CandleStore(str(tmp_path)).upsert('BTCUSDT', '1h', make_bars(datetime(2024, 1, 1), 10))
+
+        reopened = CandleStore(str(tmp_path))
+        first, last = reopened.bounds('BTCUSDT', '1h')
+        assert last - first == timedelta(hours=9).total_seconds()
+
+    def test_backfill_before_stored_bars_leaves_no_gap(self, tmp_path):
+        store = CandleStore(str(tmp_path), refresh_seconds=3600)
+        upstream = FakeUpstream(make_bars(datetime(2024, 1, 1), 265))
+
+        store.load('BTCUSDT', '1h', upstream, start=datetime(2024, 1, 10))
+        early = store.load('BTCUSDT', '1h', upstream, start=datetime(2024, 1, 1), end=datetime(2024, 1, 3))
+        assert len(early) == 49
+        # The backfill ran through to the first stored bar, not just to Jan 3
+        assert upstream.calls[1] == (datetime(2024, 1, 1), datetime(2024, 1, 10))
+
+        calls = len(upstream.calls)
+        full = store.load('BTCUSDT', '1h', upstream, start=datetime(2024, 1, 1), end=datetime(2024, 1, 12))
+        assert len(upstream.calls) == calls
+        assert len(full) == 265
+
+    def test_historical_range_past_the_stored_bars_is_fetched(self, tmp_path):
+        store = CandleStore(str(tmp_path), refresh_seconds=3600)
+        upstream = FakeUpstream(make_bars(datetime(2024, 1, 1), 265))
+
+        store.load('BTCUSDT', '1h', upstream, start=datetime(2024, 1, 1), end=datetime(2024, 1, 3))
+        full = store.load('BTCUSDT', '1h', upstream, start=datetime(2024, 1, 1), end=datetime(2024, 1, 12))
+
+        assert upstream.calls[1] == (datetime(2024, 1, 3), datetime(2024, 1, 12))
+        assert len(full) == 265
@@ -0,0 +1,116 @@
+"""
+Tests for the batched customer service audit writer
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'customer-service'))
+
+from audit_writer import AuditWriter, audit_timestamp
+from data_access import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'cs.db'))
+    conn = pool.connect()
+    conn.executescript('''
+        CREATE TABLE audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            action TEXT NOT NULL CHECK (action IN ('CREATE', 'UPDATE')),
+            user_id INTEGER, old_data TEXT, new_data TEXT, ip_address TEXT, user_agent TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP, details TEXT
+        );
+        CREATE TABLE user_audit_trail (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL, action TEXT NOT NULL, field_name TEXT, old_value TEXT, new_value TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP, ip_address TEXT, user_agent TEXT
+        );
+    ''')
+    conn.close()
+    yield pool
+    pool.close_idle()
+
+
+def action(record_id, name='UPDATE'):
+    return ('customers', record_id, name, record_id, None, None, None, None, None, audit_timestamp())
+
+
+def field_change(user_id):
+    return (user_id, 'FIELD_UPDATED', 'name', 'a', 'b', None, None, audit_timestamp())
+
+
+def count(pool, table):
+    conn = pool.connect()
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestAuditWriter:
+    """Test batching, shutdown, overflow and durability modes"""
+
+    def test_group_commit_batches_and_flushes(self, pool):
+        writer = AuditWriter(pool, batch_size=50, flush_interval_ms=20)
+        writer.start()
+        for n in range(120):
+            writer.write('audit_logs', action(n))
+            writer.write('user_audit_trail', field_change(n))
+
+        assert writer.flush()
+        assert count(pool, 'audit_logs') == 120 and count(pool, 'user_audit_trail') == 120
+        stats = writer.get_stats()
+        assert stats['written'] == 240 and stats['inline'] == 0
+        assert stats['batches'] < 240 and stats['max_batch'] <= 50
+        writer.stop()
+
+    def test_stop_writes_everything_queued(self, pool):
+        writer = AuditWriter(pool, batch_size=1000, flush_interval_ms=60000)
+        writer.start()
+        for n in range(10):
+            writer.write('audit_logs', action(n))
+        writer.stop()
+
+        assert count(pool, 'audit_logs') == 10
+        # After shutdown records are written inline instead of being lost
+        assert writer.write('audit_logs', action(10)) and count(pool, 'audit_logs') == 11
+
+    def test_sync_mode_writes_before_returning(self, pool):
+        writer = AuditWriter(pool, durability='sync')
+        writer.start()
+        assert writer.write('audit_logs', action(1))
+        assert count(pool, 'audit_logs') == 1 and writer.get_stats()['inline'] == 1
+
+    def test_overflow_policies(self, pool):
+        # A writer whose queue is never drained: fill it, then overflow
+        dropping = AuditWriter(pool, queue_size=2, overflow_policy='drop')
+        dropping.running = True
+        results = [dropping.write('audit_logs', action(n)) for n in range(3)]
+        assert results == [True, True, False] and dropping.get_stats()['dropped'] == 1
+
+        inline = AuditWriter(pool, queue_size=1, overflow_policy='block', block_timeout=0.01)
+        inline.running = True
+        assert inline.write('audit_logs', action(1)) and inline.write('audit_logs', action(2))
+        assert inline.get_stats()['inline'] == 1 and count(pool, 'audit_logs') == 1
+
+    def test_rejected_rows_do_not_lose_the_batch(self, pool):
+        writer = AuditWriter(pool, batch_size=10, flush_interval_ms=20)
+        writer.start()
+        for record in [action(1), action(2, name='NOT_ALLOWED'), action(3)]:
+            writer.write('audit_logs', record)
+        writer.stop()
+
+        assert count(pool, 'audit_logs') == 2
+        assert writer.get_stats()['failed'] == 1
+
+    def test_unknown_modes_are_rejected(self, pool):
+        with pytest.raises(ValueError):
+            AuditWriter(pool, durability='eventually')
+        with pytest.raises(ValueError):
+            AuditWriter(pool, overflow_policy='spill')
@@ -0,0 +1,110 @@
+"""
+Tests for the customer service SQLite connection pool
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'customer-service'))
+
+from data_access import ConnectionPool, is_busy_error
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'cs.db'))
+    conn = pool.connect()
+    conn.execute('CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)')
+    conn.commit()
+    conn.close()
+    yield pool
+    pool.close_idle()
+
+
+class TestConnectionPool:
+    """Test PRAGMAs, reuse and checkout isolation"""
+
+    def test_connections_are_tuned_and_reused(self, pool):
+        conn = pool.connect()
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA cache_size').fetchone()[0] == -65536
+        conn.close()
+
+        assert pool.connect() is conn
+        assert pool.get_stats()['opened'] == 1
+
+    def test_close_rolls_back_and_resets_row_factory(self, pool):
+        conn = pool.connect()
+        conn.row_factory = sqlite3.Row
+        conn.execute("INSERT INTO notes (body) VALUES ('draft')")
+        conn.close()
+
+        conn = pool.connect()
+        assert conn.row_factory is None
+        assert conn.execute('SELECT COUNT(*) FROM notes').fetchone() == (0,)
+
+    def test_nested_checkouts_and_threads_get_their_own_connections(self, pool):
+        outer = pool.connect()
+        inner = pool.connect()
+        assert inner is not outer
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(pool.connect()))
+        thread.start()
+        thread.join()
+        assert seen[0] not in (outer, inner)
+
+    def test_thread_per_request_reuses_connections(self, pool):
+        # Like app.run(): every request is served on a new thread
+        for n in range(20):
+            thread = threading.Thread(target=_write, args=(pool, f'request {n}'))
+            thread.start()
+            thread.join()
+
+        stats = pool.get_stats()
+        assert stats['opened'] == 1 and stats['reused'] == 20 and stats['idle'] == 1
+        conn = pool.connect()
+        assert conn.execute('SELECT COUNT(*) FROM notes').fetchone() == (20,)
+
+    def test_busy_writes_are_retried(self, pool):
+        # No sqlite-level wait, so only the pool's retries can get the write through
+        pool = ConnectionPool(pool.database_path, busy_timeout=0)
+        locked = threading.Event()
+
+        def hold_write_lock():
+            conn = sqlite3.connect(pool.database_path)
+            conn.execute("INSERT INTO notes (body) VALUES ('held')")
+            locked.set()
+            time.sleep(0.2)
+            conn.commit()
+            conn.close()
+
+        holder = threading.Thread(target=hold_write_lock)
+        holder.start()
+        locked.wait()
+
+        blocked = sqlite3.connect(pool.database_path, timeout=0)
+        with pytest.raises(sqlite3.OperationalError) as error:
+            blocked.execute("INSERT INTO notes (body) VALUES ('x')")
+        assert is_busy_error(error.value)
+        blocked.close()
+
+        _write(pool, 'retried')
+        holder.join()
+
+        conn = pool.connect()
+        assert sorted(row[0] for row in conn.execute('SELECT body FROM notes')) == ['held', 'retried']
+        assert pool.get_stats()['busy_retries'] >= 1
+
+
+def _write(pool, body):
+    conn = pool.connect()
+    conn.execute('INSERT INTO notes (body) VALUES (?)', (body,))
+    conn.commit()
+    conn.close()
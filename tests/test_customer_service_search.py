@@ -0,0 +1,114 @@
+"""
+Tests for the customer service full-text search
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'customer-service'))
+
+from customer_search import CustomerSearch, decode_cursor
+from data_access import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'cs.db'))
+    conn = pool.connect()
+    conn.execute('''
+        CREATE TABLE customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            unique_id TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT,
+            created_at TEXT
+        )
+    ''')
+    conn.executemany('INSERT INTO customers (unique_id, name, email, created_at) VALUES (?, ?, ?, ?)', [
+        ('CUST001', 'John Smith', 'john.smith@example.com', '2024-01-01 10:00:00'),
+        ('CUST002', 'Jane Doe', 'jane@example.com', '2024-01-02 10:00:00'),
+        ('CUST003', 'Bob Johnson', 'bob@work.org', '2024-01-03 10:00:00'),
+        ('CUST004', 'Alice Smithers', 'alice@example.com', '2024-01-04 10:00:00'),
+        ('CUST005', 'Jo March', 'jo@books.net', '2024-01-05 10:00:00')
+    ])
+    conn.commit()
+    conn.close()
+    yield pool
+    pool.close_idle()
+
+
+@pytest.fixture
+def search(pool):
+    search = CustomerSearch(count_ttl=60)
+    conn = pool.connect()
+    assert search.ensure_index(conn)
+    conn.close()
+    return search
+
+
+def ids(rows):
+    return [row['unique_id'] for row in rows]
+
+
+class TestCustomerSearch:
+    """Test index sync, matching, ranking, pagination and counts"""
+
+    def test_existing_rows_are_indexed_and_triggers_keep_in_sync(self, pool, search):
+        conn = pool.connect()
+        assert ids(search.search(conn, 'smith')[0]) == ['CUST004', 'CUST001']
+
+        conn.execute("INSERT INTO customers (unique_id, name, email, created_at) "
+                     "VALUES ('CUST006', 'Zed Smith', 'zed@example.com', '2024-01-06 10:00:00')")
+        conn.execute("UPDATE customers SET name = 'Alice Brown' WHERE unique_id = 'CUST004'")
+        conn.execute("DELETE FROM customers WHERE unique_id = 'CUST001'")
+        conn.commit()
+        assert ids(search.search(conn, 'smith')[0]) == ['CUST006']
+
+    def test_substring_and_short_prefix_matching(self, pool, search):
+        conn = pool.connect()
+        # Substring in the middle of a field, case-insensitive
+        assert ids(search.search(conn, 'OHNS')[0]) == ['CUST003']
+        assert ids(search.search(conn, '@example')[0]) == ['CUST004', 'CUST002', 'CUST001']
+        # Too short for a trigram: prefix match through the NOCASE indexes
+        assert ids(search.search(conn, 'jo')[0]) == ['CUST005', 'CUST001']
+        assert search.get_stats()['prefix_searches'] == 1
+
+    def test_fuzzy_matching_ranks_closest_first(self, pool, search):
+        conn = pool.connect()
+        assert search.search(conn, 'smiht')[0] == []
+        rows, _ = search.search(conn, 'smithh', order='rank', fuzzy=True)
+        assert set(ids(rows[:2])) == {'CUST001', 'CUST004'}
+
+    def test_keyset_pages_do_not_overlap(self, pool, search):
+        conn = pool.connect()
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = search.search(conn, limit=2, cursor=cursor)
+            seen += ids(rows)
+            if cursor is None:
+                break
+        assert seen == ['CUST005', 'CUST004', 'CUST003', 'CUST002', 'CUST001']
+
+        ranked, cursor = search.search(conn, 'example', order='rank', limit=2)
+        rest, last = search.search(conn, 'example', order='rank', limit=2, cursor=cursor)
+        assert last is None and len(ranked) == 2 and len(rest) == 1
+        assert not set(ids(ranked)) & set(ids(rest))
+        assert len(decode_cursor(cursor)) == 2
+
+    def test_counts_are_cached(self, pool, search):
+        conn = pool.connect()
+        assert search.count(conn, 'example') == 3
+        conn.execute("DELETE FROM customers WHERE unique_id = 'CUST002'")
+        conn.commit()
+        assert search.count(conn, 'Example') == 3
+        search.clear_counts()
+        assert search.count(conn, 'example') == 2
+        stats = search.get_stats()
+        assert stats['count_hits'] == 1 and stats['count_misses'] == 2
+
+    def test_invalid_cursor_raises_value_error(self, pool, search):
+        with pytest.raises(ValueError):
+            search.search(pool.connect(), cursor='not-a-cursor')
@@ -0,0 +1,84 @@
+"""
+Tests for the online user index and write-behind delivery tracking
+"""
+
+import uuid
+
+from sqlalchemy import text
+
+from journal.delivery_tracker import DeliveryTracker
+from journal.signal_models import UserSignal, db
+
+
+class TestConnectionIndex:
+    """Test the user_id -> sids index"""
+
+    def test_user_stays_online_until_last_connection_closes(self):
+        tracker = DeliveryTracker()
+        tracker.add_connection('sid-1', 'user-1', 'medium')
+        tracker.add_connection('sid-2', 'user-1', 'medium')
+        tracker.add_connection('sid-3', 'user-2', 'high')
+
+        assert tracker.online_user_ids('medium') == {'user-1'}
+        assert tracker.connected_count('medium') == 2
+
+        tracker.remove_connection('sid-1')
+        assert tracker.is_online('user-1')
+
+        tracker.remove_connection('sid-2')
+        assert not tracker.is_online('user-1')
+        assert tracker.online_user_ids('medium') == set()
+        assert tracker.online_user_ids('high') == {'user-2'}
+
+    def test_unknown_sid_is_ignored(self):
+        tracker = DeliveryTracker()
+        tracker.remove_connection('missing')
+        assert tracker.get_stats()['connections'] == 0
+
+
+class TestWriteBehind:
+    """Test queued delivery persistence"""
+
+    def test_broadcast_creates_mappings_and_marks_online_users(self, app):
+        user_ids = [uuid.uuid4() for _ in range(4)]
+        for user_id in user_ids:
+            db.session.execute(text("INSERT INTO users (uuid, risk_tier) VALUES (:uuid, 'medium')"),
+                               {'uuid': user_id.hex})
+        db.session.commit()
+
+        tracker = DeliveryTracker()
+        tracker.running = True  # persist via flush() instead of the worker thread
+        tracker.set_app(app)
+        tracker.add_connection('sid-1', str(user_ids[0]), 'medium')
+        tracker.add_connection('sid-2', str(user_ids[1]), 'medium')
+
+        signal_id = uuid.uuid4()
+        tracker.record_broadcast(str(signal_id), 'medium')
+        assert UserSignal.query.count() == 0
+
+        tracker.flush()
+
+        mappings = {row.user_id: row.delivered for row in UserSignal.query.filter_by(signal_id=signal_id)}
+        assert len(mappings) == 4
+        assert {user_id for user_id, delivered in mappings.items() if delivered} == set(user_ids[:2])
+        assert tracker.stats['mappings_created'] == 4
+        assert tracker.stats['marked_delivered'] == 2
+
+    def test_repeated_broadcasts_are_idempotent(self, app):
+        user_id = uuid.uuid4()
+        db.session.execute(text("INSERT INTO users (uuid, risk_tier) VALUES (:uuid, 'high')"),
+                           {'uuid': user_id.hex})
+        db.session.commit()
+
+        tracker = DeliveryTracker()
+        tracker.running = True
+        tracker.set_app(app)
+        tracker.add_connection('sid-1', str(user_id), 'high')
+
+        signal_id = str(uuid.uuid4())
+        tracker.record_broadcast(signal_id, 'high')
+        tracker.record_broadcast(signal_id, 'high')
+        tracker.flush()
+
+        assert UserSignal.query.count() == 1
+        assert tracker.stats['marked_delivered'] == 1
@@ -0,0 +1,125 @@
+"""
+Tests for the shared technical indicator library
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+
+from indicators import (  # noqa: E402
+    ADXState, ATRState, BollingerState, EMAState, IndicatorState, MACDState, RSIState, SMAState,
+    adx, atr, bollinger_bands, ema, latest_indicators, macd, rsi, sma
+)
+
+
+def make_prices(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    return 1.08 + np.cumsum(rng.normal(0, 0.0005, n))
+
+
+def make_ohlc(n=400, seed=11):
+    closes = make_prices(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    return closes + rng.uniform(0, 0.0006, n), closes - rng.uniform(0, 0.0006, n), closes
+
+
+def stream(state, values):
+    return np.array([np.nan if v is None else v for v in (state.update(x) for x in values)], dtype=float)
+
+
+class TestVectorized:
+    """Test the full-series functions against direct definitions"""
+
+    def test_ema_is_sma_seeded_recursion(self):
+        prices = make_prices(60)
+        expected = prices[:12].mean()
+        for price in prices[12:]:
+            expected += 2 / 13 * (price - expected)
+        result = ema(prices, 12)
+        assert np.isnan(result[10]) and not np.isnan(result[11])
+        assert result[-1] == pytest.approx(expected)
+
+    def test_rsi_is_bounded_and_saturates_on_rises(self):
+        values = rsi(make_prices())
+        assert np.nanmin(values) >= 0 and np.nanmax(values) <= 100
+        assert rsi(np.arange(1.0, 40.0))[-1] == 100.0
+
+    def test_macd_signal_line_is_ema_of_macd_line(self):
+        prices = make_prices()
+        line, signal, histogram = macd(prices)
+        start = np.flatnonzero(~np.isnan(line))[0]
+        assert start == 25
+        np.testing.assert_allclose(signal[start:], ema(line[start:], 9), equal_nan=True)
+        np.testing.assert_allclose(histogram, line - signal, equal_nan=True)
+        # The old one-element EMA made the signal equal the MACD line itself
+        assert not np.allclose(signal[start + 9:], line[start + 9:])
+
+    def test_bollinger_uses_population_std(self):
+        prices = make_prices(30)
+        middle, upper, lower = bollinger_bands(prices, 20)
+        window = prices[-20:]
+        assert middle[-1] == pytest.approx(window.mean())
+        assert upper[-1] == pytest.approx(window.mean() + 2 * window.std())
+        assert lower[-1] == pytest.approx(window.mean() - 2 * window.std())
+
+    def test_adx_is_bounded(self):
+        values, plus_di, minus_di = adx(*make_ohlc())
+        assert np.isnan(values[26]) and not np.isnan(values[27])
+        assert np.nanmin(values) >= 0 and np.nanmax(values) <= 100
+        assert np.nanmin(plus_di) >= 0 and np.nanmin(minus_di) >= 0
+
+
+class TestStreamingMatchesVectorized:
+    """Test that each streaming state reproduces its full-series function tick by tick"""
+
+    def test_moving_averages_and_rsi(self):
+        prices = make_prices()
+        np.testing.assert_allclose(stream(SMAState(200), prices), sma(prices, 200), equal_nan=True)
+        np.testing.assert_allclose(stream(EMAState(26), prices), ema(prices, 26), equal_nan=True)
+        np.testing.assert_allclose(stream(RSIState(14), prices), rsi(prices, 14), equal_nan=True)
+
+    def test_macd_and_bollinger(self):
+        prices = make_prices()
+        macd_state, bands_state = MACDState(), BollingerState()
+        streamed_macd = np.array([[np.nan if v is None else v for v in macd_state.update(p)] for p in prices])
+        streamed_bands = np.array([[np.nan if v is None else v for v in bands_state.update(p)] for p in prices])
+
+        for column, expected in enumerate(macd(prices)):
+            np.testing.assert_allclose(streamed_macd[:, column], expected, equal_nan=True)
+        for column, expected in enumerate(bollinger_bands(prices)):
+            np.testing.assert_allclose(streamed_bands[:, column], expected, rtol=1e-9, equal_nan=True)
+
+    def test_atr_and_adx(self):
+        highs, lows, closes = make_ohlc()
+        atr_state, adx_state = ATRState(), ADXState()
+        streamed_atr = [atr_state.update(h, l, c) for h, l, c in zip(highs, lows, closes)]
+        streamed_adx = [adx_state.update(h, l, c) for h, l, c in zip(highs, lows, closes)]
+
+        np.testing.assert_allclose(np.array(streamed_atr, dtype=float), atr(highs, lows, closes), equal_nan=True)
+        np.testing.assert_allclose(np.array(streamed_adx, dtype=float), adx(highs, lows, closes)[0],
+                                   equal_nan=True)
+
+    def test_indicator_state_snapshot_matches_latest_indicators(self):
+        prices = make_prices(300)
+        state = IndicatorState()
+        for price in prices:
+            snapshot = state.update(price)
+
+        expected = latest_indicators(prices)
+        assert snapshot.keys() == expected.keys()
+        for key, value in expected.items():
+            assert snapshot[key] == pytest.approx(value, rel=1e-7), key
+
+    def test_short_history_falls_back_like_the_bots(self):
+        prices = make_prices(25)
+        state = IndicatorState()
+        for price in prices:
+            snapshot = state.update(price)
+
+        assert snapshot['sma_200'] == snapshot['sma_50'] == snapshot['sma_20']
+        assert snapshot['macd_signal'] == 0.0
+        assert snapshot == pytest.approx(latest_indicators(prices))
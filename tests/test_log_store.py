@@ -0,0 +1,171 @@
+"""
+Tests for the partitioned columnar log store and the log comparison tool that reads it
+"""
+
+import json
+import os
+
+import pytest
+
+from log_comparison_tool import LogComparisonTool
+from log_store import COLUMNS, NUMERIC_COLUMNS, PARTITION_COLUMNS, LogStore, _normalize, _structured_rows, \
+    parquet_available
+
+requires_pyarrow = pytest.mark.skipif(not parquet_available(), reason='the log store writes Parquet')
+
+
+def entry(n, day='2024-05-01', **fields):
+    return {'timestamp': f'{day}T10:00:{n % 60:02d}Z', 'type': 'request', 'request_id': f'req_{n}', **fields}
+
+
+def write_lines(path, entries, mode='a'):
+    with open(path, mode) as f:
+        for item in entries:
+            f.write((item if isinstance(item, str) else json.dumps(item)) + '\n')
+
+
+@pytest.fixture
+def logs(tmp_path):
+    directory = tmp_path / 'logs'
+    directory.mkdir()
+    return directory
+
+
+def test_normalized_chunks_have_one_type_per_column():
+    # Runs without pyarrow: the part schema relies on strings or None in every text column
+    frame = _normalize(_structured_rows([json.dumps(entry(1, status_code=200, name=7, message={'a': 1})),
+                                         json.dumps({'timestamp': None, 'type': 'error'})]),
+                       'frontend_app_structured.json', 'frontend', 'frontend_app')
+    for column in COLUMNS:
+        if column in NUMERIC_COLUMNS:
+            assert frame[column].dtype == float, column
+        elif column not in PARTITION_COLUMNS:
+            assert all(value is None or isinstance(value, str) for value in frame[column]), column
+    assert frame.loc[0, 'name'] == '7' and frame.loc[0, 'message'] == '{"a": 1}'
+    assert frame.loc[1, 'request_id'] is None and frame.loc[1, 'day'] == 'unknown'
+
+
+@requires_pyarrow
+class TestLogStore:
+    """Test partitioning, incremental ingestion, parallel chunks and queries"""
+
+    def test_partitions_by_service_and_day(self, logs, tmp_path):
+        path = str(logs / 'api_server_structured.json')
+        write_lines(path, [entry(1), entry(2, day='2024-05-02'), entry(3, service='database'),
+                           entry(4, error={'name': 'TypeError'}, value='12.5')])
+        store = LogStore(str(tmp_path / 'store'), workers=1)
+
+        assert store.ingest([(path, 'structured', 'backend')]) == 4
+        layout = {os.path.relpath(os.path.dirname(part), store.root_dir) for part in store.partitions()}
+        assert layout == {'service=api_server/day=2024-05-01', 'service=api_server/day=2024-05-02',
+                          'service=database/day=2024-05-01'}
+
+        rows = store.query(['request_id', 'error_name', 'value', 'service'], services=['api_server'],
+                           until='2024-05-01')
+        assert sorted(rows['request_id']) == ['req_1', 'req_4']
+        assert rows.set_index('request_id').loc['req_4', 'error_name'] == 'TypeError'
+        assert rows.set_index('request_id').loc['req_4', 'value'] == 12.5
+
+    def test_reruns_parse_only_appended_complete_lines(self, logs, tmp_path):
+        path = str(logs / 'api_server_structured.json')
+        write_lines(path, [entry(n) for n in range(5)])
+        store = LogStore(str(tmp_path / 'store'), workers=1)
+        assert store.ingest([(path, 'structured', 'backend')]) == 5
+
+        # A line still being written is left for the next run
+        write_lines(path, [entry(5)])
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry(6))[:10])
+        assert store.ingest([(path, 'structured', 'backend')]) == 1
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry(6))[10:] + '\n')
+
+        # Offsets survive a new store instance
+        store = LogStore(store.root_dir, workers=1)
+        assert store.ingest([(path, 'structured', 'backend')]) == 1
+        assert store.ingest([(path, 'structured', 'backend')]) == 0
+        assert sorted(store.query(['request_id'])['request_id']) == sorted(f'req_{n}' for n in range(7))
+
+    def test_rotated_file_is_read_from_the_start(self, logs, tmp_path):
+        path = str(logs / 'api_server_structured.json')
+        write_lines(path, [entry(n) for n in range(5)])
+        store = LogStore(str(tmp_path / 'store'), workers=1)
+        store.ingest([(path, 'structured', 'backend')])
+
+        os.rename(path, path + '.1')
+        write_lines(path, [entry(100)])
+        assert store.ingest([(path, 'structured', 'backend')]) == 1
+        assert store.count() == 6
+
+    def test_parallel_chunks_match_a_single_pass(self, logs, tmp_path):
+        path = str(logs / 'api_server_structured.json')
+        write_lines(path, [entry(n, day=f'2024-05-0{1 + n % 3}', execution_time_ms=n) for n in range(600)])
+
+        single = LogStore(str(tmp_path / 'single'), workers=1)
+        parallel = LogStore(str(tmp_path / 'parallel'), workers=2, chunk_bytes=4096)
+        single.ingest([(path, 'structured', 'backend')])
+        parallel.ingest([(path, 'structured', 'backend')])
+
+        assert parallel.get_stats()['chunks'] > 1
+        columns = ['request_id', 'execution_time_ms', 'day']
+        expected = single.query(columns).sort_values('request_id').reset_index(drop=True)
+        actual = parallel.query(columns).sort_values('request_id').reset_index(drop=True)
+        assert actual.equals(expected) and len(actual) == 600
+
+    def test_text_logs_and_filters(self, logs, tmp_path):
+        path = str(logs / 'backend_main.log')
+        write_lines(path, ['2024-05-01 10:00:00 | ERROR    | app    | handle    | 42    | ValueError raised',
+                           'free-form line', ''])
+        structured = str(logs / 'frontend_app_structured.json')
+        write_lines(structured, [entry(1, type='user_action'), entry(2, type='error')])
+        store = LogStore(str(tmp_path / 'store'), workers=1)
+        store.ingest([(path, 'text', 'backend'), (structured, 'structured', 'frontend')])
+
+        text = store.query(['level', 'logger', 'line', 'message'], log_type='backend')
+        assert sorted(text['level']) == ['ERROR', 'INFO']
+        parsed = text[text['level'] == 'ERROR'].iloc[0]
+        assert (parsed['logger'], parsed['line'], parsed['message']) == ('app', 42, 'ValueError raised')
+        assert store.count(log_type='frontend', types=['error']) == 1
+        assert store.query(['message'], sources=['missing.log']).empty
+
+        store.clear()
+        assert store.count() == 0 and store.ingest([(path, 'text', 'backend')]) == 2
+
+    def test_whole_store_reads_as_one_dataset(self, logs, tmp_path):
+        import pyarrow.dataset as ds
+
+        # Frontend entries carry no request_id, so that column is all-NULL in their parts
+        backend = str(logs / 'api_server_structured.json')
+        frontend = str(logs / 'frontend_app_structured.json')
+        write_lines(backend, [entry(1, status_code=200), entry(2, execution_time_ms=5)])
+        write_lines(frontend, [{'timestamp': '2024-05-02T10:00:00Z', 'type': 'user_action', 'action': 'login'}])
+        store = LogStore(str(tmp_path / 'store'), workers=1)
+        store.ingest([(backend, 'structured', 'backend'), (frontend, 'structured', 'frontend')])
+
+        table = ds.dataset(store.root_dir, format='parquet', partitioning='hive').to_table()
+        assert table.num_rows == 3
+        assert sorted(filter(None, table.column('request_id').to_pylist())) == ['req_1', 'req_2']
+        assert sorted(table.column('service').to_pylist()) == ['api_server', 'api_server', 'frontend_app']
+        assert str(table.schema.field('status_code').type) == 'double'
+
+
+@requires_pyarrow
+def test_comparison_tool_reads_from_the_store(logs, tmp_path):
+    write_lines(str(logs / 'backend_main.log'), [
+        '2024-05-01 10:00:00 | INFO     | api    | handle    | 1     | API REQUEST GET /api/signals | Status: 200 | Time: 0.5s',
+        '2024-05-01 10:00:01 | ERROR    | api    | handle    | 2     | TimeoutError talking to broker'
+    ])
+    write_lines(str(logs / 'frontend_user_actions.log'), [
+        '2024-05-01 10:00:02 | INFO     | ui     | click     | 3     | USER ACTION: login in Header | User: user_7'
+    ])
+    tool = LogComparisonTool(str(logs), store_dir=str(tmp_path / 'store'), workers=1)
+    tool.load_logs()
+    tool.compare_log_patterns()
+
+    results = tool.comparison_results
+    assert results['errors']['backend']['types'] == {'TimeoutError': 1}
+    assert results['api_calls']['backend']['endpoints'] == {'api/signals': 1}
+    assert results['api_calls']['backend']['status_codes'] == {200: 1}
+    assert results['performance']['backend']['response_times'] == [0.5]
+    assert results['user_activity']['frontend']['actions'] == {'login': 1}
+    assert results['user_activity']['frontend']['users'] == {'user_7': 1}
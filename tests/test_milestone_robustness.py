@@ -0,0 +1,97 @@
+"""
+Tests for walk-forward and Monte Carlo milestone robustness analysis
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from milestone_backtest import MilestoneBacktester, MilestoneThresholds
+from milestone_robustness import (
+    DAY, milestone_metrics, monte_carlo, walk_forward, walk_forward_windows, write_rows
+)
+from threshold_optimizer import MILESTONES, SignalColumns, thresholds_to_candidate
+
+
+@pytest.fixture(scope='module')
+def backtester():
+    return MilestoneBacktester()
+
+
+@pytest.fixture(scope='module')
+def signals(backtester):
+    random.seed(11)
+    np.random.seed(11)
+    return backtester.generate_mock_historical_data(1200)
+
+
+@pytest.fixture(scope='module')
+def columns(signals):
+    return SignalColumns.from_signals(signals)
+
+
+class TestWalkForward:
+    """Test fold windows and fold results"""
+
+    def test_windows_roll_over_timestamps(self):
+        timestamps = np.arange(0, 100 * DAY, DAY, dtype=float)
+        windows = walk_forward_windows(timestamps, train_days=30, test_days=10)
+
+        assert [w['train'] for w in windows[:2]] == [(0, 30), (10, 40)]
+        assert [w['test'] for w in windows[:2]] == [(30, 40), (40, 50)]
+        assert windows[-1]['test'] == (90, 100)
+
+    def test_metrics_match_calculate_milestone_performance(self, backtester, signals, columns):
+        thresholds = MilestoneThresholds()
+        targets = np.array([backtester.target_win_rates[m] for m in MILESTONES])
+        metrics = milestone_metrics(columns, thresholds_to_candidate(thresholds), targets)
+        expected = backtester.calculate_milestone_performance(signals, thresholds)
+
+        for milestone in MILESTONES:
+            for key in ['total_signals', 'win_rate', 'total_pnl', 'max_drawdown', 'win_rate_diff']:
+                assert metrics[milestone][key] == pytest.approx(expected[milestone][key]), (milestone, key)
+
+    def test_folds_are_deterministic_across_worker_counts(self, backtester, columns):
+        kwargs = dict(train_days=120, test_days=60, iterations=300, seed=5)
+        serial = walk_forward(columns, backtester.target_win_rates, workers=1, **kwargs)
+        parallel = walk_forward(columns, backtester.target_win_rates, workers=2, **kwargs)
+
+        assert serial == parallel
+        assert len(serial) == 4 * len(walk_forward_windows(columns.timestamp, 120, 60))
+        for row in serial:
+            assert row['test_start'] - row['train_start'] == 120 * DAY
+
+
+class TestMonteCarlo:
+    """Test bootstrap resampling"""
+
+    def test_resamples_are_deterministic_and_bounded(self, backtester, signals, columns):
+        candidate = thresholds_to_candidate(MilestoneThresholds())
+        serial = monte_carlo(columns, candidate, resamples=250, workers=1, seed=3, chunk_size=50)
+        parallel = monte_carlo(columns, candidate, resamples=250, workers=2, seed=3, chunk_size=50)
+        assert serial == parallel
+
+        frame = pd.DataFrame(serial)
+        assert sorted(frame['resample'].unique()) == list(range(250))
+        assert (frame['max_drawdown'] >= 0).all()
+
+        # Resampled win rates centre on the observed win rate
+        observed = backtester.calculate_milestone_performance(signals, MilestoneThresholds())
+        for milestone, group in frame.groupby('milestone'):
+            assert group['win_rate'].mean() == pytest.approx(observed[milestone]['win_rate'], abs=0.02)
+
+    def test_summary_reports_percentiles_per_milestone(self, backtester, signals):
+        _, summary = backtester.monte_carlo(signals, MilestoneThresholds(), resamples=200, seed=1)
+
+        for stats in summary.values():
+            assert stats['win_rate_p5'] <= stats['win_rate_p50'] <= stats['win_rate_p95']
+            assert 0.0 <= stats['prob_below_target'] <= 1.0
+
+    def test_write_rows_round_trips(self, tmp_path):
+        rows = [{'resample': 0, 'milestone': 'M1', 'win_rate': 0.9}]
+        path = write_rows(rows, str(tmp_path / 'mc.parquet'))
+
+        frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+        assert frame.to_dict('records') == rows
@@ -0,0 +1,118 @@
+"""
+Tests for the shared real-time price hub
+"""
+
+from journal.price_hub import PriceHub, to_yfinance_symbol
+
+
+class RecordingSocketIO:
+    """Stand-in Socket.IO app that records emits"""
+
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, room=None, ignore_queue=False):
+        # Updates go to this worker's sockets only; other workers' hubs serve their own
+        assert ignore_queue
+        self.emitted.append((event, data, room))
+
+
+class TestPriceHub:
+    """Test shared polling and delta fan-out"""
+
+    def test_one_upstream_call_per_poll_regardless_of_clients(self):
+        calls = []
+
+        def fetcher(tickers):
+            tickers = list(tickers)
+            calls.append(tickers)
+            return {ticker: 1.1 for ticker in tickers}
+
+        hub = PriceHub(poll_interval=1, fetcher=fetcher)
+        hub.set_socketio_app(RecordingSocketIO())
+        for sid in range(100):
+            hub.subscribe(f"sid-{sid}", 'EUR/USD')
+        hub.subscribe('sid-0', 'GBP/USD')
+
+        hub.poll_once()
+
+        assert len(calls) == 1
+        assert sorted(calls[0]) == ['EURUSD=X', 'GBPUSD=X']
+
+    def test_only_price_changes_are_emitted(self):
+        prices = {'EURUSD=X': 1.1}
+        hub = PriceHub(poll_interval=1, fetcher=lambda tickers: dict(prices))
+        socketio_app = RecordingSocketIO()
+        hub.set_socketio_app(socketio_app)
+        hub.subscribe('sid-1', 'EUR/USD')
+
+        hub.poll_once()
+        hub.poll_once()
+        prices['EURUSD=X'] = 1.2
+        hub.poll_once()
+
+        assert [room for _, _, room in socketio_app.emitted] == ['price:EUR/USD', 'price:EUR/USD']
+        assert round(socketio_app.emitted[-1][1]['change'], 6) == 0.1
+
+    def test_disconnect_drops_subscriptions(self):
+        hub = PriceHub(poll_interval=1, fetcher=lambda tickers: {})
+        hub.subscribe('sid-1', 'EUR/USD')
+        hub.subscribe('sid-1', 'US30')
+        hub.unsubscribe_all('sid-1')
+
+        assert hub.get_stats()['symbols'] == 0
+        assert to_yfinance_symbol('US30') == '^DJI'
+
+    def test_symbol_spellings_share_one_tick_and_fetch(self):
+        calls = []
+
+        def fetcher(tickers):
+            calls.append(sorted(tickers))
+            return {ticker: 1.1 for ticker in tickers}
+
+        hub = PriceHub(poll_interval=1, fetcher=fetcher)
+        socketio_app = RecordingSocketIO()
+        hub.set_socketio_app(socketio_app)
+        hub.subscribe('sid-1', 'EUR/USD')
+        hub.subscribe('sid-2', 'eurusd')
+
+        hub.poll_once()
+
+        assert calls == [['EURUSD=X']]
+        assert sorted((data['symbol'], room) for _, data, room in socketio_app.emitted) == [
+            ('EUR/USD', 'price:EUR/USD'), ('eurusd', 'price:eurusd')
+        ]
+        hub.record_tick('EURUSD', 1.2)
+        assert hub.get_latest('EUR/USD')['price'] == 1.2
+        assert hub.get_stats()['ticks'] == 1
+
+    def test_rest_ticks_are_capped_and_keep_subscribed_symbols(self):
+        hub = PriceHub(poll_interval=1, fetcher=lambda tickers: {}, max_ticks=3)
+        hub.subscribe('sid-1', 'EUR/USD')
+        hub.record_tick('EUR/USD', 1.1)
+        for n in range(10):
+            hub.record_tick(f"SYM{n}", float(n))
+
+        assert hub.get_stats()['ticks'] == 3
+        assert hub.get_stats()['evicted'] == 8
+        assert hub.get_latest('EURUSD') is not None
+        assert hub.get_latest('SYM9') is not None and hub.get_latest('SYM0') is None
+
+    def test_rest_price_reaches_subscribers_before_the_next_poll(self):
+        prices = {'EURUSD=X': 1.1}
+        hub = PriceHub(poll_interval=1, fetcher=lambda tickers: dict(prices))
+        socketio_app = RecordingSocketIO()
+        hub.set_socketio_app(socketio_app)
+        hub.subscribe('sid-1', 'EUR/USD')
+        hub.poll_once()
+
+        # A REST endpoint sees the move first; the poll that follows finds nothing new
+        assert round(hub.publish_tick('EURUSD', 1.2)['change'], 6) == 0.1
+        prices['EURUSD=X'] = 1.2
+        hub.poll_once()
+
+        assert [(data['symbol'], data['price'], room) for _, data, room in socketio_app.emitted] == [
+            ('EUR/USD', 1.1, 'price:EUR/USD'), ('EUR/USD', 1.2, 'price:EUR/USD')
+        ]
+        assert hub.publish_tick('GBPUSD', 1.3) is not None
+        assert len(socketio_app.emitted) == 2
@@ -0,0 +1,130 @@
+"""
+Tests for the in-memory price ring buffers and the write-behind SQLite writer
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+
+from forex_bot_system import ForexBotSystem, ForexPair  # noqa: E402
+from price_store import PriceHistory, PriceRingBuffer, SQLiteWriteBehind  # noqa: E402
+
+INSERT_PRICE = 'INSERT INTO prices (symbol, price, timestamp) VALUES (?, ?, ?)'
+
+
+def make_writer(tmp_path, **kwargs):
+    writer = SQLiteWriteBehind(str(tmp_path / 'prices.db'), **kwargs)
+    writer.executescript('CREATE TABLE prices (symbol TEXT, price REAL, timestamp TEXT);')
+    return writer
+
+
+class TestPriceRingBuffer:
+    """Test ring buffer ordering and wrap-around"""
+
+    def test_latest_is_chronological_after_wrap(self):
+        ring = PriceRingBuffer(5)
+        ring.extend(range(8))
+        assert len(ring) == 5
+        assert ring.last == 7
+        np.testing.assert_array_equal(ring.latest(), [3, 4, 5, 6, 7])
+        np.testing.assert_array_equal(ring.latest(2), [6, 7])
+
+    def test_partial_buffer(self):
+        ring = PriceRingBuffer(5)
+        assert ring.last is None
+        ring.extend([1.0, 2.0])
+        np.testing.assert_array_equal(ring.latest(10), [1.0, 2.0])
+
+
+class TestSQLiteWriteBehind:
+    """Test batching, ordering and read-your-writes"""
+
+    def test_writes_are_batched_and_visible_to_queries(self, tmp_path):
+        writer = make_writer(tmp_path, flush_interval=60)
+        for n in range(10):
+            writer.enqueue(INSERT_PRICE, ('EURUSD', 1.0 + n, f"2024-01-01T00:00:{n:02d}"))
+        assert writer.pending_count() == 10
+
+        rows = writer.query('SELECT price FROM prices ORDER BY timestamp')
+
+        assert [row[0] for row in rows] == [1.0 + n for n in range(10)]
+        assert writer.stats['batches'] == 1
+        writer.close()
+
+    def test_uses_wal_and_flushes_on_close(self, tmp_path):
+        writer = make_writer(tmp_path, flush_interval=60)
+        writer.enqueue(INSERT_PRICE, ('EURUSD', 1.1, '2024-01-01T00:00:00'))
+        writer.close()
+
+        conn = sqlite3.connect(str(tmp_path / 'prices.db'))
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('SELECT COUNT(*) FROM prices').fetchone()[0] == 1
+        conn.close()
+
+    def test_price_history_loads_once_then_serves_from_memory(self, tmp_path):
+        writer = make_writer(tmp_path, flush_interval=60)
+        for n in range(5):
+            writer.enqueue(INSERT_PRICE, ('EURUSD', float(n), f"2024-01-01T00:00:{n:02d}"))
+        history = PriceHistory(writer, 'prices', capacity=3)
+
+        assert history.latest('EURUSD', 3) == [2.0, 3.0, 4.0]
+        with mock.patch.object(writer, 'query', side_effect=AssertionError('hit the database')):
+            history.append('EURUSD', 5.0, INSERT_PRICE, ('EURUSD', 5.0, '2024-01-01T00:00:05'))
+            assert history.latest('EURUSD', 3) == [3.0, 4.0, 5.0]
+        assert history.latest('EURUSD', 10) == [float(n) for n in range(6)]
+        writer.close()
+
+
+class TestForexBotPriceHistory:
+    """Test that the bot's tick path stays in memory"""
+
+    def test_ticks_do_not_open_connections(self, tmp_path):
+        with mock.patch.object(ForexBotSystem, 'start_monitoring'):
+            bot = ForexBotSystem(str(tmp_path / 'forex_bot.db'))
+        base = datetime(2024, 1, 1)
+        rates = 1.08 + np.cumsum(np.random.default_rng(3).normal(0, 0.0005, 60))
+
+        with mock.patch('sqlite3.connect', side_effect=AssertionError('opened a connection')):
+            for n, rate in enumerate(rates):
+                bot.add_forex_pair(ForexPair('EUR/USD', 'EUR', 'USD', float(rate), 0, 0, 0, 0, 0,
+                                             base + timedelta(seconds=n)))
+                bot.analyze_pair('EUR/USD')
+
+        assert bot.get_price_history('EUR/USD', limit=100) == [float(rate) for rate in rates]
+        bot.db.flush()
+        assert bot.db.query('SELECT COUNT(*) FROM price_history')[0][0] == 60
+        assert bot.db.query("SELECT name FROM sqlite_master WHERE name = 'idx_price_history_symbol_timestamp'")
+        bot.db.close()
+
+    def test_concurrent_scans_share_one_indicator_state(self, tmp_path):
+        with mock.patch.object(ForexBotSystem, 'start_monitoring'):
+            bot = ForexBotSystem(str(tmp_path / 'forex_bot.db'))
+        base = datetime(2024, 1, 1)
+        states = []
+
+        def scan():
+            for _ in range(200):
+                bot.analyze_pair('EUR/USD')
+                states.append(bot.indicator_states.get('EUR/USD'))
+
+        scanners = [threading.Thread(target=scan) for _ in range(4)]
+        for thread in scanners:
+            thread.start()
+        for n in range(300):
+            bot.add_forex_pair(ForexPair('EUR/USD', 'EUR', 'USD', 1.08 + n * 1e-5, 0, 0, 0, 0, 0,
+                                         base + timedelta(seconds=n)))
+        for thread in scanners:
+            thread.join()
+
+        # Every price was applied exactly once, to the one state every scan saw
+        state = bot.indicator_states['EUR/USD']
+        assert {id(seen) for seen in states if seen is not None} <= {id(state)}
+        assert state.count == 300 and state.last_price == 1.08 + 299 * 1e-5
+        bot.db.close()
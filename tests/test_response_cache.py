@@ -0,0 +1,67 @@
+"""
+Tests for the forex data service response cache
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+
+from response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test LRU/TTL bounds and single-flight loading"""
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_eviction_by_bytes_and_ttl(self):
+        cache = ResponseCache(max_bytes=20)
+        cache.set('small', 'x' * 5)
+        cache.set('large', 'y' * 15)
+        assert cache.get('small') is None
+
+        cache.set('short', 1, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get('short') is None
+        assert cache.get_stats()['expirations'] == 1
+
+    def test_concurrent_misses_trigger_one_load(self):
+        cache = ResponseCache()
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(1)
+            return {'price': 1.1}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('EUR/USD', loader)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        while cache.get_stats()['coalesced'] < 7:
+            time.sleep(0.001)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [{'price': 1.1}] * 8
+
+    def test_none_results_are_not_cached(self):
+        cache = ResponseCache()
+        assert cache.get_or_load('missing', lambda: None) is None
+        assert len(cache) == 0
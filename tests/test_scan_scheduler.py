@@ -0,0 +1,123 @@
+"""
+Tests for the per-symbol scan scheduler
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+
+from scan_scheduler import ScanScheduler  # noqa: E402
+
+
+class ImmediateExecutor:
+    """Runs submitted scans inline so dispatch can be driven with a fake clock"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def make_scheduler(symbols, scan=lambda symbol: None, interval=1.0, **kwargs):
+    scheduler = ScanScheduler(scan, interval=interval, symbols=lambda: list(symbols), **kwargs)
+    scheduler._executor = ImmediateExecutor()
+    return scheduler
+
+
+class TestDispatch:
+    """Test due times, missed slots and error accounting with a fake clock"""
+
+    def test_each_symbol_runs_once_per_interval(self):
+        scanned = []
+        scheduler = make_scheduler(['EURUSD', 'GBPUSD'], scan=scanned.append)
+
+        assert scheduler.dispatch_due(now=100.0) == 2
+        assert scheduler.dispatch_due(now=100.5) == 0
+        assert scheduler.dispatch_due(now=101.0) == 2
+        assert scanned == ['EURUSD', 'GBPUSD', 'EURUSD', 'GBPUSD']
+
+    def test_missed_slots_are_skipped_and_cadence_does_not_drift(self):
+        scheduler = make_scheduler(['EURUSD'])
+        scheduler.dispatch_due(now=100.0)
+
+        # Dispatcher stalled for 3.5 intervals: one scan runs, the two fully missed slots are skipped
+        assert scheduler.dispatch_due(now=103.5) == 1
+        stats = scheduler.get_stats()
+        assert stats['scans_skipped'] == 2
+        assert stats['last_cycle_lag'] == pytest.approx(0.5)
+        assert scheduler._due[0] == (104.0, 'EURUSD')
+
+    def test_removed_symbols_stop_being_scanned(self):
+        symbols = ['EURUSD', 'GBPUSD']
+        scanned = []
+        scheduler = make_scheduler(symbols, scan=scanned.append)
+        scheduler.dispatch_due(now=0.0)
+        symbols.remove('GBPUSD')
+
+        scheduler.dispatch_due(now=1.0)
+
+        assert scanned == ['EURUSD', 'GBPUSD', 'EURUSD']
+        assert scheduler.get_stats()['symbols'] == 1
+
+    def test_scan_errors_are_counted(self):
+        def scan(symbol):
+            raise RuntimeError('boom')
+
+        scheduler = make_scheduler(['EURUSD'], scan=scan)
+        scheduler.dispatch_due(now=0.0)
+
+        stats = scheduler.get_stats()
+        assert stats['errors'] == 1
+        assert stats['in_flight'] == 0
+
+
+class TestWorkerPool:
+    """Test coalescing and parallelism on a real thread pool"""
+
+    def test_symbol_is_never_scanned_twice_at_once(self):
+        release = threading.Event()
+        concurrent, peak = [0], [0]
+        lock = threading.Lock()
+
+        def scan(symbol):
+            with lock:
+                concurrent[0] += 1
+                peak[0] = max(peak[0], concurrent[0])
+            release.wait(1)
+            with lock:
+                concurrent[0] -= 1
+
+        scheduler = ScanScheduler(scan, interval=0.02, symbols=lambda: ['EURUSD'], workers=4)
+        scheduler.start()
+        time.sleep(0.15)
+        release.set()
+        scheduler.stop()
+
+        stats = scheduler.get_stats()
+        assert peak[0] == 1
+        assert stats['scans_started'] == 1
+        assert stats['scans_skipped'] >= 3
+
+    def test_slow_symbols_scan_in_parallel(self):
+        symbols = [f"PAIR{n}" for n in range(8)]
+        done = []
+
+        def scan(symbol):
+            time.sleep(0.1)
+            done.append(symbol)
+
+        scheduler = ScanScheduler(scan, interval=10, symbols=lambda: symbols, workers=8)
+        scheduler.start()
+        time.sleep(0.25)
+        scheduler.stop()
+
+        assert sorted(done) == symbols
@@ -0,0 +1,96 @@
+"""
+Tests for the keyset-paginated user signal feed
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from journal.signal_models import Signal, UserSignal, db
+from journal.user_signals_api import _decode_cursor, _encode_cursor
+
+
+def add_signals(count, risk_tier='medium', created_at=None):
+    base = datetime(2024, 1, 1)
+    signals = []
+    for n in range(count):
+        signal = Signal.create_signal('EURUSD', 'buy', 1.1, 1.09, 1.12, risk_tier, {}, uuid.uuid4())
+        # Pairs of signals share a timestamp so the id tie-breaker is exercised
+        signal.created_at = created_at or base + timedelta(minutes=n // 2)
+        db.session.add(signal)
+        signals.append(signal)
+    db.session.commit()
+    return signals
+
+
+class TestCursor:
+    """Test opaque cursor round-trips"""
+
+    def test_round_trip(self):
+        created_at, signal_id = datetime(2024, 5, 1, 12, 30), uuid.uuid4()
+        assert _decode_cursor(_encode_cursor(created_at, signal_id)) == (created_at, signal_id)
+
+    def test_garbage_is_rejected(self):
+        with pytest.raises(ValueError):
+            _decode_cursor('not-a-cursor')
+
+
+class TestFeedPage:
+    """Test keyset pagination and the delivery-status join"""
+
+    def test_pages_cover_feed_without_gaps_or_repeats(self, app):
+        signals = add_signals(7)
+        add_signals(3, risk_tier='high')
+
+        seen, before = [], None
+        while True:
+            rows = Signal.get_feed_page('medium', 3, before=before)
+            if not rows:
+                break
+            seen.extend(signal.id for signal, _, _ in rows)
+            last = rows[-1][0]
+            before = (last.created_at, last.id)
+
+        expected = [s.id for s in sorted(signals, key=lambda s: (s.created_at, s.id), reverse=True)]
+        assert seen == expected
+
+    def test_delivery_status_comes_from_one_join(self, app):
+        signals = add_signals(3)
+        user_id = uuid.uuid4()
+        db.session.add(UserSignal(user_id=user_id, signal_id=signals[0].id, delivered=True,
+                                  delivered_at=datetime(2024, 1, 2)))
+        db.session.commit()
+
+        rows = Signal.get_feed_page('medium', 10, user_id=user_id)
+
+        delivered = {signal.id: (flag, at) for signal, flag, at in rows}
+        assert delivered[signals[0].id] == (True, datetime(2024, 1, 2))
+        assert delivered[signals[1].id] == (None, None)
+        assert len(rows) == 3
+
+    def test_feed_version_tracks_changes_from_the_cursor_on(self, app):
+        signals = add_signals(4)
+        user_id = uuid.uuid4()
+        newest_first = sorted(signals, key=lambda s: (s.created_at, s.id), reverse=True)
+        before = (newest_first[1].created_at, newest_first[1].id)
+
+        def version():
+            return Signal.get_feed_version('medium', before=before, user_id=user_id)
+
+        initial = version()
+        assert initial[0] == 2 and Signal.get_feed_version('high') == (0, None)
+
+        # Newer signals are not part of pages after the cursor
+        add_signals(1, created_at=datetime(2030, 1, 1))
+        assert version() == initial
+
+        db.session.add(UserSignal(user_id=user_id, signal_id=newest_first[3].id, delivered=True,
+                                  delivered_at=datetime(2024, 1, 3)))
+        db.session.commit()
+        delivered = version()
+        assert delivered != initial
+
+        newest_first[2].status = 'closed'
+        db.session.commit()
+        assert version()[0] == 1
@@ -0,0 +1,125 @@
+"""
+Tests for deduplicated signal feed ingestion
+"""
+
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from journal.extensions import db
+from journal.models import SignalFeed
+from journal.signal_ingest import RecentKeyCache, SignalIngestor, signal_ingestor
+from journal.signal_system import SignalGenerator, SignalSystem
+
+
+@pytest.fixture
+def app():
+    """In-memory app with the signal_feed table"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        SignalFeed.__table__.create(db.engine)
+        yield app
+        db.session.remove()
+    # The shared ingestor's cache would otherwise outlive the in-memory database
+    signal_ingestor.recent_keys.clear()
+
+
+def feed_row(unique_key, pair='EURUSD'):
+    return {
+        'unique_key': unique_key, 'signal_id': unique_key, 'pair': pair, 'direction': 'LONG',
+        'entry_price': '1.1', 'stop_loss': '1.09', 'take_profit': '1.12', 'confidence': 90,
+        'timestamp': datetime(2024, 1, 1)
+    }
+
+
+def feed_keys():
+    return sorted(row.unique_key for row in SignalFeed.query.all())
+
+
+class TestRecentKeyCache:
+    """Test the LRU pre-filter"""
+
+    def test_evicts_least_recently_used(self):
+        cache = RecentKeyCache(capacity=2)
+        cache.add_many(['a', 'b'])
+        assert 'a' in cache  # refreshes a
+        cache.add_many(['c'])
+
+        assert 'a' in cache and 'c' in cache
+        assert 'b' not in cache
+
+
+class TestSignalIngestor:
+    """Test one-statement dedup against the unique index"""
+
+    def test_batch_inserts_once_per_key(self, app):
+        ingestor = SignalIngestor()
+
+        inserted = ingestor.ingest([feed_row('a'), feed_row('b'), feed_row('a', pair='GBPUSD')])
+
+        assert [row['unique_key'] for row in inserted] == ['a', 'b']
+        assert feed_keys() == ['a', 'b']
+        assert SignalFeed.query.filter_by(unique_key='a').one().pair == 'EURUSD'
+        assert SignalFeed.query.filter_by(unique_key='a').one().status == 'active'
+
+    def test_cached_keys_skip_the_database(self, app):
+        ingestor = SignalIngestor()
+        ingestor.ingest([feed_row('a')])
+
+        assert ingestor.ingest([feed_row('a')]) == []
+        assert ingestor.stats['cache_hits'] == 1 and ingestor.stats['conflicts'] == 0
+
+    def test_deleted_rows_are_not_kept_out_by_the_cache(self, app):
+        ingestor = SignalIngestor()
+        ingestor.ingest([feed_row('a'), feed_row('b')])
+        # Rows deleted without going through the ingestor, e.g. by another process
+        SignalFeed.query.filter_by(unique_key='a').delete()
+        db.session.commit()
+
+        assert not ingestor.is_known('a') and ingestor.is_known('b')
+        ingestor.recent_keys.add_many(['a'])
+        inserted = ingestor.ingest([feed_row('a'), feed_row('b')])
+
+        assert [row['unique_key'] for row in inserted] == ['a']
+        assert ingestor.stats['stale_hits'] == 2 and ingestor.stats['cache_hits'] == 1
+        assert feed_keys() == ['a', 'b']
+
+    def test_uncommitted_ingest_rolls_back_with_the_caller(self, app):
+        ingestor = SignalIngestor()
+        assert [row['unique_key'] for row in ingestor.ingest([feed_row('a')], commit=False)] == ['a']
+        # The caller's own insert failed, so the feed row goes with it
+        db.session.rollback()
+
+        assert feed_keys() == [] and not ingestor.is_known('a')
+        assert [row['unique_key'] for row in ingestor.ingest([feed_row('a')])] == ['a']
+
+    def test_conflicts_are_resolved_by_the_index(self, app):
+        # A second process has its own cache; the unique index still rejects the duplicate
+        SignalIngestor().ingest([feed_row('a')])
+        other = SignalIngestor()
+
+        inserted = other.ingest([feed_row('a'), feed_row('b')])
+
+        assert [row['unique_key'] for row in inserted] == ['b']
+        assert other.stats['conflicts'] == 1
+        assert other.is_known('a')
+        assert feed_keys() == ['a', 'b']
+
+
+class TestSignalSystem:
+    """Test bot-generated signals go through the shared ingestion path"""
+
+    def test_store_signals_broadcasts_only_new_signals(self, app, monkeypatch):
+        system = SignalSystem()
+        broadcasts = []
+        monkeypatch.setattr(system, 'broadcast_signal', broadcasts.append)
+        signal = SignalGenerator().generate_forex_signal()
+
+        system.store_signals([signal, signal])
+        system.store_signal(signal)
+
+        assert broadcasts == [signal]
+        assert SignalFeed.query.count() == 1
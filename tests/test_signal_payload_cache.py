@@ -0,0 +1,104 @@
+"""
+Tests for the pre-serialized signal payload cache
+"""
+
+import json
+import pickle
+import uuid
+
+import pytest
+from socketio import packet
+
+from journal.signal_models import Signal, db
+from journal.signal_payload_cache import (
+    EncodedSignal, SignalPayloadCache, SocketIOJSON, encode_response, signal_payload_cache
+)
+
+
+@pytest.fixture
+def app(app):
+    yield app
+    signal_payload_cache.clear()
+
+
+class TestEncodedSignal:
+    """Test fragment reuse and splicing"""
+
+    def test_added_keys_are_appended_to_the_cached_bytes(self):
+        signal = EncodedSignal({'id': 'a', 'price': 1.5})
+        copy = signal.copy()
+        copy['seq'] = 3
+
+        assert signal.encode() == b'{"id":"a","price":1.5}'
+        assert json.loads(copy.encode()) == {'id': 'a', 'price': 1.5, 'seq': 3}
+        assert pickle.loads(pickle.dumps(copy)).encode() == copy.encode()
+
+    def test_changing_cached_keys_re_encodes(self):
+        signal = EncodedSignal({'id': 'a', 'status': 'active'})
+
+        reassigned = signal.copy()
+        reassigned['status'] = 'closed'
+        swapped = signal.copy()
+        del swapped['status']
+        swapped['seq'] = 1
+        updated = signal.copy()
+        updated.update(status='hit_tp', seq=2)
+        popped = signal.copy()
+        popped.pop('status')
+
+        assert json.loads(reassigned.encode()) == {'id': 'a', 'status': 'closed'}
+        assert json.loads(swapped.encode()) == {'id': 'a', 'seq': 1}
+        assert json.loads(updated.encode()) == {'id': 'a', 'status': 'hit_tp', 'seq': 2}
+        assert json.loads(popped.encode()) == {'id': 'a'}
+        assert signal.encode() == b'{"id":"a","status":"active"}'
+
+    def test_responses_and_socketio_packets_embed_fragments(self):
+        signals = [EncodedSignal({'id': n}) for n in range(3)]
+
+        body = encode_response({'success': True, 'signals': signals, 'count': 3})
+        assert json.loads(body) == {'success': True, 'signals': [{'id': 0}, {'id': 1}, {'id': 2}], 'count': 3}
+
+        packet.Packet.json = SocketIOJSON
+        try:
+            encoded = packet.Packet(packet.EVENT, data=['signal:new', signals[1]], namespace='/').encode()
+        finally:
+            packet.Packet.json = json
+        assert encoded == '2["signal:new",{"id":1}]'
+
+
+class TestSignalPayloadCache:
+    """Test versioned lookups, eviction and invalidation"""
+
+    def test_builds_once_per_version(self):
+        cache = SignalPayloadCache(max_entries=10)
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {'id': 'a', 'n': len(builds)}
+
+        first = cache.fragment('feed', 'a', 1, build)
+        assert cache.fragment('feed', 'a', 1, build) is first
+        assert json.loads(cache.fragment('feed', 'a', 2, build))['n'] == 2
+        assert cache.get_stats()['hits'] == 1 and len(builds) == 2
+
+    def test_evicts_least_recently_used(self):
+        cache = SignalPayloadCache(max_entries=2)
+        for signal_id in 'abc':
+            cache.fragment('feed', signal_id, 1, lambda: {'id': signal_id})
+        assert cache.get_stats()['entries'] == 2 and cache.get_stats()['evictions'] == 1
+
+    def test_model_status_change_invalidates(self, app):
+        signal = Signal.create_signal('EURUSD', 'buy', 1.1, 1.09, 1.12, 'medium', {}, uuid.uuid4())
+        db.session.add(signal)
+        db.session.commit()
+
+        cached = signal.to_cached_dict()
+        assert dict(cached) == signal.to_dict()
+        assert json.loads(cached.encode()) == json.loads(json.dumps(signal.to_dict()))
+
+        invalidations = signal_payload_cache.get_stats()['invalidations']
+        signal.status = 'archived'
+        assert signal_payload_cache.get_stats()['invalidations'] == invalidations + 1
+        db.session.commit()
+        assert signal.to_cached_dict()['status'] == 'archived'
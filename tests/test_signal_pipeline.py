@@ -0,0 +1,122 @@
+"""
+Tests for the staged signal pipeline
+"""
+
+import threading
+
+import pytest
+from flask import Flask
+
+from journal.extensions import db
+from journal.models import SignalFeed
+from journal.signal_ingest import signal_ingestor
+from journal.signal_pipeline import SignalPipeline
+from journal.signal_system import SignalGenerator, SignalSystem
+
+
+def make_pipeline(persist=None, fan_out=None, **kwargs):
+    delivered = []
+    pipeline = SignalPipeline(
+        validate=lambda n: None if n < 0 else n,
+        persist=persist or (lambda items: [n for n in items if n % 2 == 0]),
+        fan_out=fan_out or delivered.append,
+        **{'flush_interval': 0.01, **kwargs}
+    )
+    return pipeline, delivered
+
+
+class TestSignalPipeline:
+    """Test stage flow, backpressure, retries and shutdown"""
+
+    def test_stop_drains_every_stage(self):
+        batches = []
+        pipeline, delivered = make_pipeline(persist=lambda items: batches.append(list(items)) or items,
+                                            batch_size=4)
+        pipeline.start()
+        for n in [1, -1, 2, 3, 4, 5]:
+            assert pipeline.submit(n)
+        pipeline.stop()
+
+        assert delivered == [1, 2, 3, 4, 5]
+        assert all(len(batch) <= 4 for batch in batches)
+        stats = pipeline.get_stats()
+        assert stats['submitted'] == 6 and stats['dropped'] == 1 and stats['delivered'] == 5
+        assert stats['stages']['validate']['processed'] == 6
+        assert stats['stages']['persist']['processed'] == 5
+        assert stats['stages']['fan_out']['queue_depth'] == 0
+
+    def test_duplicates_are_not_fanned_out(self):
+        pipeline, delivered = make_pipeline()
+        pipeline.start()
+        for n in range(6):
+            pipeline.submit(n)
+        pipeline.stop()
+
+        assert delivered == [0, 2, 4]
+        assert pipeline.get_stats()['duplicates'] == 3
+
+    def test_full_queues_push_back_on_producers(self):
+        release = threading.Event()
+        pipeline, _ = make_pipeline(persist=lambda items: release.wait() and items, queue_size=1, batch_size=1)
+        pipeline.start()
+
+        # One item in persist, one waiting for persist, one in validate's queue
+        accepted = [pipeline.submit(n, timeout=0.2) for n in range(6)]
+        assert accepted[:2] == [True, True] and accepted[-1] is False
+        assert pipeline.get_stats()['rejected'] >= 1
+
+        release.set()
+        pipeline.stop()
+
+    def test_failed_writes_are_retried_without_losing_signals(self):
+        attempts = []
+
+        def flaky_persist(items):
+            attempts.append(list(items))
+            if len(attempts) == 1:
+                raise RuntimeError('database is locked')
+            return items
+
+        pipeline, delivered = make_pipeline(persist=flaky_persist, batch_size=10)
+        pipeline.start()
+        for n in range(3):
+            pipeline.submit(n)
+        pipeline.stop()
+
+        assert delivered == [0, 1, 2]
+        stats = pipeline.get_stats()
+        assert stats['retries'] == 1 and stats['failed'] == 0
+        assert stats['stages']['persist']['errors'] == 1
+
+
+@pytest.fixture
+def app():
+    """In-memory app with the signal_feed table"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        SignalFeed.__table__.create(db.engine)
+        yield app
+        db.session.remove()
+    signal_ingestor.recent_keys.clear()
+
+
+class TestSignalSystemPipeline:
+    """Test SignalSystem hands admin signals to the pipeline"""
+
+    def test_admin_signals_are_persisted_and_broadcast_off_thread(self, app, monkeypatch):
+        system = SignalSystem()
+        broadcasts = []
+        monkeypatch.setattr(system, 'broadcast_signal', broadcasts.append)
+        system.pipeline.flush_interval = 0.01
+        system.pipeline.set_app(app)
+        system.pipeline.start()
+
+        signals = [SignalGenerator().generate_forex_signal() for _ in range(3)]
+        results = [system.create_admin_signal(signal) for signal in signals + signals[:1]]
+        system.pipeline.stop()
+
+        assert all(result['success'] for result in results)
+        assert sorted(signal['id'] for signal in broadcasts) == sorted(signal['id'] for signal in signals)
+        assert SignalFeed.query.count() == 3
@@ -0,0 +1,55 @@
+"""
+Tests for missed-signal replay buffers
+"""
+
+from journal.signal_replay import SignalReplayBuffer, create_replay_buffer
+
+
+def fill(buffer, tier, count):
+    return [buffer.append(tier, {'id': f"{tier}-{n}"}) for n in range(count)]
+
+
+class TestSignalReplayBuffer:
+    """Test per-tier sequencing and gap replay"""
+
+    def test_sequences_are_consecutive_per_tier(self):
+        buffer = SignalReplayBuffer(capacity=10)
+        assert fill(buffer, 'low', 3) == [1, 2, 3]
+        assert fill(buffer, 'high', 2) == [1, 2]
+        assert buffer.latest_seq('low') == 3
+        assert buffer.latest_seq('medium') == 0
+
+    def test_replays_only_the_gap(self):
+        buffer = SignalReplayBuffer(capacity=10)
+        fill(buffer, 'medium', 5)
+
+        replay = buffer.since('medium', 3)
+
+        assert not replay.resync
+        assert replay.latest_seq == 5
+        assert [signal['seq'] for signal in replay.signals] == [4, 5]
+        assert [signal['id'] for signal in replay.signals] == ['medium-3', 'medium-4']
+
+    def test_up_to_date_client_gets_nothing(self):
+        buffer = SignalReplayBuffer(capacity=10)
+        fill(buffer, 'medium', 2)
+        assert buffer.since('medium', 2).to_dict() == {'signals': [], 'latest_seq': 2, 'resync': False}
+        assert buffer.since('low', 0).to_dict() == {'signals': [], 'latest_seq': 0, 'resync': False}
+
+    def test_gap_evicted_from_buffer_requires_resync(self):
+        buffer = SignalReplayBuffer(capacity=3)
+        fill(buffer, 'high', 6)
+
+        assert buffer.since('high', 2).resync
+        replay = buffer.since('high', 3)
+        assert not replay.resync
+        assert [signal['seq'] for signal in replay.signals] == [4, 5, 6]
+
+    def test_client_ahead_of_buffer_requires_resync(self):
+        buffer = SignalReplayBuffer(capacity=3)
+        fill(buffer, 'high', 2)
+        assert buffer.since('high', 7).resync
+
+    def test_memory_url_buffers_are_shared(self):
+        assert create_replay_buffer('memory://replay-test') is create_replay_buffer('memory://replay-test')
+        assert isinstance(create_replay_buffer(''), SignalReplayBuffer)
@@ -0,0 +1,78 @@
+"""
+Tests for Socket.IO message-queue fan-out and shared presence
+"""
+
+import uuid
+
+from journal.socketio_cluster import (
+    InProcessPresenceRegistry, PresenceRegistry, create_client_manager, create_presence_registry
+)
+from socketio_load_test import run_load_test
+
+
+class TestPresenceRegistry:
+    """Test connection presence bookkeeping"""
+
+    def test_user_counts_follow_connections(self):
+        registry = PresenceRegistry()
+        registry.add('sid-1', {'user_id': 'user-1', 'username': 'a', 'risk_tier': 'medium'})
+        registry.add('sid-2', {'user_id': 'user-1', 'username': 'a', 'risk_tier': 'medium'})
+        registry.add('sid-3', {'user_id': 'user-2', 'username': 'b', 'risk_tier': 'high'})
+
+        assert registry.count_by_tier() == {'medium': 2, 'high': 1}
+        assert registry.online_user_ids('medium') == {'user-1'}
+
+        registry.remove('sid-1')
+        assert registry.online_user_ids('medium') == {'user-1'}
+        registry.remove('sid-2')
+        assert registry.online_user_ids('medium') == set()
+        assert registry.count_by_tier() == {'high': 1}
+        assert registry.remove('sid-2') is None
+
+    def test_in_process_group_is_shared_between_workers(self):
+        group = f"test-{uuid.uuid4().hex}"
+        worker_a = InProcessPresenceRegistry(group)
+        worker_b = InProcessPresenceRegistry(group)
+        worker_a.add('sid-1', {'user_id': 'user-1', 'username': 'a', 'risk_tier': 'low'})
+        worker_b.add('sid-2', {'user_id': 'user-2', 'username': 'b', 'risk_tier': 'low'})
+
+        assert worker_a.online_user_ids('low') == {'user-1', 'user-2'}
+        assert worker_b.connection_count('low') == 2
+        assert {info['node'] for info in worker_a.connections()} == {worker_a.node_id, worker_b.node_id}
+
+        worker_b.stop()
+        assert worker_a.online_user_ids('low') == {'user-1'}
+
+    def test_factories_for_memory_and_local_urls(self):
+        assert create_client_manager('') is None
+        assert type(create_presence_registry('')) is PresenceRegistry
+        assert create_client_manager('memory://factory-test').name == 'inprocess'
+        assert isinstance(create_presence_registry('memory://factory-test'), InProcessPresenceRegistry)
+
+    def test_service_joins_the_cluster_on_first_use(self, monkeypatch):
+        from journal import socketio_service
+        sio = socketio_service.sio
+        for name, value in (('presence_registry', None), ('replay_buffer', None)):
+            monkeypatch.setattr(socketio_service, name, value)
+        monkeypatch.setattr(sio, 'manager', sio.manager)
+        monkeypatch.setattr(sio, 'manager_initialized', False)
+        monkeypatch.setenv('SOCKETIO_MESSAGE_QUEUE', f"memory://service-{uuid.uuid4().hex}")
+
+        sio.emit('system:message', {'message': 'hello'})
+
+        assert isinstance(socketio_service.presence_registry, InProcessPresenceRegistry)
+        assert sio.manager.name == 'inprocess'
+        socketio_service.presence_registry.stop()
+
+
+class TestFanOut:
+    """Load test: every client gets every signal:new for its tier, from any worker"""
+
+    def test_every_client_receives_each_signal_once(self):
+        result = run_load_test(workers=3, clients=300, signals=6, timeout=10)
+
+        assert result['expected_deliveries'] == 600
+        assert result['delivered'] == 600
+        assert result['missing'] == 0
+        assert result['duplicates'] == 0
+        assert result['presence_by_tier'] == {'low': 100, 'medium': 100, 'high': 100}
@@ -0,0 +1,115 @@
+"""
+Tests for single-pass dashboard stats and incremental trade stats
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from journal.extensions import db
+from journal.models import Trade, User, UserTradeStats
+from journal.stats_service import (
+    StatsCache, build_user_trade_stats, get_user_trade_stats, landing_trade_stats,
+    summarize_user_trade_stats, user_counts
+)
+
+NOW = datetime(2024, 6, 15, 12, 0)
+
+
+@pytest.fixture
+def app():
+    """In-memory app with the users, trades and user_trade_stats tables"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[User.__table__, Trade.__table__, UserTradeStats.__table__])
+        yield app
+        db.session.remove()
+
+
+def add_user(**kwargs):
+    user = User(first_name='A', last_name='B', email=f'{uuid.uuid4().hex}@x.io', password_hash='x', **kwargs)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def trade(user, **kwargs):
+    values = {'asset': 'EURUSD', 'direction': 'buy', 'entry_price': 1.0, 'exit_price': 1.2, 'sl': 0.9,
+              'outcome': 'win', 'strategy_tag': 'breakout', 'prop_firm': 'FTMO', **kwargs}
+    return Trade(user_id=user.id, **values)
+
+
+class TestStatsCache:
+    """Test TTL expiry and single computation per name"""
+
+    def test_reuses_until_expired(self):
+        cache = StatsCache(ttl=60)
+        calls = []
+        compute = lambda: calls.append(1) or {'n': len(calls)}
+
+        assert cache.get_or_compute('a', compute) == {'n': 1}
+        assert cache.get_or_compute('a', compute) == {'n': 1}
+        cache.clear()
+        assert cache.get_or_compute('a', compute) == {'n': 2}
+        assert cache.get_stats()['hits'] == 1
+
+
+class TestAggregates:
+    """Test the one-pass user and trade aggregates"""
+
+    def test_user_counts(self, app):
+        add_user(created_at=NOW - timedelta(hours=1), last_login=NOW - timedelta(hours=2))
+        add_user(created_at=NOW - timedelta(days=3), last_login=NOW - timedelta(days=2))
+        add_user(created_at=NOW - timedelta(days=60))
+
+        assert user_counts(NOW) == {'total': 3, 'active_24h': 1, 'new_today': 1, 'new_week': 2, 'new_month': 2}
+
+    def test_landing_trade_stats(self, app):
+        alice, bob = add_user(), add_user()
+        db.session.add_all([
+            trade(alice, outcome='Target Hit', pnl=100, closeTime=NOW - timedelta(days=1)),
+            trade(alice, outcome='Target Hit', pnl=50, closeTime=NOW - timedelta(days=2)),
+            trade(alice, outcome='Stop Loss', pnl=-20, closeTime=NOW - timedelta(days=3)),
+            trade(bob, outcome='Target Hit', pnl=70, closeTime=NOW - timedelta(days=90))
+        ])
+        db.session.commit()
+
+        assert landing_trade_stats(NOW) == {'total_trades': 3, 'winning_trades': 2, 'total_funded': 150.0,
+                                            'funded_accounts': 1, 'successful_traders': 2}
+
+
+class TestUserTradeStats:
+    """Test stats rows stay equal to a rebuild from the trades table"""
+
+    def assert_matches_rebuild(self, user):
+        stored = summarize_user_trade_stats(get_user_trade_stats(user.id))
+        rebuilt = build_user_trade_stats(user.id)
+        assert stored == summarize_user_trade_stats(rebuilt)
+        return stored
+
+    def test_added_changed_and_deleted_trades_update_stats(self, app):
+        user = add_user()
+        db.session.add(trade(user))
+        db.session.commit()
+        assert get_user_trade_stats(user.id).total_trades == 1
+
+        db.session.add_all([trade(user, asset='GBPUSD', exit_price=1.5, outcome='loss', prop_firm='MFF'),
+                            trade(user, strategy_tag='scalp', outcome='pending', exit_price=0)])
+        db.session.commit()
+        stats = self.assert_matches_rebuild(user)
+        assert stats['total_trades'] == 3 and stats['most_profitable_pair'] == 'GBPUSD'
+
+        pending = Trade.query.filter_by(outcome='pending').one()
+        pending.outcome, pending.exit_price, pending.prop_firm = 'win', 1.1, 'MFF'
+        db.session.commit()
+        stats = self.assert_matches_rebuild(user)
+        assert stats['win_rate'] == 66.67
+
+        db.session.delete(Trade.query.filter_by(asset='GBPUSD').one())
+        db.session.commit()
+        stats = self.assert_matches_rebuild(user)
+        assert stats['total_trades'] == 2 and stats['most_profitable_pair'] == 'EURUSD'
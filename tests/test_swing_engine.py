@@ -0,0 +1,44 @@
+"""
+Tests for the vectorized swing/structure engine used by the forex data service
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'forex_data_service'))
+
+from swing_engine import analyze_structure, find_swing_points
+from benchmark_swing_engine import legacy_swing_points, make_candles
+
+
+class TestSwingEngine:
+    """Test swing point detection and structure classification"""
+
+    def test_matches_legacy_loop(self):
+        """Vectorized detection returns the same swings as the original nested loop"""
+        for lookback in (3, 10, 50):
+            highs, lows = make_candles(2000, seed=lookback)
+            legacy_highs, legacy_lows = legacy_swing_points(highs, lows, lookback)
+            high_idx, low_idx = find_swing_points(highs, lows, lookback)
+            assert high_idx.tolist() == legacy_highs
+            assert low_idx.tolist() == legacy_lows
+
+    def test_short_series_has_no_swings(self):
+        """Series shorter than a full window yield no swing points"""
+        high_idx, low_idx = find_swing_points([1.0, 2.0, 1.0], [0.5, 0.4, 0.5], lookback=2)
+        assert len(high_idx) == 0
+        assert len(low_idx) == 0
+
+    def test_structure_classification_and_bos(self):
+        """Rising swings are classified HH/HL and a close above a swing high is a bullish BOS"""
+        closes = np.array([1, 2, 3, 2, 1.5, 2.5, 4, 3, 2.5, 3.5, 5, 4.5, 6], dtype=float)
+        structure = analyze_structure(closes + 0.1, closes - 0.1, closes, lookback=1)
+
+        assert structure.high_labels[1:] == ['HH', 'HH']
+        assert structure.low_labels[1:] == ['HL', 'HL']
+        assert structure.trend == 'bullish'
+        bullish = [b for b in structure.bos_levels if b['direction'] == 'bullish']
+        assert bullish[0]['swing_index'] == 2
+        assert bullish[0]['index'] == 6
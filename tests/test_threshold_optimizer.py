@@ -0,0 +1,86 @@
+"""
+Tests for the columnar milestone threshold optimizer
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from milestone_backtest import MilestoneBacktester, MilestoneThresholds
+from threshold_optimizer import (
+    MILESTONES, SignalColumns, ThresholdOptimizer, candidate_to_dict, random_candidates, thresholds_to_candidate
+)
+
+
+@pytest.fixture(scope='module')
+def backtester():
+    return MilestoneBacktester()
+
+
+@pytest.fixture(scope='module')
+def signals(backtester):
+    random.seed(3)
+    np.random.seed(3)
+    return backtester.generate_mock_historical_data(1500)
+
+
+def reference_score(backtester, signals, thresholds):
+    """The original objective, computed through calculate_milestone_performance"""
+    results = backtester.calculate_milestone_performance(signals, thresholds)
+    score = sum(results[m]['win_rate_diff'] for m in MILESTONES)
+    return score + sum(10 for m in ['M1', 'M2', 'M3'] if results[m]['total_signals'] == 0)
+
+
+class TestScoring:
+    """Test that columnar scoring reproduces the per-object computation"""
+
+    def test_scores_match_calculate_milestone_performance(self, backtester, signals):
+        candidates = random_candidates(150, np.random.default_rng(0))
+        optimizer = ThresholdOptimizer(SignalColumns.from_signals(signals), backtester.target_win_rates)
+
+        scores = optimizer.score(candidates)
+
+        for candidate, score in zip(candidates, scores):
+            thresholds = MilestoneThresholds(**candidate_to_dict(candidate))
+            if np.isinf(score):
+                assert candidate[0] <= candidate[2] or candidate[2] <= candidate[4]
+                continue
+            assert score == pytest.approx(reference_score(backtester, signals, thresholds))
+
+    def test_milestone_totals_partition_signals(self, backtester, signals):
+        optimizer = ThresholdOptimizer(SignalColumns.from_signals(signals), backtester.target_win_rates)
+        totals = optimizer.totals(thresholds_to_candidate(MilestoneThresholds()))[0]
+
+        results = backtester.calculate_milestone_performance(signals, MilestoneThresholds())
+        assert [int(round(count)) for count in totals[:, 0]] == [results[m]['total_signals'] for m in MILESTONES]
+        assert totals[:, 2].sum() == pytest.approx(sum(s.pnl for s in signals))
+
+    def test_parallel_scoring_matches_serial(self, backtester, signals):
+        columns = SignalColumns.from_signals(signals)
+        candidates = random_candidates(400, np.random.default_rng(1))
+
+        serial = ThresholdOptimizer(columns, backtester.target_win_rates).score(candidates)
+        with ThresholdOptimizer(columns, backtester.target_win_rates, workers=2, chunk_size=100) as optimizer:
+            parallel = optimizer.score(candidates)
+
+        np.testing.assert_allclose(parallel, serial)
+
+
+class TestSearch:
+    """Test the search methods end to end"""
+
+    @pytest.mark.parametrize('method', ['random', 'grid', 'cem'])
+    def test_search_returns_best_valid_thresholds(self, backtester, signals, method):
+        thresholds, results = backtester.optimize_thresholds(signals, iterations=2000, method=method, seed=0)
+
+        assert thresholds.M1_confidence > thresholds.M2_confidence > thresholds.M3_confidence
+        assert sum(results[m]['total_signals'] for m in MILESTONES) == len(signals)
+        optimizer = ThresholdOptimizer(SignalColumns.from_signals(signals), backtester.target_win_rates)
+        baseline = optimizer.score(random_candidates(100, np.random.default_rng(9)))
+        assert reference_score(backtester, signals, thresholds) <= baseline.min()
+
+    def test_unknown_method_is_rejected(self, backtester, signals):
+        optimizer = ThresholdOptimizer(SignalColumns.from_signals(signals), backtester.target_win_rates)
+        with pytest.raises(ValueError):
+            optimizer.search('anneal')
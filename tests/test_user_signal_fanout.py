@@ -0,0 +1,65 @@
+"""
+Tests for the set-based admin signal fan-out to user_signals
+"""
+
+import uuid
+
+from sqlalchemy import text
+
+from journal.signal_models import UserSignal, db
+
+
+def add_users(count, risk_tier):
+    user_ids = [uuid.uuid4() for _ in range(count)]
+    for user_id in user_ids:
+        db.session.execute(text("INSERT INTO users (uuid, risk_tier) VALUES (:uuid, :risk_tier)"),
+                           {'uuid': user_id.hex, 'risk_tier': risk_tier})
+    db.session.commit()
+    return user_ids
+
+
+def mapped_users(signal_id):
+    return {row.user_id for row in UserSignal.query.filter_by(signal_id=signal_id)}
+
+
+class TestBulkCreateForRiskTier:
+    """Test tier filtering, skipping existing pairs and the returned row count"""
+
+    def test_only_users_in_the_tier_get_mappings(self, app):
+        medium = add_users(3, 'medium')
+        add_users(2, 'high')
+        signal_id = uuid.uuid4()
+
+        # The tier is matched case-insensitively, like Signal.create_signal stores it
+        assert UserSignal.bulk_create_for_risk_tier(signal_id, 'MEDIUM') == 3
+        db.session.commit()
+
+        assert mapped_users(signal_id) == set(medium)
+        assert not any(row.delivered for row in UserSignal.query.all())
+        assert UserSignal.bulk_create_for_risk_tier(uuid.uuid4(), 'low') == 0
+
+    def test_existing_user_signal_pairs_are_skipped(self, app):
+        users = add_users(4, 'high')
+        signal_id = uuid.uuid4()
+        db.session.add(UserSignal(user_id=users[0], signal_id=signal_id, delivered=True))
+        # Another signal's mapping for the same user does not count as existing
+        db.session.add(UserSignal(user_id=users[1], signal_id=uuid.uuid4()))
+        db.session.commit()
+
+        assert UserSignal.bulk_create_for_risk_tier(str(signal_id), 'high') == 3
+        db.session.commit()
+        assert UserSignal.bulk_create_for_risk_tier(signal_id, 'high') == 0
+
+        assert mapped_users(signal_id) == set(users)
+        assert UserSignal.query.filter_by(signal_id=signal_id).count() == 4
+        assert UserSignal.query.filter_by(signal_id=signal_id, user_id=users[0]).one().delivered
+
+    def test_chunked_inserts_count_every_row_and_leave_the_commit_to_the_caller(self, app):
+        add_users(5, 'low')
+        signal_id = uuid.uuid4()
+
+        assert UserSignal.bulk_create_for_risk_tier(signal_id, 'low', chunk_size=2) == 5
+        assert UserSignal.query.filter_by(signal_id=signal_id).count() == 5
+
+        db.session.rollback()
+        assert UserSignal.query.filter_by(signal_id=signal_id).count() == 0
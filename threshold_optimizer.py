@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Fast Milestone Threshold Optimizer for TraderEdgePro
+Scores thousands of candidate milestone thresholds against columnar signal arrays.
+
+A milestone is a quadrant (confidence >= c and confirmations >= k) minus the
+milestones above it, so every per-milestone total follows by inclusion-exclusion
+from quadrant sums. Quadrant sums come from suffix cumulative sums over signals
+sorted once by confidence, giving O(log n) per candidate instead of a full pass.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+MILESTONES = ['M1', 'M2', 'M3', 'M4']
+
+# Candidate layout: one row per candidate
+C1, K1, C2, K2, C3, K3 = range(6)
+
+# Search ranges used by the original random search
+CONFIDENCE_BOUNDS = [(0.75, 0.95), (0.50, 0.75), (0.30, 0.55)]
+CONFIRMATION_BOUNDS = [(2, 5), (1, 4), (0, 3)]
+
+# Per-signal quantities summed per milestone
+STAT_COUNT, STAT_WINS, STAT_PNL, STAT_GROSS_PROFIT, STAT_GROSS_LOSS = range(5)
+
+EMPTY_MILESTONE_PENALTY = 10
+
+
+@dataclass
+class SignalColumns:
+    """Signals as parallel arrays, sorted by timestamp"""
+    confidence: np.ndarray
+    secondary_count: np.ndarray
+    won: np.ndarray
+    lost: np.ndarray
+    pnl: np.ndarray
+    timestamp: np.ndarray
+
+    @classmethod
+    def from_signals(cls, signals) -> 'SignalColumns':
+        """Build from SignalResult objects"""
+        order = sorted(range(len(signals)), key=lambda i: signals[i].timestamp)
+        ordered = [signals[i] for i in order]
+        return cls(
+            confidence=np.array([s.confidence_score for s in ordered], dtype=float),
+            secondary_count=np.array([s.secondary_count for s in ordered], dtype=int),
+            won=np.array([s.outcome == 'won' for s in ordered]),
+            lost=np.array([s.outcome == 'lost' for s in ordered]),
+            pnl=np.array([s.pnl for s in ordered], dtype=float),
+            timestamp=np.array([s.timestamp.timestamp() for s in ordered], dtype=float)
+        )
+
+    def __len__(self) -> int:
+        return len(self.confidence)
+
+    def subset(self, index) -> 'SignalColumns':
+        """Signals selected by a slice or index array, keeping timestamp order"""
+        return SignalColumns(**{name: values[index] for name, values in vars(self).items()})
+
+
+class QuadrantSums:
+    """Totals of signals with confidence >= c and secondary_count >= k, for many (c, k) at once"""
+
+    def __init__(self, columns: SignalColumns):
+        stats = np.column_stack([
+            np.ones(len(columns)),
+            columns.won,
+            columns.pnl,
+            np.where(columns.won, columns.pnl, 0.0),
+            np.where(columns.lost, columns.pnl, 0.0)
+        ])
+        self.levels = np.unique(columns.secondary_count)
+        self.confidence = []
+        self.suffix = []
+        for level in self.levels:
+            subset = columns.secondary_count >= level
+            order = np.argsort(columns.confidence[subset], kind='stable')
+            self.confidence.append(columns.confidence[subset][order])
+            suffix = np.cumsum(stats[subset][order][::-1], axis=0)[::-1]
+            self.suffix.append(np.vstack([suffix, np.zeros((1, stats.shape[1]))]))
+        self.n_stats = stats.shape[1]
+
+    def __call__(self, confidence: np.ndarray, confirmations: np.ndarray) -> np.ndarray:
+        """(len(confidence), n_stats) totals for each (confidence, confirmations) pair"""
+        out = np.zeros((len(confidence), self.n_stats))
+        # secondary_count >= k is the same set as >= the smallest level at or above k
+        level_index = np.searchsorted(self.levels, np.ceil(confirmations), side='left')
+        for j in np.unique(level_index):
+            if j >= len(self.levels):
+                continue
+            rows = level_index == j
+            position = np.searchsorted(self.confidence[j], confidence[rows], side='left')
+            out[rows] = self.suffix[j][position]
+        return out
+
+
+def milestone_totals(quadrants: QuadrantSums, candidates: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """(candidates, 4 milestones, n_stats) totals under each candidate's thresholds"""
+    c1, k1, c2, k2, c3, k3 = (candidates[:, i] for i in range(6))
+    q1 = quadrants(c1, k1)
+    q2 = quadrants(c2, k2)
+    q3 = quadrants(c3, k3)
+    q12 = quadrants(np.maximum(c1, c2), np.maximum(k1, k2))
+    q13 = quadrants(np.maximum(c1, c3), np.maximum(k1, k3))
+    q23 = quadrants(np.maximum(c2, c3), np.maximum(k2, k3))
+    q123 = quadrants(np.maximum(np.maximum(c1, c2), c3), np.maximum(np.maximum(k1, k2), k3))
+
+    m1 = q1
+    m2 = q2 - q12
+    m3 = q3 - q13 - q23 + q123
+    m4 = total - m1 - m2 - m3
+    return np.stack([m1, m2, m3, m4], axis=1)
+
+
+def score_totals(totals: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Same objective as the original search: summed |win rate - target| plus empty-milestone penalties"""
+    counts = totals[:, :, STAT_COUNT]
+    wins = totals[:, :, STAT_WINS]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(counts > 0, wins / counts, 0.0)
+    empty = np.round(counts[:, :3]) == 0
+    return np.abs(win_rate - targets).sum(axis=1) + EMPTY_MILESTONE_PENALTY * empty.sum(axis=1)
+
+
+def valid_candidates(candidates: np.ndarray) -> np.ndarray:
+    """Confidence thresholds must strictly decrease from M1 to M3"""
+    return (candidates[:, C1] > candidates[:, C2]) & (candidates[:, C2] > candidates[:, C3])
+
+
+def random_candidates(n: int, rng: np.random.Generator) -> np.ndarray:
+    candidates = np.empty((n, 6))
+    for level, ((c_low, c_high), (k_low, k_high)) in enumerate(zip(CONFIDENCE_BOUNDS, CONFIRMATION_BOUNDS)):
+        candidates[:, 2 * level] = rng.uniform(c_low, c_high, n)
+        candidates[:, 2 * level + 1] = rng.integers(k_low, k_high + 1, n)
+    return candidates
+
+
+def grid_candidates(n: int) -> np.ndarray:
+    """Evenly spaced confidence grid crossed with every confirmation combination"""
+    confirmation_combos = np.array(np.meshgrid(*[np.arange(low, high + 1) for low, high in CONFIRMATION_BOUNDS],
+                                               indexing='ij')).reshape(3, -1).T
+    steps = max(2, int(round((n / len(confirmation_combos)) ** (1 / 3))))
+    confidence_combos = np.array(np.meshgrid(*[np.linspace(low, high, steps) for low, high in CONFIDENCE_BOUNDS],
+                                             indexing='ij')).reshape(3, -1).T
+
+    candidates = np.empty((len(confidence_combos) * len(confirmation_combos), 6))
+    candidates[:, [C1, C2, C3]] = np.repeat(confidence_combos, len(confirmation_combos), axis=0)
+    candidates[:, [K1, K2, K3]] = np.tile(confirmation_combos, (len(confidence_combos), 1))
+    return candidates
+
+
+# Worker-process state, set once per process by _init_worker
+_worker_state: Dict = {}
+
+
+def _init_worker(columns: SignalColumns, targets: np.ndarray):
+    _worker_state['quadrants'] = QuadrantSums(columns)
+    _worker_state['total'] = _worker_state['quadrants'](np.array([-np.inf]), np.array([-np.inf]))[0]
+    _worker_state['targets'] = targets
+
+
+def _score_chunk(candidates: np.ndarray) -> np.ndarray:
+    totals = milestone_totals(_worker_state['quadrants'], candidates, _worker_state['total'])
+    return score_totals(totals, _worker_state['targets'])
+
+
+class ThresholdOptimizer:
+    """
+    Searches milestone thresholds over columnar signals
+
+    method='random' samples the original ranges, 'grid' walks an even grid, and
+    'cem' runs a cross-entropy search that adapts a per-parameter Gaussian to the
+    best candidates each generation (CMA-style, with diagonal covariance).
+    With workers > 1, candidate scoring is split across processes.
+    """
+
+    def __init__(self, columns: SignalColumns, target_win_rates: Dict[str, float], workers: int = 1,
+                 chunk_size: int = 20_000):
+        self.columns = columns
+        self.targets = np.array([target_win_rates[m] for m in MILESTONES])
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.quadrants = QuadrantSums(columns)
+        self.total = self.quadrants(np.array([-np.inf]), np.array([-np.inf]))[0]
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def totals(self, candidates: np.ndarray) -> np.ndarray:
+        return milestone_totals(self.quadrants, np.atleast_2d(candidates), self.total)
+
+    def score(self, candidates: np.ndarray) -> np.ndarray:
+        """Objective per candidate (lower is better); invalid orderings score inf"""
+        candidates = np.atleast_2d(candidates)
+        scores = np.full(len(candidates), np.inf)
+        valid = np.flatnonzero(valid_candidates(candidates))
+        if not len(valid):
+            return scores
+
+        chunks = [candidates[valid[i:i + self.chunk_size]] for i in range(0, len(valid), self.chunk_size)]
+        if self.workers > 1 and len(chunks) > 1:
+            if self._pool is None:
+                # Spawned, not forked: callers (bots, web workers) usually have threads running
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker,
+                                                 initargs=(self.columns, self.targets))
+            results = list(self._pool.map(_score_chunk, chunks))
+        else:
+            results = [score_totals(milestone_totals(self.quadrants, chunk, self.total), self.targets)
+                       for chunk in chunks]
+        scores[valid] = np.concatenate(results)
+        return scores
+
+    def search(self, method: str = 'random', iterations: int = 1000,
+               seed: Optional[int] = None) -> Tuple[np.ndarray, float, int]:
+        """
+        Run a search
+
+        Returns:
+            (best candidate row, its score, candidates evaluated)
+        """
+        rng = np.random.default_rng(seed)
+        if method == 'random':
+            candidates = random_candidates(iterations, rng)
+        elif method == 'grid':
+            candidates = grid_candidates(iterations)
+        elif method == 'cem':
+            return self._cross_entropy(iterations, rng)
+        else:
+            raise ValueError(f"Unknown search method: {method}")
+
+        scores = self.score(candidates)
+        best = int(np.argmin(scores))
+        return candidates[best], float(scores[best]), len(candidates)
+
+    def _cross_entropy(self, iterations: int, rng: np.random.Generator,
+                       population: int = 500, elite_fraction: float = 0.1) -> Tuple[np.ndarray, float, int]:
+        bounds = np.array([bound for pair in zip(CONFIDENCE_BOUNDS, CONFIRMATION_BOUNDS) for bound in pair],
+                          dtype=float)
+        integer = np.array([False, True] * 3)
+        mean = bounds.mean(axis=1)
+        std = (bounds[:, 1] - bounds[:, 0]) / 2
+        population = min(population, iterations)
+        n_elite = max(2, int(population * elite_fraction))
+
+        best, best_score, evaluated = None, np.inf, 0
+        while evaluated < iterations:
+            size = min(population, iterations - evaluated)
+            candidates = np.clip(rng.normal(mean, std, (size, 6)), bounds[:, 0], bounds[:, 1])
+            candidates[:, integer] = np.round(candidates[:, integer])
+            scores = self.score(candidates)
+            evaluated += size
+
+            order = np.argsort(scores)
+            if scores[order[0]] < best_score:
+                best, best_score = candidates[order[0]].copy(), float(scores[order[0]])
+            elite = candidates[order[:n_elite]][np.isfinite(scores[order[:n_elite]])]
+            if len(elite) >= 2:
+                # Smoothed update keeps the search from collapsing in one generation
+                mean = 0.7 * elite.mean(axis=0) + 0.3 * mean
+                std = np.maximum(0.7 * elite.std(axis=0) + 0.3 * std, 1e-3)
+
+        if best is None:
+            best = candidates[0]
+        return best, best_score, evaluated
+
+
+def candidate_to_dict(candidate: np.ndarray) -> Dict[str, float]:
+    """Keyword arguments for MilestoneThresholds"""
+    return {
+        'M1_confidence': float(candidate[C1]), 'M1_confirmations': int(candidate[K1]),
+        'M2_confidence': float(candidate[C2]), 'M2_confirmations': int(candidate[K2]),
+        'M3_confidence': float(candidate[C3]), 'M3_confirmations': int(candidate[K3]),
+        'M4_confidence': 0.0, 'M4_confirmations': 0
+    }
+
+
+def thresholds_to_candidate(thresholds) -> np.ndarray:
+    return np.array([thresholds.M1_confidence, thresholds.M1_confirmations,
+                     thresholds.M2_confidence, thresholds.M2_confirmations,
+                     thresholds.M3_confidence, thresholds.M3_confirmations], dtype=float)